@@ -16,15 +16,28 @@ import traceback
 import logging
 import asyncio
 import subprocess
+import contextlib
+import re
+import time
 from datetime import datetime
 from typing import Optional, List, Dict, Any, Union
 
 # FastAPI 相關導入
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel, Field
 
+from modules.tracing import (
+    enable_memory_tracing,
+    memory_tracing_enabled_by_env,
+    span,
+    start_trace,
+    trace_enabled_by_env,
+    write_trace_log,
+)
+from modules.metrics import CONTENT_TYPE, counter, gauge, histogram, record_cache, render_metrics
+
 # 設定日誌 - 遵循核心開發原則，輸出到 logs/ 目錄
 os.makedirs('logs', exist_ok=True)
 logging.basicConfig(
@@ -57,6 +70,11 @@ app.add_middleware(
 DEBUG_MODE = True
 API_VERSION = "2.0.0"
 
+# tracemalloc 是程序層級狀態: 由 F1_TRACE_MEMORY 在啟動時開啟一次，debug 請求只讀取配置量
+TRACE_MEMORY = memory_tracing_enabled_by_env()
+if TRACE_MEMORY:
+    enable_memory_tracing()
+
 # 支援的年份和選項
 RACE_OPTIONS = {
     2024: ["Bahrain", "Saudi Arabia", "Australia", "Japan", "China", "Miami", "Emilia Romagna", 
@@ -71,6 +89,12 @@ RACE_OPTIONS = {
 
 SESSION_TYPES = ["R", "Q", "FP1", "FP2", "FP3", "S"]
 
+# 服務指標 - 由 /metrics 以 Prometheus 文字格式輸出
+HTTP_IN_FLIGHT = gauge("f1_api_in_flight_requests", "HTTP requests currently being handled")
+ANALYSIS_REQUESTS = counter("f1_api_analysis_requests_total", "Analysis requests by function and outcome",
+                            ("function_id", "status"))
+ANALYSIS_LATENCY = histogram("f1_api_analysis_seconds", "Analysis request latency", ("function_id",))
+
 # Pydantic 模型
 class AnalysisRequest(BaseModel):
     """分析請求模型"""
@@ -81,6 +105,7 @@ class AnalysisRequest(BaseModel):
     driver1: Optional[str] = Field(None, description="車手1代碼 (單車手分析或雙車手比較用)")
     driver2: Optional[str] = Field(None, description="車手2代碼 (雙車手比較用)")
     corner_number: Optional[int] = Field(None, description="彎道編號 (彎道分析用)")
+    debug: bool = Field(False, description="附加各階段耗時與記憶體配置的追蹤樹 (trace)")
     
     class Config:
         schema_extra = {
@@ -221,7 +246,7 @@ async def root():
             "version": API_VERSION,
             "description": "F1 賽事數據分析 REST API - 完整功能版本",
             "debug_mode": DEBUG_MODE,
-            "endpoints": ["/analyze", "/health", "/modules", "/supported-functions", "/drivers"],
+            "endpoints": ["/analyze", "/health", "/metrics", "/modules", "/supported-functions", "/drivers"],
             "supported_modules": supported_modules,
             "total_modules": len(supported_modules),
             "supported_years": list(RACE_OPTIONS.keys()),
@@ -234,6 +259,25 @@ async def health_check():
     """健康檢查端點"""
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 指標端點"""
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+@app.middleware("http")
+async def track_in_flight_requests(request, call_next):
+    """記錄處理中的 HTTP 請求數"""
+    HTTP_IN_FLIGHT.inc()
+    try:
+        return await call_next(request)
+    finally:
+        HTTP_IN_FLIGHT.dec()
+
+def _function_label(function_id) -> str:
+    """功能編號指標標籤 - 非功能編號格式的輸入歸為 other，避免標籤數量無限增長"""
+    text = str(function_id).strip()
+    return text if re.fullmatch(r"\d{1,2}(\.\d{1,2})?", text) else "other"
+
 @app.get("/modules")
 async def get_modules():
     """獲取支援的模組列表"""
@@ -404,6 +448,165 @@ async def get_common_drivers():
 @app.post("/analyze", response_model=APIResponse)
 async def analyze_data(request: AnalysisRequest):
     """執行F1數據分析"""
+    function_label = _function_label(request.function_id)
+    status = "error"
+    start = time.perf_counter()
+    try:
+        response = await _analyze_data(request)
+        status = "success" if response.success else "failed"
+        if response.success and isinstance(response.data, dict):
+            record_cache("analysis_result", bool(response.data.get("cache_used")))
+        return response
+    except HTTPException:
+        status = "rejected"
+        raise
+    finally:
+        ANALYSIS_REQUESTS.inc(function_label, status)
+        ANALYSIS_LATENCY.observe(time.perf_counter() - start, function_label)
+
+def _run_loaded_analysis(request: AnalysisRequest, data_loader, start_time: float) -> dict:
+    """以已載入的數據執行分析功能，返回附加執行元數據的結果字典"""
+    from modules.function_mapper import F1AnalysisFunctionMapper
+    
+    # 創建功能映射器 - 根據核心開發原則
+    log_message("初始化功能映射器...", "INFO")
+    mapper = F1AnalysisFunctionMapper(
+        data_loader=data_loader,
+        dynamic_team_mapping=None,  # 將從數據載入器獲取
+        f1_analysis_instance=None,  # 將在映射器內部創建
+        driver=request.driver1,     # 主要車手
+        driver2=request.driver2     # 次要車手
+    )
+    
+    # 執行分析功能 - 遵循統一執行標準
+    log_message(f"執行功能: {request.function_id}", "INFO")
+    
+    # 設定執行參數 - 確保兼容性
+    execution_params = {
+        "function_id": request.function_id,
+        "driver1": request.driver1,
+        "driver2": request.driver2,
+        "corner_number": request.corner_number,
+        "year": request.year,
+        "race": request.race,
+        "session": request.session
+    }
+    
+    # 嘗試執行分析，如果失敗則嘗試不同參數組合
+    analysis_result = None
+    try:
+        # 首先嘗試完整參數
+        analysis_result = mapper.execute_function_by_number(
+            function_id=request.function_id,
+            driver1=request.driver1,
+            driver2=request.driver2,
+            corner_number=request.corner_number,
+            show_detailed_output=True,  # API 預設顯示詳細輸出
+            year=request.year,
+            race=request.race,
+            session=request.session
+        )
+    except TypeError as te:
+        log_message(f"參數錯誤，嘗試簡化參數: {te}", "WARNING")
+        # 如果有參數問題，嘗試簡化參數
+        try:
+            analysis_result = mapper.execute_function_by_number(
+                function_id=request.function_id,
+                driver1=request.driver1,
+                driver2=request.driver2,
+                corner_number=request.corner_number
+            )
+        except Exception as e2:
+            log_message(f"簡化參數也失敗: {e2}", "ERROR")
+            analysis_result = {
+                "success": False,
+                "message": f"功能執行失敗: 參數錯誤",
+                "error": f"TypeError: {te}, 簡化嘗試: {e2}"
+            }
+    except Exception as e:
+        log_message(f"執行異常: {e}", "ERROR")
+        analysis_result = {
+            "success": False,
+            "message": f"功能執行失敗",
+            "error": str(e)
+        }
+    
+    # 確保分析結果為字典格式
+    if not isinstance(analysis_result, dict):
+        log_message("分析結果格式異常，使用默認格式", "WARNING")
+        analysis_result = {
+            "success": False,
+            "message": "分析結果格式異常",
+            "error": f"返回結果類型: {type(analysis_result)}",
+            "function_id": str(request.function_id),
+            "raw_result": str(analysis_result)[:500]  # 截取前500字符作為調試信息
+        }
+    
+    # 計算執行時間
+    end_time = datetime.now().timestamp()
+    execution_time = round(end_time - start_time, 2)
+    
+    # 增強分析結果 - 添加執行元數據
+    analysis_result.update({
+        "execution_time": f"{execution_time}秒",
+        "function_id": str(request.function_id),
+        "parameters": {
+            "year": request.year,
+            "race": request.race,
+            "session": request.session,
+            "driver1": request.driver1,
+            "driver2": request.driver2,
+            "corner_number": request.corner_number
+        },
+        "api_version": API_VERSION,
+        "timestamp": datetime.now().isoformat(),
+        "cache_used": analysis_result.get("cache_used", False)
+    })
+    
+    # 嘗試載入 JSON 數據 - 增加數據豐富度
+    if analysis_result.get("success"):
+        try:
+            # 查找 json 目錄中的相關文件
+            json_dir = os.path.join(os.getcwd(), "json")
+            if os.path.exists(json_dir):
+                # 查找最新的相關 JSON 文件
+                json_files = []
+                for file in os.listdir(json_dir):
+                    if file.endswith('.json') and str(request.function_id) in file:
+                        json_path = os.path.join(json_dir, file)
+                        json_files.append(json_path)
+                
+                # 載入找到的 JSON 文件
+                if json_files:
+                    analysis_result["json_files"] = []
+                    for json_file in json_files[:3]:  # 最多3個文件，避免過大
+                        try:
+                            with open(json_file, 'r', encoding='utf-8') as f:
+                                json_data = json.load(f)
+                                analysis_result["json_files"].append({
+                                    "filename": os.path.basename(json_file),
+                                    "path": json_file,
+                                    "data": json_data
+                                })
+                                log_message(f"成功載入 JSON 文件: {os.path.basename(json_file)}", "SUCCESS")
+                        except Exception as e:
+                            log_message(f"載入 JSON 文件失敗 {json_file}: {e}", "WARNING")
+                else:
+                    log_message(f"未找到功能 {request.function_id} 的 JSON 文件", "WARNING")
+            else:
+                log_message("json 目錄不存在", "WARNING")
+        except Exception as e:
+            log_message(f"搜索 JSON 文件時發生錯誤: {e}", "WARNING")
+    
+    # 驗證分析結果
+    if not analysis_result.get("success"):
+        log_message(f"功能 {request.function_id} 執行失敗: {analysis_result.get('message', '未知錯誤')}", "ERROR")
+    else:
+        log_message(f"功能 {request.function_id} 執行成功", "SUCCESS")
+    
+    return analysis_result
+
+async def _analyze_data(request: AnalysisRequest):
     log_message(f"收到分析請求: 功能{request.function_id}, {request.year} {request.race} {request.session}", "INFO")
     
     try:
@@ -431,27 +634,37 @@ async def analyze_data(request: AnalysisRequest):
         # 使用統一的功能映射器 - 符合核心開發原則的參數化模式
         start_time = datetime.now().timestamp()
         
-        try:
-            # 初始化數據載入器
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            modules_dir = os.path.join(current_dir, 'modules')
-            if modules_dir not in sys.path:
-                sys.path.insert(0, modules_dir)
-            
-            # 動態導入核心模組
-            log_message("載入核心模組...", "INFO")
-            from modules.compatible_data_loader import CompatibleF1DataLoader
-            from modules.function_mapper import F1AnalysisFunctionMapper
-            
-            # 創建數據載入器並載入數據
-            data_loader = CompatibleF1DataLoader()
-            
-            log_message(f"載入數據: {request.year} {request.race} {request.session}", "INFO")
-            if not data_loader.load_race_data(request.year, request.race, request.session):
-                return APIResponse(
-                    success=False,
-                    message="數據載入失敗",
-                    data={
+        # 追蹤: debug=true 時將 span 樹附加在回應中；設定 F1_TRACE 時只寫入 logs/trace.log
+        # 記憶體配置只在啟動時以 F1_TRACE_MEMORY 開啟 tracemalloc 後記錄
+        trace = None
+        if request.debug or trace_enabled_by_env():
+            trace = start_trace("api.analyze", memory=TRACE_MEMORY and request.debug,
+                                function_id=str(request.function_id),
+                                year=request.year, race=request.race, session=request.session)
+        
+        with trace if trace is not None else contextlib.nullcontext():
+            try:
+                # 初始化數據載入器
+                current_dir = os.path.dirname(os.path.abspath(__file__))
+                modules_dir = os.path.join(current_dir, 'modules')
+                if modules_dir not in sys.path:
+                    sys.path.insert(0, modules_dir)
+                
+                # 動態導入核心模組
+                log_message("載入核心模組...", "INFO")
+                from modules.compatible_data_loader import CompatibleF1DataLoader
+                
+                # 創建數據載入器並載入數據
+                data_loader = CompatibleF1DataLoader()
+                
+                log_message(f"載入數據: {request.year} {request.race} {request.session}", "INFO")
+                with span("load", year=request.year, race=request.race, session=request.session):
+                    loaded = data_loader.load_race_data(request.year, request.race, request.session)
+                if not loaded:
+                    # 不直接返回，讓追蹤在下方統一寫入日誌並附加到回應
+                    analysis_result = {
+                        "success": False,
+                        "message": "數據載入失敗",
                         "error": f"無法載入 {request.year} {request.race} {request.session} 的數據",
                         "function_id": str(request.function_id),
                         "parameters": {
@@ -460,162 +673,32 @@ async def analyze_data(request: AnalysisRequest):
                             "session": request.session
                         }
                     }
-                )
-            
-            # 創建功能映射器 - 根據核心開發原則
-            log_message("初始化功能映射器...", "INFO")
-            mapper = F1AnalysisFunctionMapper(
-                data_loader=data_loader,
-                dynamic_team_mapping=None,  # 將從數據載入器獲取
-                f1_analysis_instance=None,  # 將在映射器內部創建
-                driver=request.driver1,     # 主要車手
-                driver2=request.driver2     # 次要車手
-            )
-            
-            # 執行分析功能 - 遵循統一執行標準
-            log_message(f"執行功能: {request.function_id}", "INFO")
-            
-            # 設定執行參數 - 確保兼容性
-            execution_params = {
-                "function_id": request.function_id,
-                "driver1": request.driver1,
-                "driver2": request.driver2,
-                "corner_number": request.corner_number,
-                "year": request.year,
-                "race": request.race,
-                "session": request.session
-            }
-            
-            # 嘗試執行分析，如果失敗則嘗試不同參數組合
-            analysis_result = None
-            try:
-                # 首先嘗試完整參數
-                analysis_result = mapper.execute_function_by_number(
-                    function_id=request.function_id,
-                    driver1=request.driver1,
-                    driver2=request.driver2,
-                    corner_number=request.corner_number,
-                    show_detailed_output=True,  # API 預設顯示詳細輸出
-                    year=request.year,
-                    race=request.race,
-                    session=request.session
-                )
-            except TypeError as te:
-                log_message(f"參數錯誤，嘗試簡化參數: {te}", "WARNING")
-                # 如果有參數問題，嘗試簡化參數
-                try:
-                    analysis_result = mapper.execute_function_by_number(
-                        function_id=request.function_id,
-                        driver1=request.driver1,
-                        driver2=request.driver2,
-                        corner_number=request.corner_number
-                    )
-                except Exception as e2:
-                    log_message(f"簡化參數也失敗: {e2}", "ERROR")
-                    analysis_result = {
-                        "success": False,
-                        "message": f"功能執行失敗: 參數錯誤",
-                        "error": f"TypeError: {te}, 簡化嘗試: {e2}"
-                    }
-            except Exception as e:
-                log_message(f"執行異常: {e}", "ERROR")
+                else:
+                    analysis_result = _run_loaded_analysis(request, data_loader, start_time)
+                
+            except ImportError as e:
+                log_message(f"模組載入失敗: {str(e)}", "ERROR")
                 analysis_result = {
                     "success": False,
-                    "message": f"功能執行失敗",
-                    "error": str(e)
+                    "message": "系統模組載入失敗",
+                    "error": str(e),
+                    "function_id": str(request.function_id),
+                    "traceback": traceback.format_exc() if DEBUG_MODE else None
                 }
-            
-            # 確保分析結果為字典格式
-            if not isinstance(analysis_result, dict):
-                log_message("分析結果格式異常，使用默認格式", "WARNING")
+            except Exception as e:
+                log_message(f"分析執行異常: {str(e)}", "ERROR")
                 analysis_result = {
                     "success": False,
-                    "message": "分析結果格式異常",
-                    "error": f"返回結果類型: {type(analysis_result)}",
+                    "message": "分析執行失敗",
+                    "error": str(e),
                     "function_id": str(request.function_id),
-                    "raw_result": str(analysis_result)[:500]  # 截取前500字符作為調試信息
+                    "traceback": traceback.format_exc() if DEBUG_MODE else None
                 }
             
-            # 計算執行時間
-            end_time = datetime.now().timestamp()
-            execution_time = round(end_time - start_time, 2)
-            
-            # 增強分析結果 - 添加執行元數據
-            analysis_result.update({
-                "execution_time": f"{execution_time}秒",
-                "function_id": str(request.function_id),
-                "parameters": {
-                    "year": request.year,
-                    "race": request.race,
-                    "session": request.session,
-                    "driver1": request.driver1,
-                    "driver2": request.driver2,
-                    "corner_number": request.corner_number
-                },
-                "api_version": API_VERSION,
-                "timestamp": datetime.now().isoformat(),
-                "cache_used": analysis_result.get("cache_used", False)
-            })
-            
-            # 嘗試載入 JSON 數據 - 增加數據豐富度
-            if analysis_result.get("success"):
-                try:
-                    # 查找 json 目錄中的相關文件
-                    json_dir = os.path.join(os.getcwd(), "json")
-                    if os.path.exists(json_dir):
-                        # 查找最新的相關 JSON 文件
-                        json_files = []
-                        for file in os.listdir(json_dir):
-                            if file.endswith('.json') and str(request.function_id) in file:
-                                json_path = os.path.join(json_dir, file)
-                                json_files.append(json_path)
-                        
-                        # 載入找到的 JSON 文件
-                        if json_files:
-                            analysis_result["json_files"] = []
-                            for json_file in json_files[:3]:  # 最多3個文件，避免過大
-                                try:
-                                    with open(json_file, 'r', encoding='utf-8') as f:
-                                        json_data = json.load(f)
-                                        analysis_result["json_files"].append({
-                                            "filename": os.path.basename(json_file),
-                                            "path": json_file,
-                                            "data": json_data
-                                        })
-                                        log_message(f"成功載入 JSON 文件: {os.path.basename(json_file)}", "SUCCESS")
-                                except Exception as e:
-                                    log_message(f"載入 JSON 文件失敗 {json_file}: {e}", "WARNING")
-                        else:
-                            log_message(f"未找到功能 {request.function_id} 的 JSON 文件", "WARNING")
-                    else:
-                        log_message("json 目錄不存在", "WARNING")
-                except Exception as e:
-                    log_message(f"搜索 JSON 文件時發生錯誤: {e}", "WARNING")
-            
-            # 驗證分析結果
-            if not analysis_result.get("success"):
-                log_message(f"功能 {request.function_id} 執行失敗: {analysis_result.get('message', '未知錯誤')}", "ERROR")
-            else:
-                log_message(f"功能 {request.function_id} 執行成功", "SUCCESS")
-            
-        except ImportError as e:
-            log_message(f"模組載入失敗: {str(e)}", "ERROR")
-            analysis_result = {
-                "success": False,
-                "message": "系統模組載入失敗",
-                "error": str(e),
-                "function_id": str(request.function_id),
-                "traceback": traceback.format_exc() if DEBUG_MODE else None
-            }
-        except Exception as e:
-            log_message(f"分析執行異常: {str(e)}", "ERROR")
-            analysis_result = {
-                "success": False,
-                "message": "分析執行失敗",
-                "error": str(e),
-                "function_id": str(request.function_id),
-                "traceback": traceback.format_exc() if DEBUG_MODE else None
-            }
+        if trace is not None:
+            write_trace_log(trace, function_id=str(request.function_id), success=analysis_result.get("success", False))
+            if request.debug:
+                analysis_result["trace"] = trace.to_dict()
         
         return APIResponse(
             success=analysis_result.get("success", False),
@@ -700,6 +783,7 @@ if __name__ == "__main__":
     print("   • 根端點: http://localhost:8000/")
     print("   • 分析端點: http://localhost:8000/analyze")
     print("   • 健康檢查: http://localhost:8000/health")
+    print("   • 服務指標: http://localhost:8000/metrics")
     print("   • API文檔: http://localhost:8000/docs")
     print("   • 模組列表: http://localhost:8000/modules")
     print("\n🔧 使用 Ctrl+C 停止服務器")
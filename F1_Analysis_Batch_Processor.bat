@@ -7,6 +7,14 @@ echo F1 Analysis 批次處理系統
 echo 參數化模式 - 符合核心開發原則
 echo ==========================================
 
+echo.
+echo 🚀 選擇執行模式:
+echo   1. 單一分析 (互動輸入功能與賽事)
+echo   2. 工作清單批次執行 (--batch，同賽段只載入一次)
+echo.
+set /p RUN_MODE=請輸入模式 (預設: 1): 
+if "%RUN_MODE%"=="2" goto batch_mode
+
 echo.
 echo 🚀 選擇分析功能:
 echo.
@@ -70,7 +78,35 @@ echo.
 
 rem 執行參數化分析
 python f1_analysis_modular_main.py -y %YEAR% -r %RACE% -s %SESSION% -f %FUNCTION_ID%
+goto show_result
+
+:batch_mode
+echo.
+echo 📋 工作清單格式: .yaml / .yml (需安裝 PyYAML) / .jsonl / .json
+echo    每項工作指定 year, race, session, function, driver (function / driver 可為清單)
+echo.
+set /p MANIFEST=請輸入工作清單路徑 (預設: jobs.yaml): 
+if "%MANIFEST%"=="" set MANIFEST=jobs.yaml
+if not exist "%MANIFEST%" (
+    echo ❌ 找不到工作清單: %MANIFEST%
+    pause
+    exit /b 1
+)
+
+set /p WORKERS=請輸入平行處理的賽段程序數 (預設: 1): 
+if "%WORKERS%"=="" set WORKERS=1
+
+echo.
+echo ==========================================
+echo 🚀 開始批次執行...
+echo ==========================================
+echo 參數: Manifest=%MANIFEST%, Workers=%WORKERS%
+echo.
+
+rem 批次模式：工作依賽段分組，每個賽段只載入一次數據，完成後輸出摘要
+python f1_analysis_modular_main.py --batch "%MANIFEST%" --workers %WORKERS% --no-detailed-output
 
+:show_result
 echo.
 echo ==========================================
 if %ERRORLEVEL% equ 0 (
@@ -82,7 +118,7 @@ echo ==========================================
 
 echo.
 echo 📊 輸出檔案位置:
-echo   - JSON 數據: json/ 目錄
+echo   - JSON 數據: json/ 目錄 (批次摘要: json/batch_summary_*.json)
 echo   - 圖表檔案: cache/ 目錄
 echo   - 日誌檔案: logs/ 目錄
 echo.
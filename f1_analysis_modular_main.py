@@ -28,6 +28,7 @@ try:
     from modules.function_mapper import F1AnalysisFunctionMapper
     from modules.compatible_data_loader import CompatibleF1DataLoader
     from modules.compatible_f1_analysis_instance import create_f1_analysis_instance
+    from modules.tracing import format_span_tree, span, start_trace, trace_enabled_by_env, write_trace_log
     
     print("[OK] 統一函數映射器導入成功！")
     has_function_mapper = True
@@ -801,6 +802,12 @@ class F1AnalysisModularCLI:
                 driver2=getattr(self.args, 'driver2', None)
             )
             
+            # 串流模式：部分結果以 [PARTIAL] 單行 JSON 輸出，供 GUI 即時顯示
+            if getattr(self.args, 'stream', False):
+                from modules.streaming_results import make_stdout_emitter
+                mapper.partial_callback = make_stdout_emitter()
+                print("[INFO] 串流模式: 啟用 (部分結果將即時輸出)")
+            
             # 執行分析
             # 處理詳細輸出參數
             show_detailed_output = True  # 預設啟用
@@ -2620,6 +2627,18 @@ class F1AnalysisModularCLI:
 
     def run_parameter_mode(self):
         """參數模式運行 - 使用統一功能映射器"""
+        # --trace 或環境變數 F1_TRACE 啟用追蹤，完成後顯示各階段耗時
+        if not (getattr(self.args, 'trace', False) or trace_enabled_by_env()):
+            return self._run_parameter_mode()
+        
+        with start_trace("cli.parameter_mode", function_id=self.args.function) as trace:
+            success = self._run_parameter_mode()
+        print("[TRACE] 各階段耗時:")
+        print(format_span_tree(trace))
+        write_trace_log(trace, function_id=self.args.function, success=success)
+        return success
+    
+    def _run_parameter_mode(self):
         print("=" * 60)
         print("[TOOL] 參數化模式 - 符合核心開發原則")
         print("=" * 60)
@@ -2631,7 +2650,9 @@ class F1AnalysisModularCLI:
         
         print(f"[STATS] 載入參數: Year={year}, Race={race}, Session={session}")
         
-        if not self.load_race_data_from_args(year, race, session):
+        with span("load", year=year, race=race, session=session):
+            loaded = self.load_race_data_from_args(year, race, session)
+        if not loaded:
             print("[ERROR] 參數模式數據載入失敗")
             return False
         
@@ -2696,6 +2717,13 @@ def create_argument_parser():
   
   # 顯示幫助
   python f1_analysis_modular_main.py -f 20
+  
+  # 追蹤各階段耗時 (載入 / 分析 / 輸出)
+  python f1_analysis_modular_main.py -y 2025 -r Japan -s R -f 3 --trace
+  
+  # 批次模式：依工作清單執行多個功能/車手/賽事 (每個賽段只載入一次)
+  python f1_analysis_modular_main.py --batch jobs.yaml
+  python f1_analysis_modular_main.py --batch jobs.jsonl --workers 2
 
 功能編號對照:
   [RAIN]  基礎分析模組:
@@ -2746,7 +2774,7 @@ def create_argument_parser():
     
     # 功能參數
     parser.add_argument('-f', '--function', type=str,
-                       help='直接執行指定功能 (1-20, 4.1-4.5, 6.1-6.7, 7.1-7.2, 11.1-11.2, 12.1-12.2, 14.1-14.3, 16.1-16.4等子功能)')
+                       help='直接執行指定功能 (1-20, 2.1, 4.1-4.5, 6.1-6.7, 7.1-7.2, 11.1-11.2, 12.1-12.2, 14.1-14.3, 16.1-16.4等子功能)')
     
     # 車手參數
     parser.add_argument('-d', '--driver', type=str,
@@ -2767,6 +2795,14 @@ def create_argument_parser():
                        help='即使使用緩存數據也顯示詳細的表格輸出 (預設啟用)')
     parser.add_argument('--no-detailed-output', action='store_true', 
                        help='禁用詳細輸出，緩存模式下只顯示摘要')
+    parser.add_argument('--stream', action='store_true',
+                       help='串流模式：分析過程中以 [PARTIAL] JSON 行即時輸出部分結果 (供呼叫端漸進讀取)')
+    parser.add_argument('--trace', action='store_true',
+                       help='追蹤模式：顯示數據載入、分析與輸出各階段的耗時，並寫入 logs/trace.log')
+    parser.add_argument('--batch', type=str, metavar='MANIFEST',
+                       help='批次模式：依工作清單 (.yaml/.yml/.jsonl/.json) 執行，工作依賽段分組且每個賽段只載入一次')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='批次模式平行處理的賽段程序數 (預設 1)')
     parser.add_argument('--version', action='version', version='F1 Analysis CLI v5.3')
     
     return parser
@@ -2794,6 +2830,13 @@ def main():
             print("請確保在正確的工作目錄中運行此程式")
             sys.exit(1)
             
+        # 批次模式：不進入互動/參數模式，直接執行工作清單
+        if args.batch:
+            from modules.batch_runner import run_batch
+            summary = run_batch(args.batch, workers=args.workers,
+                                show_detailed_output=not args.no_detailed_output)
+            sys.exit(0 if summary.get("success") else 1)
+            
         # 啟動模組化CLI
         cli = F1AnalysisModularCLI(args)
         cli.run()
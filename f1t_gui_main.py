@@ -8,6 +8,21 @@ F1T GUI Main - Professional Racing Analysis Workstation
 import sys
 import os
 import math
+import time
+
+# 啟動計時與匯入量測 (--profile-imports) - 必須在 PyQt 匯入前啟用
+_STARTUP_T0 = time.perf_counter()
+try:
+    from modules.import_profiler import import_profiler, profiling_requested, lazy_import
+    if profiling_requested():
+        import_profiler.enable()
+except ImportError:
+    import_profiler = None
+    import importlib
+
+    def lazy_import(module_name):
+        return importlib.import_module(module_name)
+
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QComboBox, QCheckBox, QPushButton, QTreeWidget, QTreeWidgetItem,
@@ -17,7 +32,7 @@ from PyQt5.QtWidgets import (
     QTextEdit, QScrollArea, QHeaderView, QDialog, QDialogButtonBox
 )
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QPointF, QPoint, QObject, QRect
-from PyQt5.QtGui import QFont, QIcon, QPalette, QColor, QPainter, QPen, QBrush, QMouseEvent
+from PyQt5.QtGui import QFont, QIcon, QPalette, QColor, QPainter, QPen, QBrush, QMouseEvent, QPainterPath
 import json
 import datetime
 import traceback
@@ -935,6 +950,34 @@ class TrackMapWidget(QWidget):
         # 移除最小尺寸限制，允許完全自由縮放
         # self.setMinimumSize(300, 200) - 已移除
         self.setObjectName("TrackMap")
+        self._outline_key = None
+        self._outline_path = None
+        
+    def _get_outline_path(self, center_x, center_y):
+        """建立基本賽道輪廓路徑 (待整合真實賽道數據) - 中心點不變時沿用快取"""
+        if self._outline_key == (center_x, center_y):
+            return self._outline_path
+        
+        path = QPainterPath()
+        for i in range(360):
+            angle = math.radians(i)
+            if i < 180:
+                # 上半部分
+                x = center_x + 80 * math.cos(angle)
+                y = center_y - 60 + 30 * math.sin(angle)
+            else:
+                # 下半部分
+                x = center_x + 60 * math.cos(angle)
+                y = center_y + 20 + 40 * math.sin(angle)
+            if i == 0:
+                path.moveTo(x, y)
+            else:
+                path.lineTo(x, y)
+        path.closeSubpath()
+        
+        self._outline_key = (center_x, center_y)
+        self._outline_path = path
+        return path
         
     def paintEvent(self, event):
         painter = QPainter(self)
@@ -949,24 +992,8 @@ class TrackMapWidget(QWidget):
         # 賽道主線
         center_x, center_y = self.width() // 2, self.height() // 2
         
-        # 繪製基本賽道輪廓 (待整合真實賽道數據)
-        points = []
-        for i in range(360):
-            angle = math.radians(i)
-            if i < 180:
-                # 上半部分
-                x = center_x + 80 * math.cos(angle)
-                y = center_y - 60 + 30 * math.sin(angle)
-            else:
-                # 下半部分
-                x = center_x + 60 * math.cos(angle)
-                y = center_y + 20 + 40 * math.sin(angle)
-            points.append(QPointF(x, y))
-        
-        # 繪製賽道
-        for i in range(len(points)):
-            next_i = (i + 1) % len(points)
-            painter.drawLine(points[i], points[next_i])
+        # 繪製賽道 (輪廓路徑依視窗尺寸快取)
+        painter.drawPath(self._get_outline_path(center_x, center_y))
         
         # 繪製起跑線
         painter.setPen(QPen(QColor(255, 255, 255), 2))
@@ -3312,6 +3339,7 @@ class StyleHMainWindow(QMainWindow):
         # 分析菜單
         analysis_menu = menubar.addMenu('分析')
         analysis_menu.addAction('[RAIN] 降雨分析', self.rain_analysis)
+        analysis_menu.addAction('[TRACK] 全場回放', self.race_replay)
         analysis_menu.addSeparator()
         analysis_menu.addAction('圈速分析', self.lap_analysis)
         analysis_menu.addAction('遙測比較', self.telemetry_comparison)
@@ -3623,6 +3651,7 @@ class StyleHMainWindow(QMainWindow):
         QTreeWidgetItem(advanced_group, ["燃料分析"])
         QTreeWidgetItem(advanced_group, ["策略分析"])
         QTreeWidgetItem(advanced_group, ["氣象分析"])
+        QTreeWidgetItem(advanced_group, ["年度超車統計"])
         
         layout.addWidget(tree)
         
@@ -4705,10 +4734,20 @@ class StyleHMainWindow(QMainWindow):
             #print(f"[警告] 無法找到MDI區域來添加視窗: {function_name}")
             return
 
+        # 串流分析：長時間分析在完成前即漸進顯示部分結果
+        streaming_widget = self._create_streaming_analysis(function_name)
+        
         # 🔧 新增：嘗試使用模組化架構
-        analysis_module = self._create_analysis_module(function_name)
+        analysis_module = None if streaming_widget else self._create_analysis_module(function_name)
         
-        if analysis_module:
+        if streaming_widget:
+            analysis_window = PopoutSubWindow(self.format_window_title(streaming_widget.title), mdi_area)
+            analysis_window.setWidget(streaming_widget)
+            analysis_window.resize(800, 600)
+            
+            print(f"✅ [STREAM] 使用串流分析視窗: {streaming_widget.get_title()}")
+            
+        elif analysis_module:
             # 使用新的模組化方式
             window_title = analysis_module.get_title()
             analysis_window = PopoutSubWindow(window_title, mdi_area, analysis_module)
@@ -4757,6 +4796,29 @@ class StyleHMainWindow(QMainWindow):
         base_y = 10 + offset_y
         
         analysis_window.move(base_x, base_y)
+        
+        # 串流分析視窗開啟後立即開始分析
+        if streaming_widget:
+            streaming_widget.start_analysis()
+    
+    def _create_streaming_analysis(self, function_name):
+        """創建串流分析視窗 (僅限支援部分結果回報的功能)"""
+        try:
+            streaming = lazy_import("modules.gui.streaming_analysis_worker")
+        except ImportError as e:
+            print(f"⚠️ [STREAM] 串流分析組件導入失敗: {e}")
+            return None
+        
+        if function_name not in streaming.STREAMING_FUNCTIONS:
+            return None
+        
+        params = self.get_current_parameters()
+        return streaming.StreamingAnalysisWidget(
+            function_name,
+            year=params['year'],
+            race=params['race'],
+            session=params['session']
+        )
     
     def _create_analysis_module(self, function_name):
         """創建分析模組實例"""
@@ -4824,7 +4886,7 @@ class StyleHMainWindow(QMainWindow):
         if "降雨分析" in function_name:
             # 使用新的雨量分析模組 (通用圖表系統)
             try:
-                from modules.gui.rain_analysis_module import RainAnalysisModule
+                RainAnalysisModule = lazy_import("modules.gui.rain_analysis_module").RainAnalysisModule
                 params = self.get_current_parameters()
                 content = RainAnalysisModule(
                     year=params['year'],
@@ -5051,7 +5113,7 @@ class StyleHMainWindow(QMainWindow):
             print(f"[分析] [RAIN] 降雨分析 - {params['year']} {params['race']} {params['session']}")
             
             # 導入新的雨量分析模組 (使用通用圖表)
-            from modules.gui.rain_analysis_module import RainAnalysisModule
+            RainAnalysisModule = lazy_import("modules.gui.rain_analysis_module").RainAnalysisModule
             
             # 創建雨量分析模組
             rain_widget = RainAnalysisModule(
@@ -5081,6 +5143,38 @@ class StyleHMainWindow(QMainWindow):
             traceback.print_exc()
             self.show_error_message("降雨分析錯誤", f"開啟降雨分析時發生錯誤: {e}")
             
+    def race_replay(self):
+        """開啟全場比賽回放播放器"""
+        try:
+            self.remove_welcome_tab()
+            
+            params = self.get_current_parameters()
+            print(f"[分析] [TRACK] 全場回放 - {params['year']} {params['race']} {params['session']}")
+            
+            RaceReplayWidget = lazy_import("modules.gui.race_replay_widget").RaceReplayWidget
+            replay_widget = RaceReplayWidget(
+                year=params['year'],
+                race=params['race'],
+                session=params['session']
+            )
+            
+            tab_title = f"全場回放_{params['year']}_{params['race']}_{params['session']}"
+            tab_index = self.tab_widget.addTab(replay_widget, "")
+            self.tab_widget.setCurrentIndex(tab_index)
+            self.active_analysis_tabs.append(tab_title)
+            
+            # 開啟後立即準備回放數據
+            replay_widget.start_export()
+            print(f"[OK] 全場回放頁面已開啟: {tab_title}")
+            
+        except ImportError as e:
+            print(f"[ERROR] 全場回放組件導入失敗: {e}")
+            self.show_error_message("模組錯誤", f"無法載入全場回放組件: {e}")
+        except Exception as e:
+            print(f"[ERROR] 全場回放開啟失敗: {e}")
+            traceback.print_exc()
+            self.show_error_message("全場回放錯誤", f"開啟全場回放時發生錯誤: {e}")
+            
     def telemetry_comparison(self): 
         params = self.get_current_parameters()
         #print(f"[分析] 遙測比較 - {params['year']} {params['race']} {params['session']}")
@@ -6489,6 +6583,14 @@ class StyleHMainWindow(QMainWindow):
             pass
 
 
+def report_startup_time():
+    """回報視窗可用耗時與最慢的匯入模組 (--profile-imports)"""
+    elapsed = time.perf_counter() - _STARTUP_T0
+    print(f"[INFO] 主視窗可用耗時: {elapsed:.3f}s")
+    if import_profiler is not None and import_profiler.enabled:
+        import_profiler.report(limit=15, title="啟動匯入耗時排行")
+
+
 def main():
     """主函數"""
     app = QApplication(sys.argv)
@@ -6503,6 +6605,9 @@ def main():
     window = StyleHMainWindow()
     window.show()
     
+    # 事件迴圈開始處理後視窗即可使用 - 回報啟動耗時
+    QTimer.singleShot(0, report_startup_time)
+    
     # 顯示歡迎訊息
     #print("[FINISH] F1T 專業賽車分析工作站已啟動")
     #print("[TARGET] 專業級F1數據分析平台")
@@ -1,52 +1,58 @@
 """
 F1 Analysis CLI Modules - 統一映射器版
 模組化F1分析系統 - 使用統一函數映射器
+
+套件匯出採延遲載入 (PEP 562)：匯入 modules.gui.* 等子模組時
+不會連帶載入 FastF1 / pandas / matplotlib 與所有分析模組，
+首次存取 modules.<名稱> 時才真正導入對應模組。
 """
 
+import importlib
+
 __version__ = "6.0.0"
 __author__ = "F1 Analysis Team"
 
-# 導入核心模組
-from .function_mapper import F1AnalysisFunctionMapper
-from .compatible_data_loader import CompatibleF1DataLoader
-from .compatible_f1_analysis_instance import create_f1_analysis_instance
-
-# 導入基礎模組 (如果存在)
-try:
-    from .base import F1AnalysisBase
-except ImportError:
-    F1AnalysisBase = None
-
-# 導入主要分析模組
-try:
-    from .rain_intensity_analyzer_json import run_rain_intensity_analysis_json
-except ImportError:
-    run_rain_intensity_analysis_json = None
-
-try:
-    from .accident_analysis_complete import run_accident_analysis_json
-except ImportError:
-    run_accident_analysis_json = None
-
-try:
-    from .pitstop_analysis_complete import run_pitstop_analysis_json
-except ImportError:
-    run_pitstop_analysis_json = None
-
-try:
-    from .single_driver_analysis import run_single_driver_analysis
-except ImportError:
-    run_single_driver_analysis = None
-
-try:
-    from .driver_comparison_advanced import run_driver_comparison_json
-except ImportError:
-    run_driver_comparison_json = None
-
-try:
-    from .single_driver_analysis import run_single_driver_comprehensive_analysis
-except ImportError:
-    run_single_driver_comprehensive_analysis = None
+# 核心模組 - 名稱: (子模組, 屬性)
+_CORE_EXPORTS = {
+    'F1AnalysisFunctionMapper': ('.function_mapper', 'F1AnalysisFunctionMapper'),
+    'CompatibleF1DataLoader': ('.compatible_data_loader', 'CompatibleF1DataLoader'),
+    'create_f1_analysis_instance': ('.compatible_f1_analysis_instance', 'create_f1_analysis_instance'),
+}
+
+# 可選模組 - 導入失敗時回傳 None
+_OPTIONAL_EXPORTS = {
+    'F1AnalysisBase': ('.base', 'F1AnalysisBase'),
+    'run_rain_intensity_analysis_json': ('.rain_intensity_analyzer_json', 'run_rain_intensity_analysis_json'),
+    'run_accident_analysis_json': ('.accident_analysis_complete', 'run_accident_analysis_json'),
+    'run_pitstop_analysis_json': ('.pitstop_analysis_complete', 'run_pitstop_analysis_json'),
+    'run_single_driver_analysis': ('.single_driver_analysis', 'run_single_driver_analysis'),
+    'run_driver_comparison_json': ('.driver_comparison_advanced', 'run_driver_comparison_json'),
+    'run_single_driver_comprehensive_analysis': ('.single_driver_analysis', 'run_single_driver_comprehensive_analysis'),
+}
+
+
+def __getattr__(name):
+    """延遲載入套件匯出名稱"""
+    if name in _CORE_EXPORTS:
+        module_name, attr = _CORE_EXPORTS[name]
+        value = getattr(importlib.import_module(module_name, __name__), attr)
+    elif name in _OPTIONAL_EXPORTS:
+        module_name, attr = _OPTIONAL_EXPORTS[name]
+        try:
+            value = getattr(importlib.import_module(module_name, __name__), attr)
+        except (ImportError, AttributeError):
+            value = None
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    # 快取於套件命名空間，後續存取不再經過 __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + __all__)
+
 
 __all__ = [
     'F1AnalysisFunctionMapper',
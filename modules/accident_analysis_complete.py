@@ -26,6 +26,34 @@ except ImportError:
         print("[ERROR] 無法導入基礎模組")
         F1AnalysisBase = object
 
+try:
+    from .race_control_classifier import (get_classified_messages, driver_code_column, derived_column,
+                                          classify_text, classify_series, extract_driver_code,
+                                          classify_responsibility, CATEGORY_ZH_RULES,
+                                          IGNORED_MESSAGE_PATTERN, IMPORTANT_MESSAGE_PATTERN,
+                                          IMPORTANCE_SEVERITY_RULES, EVENT_SEVERITY_RULES,
+                                          DRIVER_RISK_SCORE_RULES, keywords)
+    from .incident_timeline import get_incident_timeline, TRACK_STATUS_LABELS
+except ImportError:
+    from modules.race_control_classifier import (get_classified_messages, driver_code_column, derived_column,
+                                                 classify_text, classify_series, extract_driver_code,
+                                                 classify_responsibility, CATEGORY_ZH_RULES,
+                                                 IGNORED_MESSAGE_PATTERN, IMPORTANT_MESSAGE_PATTERN,
+                                                 IMPORTANCE_SEVERITY_RULES, EVENT_SEVERITY_RULES,
+                                                 DRIVER_RISK_SCORE_RULES, keywords)
+    from modules.incident_timeline import get_incident_timeline, TRACK_STATUS_LABELS
+
+# 關鍵事件摘要的事件類型 (依序比對)
+KEY_EVENT_TYPE_RULES = [
+    ("[CRITICAL] 事故", keywords('ACCIDENT', 'COLLISION', 'CRASH', 'CONTACT', 'INCIDENT')),
+    ("🚗 安全車", keywords('SAFETY CAR', 'SC DEPLOYED', 'VSC')),
+    ("🔴 紅旗", keywords('RED FLAG', 'RED LIGHT')),
+    ("🟡 黃旗", keywords('YELLOW FLAG', 'DOUBLE YELLOW')),
+    ("🟢 綠旗", keywords('GREEN FLAG', 'GREEN LIGHT')),
+    ("⚖️ 處罰", keywords('PENALTY', 'WARNING', 'INVESTIGATION')),
+    ("[FINISH] 比賽結束", keywords('CHEQUERED FLAG', 'RACE FINISHED')),
+]
+
 # 註解：F1AccidentAnalyzer 將在本文件中定義，不需要外部導入
 
 
@@ -57,49 +85,29 @@ class F1AccidentAnalyzer:
         
         try:
             if hasattr(session, 'race_control_messages') and session.race_control_messages is not None:
-                messages = session.race_control_messages
-                
-                for _, message in messages.iterrows():
-                    msg_text = str(message.get('Message', '')).upper()
-                    
-                    # 檢查是否為事故相關事件
-                    if any(keyword in msg_text for keyword in [
-                        'ACCIDENT', 'COLLISION', 'CRASH', 'CONTACT', 'INCIDENT',
-                        'FLAG', 'YELLOW', 'RED', 'SAFETY CAR', 'VSC'
-                    ]):
-                        accident_data = {
-                            'time': message.get('Time', 'N/A'),
-                            'lap': message.get('Lap', 'N/A'),
-                            'message': message.get('Message', ''),
-                            'driver': message.get('Driver', 'N/A'),
-                            'category': message.get('Category', ''),
-                            'category_zh': self._categorize_message_zh(msg_text)
-                        }
-                        accidents.append(accident_data)
+                # 共用分類引擎 - 事故篩選與中文分類每場賽事只計算一次
+                classified = get_classified_messages(session.race_control_messages)
+                
+                for message in classified[classified['is_accident_message']].to_dict('records'):
+                    accident_data = {
+                        'time': message.get('Time', 'N/A'),
+                        'lap': message.get('Lap', 'N/A'),
+                        'message': message.get('Message', ''),
+                        'driver': message.get('Driver', 'N/A'),
+                        'category': message.get('Category', ''),
+                        'category_zh': message['category_zh']
+                    }
+                    accidents.append(accident_data)
             
         except Exception as e:
             print(f"[WARNING] 分析事故數據時發生錯誤: {e}")
-            
+        
+        self.accidents = accidents
         return accidents
     
     def _categorize_message_zh(self, message):
         """中文分類消息"""
-        message = message.upper()
-        
-        if 'RED' in message:
-            return '紅旗'
-        elif 'YELLOW' in message:
-            return '黃旗'
-        elif 'SAFETY CAR' in message or 'SC' in message:
-            return '安全車'
-        elif 'VSC' in message:
-            return '虛擬安全車'
-        elif any(word in message for word in ['ACCIDENT', 'COLLISION', 'CRASH']):
-            return '事故'
-        elif any(word in message for word in ['INVESTIGATION', 'PENALTY']):
-            return '調查'
-        else:
-            return '其他'
+        return classify_text(message.upper(), CATEGORY_ZH_RULES, '其他')
     
     def calculate_statistics(self, accidents):
         """計算統計數據"""
@@ -1021,41 +1029,37 @@ class F1AccidentAnalysisComplete:
             red_flags = 0
             safety_cars = 0
             
-            for idx, message_row in race_control_messages.iterrows():
-                message = str(message_row.get('Message', ''))
-                category = str(message_row.get('Category', ''))
-                time = message_row.get('Time', '')
-                lap = message_row.get('Lap', '')
-                
-                # 過濾重要事件
-                if self._is_important_incident(message, category):
-                    # 提取車手資訊
-                    driver = self._extract_driver_from_message(message)
-                    if driver != 'N/A' and driver != '':
-                        involved_drivers.add(driver)
-                    
-                    # 統計不同類型事件
-                    message_upper = message.upper()
-                    if 'YELLOW FLAG' in message_upper:
-                        yellow_flags += 1
-                    elif 'RED FLAG' in message_upper:
-                        red_flags += 1
-                    elif 'SAFETY CAR' in message_upper:
-                        safety_cars += 1
-                    
-                    # 確定嚴重程度
-                    severity = self._determine_severity(message, category)
-                    
-                    incident_info = {
-                        'index': idx,
-                        'time': time,
-                        'lap': lap,
-                        'category': category,
-                        'message': message,
-                        'severity': severity,
-                        'driver': driver
-                    }
-                    all_incidents.append(incident_info)
+            # 共用分類引擎 - 重要事件篩選、嚴重程度與車手擷取每場賽事只計算一次
+            classified = get_classified_messages(race_control_messages)
+            drivers = driver_code_column(classified, self._known_driver_codes()).to_numpy()
+            important_mask = classified['is_important'].to_numpy(dtype=bool)
+            important = classified[important_mask]
+            
+            for idx, message_row, driver in zip(important.index, important.to_dict('records'), drivers[important_mask]):
+                message = message_row['message_text']
+                message_upper = message_row['message_upper']
+                
+                if driver != 'N/A' and driver != '':
+                    involved_drivers.add(driver)
+                
+                # 統計不同類型事件
+                if 'YELLOW FLAG' in message_upper:
+                    yellow_flags += 1
+                elif 'RED FLAG' in message_upper:
+                    red_flags += 1
+                elif 'SAFETY CAR' in message_upper:
+                    safety_cars += 1
+                
+                incident_info = {
+                    'index': idx,
+                    'time': message_row.get('Time', ''),
+                    'lap': message_row.get('Lap', ''),
+                    'category': str(message_row.get('Category', '')),
+                    'message': message,
+                    'severity': message_row['importance_severity'],
+                    'driver': driver
+                }
+                all_incidents.append(incident_info)
             
             # 顯示事故統計概覽
             print(f"\n[INFO] 事故統計概覽:")
@@ -1243,45 +1247,11 @@ class F1AccidentAnalysisComplete:
     def _is_important_incident(self, message, category):
         """判斷是否為重要事件"""
         message_upper = message.upper()
-        category_upper = category.upper()
-        
-        # 過濾不重要的消息
-        ignore_keywords = [
-            'GREEN LIGHT - PIT EXIT OPEN',
-            'PIT EXIT OPEN',
-            'PIT ENTRY OPEN', 
-            'PIT EXIT CLOSED',
-            'DRS ENABLED',
-            'DRS DISABLED',
-            'RISK OF RAIN'
-        ]
-        
-        if any(keyword in message_upper for keyword in ignore_keywords):
-            return False
-        
-        # 重要的關鍵字
-        important_keywords = [
-            'TRACK LIMIT', 'DELETED', 'INCIDENT', 'INVESTIGATION',
-            'YELLOW FLAG', 'RED FLAG', 'SAFETY CAR', 'VSC',
-            'BLUE FLAG', 'CHEQUERED FLAG', 'PENALTY', 'WARNING'
-        ]
-        
-        return any(keyword in message_upper for keyword in important_keywords)
+        return not IGNORED_MESSAGE_PATTERN.search(message_upper) and bool(IMPORTANT_MESSAGE_PATTERN.search(message_upper))
     
     def _determine_severity(self, message, category):
         """確定事件嚴重程度"""
-        message_upper = message.upper()
-        
-        if any(keyword in message_upper for keyword in ['DELETED', 'TRACK LIMIT']):
-            return 'MEDIUM'
-        elif any(keyword in message_upper for keyword in ['BLUE FLAG', 'INCIDENT']):
-            return 'LOW'
-        elif any(keyword in message_upper for keyword in ['PENALTY', 'INVESTIGATION']):
-            return 'HIGH'
-        elif any(keyword in message_upper for keyword in ['RED FLAG']):
-            return 'CRITICAL'
-        else:
-            return 'LOW'
+        return classify_text(message.upper(), IMPORTANCE_SEVERITY_RULES, 'LOW')
     
     def _display_all_incidents_summary(self, incidents):
         """顯示所有事件詳細列表"""
@@ -1371,32 +1341,6 @@ class F1AccidentAnalysisComplete:
         else:
             return '事件'
     
-    def _extract_driver_from_message(self, message):
-        """從訊息中提取車手代碼"""
-        if not message:
-            return 'N/A'
-        
-        message_upper = message.upper()
-        
-        # 預設車手代碼列表
-        all_drivers = [
-            'VER', 'PER', 'HAM', 'LEC', 'SAI', 'RUS', 'ANT', 
-            'NOR', 'PIA', 'ALO', 'STR', 'HUL', 'OCO', 'TSU', 
-            'LAW', 'HAD', 'ZHO', 'VAL', 'ALB', 'COL', 'GAS', 
-            'BEA', 'DOO', 'BOR'
-        ]
-        
-        # 如果有動態車隊映射，使用其中的車手代碼
-        if hasattr(self, 'dynamic_team_mapping') and self.dynamic_team_mapping:
-            all_drivers = list(self.dynamic_team_mapping.keys())
-        
-        # 在訊息中搜尋車手代碼
-        for driver in all_drivers:
-            if driver in message_upper:
-                return driver
-        
-        return 'N/A'
-    
     def _get_race_control_data(self):
         """獲取賽會控制數據的通用方法"""
         try:
@@ -1408,16 +1352,11 @@ class F1AccidentAnalysisComplete:
                 return []
             
             # 將 DataFrame 轉換為字典列表
-            data = []
-            for _, row in race_control_messages.iterrows():
-                data.append({
-                    'Time': row.get('Time', 'N/A'),
-                    'Lap': row.get('Lap', 'N/A'),
-                    'Category': row.get('Category', 'N/A'),
-                    'Message': row.get('Message', 'N/A')
-                })
-            
-            return data
+            columns = ['Time', 'Lap', 'Category', 'Message']
+            return pd.DataFrame({
+                column: race_control_messages[column] if column in race_control_messages.columns else 'N/A'
+                for column in columns
+            }).to_dict('records')
             
         except Exception as e:
             print(f"[ERROR] 獲取賽會控制數據時發生錯誤: {e}")
@@ -1741,111 +1680,7 @@ class F1AccidentAnalysisComplete:
         Returns:
             tuple: (incident_type, severity, is_responsibility_incident)
         """
-        message_upper = message.upper() if message else ""
-        category_upper = category.upper() if category else ""
-        
-        # 🚗 1. 碰撞事件報告 (Collision Incidents) - 參照事故分析器邏輯
-        collision_patterns = [
-            "COLLISION", "COLLIDED", "CRASHED", "CONTACT", "HIT", "STRUCK",
-            "CAUSING.*COLLISION", "INVOLVED.*COLLISION", "COLLISION.*WITH",
-            "CRASH", "ACCIDENT"  # 從事故分析器添加
-        ]
-        
-        # ⚖️ 2. 罰秒事件報告 (Penalty Incidents) - 參照事故分析器邏輯
-        penalty_patterns = [
-            "PENALTY", "PENALISED", "PENALIZED", "FINE", "FINED", 
-            "TIME PENALTY", "GRID PENALTY", "STOP.*GO", "DRIVE.*THROUGH",
-            "INFRINGEMENT", "VIOLATION", "BREACH", "INVESTIGATION"  # 從事故分析器添加
-        ]
-        
-        # [CRITICAL] 3. 引發安全車事件報告 (Safety Car Incidents) - 參照事故分析器邏輯
-        safety_car_patterns = [
-            "SAFETY CAR", "VIRTUAL SAFETY CAR", "VSC", "SC DEPLOYED",
-            "CAUSED.*SAFETY CAR", "TRIGGERING.*SAFETY CAR", "INCIDENT.*SAFETY CAR"
-        ]
-        
-        # 檢查訊息和類別中的事件類型
-        combined_text = f"{message_upper} {category_upper}"
-        
-        # [CRITICAL] 關鍵修正：檢查是否為調查中或註記狀態（沒有實際罰則）
-        investigation_patterns = [
-            "UNDER INVESTIGATION",  # 調查中
-            "NOTED",               # 註記
-            "NO FURTHER ACTION",   # 無進一步行動
-            "NO ACTION NECESSARY", # 無需行動
-            "INVESTIGATION ONGOING", # 調查進行中
-            "WILL BE INVESTIGATED" # 將被調查
-        ]
-        
-        # 檢查是否包含調查或註記關鍵詞
-        has_investigation_status = any(
-            re.search(pattern, combined_text, re.IGNORECASE) 
-            for pattern in investigation_patterns
-        )
-        
-        # [CRITICAL] 關鍵修正：如果包含調查/註記關鍵詞，必須有明確罰則才算責任事故
-        if has_investigation_status:
-            # 檢查是否有明確的罰則關鍵詞
-            actual_penalty_patterns = [
-                "TIME PENALTY", "GRID PENALTY", "STOP.*GO", "DRIVE.*THROUGH", 
-                "FINE", "FINED", "PENALISED", "PENALIZED", "REPRIMAND",
-                "DELETED", "BLACK AND WHITE FLAG", "BLACK.*WHITE.*FLAG"
-            ]
-            
-            has_actual_penalty = any(
-                re.search(pattern, combined_text, re.IGNORECASE) 
-                for pattern in actual_penalty_patterns
-            )
-            
-            # [CRITICAL] 關鍵修正：如果只是調查/註記而沒有實際罰則，直接返回非責任事故
-            if not has_actual_penalty:
-                return ("investigation", "none", False)
-        
-        # 檢查是否屬於三種責任事件類型之一
-        is_collision_incident = any(
-            re.search(pattern, combined_text, re.IGNORECASE) 
-            for pattern in collision_patterns
-        )
-        
-        is_penalty_incident = any(
-            re.search(pattern, combined_text, re.IGNORECASE) 
-            for pattern in penalty_patterns
-        )
-        
-        is_safety_car_incident = any(
-            re.search(pattern, combined_text, re.IGNORECASE) 
-            for pattern in safety_car_patterns
-        )
-        
-        # [CRITICAL] 關鍵修正：對於碰撞事件，檢查是否有實際後果
-        if is_collision_incident:
-            # 檢查碰撞事件是否有實際後果
-            collision_consequence_patterns = [
-                "TIME PENALTY", "GRID PENALTY", "FINE", "FINED", "PENALISED", "PENALIZED",
-                "REPRIMAND", "WARNING", "DELETED", "BLACK AND WHITE FLAG",
-                "CAUSED.*RETIREMENT", "CAUSED.*DAMAGE", "RESPONSIBLE FOR"
-            ]
-            
-            has_collision_consequence = any(
-                re.search(pattern, combined_text, re.IGNORECASE) 
-                for pattern in collision_consequence_patterns
-            )
-            
-            # [CRITICAL] 關鍵修正：碰撞事件必須有實際後果才算責任事故
-            if not has_collision_consequence:
-                return ("collision_noted", "none", False)
-                
-            # 碰撞事件有實際後果 - 高嚴重度
-            return ("collision", "high", True)
-        elif is_penalty_incident:
-            # 罰秒事件 - 中等嚴重度
-            return ("penalty", "medium", True)  
-        elif is_safety_car_incident:
-            # 安全車事件 - 中等嚴重度
-            return ("safety_car", "medium", True)
-        else:
-            # 其他事件不計入責任分析
-            return ("other", "none", False)
+        return classify_responsibility(message, category)
     
     def _is_driver_responsible_for_incident(self, driver_abbr, driver_number, message_upper, original_message):
         """檢查車手是否在事故中負有責任 - 完全復刻 f1_analysis_cli_new.py 實現"""
@@ -2155,28 +1990,15 @@ class F1AccidentAnalysisComplete:
                 print("[ERROR] race_control_messages 為空")
                 return
             
-            # 收集關鍵事件 - 完全對應原始實現
+            # 收集關鍵事件 - 共用分類結果 + 事件時間軸 (每圈賽道狀態以二分搜尋查詢)
+            classified = get_classified_messages(messages)
+            event_types = derived_column(classified, 'key_event_type_zh',
+                                         lambda f: classify_series(f['message_upper'], KEY_EVENT_TYPE_RULES))
+            timeline = get_incident_timeline(data)
+            
             key_events = []
-            for _, msg in messages.iterrows():
-                msg_text = str(msg.get('Message', '')).upper()
-                category = str(msg.get('Category', '')).upper()
-                
-                # 檢查關鍵事件類型 - 完全對應原始實現
-                if any(keyword in msg_text for keyword in ['ACCIDENT', 'COLLISION', 'CRASH', 'CONTACT', 'INCIDENT']):
-                    event_type = "[CRITICAL] 事故"
-                elif any(keyword in msg_text for keyword in ['SAFETY CAR', 'SC DEPLOYED', 'VSC']):
-                    event_type = "🚗 安全車"
-                elif any(keyword in msg_text for keyword in ['RED FLAG', 'RED LIGHT']):
-                    event_type = "🔴 紅旗"
-                elif any(keyword in msg_text for keyword in ['YELLOW FLAG', 'DOUBLE YELLOW']):
-                    event_type = "🟡 黃旗"
-                elif any(keyword in msg_text for keyword in ['GREEN FLAG', 'GREEN LIGHT']):
-                    event_type = "🟢 綠旗"
-                elif any(keyword in msg_text for keyword in ['PENALTY', 'WARNING', 'INVESTIGATION']):
-                    event_type = "⚖️ 處罰"
-                elif any(keyword in msg_text for keyword in ['CHEQUERED FLAG', 'RACE FINISHED']):
-                    event_type = "[FINISH] 比賽結束"
-                else:
+            for msg, event_type in zip(classified.to_dict('records'), event_types):
+                if event_type is None:
                     continue
                 
                 # 格式化時間 (使用 MM:SS 格式) - 完全對應原始實現
@@ -2199,26 +2021,31 @@ class F1AccidentAnalysisComplete:
                     except:
                         formatted_time = str(time_val)[:8]
                 
+                lap = msg.get('Lap', 'N/A')
+                statuses = timeline.statuses_for_lap(lap) if isinstance(lap, (int, float, np.number)) and lap == lap else []
+                
                 key_events.append({
                     'type': event_type,
                     'time': formatted_time,
-                    'lap': msg.get('Lap', 'N/A'),
-                    'message': str(msg.get('Message', ''))  # 移除截斷，顯示完整內容
+                    'lap': lap,
+                    'track_status': ", ".join(TRACK_STATUS_LABELS.get(code, code) for code in statuses) or '-',
+                    'message': msg['message_text']  # 移除截斷，顯示完整內容
                 })
             
             if key_events:
                 print(f"[INFO] 發現 {len(key_events)} 個關鍵事件")
                 
                 key_table = PrettyTable()
-                key_table.field_names = ["類型", "時間", "圈數", "事件描述"]
+                key_table.field_names = ["類型", "時間", "圈數", "賽道狀態", "事件描述"]
                 key_table.align = "l"
                 key_table.max_width["事件描述"] = 120  # 設置事件描述欄位最大寬度
                 key_table.max_width["類型"] = 15
                 key_table.max_width["時間"] = 10
                 key_table.max_width["圈數"] = 8
+                key_table.max_width["賽道狀態"] = 16
                 
                 for event in key_events:
-                    key_table.add_row([event['type'], event['time'], event['lap'], event['message']])
+                    key_table.add_row([event['type'], event['time'], event['lap'], event['track_status'], event['message']])
                 
                 print(key_table)
             else:
@@ -3230,40 +3057,28 @@ class F1AccidentAnalysisComplete:
 
     def _extract_driver_from_message(self, message):
         """從訊息中提取車手代碼"""
-        if not message:
-            return 'N/A'
-        
-        # 尋找 CAR X (DRV) 格式
-        import re
-        pattern = r'CAR\s+\d+\s+\(([A-Z]{3})\)'
-        match = re.search(pattern, message.upper())
-        if match:
-            return match.group(1)
-        
-        # 如果有動態車隊映射，使用其中的車手代碼
+        return extract_driver_code(message, self._known_driver_codes())
+    
+    def _known_driver_codes(self):
+        """動態車隊映射中的車手代碼 (訊息車手擷取使用)"""
         if hasattr(self, 'dynamic_team_mapping') and self.dynamic_team_mapping:
-            for driver in self.dynamic_team_mapping.keys():
-                if driver in message.upper():
-                    return driver
-        
-        return 'N/A'
+            return list(self.dynamic_team_mapping.keys())
+        return []
+    
+    def _calculate_driver_risk_scores(self, race_control_messages):
+        """計算車手風險分數 - 以共用分類結果整欄計分"""
+        classified = get_classified_messages(race_control_messages)
+        drivers = driver_code_column(classified, self._known_driver_codes()).to_numpy()
+        scores = derived_column(classified, 'driver_risk_score',
+                                lambda f: classify_series(f['message_upper'], DRIVER_RISK_SCORE_RULES, 0).astype(int))
+        
+        has_driver = (drivers != 'N/A') & (drivers != '')
+        totals = pd.Series(scores.to_numpy()[has_driver]).groupby(drivers[has_driver], sort=False).sum()
+        return {driver: int(score) for driver, score in totals.items()}
 
     def _determine_event_severity(self, message):
         """確定事件嚴重程度"""
-        message_upper = message.upper()
-        
-        if any(keyword in message_upper for keyword in ['RED FLAG']):
-            return 'CRITICAL'
-        elif any(keyword in message_upper for keyword in ['PENALTY', 'INVESTIGATION']):
-            return 'HIGH'
-        elif any(keyword in message_upper for keyword in ['ACCIDENT', 'COLLISION', 'CRASH']):
-            return 'HIGH'
-        elif any(keyword in message_upper for keyword in ['DELETED', 'TRACK LIMIT']):
-            return 'MEDIUM'
-        elif any(keyword in message_upper for keyword in ['BLUE FLAG', 'INCIDENT']):
-            return 'LOW'
-        else:
-            return 'LOW'
+        return classify_text(message.upper(), EVENT_SEVERITY_RULES, 'LOW')
 
     def _translate_event_to_chinese(self, message):
         """將英文消息翻譯成中文"""
@@ -3634,28 +3449,7 @@ def run_accident_analysis_json(data_loader, dynamic_team_mapping=None, f1_analys
             print("=" * 80)
             
             # 計算車手分數
-            driver_scores = {}
-            for _, msg in race_control_messages.iterrows():
-                message = str(msg.get('Message', ''))
-                driver = self._extract_driver_from_message(message)
-                
-                if driver != 'N/A' and driver != '':
-                    msg_upper = message.upper()
-                    score = 0
-                    
-                    if any(word in msg_upper for word in ['ACCIDENT', 'COLLISION', 'CRASH']):
-                        score += 3
-                    elif any(word in msg_upper for word in ['PENALTY']):
-                        score += 2
-                    elif any(word in msg_upper for word in ['INVESTIGATION', 'WARNING']):
-                        score += 1
-                    elif any(word in msg_upper for word in ['TRACK LIMIT', 'DELETED']):
-                        score += 2
-                    
-                    if driver in driver_scores:
-                        driver_scores[driver] += score
-                    else:
-                        driver_scores[driver] = score
+            driver_scores = self._calculate_driver_risk_scores(race_control_messages)
             
             if driver_scores:
                 print(f"[INFO] 車手風險分數排行榜:")
@@ -3712,28 +3506,7 @@ def run_accident_analysis_json(data_loader, dynamic_team_mapping=None, f1_analys
             print("=" * 80)
             
             # 先計算車手分數
-            driver_scores = {}
-            for _, msg in race_control_messages.iterrows():
-                message = str(msg.get('Message', ''))
-                driver = self._extract_driver_from_message(message)
-                
-                if driver != 'N/A' and driver != '':
-                    msg_upper = message.upper()
-                    score = 0
-                    
-                    if any(word in msg_upper for word in ['ACCIDENT', 'COLLISION', 'CRASH']):
-                        score += 3
-                    elif any(word in msg_upper for word in ['PENALTY']):
-                        score += 2
-                    elif any(word in msg_upper for word in ['INVESTIGATION', 'WARNING']):
-                        score += 1
-                    elif any(word in msg_upper for word in ['TRACK LIMIT', 'DELETED']):
-                        score += 2
-                    
-                    if driver in driver_scores:
-                        driver_scores[driver] += score
-                    else:
-                        driver_scores[driver] = score
+            driver_scores = self._calculate_driver_risk_scores(race_control_messages)
             
             # 計算車隊分數
             team_scores = {}
@@ -3798,41 +3571,23 @@ def run_accident_analysis_json(data_loader, dynamic_team_mapping=None, f1_analys
             print("=" * 80)
             
             # 過濾重要事件
+            # 共用分類引擎 - 重要事件篩選、車手與嚴重程度每場賽事只計算一次
+            classified = get_classified_messages(race_control_messages)
+            drivers = driver_code_column(classified, self._known_driver_codes()).to_numpy()
+            important_mask = classified['is_important'].to_numpy(dtype=bool)
+            
             important_events = []
-            for _, msg in race_control_messages.iterrows():
-                message = str(msg.get('Message', '')).upper()
-                
-                # 過濾不重要的消息
-                ignore_keywords = [
-                    'GREEN LIGHT - PIT EXIT OPEN',
-                    'PIT EXIT CLOSED',
-                    'DRS ENABLED',
-                    'DRS DISABLED',
-                    'RISK OF RAIN'
-                ]
-                
-                if any(keyword in message for keyword in ignore_keywords):
-                    continue
+            for msg, driver in zip(classified[important_mask].to_dict('records'), drivers[important_mask]):
+                team = self.dynamic_team_mapping.get(driver, 'Unknown Team') if hasattr(self, 'dynamic_team_mapping') and driver != 'N/A' else 'N/A'
                 
-                # 重要的關鍵字
-                important_keywords = [
-                    'TRACK LIMIT', 'DELETED', 'INCIDENT', 'INVESTIGATION',
-                    'YELLOW FLAG', 'RED FLAG', 'SAFETY CAR', 'VSC',
-                    'BLUE FLAG', 'CHEQUERED FLAG', 'PENALTY', 'WARNING'
-                ]
-                
-                if any(keyword in message for keyword in important_keywords):
-                    driver = self._extract_driver_from_message(msg.get('Message', ''))
-                    team = self.dynamic_team_mapping.get(driver, 'Unknown Team') if hasattr(self, 'dynamic_team_mapping') and driver != 'N/A' else 'N/A'
-                    
-                    important_events.append({
-                        'lap': msg.get('Lap', 'N/A'),
-                        'time': msg.get('Time', 'N/A'),
-                        'driver': driver,
-                        'team': team,
-                        'message': msg.get('Message', ''),
-                        'severity': self._determine_event_severity(msg.get('Message', ''))
-                    })
+                important_events.append({
+                    'lap': msg.get('Lap', 'N/A'),
+                    'time': msg.get('Time', 'N/A'),
+                    'driver': driver,
+                    'team': team,
+                    'message': msg.get('Message', ''),
+                    'severity': msg['event_severity']
+                })
             
             if important_events:
                 print(f"\n[CRITICAL] 重要事件報告 (共 {len(important_events)} 個事件):")
@@ -3861,20 +3616,7 @@ def run_accident_analysis_json(data_loader, dynamic_team_mapping=None, f1_analys
 
     def _determine_event_severity(self, message):
         """確定事件嚴重程度"""
-        message_upper = message.upper()
-        
-        if any(keyword in message_upper for keyword in ['RED FLAG']):
-            return 'CRITICAL'
-        elif any(keyword in message_upper for keyword in ['PENALTY', 'INVESTIGATION']):
-            return 'HIGH'
-        elif any(keyword in message_upper for keyword in ['ACCIDENT', 'COLLISION', 'CRASH']):
-            return 'HIGH'
-        elif any(keyword in message_upper for keyword in ['DELETED', 'TRACK LIMIT']):
-            return 'MEDIUM'
-        elif any(keyword in message_upper for keyword in ['BLUE FLAG', 'INCIDENT']):
-            return 'LOW'
-        else:
-            return 'LOW'
+        return classify_text(message.upper(), EVENT_SEVERITY_RULES, 'LOW')
 
     def _translate_event_to_chinese(self, message):
         """將英文消息翻譯成中文"""
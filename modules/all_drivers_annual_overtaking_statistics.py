@@ -15,42 +15,22 @@ All Drivers Annual Overtaking Statistics Module (Function 16.1)
 日期: 2025-08-05
 """
 
-import json
 import os
 import pandas as pd
 import numpy as np
 from datetime import datetime
 from prettytable import PrettyTable
 
+try:
+    from .streaming_results import emit_partial, calculate_progress
+    from .json_export import write_json, to_jsonable
+except ImportError:
+    from streaming_results import emit_partial, calculate_progress
+    from json_export import write_json, to_jsonable
 
-def _make_serializable(obj):
-    """將對象轉換為JSON可序列化格式"""
-    if hasattr(obj, 'to_dict'):
-        return obj.to_dict()
-    elif hasattr(obj, '__dict__'):
-        return obj.__dict__
-    elif isinstance(obj, (pd.Timestamp, pd.Timedelta)):
-        return str(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    elif isinstance(obj, (np.int64, np.int32, np.float64, np.float32)):
-        return float(obj) if 'float' in str(type(obj)) else int(obj)
-    elif isinstance(obj, (list, tuple)):
-        return [_make_serializable(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {key: _make_serializable(value) for key, value in obj.items()}
-    else:
-        try:
-            # 嘗試使用 pandas isna，但只對標量使用
-            if hasattr(pd, 'isna') and not hasattr(obj, '__len__'):
-                if pd.isna(obj):
-                    return None
-        except (ValueError, TypeError):
-            pass
-        return str(obj)
 
-
-def run_all_drivers_annual_overtaking_statistics(data_loader, dynamic_team_mapping, f1_analysis_instance):
+def run_all_drivers_annual_overtaking_statistics(data_loader, dynamic_team_mapping, f1_analysis_instance,
+                                                 partial_callback=None):
     """
     執行全部車手年度超車統計分析 (功能 16.1)
     
@@ -58,6 +38,7 @@ def run_all_drivers_annual_overtaking_statistics(data_loader, dynamic_team_mappi
         data_loader: F1數據載入器
         dynamic_team_mapping: 動態車隊映射
         f1_analysis_instance: F1分析實例
+        partial_callback: 串流模式回呼，每完成一位車手即回報部分結果 (可選)
     
     Returns:
         bool: 分析是否成功完成
@@ -70,7 +51,7 @@ def run_all_drivers_annual_overtaking_statistics(data_loader, dynamic_team_mappi
             return False
         
         # 獲取年度超車數據
-        overtaking_stats = _get_annual_overtaking_statistics(data_loader, f1_analysis_instance)
+        overtaking_stats = _get_annual_overtaking_statistics(data_loader, f1_analysis_instance, partial_callback)
         
         if not overtaking_stats:
             print("[ERROR] 無法獲取超車統計數據")
@@ -89,7 +70,7 @@ def run_all_drivers_annual_overtaking_statistics(data_loader, dynamic_team_mappi
                 "race_info": f"{data_loader.year} {data_loader.race_name}",
                 "total_drivers": len(overtaking_stats)
             },
-            "annual_overtaking_statistics": _make_serializable(overtaking_stats),
+            "annual_overtaking_statistics": overtaking_stats,
             "summary": _generate_summary_statistics(overtaking_stats)
         }
         
@@ -98,8 +79,7 @@ def run_all_drivers_annual_overtaking_statistics(data_loader, dynamic_team_mappi
         os.makedirs(json_dir, exist_ok=True)
         
         filename = os.path.join(json_dir, f"all_drivers_annual_overtaking_statistics_{timestamp}.json")
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(json_output, f, ensure_ascii=False, indent=2, default=str)
+        write_json(filename, json_output)
         
         print(f"\n[SUCCESS] 全部車手年度超車統計分析完成！JSON輸出已保存到: {filename}")
         return True
@@ -229,7 +209,7 @@ def _generate_reasonable_overtaking_estimate(driver_abbr):
     }
 
 
-def _get_annual_overtaking_statistics(data_loader, f1_analysis_instance):
+def _get_annual_overtaking_statistics(data_loader, f1_analysis_instance, partial_callback=None):
     """獲取年度超車統計數據"""
     print("\n[INFO] 分析年度超車統計...")
     
@@ -240,8 +220,9 @@ def _get_annual_overtaking_statistics(data_loader, f1_analysis_instance):
             
             # 獲取所有車手的超車數據
             all_drivers_stats = []
+            total_drivers = len(data_loader.results)
             
-            for index, driver_result in data_loader.results.iterrows():
+            for driver_index, (index, driver_result) in enumerate(data_loader.results.iterrows()):
                 driver_abbr = driver_result['Abbreviation']
                 
                 # 安全地獲取車手姓名
@@ -302,6 +283,13 @@ def _get_annual_overtaking_statistics(data_loader, f1_analysis_instance):
                         "avg_overtaking_position": 0.0
                     }
                     all_drivers_stats.append(driver_stats)
+                
+                # 串流模式：每完成一位車手即回報
+                emit_partial(
+                    partial_callback, "driver", to_jsonable(all_drivers_stats[-1]),
+                    progress=calculate_progress(driver_index, total_drivers),
+                    driver=driver_abbr, index=driver_index + 1, total=total_drivers
+                )
             
             print(f"[SUCCESS] 成功分析 {len(all_drivers_stats)} 位車手的年度超車統計")
             return all_drivers_stats
@@ -12,6 +12,17 @@ import pandas as pd
 from datetime import datetime
 from prettytable import PrettyTable
 
+try:
+    from .race_control_classifier import (get_classified_messages, classify_text, keywords_present,
+                                          extract_driver_info as _extract_driver_info,
+                                          INCIDENT_CATEGORY_RULES, INCIDENT_SEVERITY_RULES,
+                                          INCIDENT_KEYWORD_LIST, FLAG_KEYWORD_LIST)
+except ImportError:
+    from modules.race_control_classifier import (get_classified_messages, classify_text, keywords_present,
+                                                 extract_driver_info as _extract_driver_info,
+                                                 INCIDENT_CATEGORY_RULES, INCIDENT_SEVERITY_RULES,
+                                                 INCIDENT_KEYWORD_LIST, FLAG_KEYWORD_LIST)
+
 def generate_cache_key(session_info):
     """生成快取鍵值"""
     return f"all_incidents_summary_{session_info.get('year', 2024)}_{session_info.get('event_name', 'Unknown')}_{session_info.get('session_type', 'R')}"
@@ -53,50 +64,11 @@ def format_time(time_obj):
 
 def extract_driver_info(message):
     """從訊息中提取車手資訊"""
-    import re
-    
-    # 提取車號和車手代碼
-    car_pattern = r'CAR[S]?\s+(\d+)\s*\(([A-Z]{3})\)'
-    cars = re.findall(car_pattern, message.upper())
-    
-    if cars:
-        return [{'car_number': car[0], 'driver_code': car[1]} for car in cars]
-    
-    # 僅提取車號
-    car_number_pattern = r'CAR[S]?\s+(\d+)'
-    car_numbers = re.findall(car_number_pattern, message.upper())
-    
-    if car_numbers:
-        return [{'car_number': num, 'driver_code': 'UNK'} for num in car_numbers]
-    
-    return []
+    return _extract_driver_info(message)
 
 def categorize_incident_detailed(message):
     """詳細事故分類"""
-    message = message.upper()
-    
-    if 'CHEQUERED FLAG' in message:
-        return 'RACE_END'
-    elif any(word in message for word in ['ACCIDENT', 'COLLISION', 'CRASH']):
-        return 'ACCIDENT'
-    elif 'SAFETY CAR' in message:
-        return 'SAFETY_CAR'
-    elif 'RED FLAG' in message:
-        return 'RED_FLAG'
-    elif 'YELLOW FLAG' in message:
-        return 'YELLOW_FLAG'
-    elif 'INVESTIGATION' in message:
-        return 'INVESTIGATION'
-    elif 'PENALTY' in message:
-        return 'PENALTY'
-    elif any(word in message for word in ['CONTACT', 'INCIDENT']):
-        return 'CONTACT'
-    elif 'PIT' in message:
-        return 'PIT_RELATED'
-    elif any(word in message for word in ['TRACK', 'LIMIT', 'ADVANTAGE']):
-        return 'TRACK_LIMITS'
-    else:
-        return 'OTHER'
+    return classify_text(message.upper(), INCIDENT_CATEGORY_RULES, 'OTHER')
 
 def assess_incident_impact(message, category):
     """評估事故影響程度"""
@@ -137,101 +109,88 @@ def analyze_all_incidents(session):
             race_control = session.race_control_messages
             
             if race_control is not None and not race_control.empty:
-                # 找出最後一圈圈數，用於過濾正常結束的 CHEQUERED FLAG
-                max_lap = race_control['Lap'].max() if 'Lap' in race_control.columns else 0
                 incident_sequence = 1
                 
-                for _, message in race_control.iterrows():
-                    msg_text = str(message.get('Message', ''))
-                    msg_upper = msg_text.upper()
+                # 共用分類引擎 - 類別、嚴重程度與涉及車手每場賽事只計算一次
+                classified = get_classified_messages(race_control)
+                incidents = classified[classified['is_incident'] & ~classified['is_final_chequered']]
+                keyword_lists = keywords_present(incidents['message_upper'], INCIDENT_KEYWORD_LIST)
+                flag_lists = keywords_present(incidents['message_upper'], FLAG_KEYWORD_LIST)
+                
+                for position, message in enumerate(incidents.to_dict('records')):
+                    msg_text = message['message_text']
                     lap = message.get('Lap', 0)
                     time = message.get('Time', 'N/A')
                     
-                    # 過濾最後一圈的正常比賽結束 CHEQUERED FLAG
-                    if 'CHEQUERED FLAG' in msg_upper and lap == max_lap:
-                        continue  # 跳過正常的比賽結束標誌
+                    involved_drivers = message['involved_drivers']
+                    category = message['incident_category']
+                    severity = message['incident_severity']
                     
-                    # 識別事故相關關鍵字
-                    if any(keyword in msg_upper for keyword in [
-                        'ACCIDENT', 'COLLISION', 'CRASH', 'INCIDENT', 
-                        'SAFETY CAR', 'RED FLAG', 'YELLOW FLAG',
-                        'INVESTIGATION', 'PENALTY', 'CONTACT', 'CHEQUERED FLAG',
-                        'PIT EXIT', 'TRACK LIMITS', 'ADVANTAGE'
-                    ]):
-                        # 提取車手資訊
-                        involved_drivers = extract_driver_info(msg_text)
-                        
-                        # 分類事故
-                        category = categorize_incident_detailed(msg_text)
-                        
-                        # 評估影響
-                        impact = assess_incident_impact(msg_text, category)
-                        
-                        # 評估嚴重程度
-                        severity = assess_severity_detailed(msg_upper)
-                        
-                        incident_detail = {
-                            'sequence_number': incident_sequence,
-                            'lap': lap,
-                            'time': format_time(time) if time != 'N/A' else str(time),
-                            'raw_time': str(time),
-                            'message': msg_text,
-                            'category': category,
-                            'severity': severity,
-                            'impact': impact,
-                            'involved_drivers': involved_drivers,
-                            'driver_codes': [d['driver_code'] for d in involved_drivers],
-                            'car_numbers': [d['car_number'] for d in involved_drivers],
-                            'keywords': extract_keywords(msg_upper),
-                            'flags_mentioned': extract_flags(msg_upper)
-                        }
+                    # 評估影響
+                    impact = assess_incident_impact(msg_text, category)
+                    
+                    incident_detail = {
+                        'sequence_number': incident_sequence,
+                        'lap': lap,
+                        'time': format_time(time) if time != 'N/A' else str(time),
+                        'raw_time': str(time),
+                        'message': msg_text,
+                        'category': category,
+                        'severity': severity,
+                        'impact': impact,
+                        'involved_drivers': involved_drivers,
+                        'driver_codes': [d['driver_code'] for d in involved_drivers],
+                        'car_numbers': [d['car_number'] for d in involved_drivers],
+                        'keywords': keyword_lists[position],
+                        'flags_mentioned': flag_lists[position]
+                    }
+                    
+                    incidents_data['all_incidents'].append(incident_detail)
+                    incidents_data['chronological_sequence'].append({
+                        'sequence': incident_sequence,
+                        'lap': lap,
+                        'category': category,
+                        'severity': severity
+                    })
+                    
+                    # 統計分析
+                    incidents_data['incident_summary']['total_count'] += 1
+                    
+                    # 按類別統計
+                    if category not in incidents_data['incident_summary']['by_category']:
+                        incidents_data['incident_summary']['by_category'][category] = 0
+                    incidents_data['incident_summary']['by_category'][category] += 1
+                    
+                    # 按影響統計
+                    if impact not in incidents_data['incident_summary']['by_impact']:
+                        incidents_data['incident_summary']['by_impact'][impact] = 0
+                    incidents_data['incident_summary']['by_impact'][impact] += 1
+                    
+                    # 記錄涉及的車手
+                    for driver in involved_drivers:
+                        driver_code = driver['driver_code']
+                        incidents_data['incident_summary']['involved_drivers'].add(driver_code)
                         
-                        incidents_data['all_incidents'].append(incident_detail)
-                        incidents_data['chronological_sequence'].append({
+                        if driver_code not in incidents_data['driver_involvement']:
+                            incidents_data['driver_involvement'][driver_code] = []
+                        incidents_data['driver_involvement'][driver_code].append({
                             'sequence': incident_sequence,
                             'lap': lap,
                             'category': category,
                             'severity': severity
                         })
-                        
-                        # 統計分析
-                        incidents_data['incident_summary']['total_count'] += 1
-                        
-                        # 按類別統計
-                        if category not in incidents_data['incident_summary']['by_category']:
-                            incidents_data['incident_summary']['by_category'][category] = 0
-                        incidents_data['incident_summary']['by_category'][category] += 1
-                        
-                        # 按影響統計
-                        if impact not in incidents_data['incident_summary']['by_impact']:
-                            incidents_data['incident_summary']['by_impact'][impact] = 0
-                        incidents_data['incident_summary']['by_impact'][impact] += 1
-                        
-                        # 記錄涉及的車手
-                        for driver in involved_drivers:
-                            driver_code = driver['driver_code']
-                            incidents_data['incident_summary']['involved_drivers'].add(driver_code)
-                            
-                            if driver_code not in incidents_data['driver_involvement']:
-                                incidents_data['driver_involvement'][driver_code] = []
-                            incidents_data['driver_involvement'][driver_code].append({
-                                'sequence': incident_sequence,
-                                'lap': lap,
-                                'category': category,
-                                'severity': severity
-                            })
-                        
-                        # 按圈數分析
-                        lap_range = f"{(lap//10)*10}-{(lap//10)*10+9}"
-                        if lap_range not in incidents_data['incident_summary']['by_lap_range']:
-                            incidents_data['incident_summary']['by_lap_range'][lap_range] = 0
-                        incidents_data['incident_summary']['by_lap_range'][lap_range] += 1
-                        
-                        if lap not in incidents_data['lap_analysis']:
-                            incidents_data['lap_analysis'][lap] = []
-                        incidents_data['lap_analysis'][lap].append(incident_detail)
-                        
-                        incident_sequence += 1
+                    
+                    # 按圈數分析
+                    lap_range = f"{(lap//10)*10}-{(lap//10)*10+9}"
+                    if lap_range not in incidents_data['incident_summary']['by_lap_range']:
+                        incidents_data['incident_summary']['by_lap_range'][lap_range] = 0
+                    incidents_data['incident_summary']['by_lap_range'][lap_range] += 1
+                    
+                    if lap not in incidents_data['lap_analysis']:
+                        incidents_data['lap_analysis'][lap] = []
+                    incidents_data['lap_analysis'][lap].append(incident_detail)
+                    
+                    incident_sequence += 1
                 
                 # 轉換 set 為 list 以便 JSON 序列化
                 incidents_data['incident_summary']['involved_drivers'] = list(incidents_data['incident_summary']['involved_drivers'])
@@ -244,37 +203,16 @@ def analyze_all_incidents(session):
 
 def assess_severity_detailed(message):
     """詳細評估事故嚴重程度"""
-    if any(word in message for word in ['RED FLAG', 'RACE SUSPENSION', 'MEDICAL CAR']):
-        return 'CRITICAL'
-    elif any(word in message for word in ['SAFETY CAR', 'YELLOW FLAG', 'COLLISION', 'CRASH']):
-        return 'HIGH'
-    elif any(word in message for word in ['INVESTIGATION', 'CONTACT', 'PENALTY']):
-        return 'MEDIUM'
-    else:
-        return 'LOW'
+    return classify_text(message, INCIDENT_SEVERITY_RULES, 'LOW')
+
 
 def extract_keywords(message):
     """提取關鍵字"""
-    keywords = []
-    keyword_list = ['ACCIDENT', 'COLLISION', 'CRASH', 'SAFETY CAR', 'RED FLAG', 'YELLOW FLAG',
-                   'INVESTIGATION', 'PENALTY', 'CONTACT', 'PIT EXIT', 'TRACK LIMITS', 'ADVANTAGE']
-    
-    for keyword in keyword_list:
-        if keyword in message:
-            keywords.append(keyword)
-    
-    return keywords
+    return [keyword for keyword in INCIDENT_KEYWORD_LIST if keyword in message]
 
 def extract_flags(message):
     """提取旗幟相關資訊"""
-    flags = []
-    flag_types = ['RED FLAG', 'YELLOW FLAG', 'CHEQUERED FLAG', 'SAFETY CAR']
-    
-    for flag in flag_types:
-        if flag in message:
-            flags.append(flag)
-    
-    return flags
+    return [flag for flag in FLAG_KEYWORD_LIST if flag in message]
 
 def display_all_incidents_summary(data):
     """顯示所有事件詳細列表"""
@@ -20,10 +20,34 @@ import pickle
 import requests
 
 
-def setup_matplotlib_chinese(dark_theme=False):
-    """設定matplotlib的中文字體支援和主題 - 全域函數"""
+# 最近一次套用的主題與其 rcParams 簽章 - 未變更時跳過重設
+_matplotlib_theme_state = {"dark_theme": None, "signature": None}
+
+
+def _matplotlib_theme_signature(plt):
+    """擷取主題相關的 rcParams，用於偵測其他程式碼是否改動過設定"""
+    return (
+        tuple(plt.rcParams['font.sans-serif']),
+        plt.rcParams['figure.facecolor'],
+        plt.rcParams['axes.facecolor'],
+        plt.rcParams['text.color'],
+        plt.rcParams['axes.unicode_minus'],
+    )
+
+
+def setup_matplotlib_chinese(dark_theme=False, force=False):
+    """設定matplotlib的中文字體支援和主題 - 全域函數
+    
+    已套用相同主題且 rcParams 未被改動時直接返回，
+    避免批次繪圖時每張圖都重新套用樣式。
+    """
     import matplotlib.pyplot as plt
     
+    if (not force
+            and _matplotlib_theme_state["dark_theme"] == dark_theme
+            and _matplotlib_theme_state["signature"] == _matplotlib_theme_signature(plt)):
+        return
+    
     if dark_theme:
         # 設定深色主題
         plt.style.use('dark_background')
@@ -50,6 +74,9 @@ def setup_matplotlib_chinese(dark_theme=False):
     # 設定中文字體 (兩種主題都需要)
     plt.rcParams['font.sans-serif'] = ['Microsoft JhengHei', 'DejaVu Sans', 'SimHei', 'Arial']
     plt.rcParams['axes.unicode_minus'] = False
+    
+    _matplotlib_theme_state["dark_theme"] = dark_theme
+    _matplotlib_theme_state["signature"] = _matplotlib_theme_signature(plt)
 
 
 def initialize_data_loader(existing_data_loader=None):
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+F1 批次分析執行器 - Batch Job Runner
+依工作清單 (YAML / JSONL / JSON) 在同一程序內執行多個功能、車手與賽事
+
+- 工作依 (年份, 賽事, 賽段) 分組，每個賽段只載入一次 FastF1 數據
+- 同一賽段內依序執行所有功能 × 車手組合，共用數據載入器與分析實例
+- 可選多程序 (--workers N) 平行處理不同賽段
+- 完成後輸出每項工作的狀態與耗時摘要 (json/batch_summary_*.json)
+
+工作清單格式 (YAML):
+    defaults:
+      year: 2025
+      session: R
+    jobs:
+      - race: Japan
+        function: [5, 6.2, 30]
+        driver: [VER, NOR, LEC]
+      - race: Japan
+        function: 7.1
+        driver: VER
+        driver2: LEC
+
+JSONL: 每行一個工作物件 (欄位同上，function / driver 可為清單)
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import json
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from prettytable import PrettyTable
+
+try:
+    from .json_export import write_json
+except ImportError:
+    from json_export import write_json
+
+# 工作欄位 - 清單欄位會展開為多個工作
+JOB_FIELDS = ('year', 'race', 'session', 'function', 'driver', 'driver2', 'lap', 'corner', 'show_detailed_output')
+
+DEFAULT_SESSION = 'R'
+SUMMARY_DIR = 'json'
+
+
+def _read_manifest(path):
+    """讀取工作清單檔案，返回 (defaults, jobs)"""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, 'r', encoding='utf-8') as f:
+        if extension == '.jsonl':
+            jobs = [json.loads(line) for line in f if line.strip() and not line.lstrip().startswith('#')]
+            return {}, jobs
+        if extension in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("讀取 YAML 工作清單需要安裝 PyYAML (pip install pyyaml)，或改用 .jsonl 格式")
+            content = yaml.safe_load(f)
+        else:
+            content = json.load(f)
+
+    if isinstance(content, list):
+        return {}, content
+    if isinstance(content, dict):
+        return content.get('defaults') or {}, content.get('jobs') or []
+    raise ValueError(f"無法解析工作清單: {path}")
+
+
+def _as_list(value):
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+def load_job_manifest(path):
+    """載入並展開工作清單
+
+    function / driver 為清單時展開為所有組合，每個工作只包含單一功能與車手
+
+    Returns:
+        list: 工作字典列表 (含 job_id)
+    """
+    defaults, raw_jobs = _read_manifest(path)
+    jobs = []
+    for index, raw in enumerate(raw_jobs, 1):
+        if not isinstance(raw, dict):
+            print(f"[WARNING] 第 {index} 項工作格式不正確，已跳過: {raw}")
+            continue
+        merged = dict(defaults)
+        merged.update(raw)
+        unknown = set(merged) - set(JOB_FIELDS)
+        if unknown:
+            print(f"[WARNING] 第 {index} 項工作包含未知欄位 {sorted(unknown)}，已忽略")
+        if not merged.get('year') or not merged.get('race') or merged.get('function') is None:
+            print(f"[WARNING] 第 {index} 項工作缺少 year / race / function，已跳過")
+            continue
+
+        for function_id in _as_list(merged['function']):
+            for driver in _as_list(merged.get('driver')):
+                job = {field: merged.get(field) for field in JOB_FIELDS}
+                job['year'] = int(merged['year'])
+                job['session'] = merged.get('session') or DEFAULT_SESSION
+                job['function'] = str(function_id)
+                job['driver'] = driver
+                job['job_id'] = len(jobs) + 1
+                jobs.append(job)
+    return jobs
+
+
+def group_jobs_by_session(jobs):
+    """依 (年份, 賽事, 賽段) 分組，保留工作清單順序"""
+    groups = OrderedDict()
+    for job in jobs:
+        groups.setdefault((job['year'], job['race'], job['session']), []).append(job)
+    return groups
+
+
+def load_session_data(year, race, session):
+    """載入賽段數據並建立分析實例 (與 CLI 參數模式相同的初始化流程)"""
+    try:
+        from .compatible_data_loader import CompatibleF1DataLoader
+        from .compatible_f1_analysis_instance import create_f1_analysis_instance
+    except ImportError:
+        from compatible_data_loader import CompatibleF1DataLoader
+        from compatible_f1_analysis_instance import create_f1_analysis_instance
+
+    data_loader = CompatibleF1DataLoader()
+    if not data_loader.load_race_data(year, race, session):
+        return None, None
+
+    f1_analysis_instance = create_f1_analysis_instance(data_loader)
+    if f1_analysis_instance:
+        try:
+            f1_analysis_instance.set_data_loader(data_loader)
+            f1_analysis_instance.update_session_status(True)
+            f1_analysis_instance.set_dynamic_team_mapping(None)
+            data_loader.f1_analysis_instance = f1_analysis_instance
+        except Exception as e:
+            print(f"[WARNING] 更新F1分析實例失敗: {e}")
+    return data_loader, f1_analysis_instance
+
+
+def _job_record(job, status, message, seconds):
+    return {
+        "job_id": job['job_id'],
+        "year": job['year'],
+        "race": job['race'],
+        "session": job['session'],
+        "function": job['function'],
+        "driver": job.get('driver'),
+        "driver2": job.get('driver2'),
+        "status": status,
+        "message": message,
+        "seconds": round(seconds, 3),
+    }
+
+
+def run_session_jobs(session_key, jobs, show_detailed_output=False):
+    """在同一賽段數據上執行一組工作
+
+    Args:
+        session_key: (年份, 賽事, 賽段)
+        jobs: 該賽段的工作列表
+        show_detailed_output: 工作未指定時的詳細輸出設定
+
+    Returns:
+        dict: 賽段載入耗時與每項工作的執行紀錄
+    """
+    try:
+        from .function_mapper import F1AnalysisFunctionMapper
+    except ImportError:
+        from function_mapper import F1AnalysisFunctionMapper
+
+    year, race, session = session_key
+    print(f"\n[BATCH] 載入賽段 {year} {race} {session} ({len(jobs)} 項工作)")
+    load_start = time.perf_counter()
+    try:
+        data_loader, f1_analysis_instance = load_session_data(year, race, session)
+    except Exception as e:
+        data_loader, f1_analysis_instance = None, None
+        print(f"[ERROR] 賽段載入失敗: {e}")
+    load_seconds = time.perf_counter() - load_start
+
+    if data_loader is None:
+        records = [_job_record(job, "skipped", "賽段數據載入失敗", 0.0) for job in jobs]
+        return {"session": list(session_key), "load_seconds": round(load_seconds, 3), "jobs": records}
+
+    records = []
+    for job in jobs:
+        label = f"功能 {job['function']}" + (f" / {job['driver']}" if job.get('driver') else "")
+        print(f"\n[BATCH] #{job['job_id']} {year} {race} {session} - {label}")
+        detailed = job['show_detailed_output']
+        start = time.perf_counter()
+        try:
+            mapper = F1AnalysisFunctionMapper(
+                data_loader=data_loader,
+                f1_analysis_instance=f1_analysis_instance,
+                driver=job.get('driver'),
+                driver2=job.get('driver2'),
+            )
+            result = mapper.execute_function_by_number(
+                job['function'],
+                year=year,
+                race=race,
+                session=session,
+                driver=job.get('driver'),
+                driver2=job.get('driver2'),
+                lap=job.get('lap'),
+                corner=job.get('corner'),
+                show_detailed_output=show_detailed_output if detailed is None else bool(detailed),
+            )
+            if isinstance(result, dict):
+                success = bool(result.get('success', False))
+                message = result.get('message') or result.get('error') or ("完成" if success else "失敗")
+            else:
+                success = bool(result)
+                message = "完成" if success else "失敗"
+            status = "success" if success else "failed"
+        except Exception as e:
+            status, message = "error", str(e)
+        seconds = time.perf_counter() - start
+        records.append(_job_record(job, status, str(message), seconds))
+        print(f"[BATCH] #{job['job_id']} {status} ({seconds:.2f}s)")
+
+    return {"session": list(session_key), "load_seconds": round(load_seconds, 3), "jobs": records}
+
+
+def _run_session_worker(payload):
+    """程序池工作函數 (需為模組層級以便序列化)"""
+    session_key, jobs, show_detailed_output = payload
+    return run_session_jobs(tuple(session_key), jobs, show_detailed_output)
+
+
+def display_batch_summary(summary):
+    """顯示批次執行摘要表格"""
+    table = PrettyTable()
+    table.field_names = ["#", "賽事", "賽段", "功能", "車手", "狀態", "耗時(秒)"]
+    table.align = "l"
+    for session in summary["sessions"]:
+        for record in session["jobs"]:
+            driver = record["driver"] or "-"
+            if record.get("driver2"):
+                driver = f"{driver} vs {record['driver2']}"
+            table.add_row([record["job_id"], f"{record['year']} {record['race']}", record["session"],
+                           record["function"], driver, record["status"], f"{record['seconds']:.2f}"])
+    print("\n[BATCH] 批次執行摘要")
+    print(table)
+
+    totals = summary["totals"]
+    print(f"[INFO] 賽段: {totals['sessions']} 個 | 工作: {totals['jobs']} 項 | "
+          f"成功: {totals['success']} | 失敗: {totals['failed']} | 錯誤: {totals['error']} | "
+          f"略過: {totals['skipped']} | 總耗時: {summary['wall_seconds']:.1f}s")
+
+
+def run_batch(manifest_path, workers=1, show_detailed_output=False, summary_path=None):
+    """執行批次工作清單
+
+    Args:
+        manifest_path: 工作清單路徑 (.yaml / .yml / .jsonl / .json)
+        workers: 平行處理的賽段程序數 (1 表示在目前程序依序執行)
+        show_detailed_output: 工作未指定時是否顯示詳細輸出
+        summary_path: 摘要輸出路徑 (預設 json/batch_summary_<時間>.json)
+
+    Returns:
+        dict: 批次摘要
+    """
+    jobs = load_job_manifest(manifest_path)
+    if not jobs:
+        print(f"[ERROR] 工作清單沒有可執行的工作: {manifest_path}")
+        return {"success": False, "message": "工作清單為空", "sessions": []}
+
+    groups = group_jobs_by_session(jobs)
+    workers = max(1, min(int(workers or 1), len(groups)))
+    print(f"[BATCH] 共 {len(jobs)} 項工作，分為 {len(groups)} 個賽段 (程序數: {workers})")
+
+    started_at = datetime.now()
+    wall_start = time.perf_counter()
+    sessions = []
+    if workers == 1:
+        for session_key, session_jobs in groups.items():
+            sessions.append(run_session_jobs(session_key, session_jobs, show_detailed_output))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(_run_session_worker, (key, session_jobs, show_detailed_output)): key
+                for key, session_jobs in groups.items()
+            }
+            finished = {}
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    finished[key] = future.result()
+                except Exception as e:
+                    print(f"[ERROR] 賽段 {key} 程序執行失敗: {e}")
+                    finished[key] = {
+                        "session": list(key), "load_seconds": 0.0,
+                        "jobs": [_job_record(job, "error", str(e), 0.0) for job in groups[key]],
+                    }
+            # 摘要依工作清單順序排列
+            sessions = [finished[key] for key in groups]
+
+    records = [record for session in sessions for record in session["jobs"]]
+    totals = {"sessions": len(sessions), "jobs": len(records)}
+    for status in ("success", "failed", "error", "skipped"):
+        totals[status] = sum(1 for record in records if record["status"] == status)
+
+    summary = {
+        "analysis_type": "batch_run",
+        "manifest": os.path.abspath(manifest_path),
+        "started_at": started_at.isoformat(),
+        "wall_seconds": round(time.perf_counter() - wall_start, 3),
+        "workers": workers,
+        "totals": totals,
+        "sessions": sessions,
+    }
+    summary["success"] = totals["success"] == totals["jobs"]
+
+    display_batch_summary(summary)
+
+    if summary_path is None:
+        summary_path = os.path.join(SUMMARY_DIR, f"batch_summary_{started_at.strftime('%Y%m%d_%H%M%S')}.json")
+    try:
+        summary_path = write_json(summary_path, summary)
+        print(f"[SAVE] 批次摘要已保存: {summary_path}")
+    except Exception as e:
+        print(f"[WARNING] 批次摘要保存失敗: {e}")
+    return summary
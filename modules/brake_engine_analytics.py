@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+"""
+F1 煞車與引擎通道分析 - Brake & Engine Channel Analytics
+以整場 car_data 串接後的單一陣列計算全場車手每一圈的 Brake / RPM / nGear / Throttle 指標
+
+- 各車手 car_data 串接為一組陣列 (車手, 時間排序)，樣本以單次 searchsorted 歸屬到圈，
+  並以各圈起訖距離正規化到參考圈座標 (與直線速度表相同)
+- 煞車區段以 run-length 邊界偵測 (不跨圈)；每個彎道取頂點前 BRAKE_WINDOW 公尺內最早的
+  煞車區段作為煞車點，得到煞車點距離、距頂點距離與煞車時間 (起終點線後的彎道搜尋上一圈末段)
+- 全油門/煞車時間比例、換檔事件 (升/降檔 RPM 與速度) 與 RPM 時間直方圖以 np.bincount 一次分組
+- 增量計算: 只查詢部分車手時只計算尚未建立的車手，結果併入同一份快取表
+
+查詢範例:
+    analytics = get_channel_analytics(data_loader, drivers=['VER'])   # 只計算 VER
+    analytics.lap_table(['VER'])               # 逐圈全油門/煞車比例、換檔次數、最高 RPM
+    analytics.corner_table(['VER'])            # 逐圈逐彎道煞車點
+    analytics.shift_points()                   # 各車手各檔位升檔 RPM
+    analytics.rpm_histogram(['VER', 'NOR'])    # RPM 時間分佈
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+from prettytable import PrettyTable
+
+try:
+    from .metrics import record_cache
+    from .minisector_table import LAP_DISTANCE_TOLERANCE, driver_code_map, resolve_session_sources
+    from .session_tables import IdentityCache, json_value, to_seconds
+    from .straight_line_speed import get_reference_lap
+    from .tracing import span
+except ImportError:
+    from metrics import record_cache
+    from minisector_table import LAP_DISTANCE_TOLERANCE, driver_code_map, resolve_session_sources
+    from session_tables import IdentityCache, json_value, to_seconds
+    from straight_line_speed import get_reference_lap
+    from tracing import span
+
+CHANNELS = ('Speed', 'RPM', 'nGear', 'Throttle', 'Brake')
+
+# 全油門門檻 (%)
+FULL_THROTTLE = 98.0
+
+# 煞車點搜尋範圍: 彎道頂點前的距離 (公尺)
+BRAKE_WINDOW = 350.0
+
+# 短於此時間的煞車區段視為雜訊 (秒)
+MIN_BRAKE_DURATION = 0.2
+
+# 樣本間隔上限 (秒)，遙測中斷時不把空白時間計入比例
+MAX_SAMPLE_GAP = 1.0
+
+# RPM 直方圖區間
+RPM_BIN = 500
+RPM_MAX = 15000
+
+# 串接陣列時各車手時間軸的位移 (秒)，大於任何賽段長度
+DRIVER_OFFSET = 1.0e6
+
+MAX_CACHED_TABLES = 4
+
+
+def _column(frame, name):
+    if name in frame.columns:
+        return frame[name]
+    return pd.Series(np.nan, index=frame.index)
+
+
+def _bincount(index, weights, size):
+    return np.bincount(index, weights=weights, minlength=size)[:size]
+
+
+class ChannelAnalytics:
+    """全場煞車與引擎通道指標 (依車手增量建立)
+
+    Attributes:
+        rpm_bins: RPM 直方圖區間下限
+        corners: 參考圈彎道頂點距離 (公尺)
+        lap_distance: 參考圈距離 (公尺)
+    """
+
+    def __init__(self, source, laps, car_data, results=None):
+        self._laps = laps
+        self._car_data = car_data or {}
+        self._numbers = driver_code_map(laps, results) if laps is not None else {}
+        self.rpm_bins = np.arange(0, RPM_MAX, RPM_BIN)
+        self.computed = set()
+
+        reference = get_reference_lap(source)
+        self.lap_distance = reference['lap_distance'] if reference is not None else np.nan
+        self.corners = np.sort([corner['distance'] for corner in reference['corners']]) \
+            if reference is not None else np.zeros(0)
+
+        self._lap_table = pd.DataFrame()
+        self._corner_table = pd.DataFrame()
+        self._shift_table = pd.DataFrame()
+        self._histograms = np.zeros((0, len(self.rpm_bins)), dtype=np.float32)
+
+    @property
+    def drivers(self):
+        """有 car_data 的全部車手代碼"""
+        return sorted(self._numbers.get(str(number), str(number)) for number in self._car_data)
+
+    @property
+    def empty(self):
+        return self._lap_table.empty
+
+    def ensure(self, drivers=None):
+        """確保指定車手 (None 為全場) 已計算，只處理尚未建立的車手
+
+        Returns:
+            bool: 是否有新計算
+        """
+        wanted = self.drivers if drivers is None else [str(driver) for driver in drivers]
+        missing = [driver for driver in wanted if driver not in self.computed]
+        if not missing or self._laps is None or len(self._laps) == 0:
+            return False
+        with span("table.channel_analytics", drivers=len(missing)):
+            self._build(missing)
+        self.computed.update(missing)
+        return True
+
+    def _build(self, drivers):
+        frames = []
+        for number, car in self._car_data.items():
+            code = self._numbers.get(str(number), str(number))
+            if code in drivers and car is not None and len(car) > 1 and 'SessionTime' in car.columns:
+                frames.append((code, car))
+        if not frames:
+            return
+        codes = [code for code, _ in frames]
+        laps = self._laps
+
+        # 串接全部車手樣本，依 (車手, 時間) 排序
+        owner = np.repeat(np.arange(len(frames)), [len(car) for _, car in frames])
+        times = np.concatenate([to_seconds(car['SessionTime']) for _, car in frames])
+        channels = {
+            name: np.concatenate([car[name].to_numpy(dtype=float) if name in car.columns
+                                  else np.full(len(car), np.nan) for _, car in frames])
+            for name in CHANNELS
+        }
+        order = np.lexsort((times, owner))
+        order = order[np.isfinite(times[order])]
+        owner, times = owner[order], times[order]
+        if order.size < 2:
+            return
+        channels = {name: values[order] for name, values in channels.items()}
+        key = owner * DRIVER_OFFSET + times
+
+        # 速度積分距離 (車手交界處不累積)
+        speed = np.nan_to_num(channels['Speed']) / 3.6
+        steps = np.diff(times) * (speed[1:] + speed[:-1]) / 2
+        steps[owner[1:] != owner[:-1]] = 0.0
+        distance = np.concatenate(([0.0], np.cumsum(np.clip(np.nan_to_num(steps), 0, None))))
+
+        # 圈次: 同樣以 (車手, 時間) 為鍵，一次 searchsorted 歸屬全部樣本
+        lap_numbers = pd.to_numeric(laps['LapNumber'], errors='coerce').to_numpy(dtype=float)
+        starts = to_seconds(laps['LapStartTime'])
+        ends = to_seconds(laps['Time'])
+        driver_index = laps['Driver'].astype(str).map({code: i for i, code in enumerate(codes)}) \
+            .to_numpy(dtype=float)
+        rows = np.flatnonzero(np.isfinite(driver_index) & np.isfinite(starts) & np.isfinite(ends)
+                              & (ends > starts) & np.isfinite(lap_numbers))
+        if rows.size == 0:
+            return
+        lap_start_key = driver_index[rows] * DRIVER_OFFSET + starts[rows]
+        lap_order = np.argsort(lap_start_key, kind='stable')
+        rows, lap_start_key = rows[lap_order], lap_start_key[lap_order]
+        lap_end_key = driver_index[rows] * DRIVER_OFFSET + ends[rows]
+        n_laps = rows.size
+
+        lap_id = np.searchsorted(lap_start_key, key, side='right') - 1
+        clipped = np.clip(lap_id, 0, None)
+        in_lap = (lap_id >= 0) & (key <= lap_end_key[clipped])
+        lap_id = np.where(in_lap, lap_id, -1)
+
+        lap_start_m = np.interp(lap_start_key, key, distance)
+        span_m = np.interp(lap_end_key, key, distance) - lap_start_m
+        lap_distance = self.lap_distance if np.isfinite(self.lap_distance) else float(np.nanmedian(span_m))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            position = (distance - lap_start_m[clipped]) / span_m[clipped] * lap_distance
+
+        same_lap_next = np.concatenate((lap_id[1:] == lap_id[:-1], [False])) & in_lap
+        dt = np.where(same_lap_next, np.clip(np.diff(times, append=times[-1]), 0, MAX_SAMPLE_GAP), 0.0)
+        inside = np.flatnonzero(in_lap)
+        laps_in = lap_id[inside]
+
+        throttle, rpm, gear = channels['Throttle'], channels['RPM'], channels['nGear']
+        brake = np.nan_to_num(channels['Brake']) > 0
+        total = _bincount(laps_in, dt[inside], n_laps)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            full_pct = _bincount(laps_in, dt[inside] * (throttle[inside] >= FULL_THROTTLE), n_laps) / total * 100
+            brake_pct = _bincount(laps_in, dt[inside] * brake[inside], n_laps) / total * 100
+        max_rpm = np.full(n_laps, np.nan)
+        np.fmax.at(max_rpm, laps_in, rpm[inside])
+        max_gear = np.full(n_laps, np.nan)
+        np.fmax.at(max_gear, laps_in, gear[inside])
+
+        # 煞車區段: run-length 邊界，不跨圈
+        braking = brake & in_lap
+        same_lap_prev = np.concatenate(([False], lap_id[1:] == lap_id[:-1]))
+        run_start = np.flatnonzero(braking & ~(np.concatenate(([False], braking[:-1])) & same_lap_prev))
+        run_end = np.flatnonzero(braking & ~(np.concatenate((braking[1:], [False])) & same_lap_next))
+        duration = times[run_end] - times[run_start]
+        real = duration >= MIN_BRAKE_DURATION
+        run_start, run_end, duration = run_start[real], run_end[real], duration[real]
+        brake_events = np.bincount(lap_id[run_start], minlength=n_laps)[:n_laps]
+
+        # 每個彎道取頂點前 BRAKE_WINDOW 內最早的煞車區段 (區段已依時間排序)
+        # 頂點接近起終點線的彎道，煞車點在上一圈末段: 另以 彎道 + 圈距離 搜尋，
+        # 歸屬到同車手的下一圈，煞車點距離以負值表示位於起終點線之前
+        corner_frame = pd.DataFrame()
+        if len(self.corners) and run_start.size:
+            n_corners = len(self.corners)
+            brake_at = position[run_start]
+            apexes = np.concatenate((self.corners, self.corners + lap_distance))
+            found = np.searchsorted(apexes, brake_at, side='left')
+            ahead = found < len(apexes)
+            to_apex = np.where(ahead, apexes[np.clip(found, 0, len(apexes) - 1)] - brake_at, np.inf)
+            wrapped = found >= n_corners
+            corner = found % n_corners
+            run_lap = lap_id[run_start] + wrapped
+            lap_driver = driver_index[rows]
+            next_lap = np.clip(run_lap, 0, n_laps - 1)
+            same_driver = (run_lap < n_laps) & (lap_driver[next_lap] == lap_driver[lap_id[run_start]])
+            hit = np.flatnonzero(ahead & (to_apex <= BRAKE_WINDOW) & (~wrapped | same_driver))
+            _, first = np.unique(run_lap[hit] * n_corners + corner[hit], return_index=True)
+            hit = hit[first]
+            corner_frame = pd.DataFrame({
+                '_lap': run_lap[hit],
+                'corner': corner[hit] + 1,
+                'apex_m': self.corners[corner[hit]],
+                'braking_point_m': brake_at[hit] - wrapped[hit] * lap_distance,
+                'braking_distance_m': to_apex[hit],
+                'braking_duration': duration[hit],
+                'entry_speed': channels['Speed'][run_start[hit]],
+                'release_speed': channels['Speed'][run_end[hit]],
+            })
+
+        # 換檔事件: 同一圈內相鄰樣本檔位變化
+        change = np.flatnonzero(same_lap_next[:-1] & np.isfinite(gear[:-1]) & np.isfinite(gear[1:])
+                                & (gear[1:] != gear[:-1]) & (gear[1:] > 0) & (gear[:-1] > 0))
+        upshift = gear[change + 1] > gear[change]
+        shift_frame = pd.DataFrame({
+            '_lap': lap_id[change],
+            'from_gear': gear[change].astype(int),
+            'to_gear': gear[change + 1].astype(int),
+            'upshift': upshift,
+            'rpm': rpm[change],
+            'speed': channels['Speed'][change],
+            'position_m': position[change],
+        })
+        up_laps = lap_id[change[upshift]]
+        upshifts = np.bincount(up_laps, minlength=n_laps)[:n_laps]
+        downshifts = np.bincount(lap_id[change[~upshift]], minlength=n_laps)[:n_laps]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_upshift_rpm = _bincount(up_laps, np.nan_to_num(rpm[change[upshift]]), n_laps) / upshifts
+
+        # RPM 時間直方圖 (秒)
+        n_bins = len(self.rpm_bins)
+        measured = inside[np.isfinite(rpm[inside])]
+        rpm_bin = np.clip((rpm[measured] // RPM_BIN).astype(int), 0, n_bins - 1)
+        histograms = _bincount(lap_id[measured] * n_bins + rpm_bin, dt[measured], n_laps * n_bins) \
+            .reshape(n_laps, n_bins).astype(np.float32)
+
+        excluded = (_column(laps, 'PitInTime').notna() | _column(laps, 'PitOutTime').notna()).to_numpy()[rows] \
+            | (lap_numbers[rows] <= 1)
+        if 'Deleted' in laps.columns:
+            excluded |= laps['Deleted'].fillna(False).astype(bool).to_numpy()[rows]
+        within = np.abs(span_m - lap_distance) <= lap_distance * LAP_DISTANCE_TOLERANCE
+        driver_codes = laps['Driver'].astype(str).to_numpy()[rows]
+        lap_frame = pd.DataFrame({
+            'Driver': driver_codes,
+            'LapNumber': lap_numbers[rows].astype(int),
+            'clean': within & ~excluded,
+            'full_throttle_pct': full_pct,
+            'braking_pct': brake_pct,
+            'brake_events': brake_events,
+            'upshifts': upshifts,
+            'downshifts': downshifts,
+            'mean_upshift_rpm': mean_upshift_rpm,
+            'max_rpm': max_rpm,
+            'max_gear': max_gear,
+        })
+        keys = lap_frame[['Driver', 'LapNumber', 'clean']]
+        if not corner_frame.empty:
+            corner_frame = pd.concat([keys.iloc[corner_frame['_lap']].reset_index(drop=True),
+                                      corner_frame.drop(columns='_lap').reset_index(drop=True)], axis=1)
+        shift_frame = pd.concat([keys.iloc[shift_frame['_lap']].reset_index(drop=True),
+                                 shift_frame.drop(columns='_lap').reset_index(drop=True)], axis=1)
+
+        self._lap_table = pd.concat([self._lap_table, lap_frame], ignore_index=True)
+        self._corner_table = pd.concat([self._corner_table, corner_frame], ignore_index=True)
+        self._shift_table = pd.concat([self._shift_table, shift_frame], ignore_index=True)
+        self._histograms = np.concatenate([self._histograms, histograms])
+
+    @staticmethod
+    def _select(frame, drivers):
+        if drivers is None or frame.empty:
+            return frame
+        return frame[frame['Driver'].isin([str(driver) for driver in drivers])]
+
+    def lap_table(self, drivers=None):
+        """逐圈指標: 全油門/煞車時間比例、煞車次數、升/降檔次數、平均升檔 RPM、最高 RPM/檔位"""
+        return self._select(self._lap_table, drivers)
+
+    def corner_table(self, drivers=None):
+        """逐圈逐彎道煞車點 (參考圈座標)、距頂點距離、煞車時間與進彎/放煞車速度"""
+        return self._select(self._corner_table, drivers)
+
+    def shift_table(self, drivers=None):
+        """全部換檔事件"""
+        return self._select(self._shift_table, drivers)
+
+    def braking_points(self, drivers=None):
+        """各彎道各車手有效圈的煞車點中位數"""
+        frame = self.corner_table(drivers)
+        if frame.empty:
+            return pd.DataFrame()
+        frame = frame[frame['clean']]
+        return frame.groupby(['corner', 'Driver'], sort=True).agg(
+            apex_m=('apex_m', 'first'),
+            laps=('braking_point_m', 'size'),
+            braking_point_m=('braking_point_m', 'median'),
+            braking_distance_m=('braking_distance_m', 'median'),
+            braking_duration=('braking_duration', 'median'),
+            entry_speed=('entry_speed', 'median'),
+        ).reset_index()
+
+    def shift_points(self, drivers=None):
+        """各車手各檔位有效圈升檔 RPM 與速度中位數"""
+        frame = self.shift_table(drivers)
+        if frame.empty:
+            return pd.DataFrame()
+        frame = frame[frame['clean'] & frame['upshift']]
+        return frame.groupby(['Driver', 'from_gear'], sort=True).agg(
+            shifts=('rpm', 'size'),
+            rpm=('rpm', 'median'),
+            speed=('speed', 'median'),
+        ).reset_index()
+
+    def rpm_histogram(self, drivers=None, clean_only=True):
+        """各車手 RPM 時間分佈 (各區間時間百分比)
+
+        Returns:
+            dict: {車手: 百分比陣列 (對應 rpm_bins)}
+        """
+        result = {}
+        if self.empty:
+            return result
+        codes = self._lap_table['Driver'].to_numpy()
+        selected = self._lap_table['clean'].to_numpy() if clean_only else np.ones(len(codes), dtype=bool)
+        for driver in sorted(set(codes) if drivers is None else set(map(str, drivers)) & set(codes)):
+            seconds = self._histograms[selected & (codes == driver)].sum(axis=0)
+            total = seconds.sum()
+            result[driver] = seconds / total * 100 if total > 0 else seconds
+        return result
+
+    def driver_summary(self, drivers=None):
+        """各車手有效圈平均: 全油門/煞車比例、每圈煞車次數、升檔次數與 RPM"""
+        frame = self.lap_table(drivers)
+        if frame.empty:
+            return pd.DataFrame()
+        clean = frame[frame['clean']]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            summary = clean.groupby('Driver').agg(
+                laps=('LapNumber', 'size'),
+                full_throttle_pct=('full_throttle_pct', 'mean'),
+                braking_pct=('braking_pct', 'mean'),
+                brake_events=('brake_events', 'mean'),
+                upshifts=('upshifts', 'mean'),
+                mean_upshift_rpm=('mean_upshift_rpm', 'mean'),
+            )
+        summary['max_rpm'] = frame.groupby('Driver')['max_rpm'].max()
+        summary['max_gear'] = frame.groupby('Driver')['max_gear'].max()
+        return summary.reset_index().rename(columns={'Driver': 'driver'})
+
+
+_table_cache = IdentityCache("channel_analytics", MAX_CACHED_TABLES)
+
+
+def get_channel_analytics(source, drivers=None):
+    """取得煞車與引擎通道分析表 (每份圈速數據一份，只計算尚未建立的車手)
+
+    Args:
+        source: get_loaded_data() 字典、數據載入器或 FastF1 session
+        drivers: 需要的車手代碼列表 (None 為全場)
+    """
+    laps, car_data, _, results = resolve_session_sources(source)
+    # 命中與否取決於是否有新車手需要計算，由下方自行記錄
+    analytics = _table_cache.get_or_build(
+        laps, lambda: ChannelAnalytics(source, laps, car_data, results), record=False)
+    record_cache("channel_analytics", hit=not analytics.ensure(drivers))
+    return analytics
+
+
+def clear_cache():
+    """清除煞車與引擎通道分析快取"""
+    _table_cache.clear()
+
+
+def channel_records(frame, digits=3):
+    """指標表轉為字典列表"""
+    return [{key: json_value(value, digits) for key, value in row.items()} for row in frame.to_dict('records')]
+
+
+def _number(value, fmt):
+    return format(value, fmt) if value is not None and value == value else "N/A"
+
+
+def display_braking_summary(summary, points):
+    table = PrettyTable()
+    table.field_names = ["車手", "有效圈", "煞車時間比例", "每圈煞車次數", "最晚煞車彎道數"]
+    table.align = "c"
+    latest = pd.Series(dtype=int)
+    if not points.empty:
+        latest = points.loc[points.groupby('corner')['braking_distance_m'].idxmin(), 'Driver'].value_counts()
+    for row in summary.sort_values('braking_pct').to_dict('records'):
+        table.add_row([
+            row['driver'], row['laps'], f"{_number(row['braking_pct'], '.1f')}%",
+            _number(row['brake_events'], '.1f'), int(latest.get(row['driver'], 0)),
+        ])
+    print("\n🛑 全場煞車表現 (有效圈平均)")
+    print(table)
+
+
+def display_engine_summary(summary):
+    table = PrettyTable()
+    table.field_names = ["車手", "有效圈", "全油門比例", "每圈升檔", "平均升檔 RPM", "最高 RPM", "最高檔位"]
+    table.align = "c"
+    for row in summary.sort_values('full_throttle_pct', ascending=False).to_dict('records'):
+        table.add_row([
+            row['driver'], row['laps'], f"{_number(row['full_throttle_pct'], '.1f')}%",
+            _number(row['upshifts'], '.1f'), _number(row['mean_upshift_rpm'], '.0f'),
+            _number(row['max_rpm'], '.0f'), _number(row['max_gear'], '.0f'),
+        ])
+    print("\n⚙️ 全場引擎表現 (有效圈平均)")
+    print(table)
+
+
+def _no_data(function_id):
+    return {"success": False, "message": "沒有可用的遙測與圈速數據，無法計算通道指標", "function_id": function_id}
+
+
+def run_brake_performance_analysis(data_loader, drivers=None, show_detailed_output=True):
+    """煞車性能分析 (功能34)"""
+    analytics = get_channel_analytics(data_loader, drivers)
+    summary = analytics.driver_summary(drivers)
+    if summary.empty:
+        return _no_data("34")
+
+    points = analytics.braking_points(drivers)
+    if show_detailed_output:
+        print(f"\n[INFO] 參考圈 {len(analytics.corners)} 個彎道，煞車點搜尋範圍 {BRAKE_WINDOW:.0f} m")
+        display_braking_summary(summary, points)
+
+    return {
+        "success": True,
+        "message": f"煞車性能分析完成 ({len(summary)} 位車手)",
+        "data": {
+            "corners_m": [json_value(value, 1) for value in analytics.corners],
+            "drivers": channel_records(summary[['driver', 'laps', 'braking_pct', 'brake_events']]),
+            "braking_points": channel_records(points),
+            "laps": channel_records(analytics.lap_table(drivers)[
+                ['Driver', 'LapNumber', 'clean', 'braking_pct', 'brake_events']]),
+            "corner_laps": channel_records(analytics.corner_table(drivers)),
+        },
+        "function_id": "34",
+    }
+
+
+def run_engine_performance_analysis(data_loader, drivers=None, show_detailed_output=True):
+    """引擎性能分析 (功能35)"""
+    analytics = get_channel_analytics(data_loader, drivers)
+    summary = analytics.driver_summary(drivers)
+    if summary.empty:
+        return _no_data("35")
+
+    if show_detailed_output:
+        display_engine_summary(summary)
+
+    histograms = analytics.rpm_histogram(drivers)
+    return {
+        "success": True,
+        "message": f"引擎性能分析完成 ({len(summary)} 位車手)",
+        "data": {
+            "drivers": channel_records(summary.drop(columns=['braking_pct', 'brake_events'])),
+            "shift_points": channel_records(analytics.shift_points(drivers)),
+            "rpm_bins": analytics.rpm_bins.tolist(),
+            "rpm_histogram_percent": {
+                driver: [json_value(value, 2) for value in values] for driver, values in histograms.items()
+            },
+            "laps": channel_records(analytics.lap_table(drivers).drop(columns=['braking_pct', 'brake_events'])),
+        },
+        "function_id": "35",
+    }
@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""
+F1 年度冠軍模擬 - Championship Simulation Engine
+以本季已完成分站的正賽成績估計車手表現分布，模擬剩餘分站並計算冠軍/名次機率
+
+- 已完成分站的成績取自數據載入器的賽段快取 (f1_analysis_cache/*.pkl) 與目前載入的正賽，
+  並彙整為 cache/season_results_<年份>.pkl (依快取檔修改時間更新，不需每次解開完整賽段)
+- 每位車手的單場表現 ~ Normal(平均完賽名次, 名次標準差)，另依退賽率抽樣 DNF
+- 剩餘分站以 (賽季數 × 分站數 × 車手數) 陣列一次抽樣並 argsort 得到完賽順序，分批計算
+- 保留每季每站的積分陣列，單場「假設」成績只需替換該站積分後重新排名 (增量重算)
+
+使用範例:
+    simulation = get_championship_simulation(2025, data_loader)
+    simulation.standings()                                   # 冠軍/名次機率
+    simulation.standings(override={"Belgium": ["NOR", "PIA", "VER"]})
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import os
+import pickle
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from prettytable import PrettyTable
+
+try:
+    from .metrics import record_cache, register_cache
+except ImportError:
+    from metrics import record_cache, register_cache
+
+# 正賽前十名積分
+RACE_POINTS = np.array([25, 18, 15, 12, 10, 8, 6, 4, 2, 1], dtype=np.int8)
+
+DEFAULT_SEASONS = 100000
+
+# 每批模擬的賽季數 (控制記憶體用量)
+SEASON_CHUNK = 20000
+
+# 表現分布的先驗 (相當於一場比賽的權重)，避免分站數少時過度外推
+PRIOR_WEIGHT = 1.0
+PRIOR_POSITION_SPREAD = 4.0
+MIN_POSITION_SPREAD = 1.0
+PRIOR_DNF_RATE = 0.08
+PRIOR_DNF_WEIGHT = 2.0
+
+SEASON_CACHE_DIR = "cache"
+SESSION_CACHE_DIR = "f1_analysis_cache"
+
+MAX_CACHED_SIMULATIONS = 2
+
+# 2024 賽季分站 (依賽程順序)；2025 賽季取自 f1_2025_schedule
+CALENDAR_2024 = ['Bahrain', 'Saudi Arabia', 'Australia', 'Japan', 'China', 'Miami', 'Emilia Romagna',
+                 'Monaco', 'Canada', 'Spain', 'Austria', 'Great Britain', 'Hungary', 'Belgium',
+                 'Netherlands', 'Italy', 'Azerbaijan', 'Singapore', 'United States', 'Mexico',
+                 'Brazil', 'Las Vegas', 'Qatar', 'Abu Dhabi']
+
+
+def season_calendar(year):
+    """賽季分站名稱 (依日期排序)"""
+    if int(year) == 2025:
+        try:
+            from .f1_2025_schedule import f1_schedule
+        except ImportError:
+            from f1_2025_schedule import f1_schedule
+        races = sorted(f1_schedule.races, key=lambda race: race['date'])
+        return [race['name'].replace(" (X)", "") for race in races]
+    return list(CALENDAR_2024)
+
+
+def _session_cache_path(cache_dir, year, race):
+    """正賽快取檔案路徑 (命名規則同 CompatibleF1DataLoader._get_cache_filename)"""
+    safe_race_name = race.replace(" ", "_").replace("'", "")
+    return os.path.join(cache_dir, f"f1_data_{year}_{safe_race_name}_R.pkl")
+
+
+def _finished(status):
+    status = str(status)
+    return status == 'Finished' or status.startswith('+') or 'Lap' in status
+
+
+def _result_records(results):
+    """FastF1 正賽成績轉為精簡紀錄 (車手、車隊、名次、積分、是否完賽)"""
+    if not isinstance(results, pd.DataFrame) or results.empty or 'Abbreviation' not in results.columns:
+        return []
+    positions = pd.to_numeric(results.get('Position'), errors='coerce')
+    points = pd.to_numeric(results.get('Points'), errors='coerce').fillna(0.0)
+    statuses = results['Status'] if 'Status' in results.columns else pd.Series('Finished', index=results.index)
+    teams = results['TeamName'] if 'TeamName' in results.columns else pd.Series('', index=results.index)
+    records = []
+    for driver, team, position, point, status in zip(results['Abbreviation'], teams, positions, points, statuses):
+        if not isinstance(driver, str) or not driver:
+            continue
+        records.append({
+            "driver": driver,
+            "team": team if isinstance(team, str) else '',
+            "position": float(position) if position == position else None,
+            "points": float(point),
+            "finished": _finished(status),
+        })
+    return records
+
+
+def collect_season_results(year, data_loader=None, cache_dir=None):
+    """彙整本季已完成分站的正賽成績
+
+    Returns:
+        (DataFrame, list): 成績表 (race, round, driver, team, position, points, finished)、缺少數據的分站
+    """
+    year = int(year)
+    calendar = season_calendar(year)
+    cache_dir = cache_dir or getattr(data_loader, 'cache_dir', None) or SESSION_CACHE_DIR
+    season_path = os.path.join(SEASON_CACHE_DIR, f"season_results_{year}.pkl")
+
+    season = {}
+    if os.path.exists(season_path):
+        try:
+            with open(season_path, 'rb') as f:
+                season = pickle.load(f)
+        except Exception as e:
+            print(f"[WARNING] 賽季成績快取讀取失敗，將重新彙整: {e}")
+            season = {}
+
+    # 目前載入的正賽直接取用成績
+    loaded = getattr(data_loader, 'loaded_data', None) or {}
+    metadata = loaded.get('metadata') or {}
+    loaded_race = None
+    if metadata.get('year') == year and metadata.get('session_type') == 'R':
+        loaded_race = metadata.get('race_name')
+        records = _result_records(loaded.get('results'))
+        if records:
+            season[loaded_race] = {"mtime": None, "results": records}
+
+    changed = False
+    for race in calendar:
+        if race == loaded_race:
+            continue
+        path = _session_cache_path(cache_dir, year, race)
+        if not os.path.exists(path):
+            continue
+        mtime = os.path.getmtime(path)
+        entry = season.get(race)
+        if entry is not None and entry["mtime"] == mtime:
+            record_cache("season_results", hit=True)
+            continue
+        record_cache("season_results", hit=False)
+        try:
+            with open(path, 'rb') as f:
+                records = _result_records(pickle.load(f).get('results'))
+        except Exception as e:
+            print(f"[WARNING] 無法讀取 {race} 正賽快取: {e}")
+            continue
+        if records:
+            season[race] = {"mtime": mtime, "results": records}
+            changed = True
+
+    if changed:
+        try:
+            os.makedirs(SEASON_CACHE_DIR, exist_ok=True)
+            with open(season_path, 'wb') as f:
+                pickle.dump({race: entry for race, entry in season.items() if entry["mtime"] is not None}, f)
+        except Exception as e:
+            print(f"[WARNING] 賽季成績快取保存失敗: {e}")
+
+    rows = []
+    for round_number, race in enumerate(calendar, 1):
+        for record in season.get(race, {}).get("results", []):
+            rows.append({"race": race, "round": round_number, **record})
+    table = pd.DataFrame(rows, columns=["race", "round", "driver", "team", "position", "points", "finished"])
+    missing = [race for race in calendar if race not in season]
+    return table, missing
+
+
+def _points_for_order(order, driver_index):
+    """完賽順序 (車手代碼列表) 轉為各車手積分與分站冠軍"""
+    points = np.zeros(len(driver_index), dtype=np.int16)
+    wins = np.zeros(len(driver_index), dtype=np.int16)
+    for position, driver in enumerate(order[:len(RACE_POINTS)]):
+        if driver in driver_index:
+            points[driver_index[driver]] = RACE_POINTS[position]
+    if order and order[0] in driver_index:
+        wins[driver_index[order[0]]] = 1
+    return points, wins
+
+
+class ChampionshipSimulation:
+    """冠軍模擬 - 剩餘分站的積分陣列與增量重算"""
+
+    def __init__(self, results, remaining_races, n_seasons=DEFAULT_SEASONS, seed=None):
+        self.results = results
+        self.completed_races = list(dict.fromkeys(results['race']))
+        self.remaining_races = list(remaining_races)
+        self.n_seasons = int(n_seasons)
+        self.seed = int(np.random.SeedSequence().entropy % (2 ** 32)) if seed is None else int(seed)
+
+        # 最近一站的參賽車手視為剩餘分站的車手陣容
+        self.drivers = sorted(results['driver'].unique())
+        self.driver_index = {driver: index for index, driver in enumerate(self.drivers)}
+        latest = results[results['round'] == results['round'].max()]
+        self.teams = results.groupby('driver')['team'].last().reindex(self.drivers).fillna('').tolist()
+        self.active = np.isin(self.drivers, latest['driver'].unique())
+
+        self._race_base = self._completed_race_points()
+        self._estimate_pace()
+        self._simulate()
+
+    # ---- 已完成分站 ----
+
+    def _completed_race_points(self):
+        """各已完成分站的積分與分站冠軍 {分站: (points, wins)}"""
+        base = {}
+        for race, frame in self.results.groupby('race', sort=False):
+            points = np.zeros(len(self.drivers), dtype=np.int16)
+            wins = np.zeros(len(self.drivers), dtype=np.int16)
+            index = frame['driver'].map(self.driver_index).to_numpy()
+            points[index] = np.rint(frame['points'].to_numpy()).astype(np.int16)
+            wins[index] = (frame['position'] == 1).to_numpy()
+            base[race] = (points, wins)
+        return base
+
+    def _base_totals(self, override=None):
+        points = np.zeros(len(self.drivers), dtype=np.int32)
+        wins = np.zeros(len(self.drivers), dtype=np.int32)
+        for race, (race_points, race_wins) in self._race_base.items():
+            if override and race in override:
+                race_points, race_wins = _points_for_order(override[race], self.driver_index)
+            points += race_points
+            wins += race_wins
+        return points, wins
+
+    # ---- 表現分布與模擬 ----
+
+    def _estimate_pace(self):
+        """每位車手的名次分布 (完賽名次的平均/標準差，向先驗收縮) 與退賽率"""
+        grid_size = max(len(self.drivers), 1)
+        prior_position = (grid_size + 1) / 2
+        finished = self.results[self.results['finished'] & self.results['position'].notna()]
+        stats = finished.groupby('driver')['position'].agg(['count', 'sum', 'var']).reindex(self.drivers)
+        count = stats['count'].fillna(0).to_numpy(dtype=float)
+        total = stats['sum'].fillna(0).to_numpy(dtype=float)
+        variance = stats['var'].fillna(0).to_numpy(dtype=float)
+
+        self.mean_position = (total + PRIOR_WEIGHT * prior_position) / (count + PRIOR_WEIGHT)
+        spread = (variance * np.maximum(count - 1, 0) + PRIOR_WEIGHT * PRIOR_POSITION_SPREAD ** 2) / (count + PRIOR_WEIGHT)
+        self.position_spread = np.maximum(np.sqrt(spread), MIN_POSITION_SPREAD)
+
+        starts = self.results.groupby('driver').size().reindex(self.drivers).fillna(0).to_numpy(dtype=float)
+        dnfs = (~self.results['finished']).groupby(self.results['driver']).sum().reindex(self.drivers).fillna(0).to_numpy(dtype=float)
+        self.dnf_rate = (dnfs + PRIOR_DNF_RATE * PRIOR_DNF_WEIGHT) / (starts + PRIOR_DNF_WEIGHT)
+
+    def _simulate(self):
+        """抽樣所有賽季的剩餘分站積分 (分批計算，每批為一次陣列運算)"""
+        n_races, n_drivers = len(self.remaining_races), len(self.drivers)
+        self.race_points = np.zeros((self.n_seasons, n_races, n_drivers), dtype=np.int8)
+        if not n_races:
+            self.simulated_points = np.zeros((self.n_seasons, n_drivers), dtype=np.int32)
+            self.simulated_wins = np.zeros((self.n_seasons, n_drivers), dtype=np.int32)
+            return
+
+        rng = np.random.default_rng(self.seed)
+        mean = self.mean_position.astype(np.float32)
+        spread = self.position_spread.astype(np.float32)
+        dnf_rate = self.dnf_rate.astype(np.float32)
+        scored = min(len(RACE_POINTS), n_drivers)
+        for start in range(0, self.n_seasons, SEASON_CHUNK):
+            size = min(SEASON_CHUNK, self.n_seasons - start)
+            scores = mean + spread * rng.standard_normal((size, n_races, n_drivers), dtype=np.float32)
+            # 退賽與不在陣容中的車手排在最後
+            scores[rng.random((size, n_races, n_drivers), dtype=np.float32) < dnf_rate] = np.inf
+            scores[:, :, ~self.active] = np.inf
+            top = np.argpartition(scores, scored - 1, axis=2)[:, :, :scored]
+            top_scores = np.take_along_axis(scores, top, axis=2)
+            sort_index = np.argsort(top_scores, axis=2)
+            top_order = np.take_along_axis(top, sort_index, axis=2)
+            # 完賽車手少於得分名額時，退賽/不在陣容的車手 (inf) 不得分
+            finished = np.isfinite(np.take_along_axis(top_scores, sort_index, axis=2))
+            chunk = self.race_points[start:start + size]
+            np.put_along_axis(chunk, top_order, np.where(finished, RACE_POINTS[:scored], 0), axis=2)
+
+        self.simulated_points = self.race_points.sum(axis=1, dtype=np.int32)
+        self.simulated_wins = (self.race_points == RACE_POINTS[0]).sum(axis=1, dtype=np.int32)
+
+    # ---- 積分榜 ----
+
+    def standings(self, override=None):
+        """冠軍/名次機率
+
+        Args:
+            override: {分站: [完賽順序車手代碼]} - 指定單場成績 (已完成分站取代實際成績，
+                      剩餘分站固定該站結果)，只重新排名不重新抽樣
+
+        Returns:
+            DataFrame: 依冠軍機率排序的車手機率表 (position_probabilities 為各名次機率)
+        """
+        override = override or {}
+        unknown = [race for race in override if race not in self._race_base and race not in self.remaining_races]
+        if unknown:
+            raise ValueError(f"未知的分站: {unknown}")
+
+        base_points, base_wins = self._base_totals(override)
+        totals = self.simulated_points + base_points
+        wins = self.simulated_wins + base_wins
+        for race, order in override.items():
+            if race in self.remaining_races:
+                index = self.remaining_races.index(race)
+                fixed_points, fixed_wins = _points_for_order(order, self.driver_index)
+                race_points = self.race_points[:, index, :]
+                totals = totals - race_points + fixed_points
+                wins = wins - (race_points == RACE_POINTS[0]) + fixed_wins
+                # 固定結果的剩餘分站計入目前積分
+                base_points = base_points + fixed_points
+
+        # 同分時以分站冠軍數決勝
+        ranking_key = totals.astype(np.int64) * 100 + wins
+        order = np.argsort(-ranking_key, axis=1, kind='stable')
+        n_drivers = len(self.drivers)
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.arange(n_drivers)[None, :], axis=1)
+        counts = np.bincount((np.arange(n_drivers)[None, :] * n_drivers + ranks).ravel(),
+                             minlength=n_drivers * n_drivers).reshape(n_drivers, n_drivers)
+        probabilities = counts / self.n_seasons
+
+        frame = pd.DataFrame({
+            "driver": self.drivers,
+            "team": self.teams,
+            "current_points": base_points,
+            "expected_points": totals.mean(axis=0),
+            "points_p10": np.percentile(totals, 10, axis=0),
+            "points_p90": np.percentile(totals, 90, axis=0),
+            "title_probability": probabilities[:, 0],
+            "top3_probability": probabilities[:, :3].sum(axis=1),
+            "expected_position": (probabilities * np.arange(1, n_drivers + 1)).sum(axis=1),
+        })
+        frame["position_probabilities"] = list(probabilities)
+        return frame.sort_values(["title_probability", "expected_points"], ascending=False).reset_index(drop=True)
+
+
+_simulation_cache = OrderedDict()
+register_cache("championship", _simulation_cache)
+
+
+def get_championship_simulation(year, data_loader=None, n_seasons=DEFAULT_SEASONS, seed=None, simulate_races=()):
+    """取得冠軍模擬 (相同成績與參數只模擬一次)
+
+    Args:
+        simulate_races: 雖有成績但仍視為未完成的分站 (衝擊分析用)
+    """
+    results, missing = collect_season_results(year, data_loader)
+    if results.empty:
+        return None
+
+    simulate_races = [race for race in simulate_races if race in set(results['race'])]
+    completed = results[~results['race'].isin(simulate_races)]
+    remaining = [race for race in season_calendar(year) if race in missing or race in simulate_races]
+    if completed.empty:
+        return None
+
+    fingerprint = tuple((race, len(frame), float(frame['points'].sum())) for race, frame in completed.groupby('race', sort=False))
+    key = (int(year), fingerprint, tuple(remaining), int(n_seasons), seed)
+    simulation = _simulation_cache.get(key)
+    if simulation is not None and seed is not None:
+        _simulation_cache.move_to_end(key)
+        record_cache("championship", hit=True)
+        return simulation
+
+    record_cache("championship", hit=False)
+    simulation = ChampionshipSimulation(completed, remaining, n_seasons=n_seasons, seed=seed)
+    simulation.missing_races = missing
+    simulation.simulated_actual = {race: results.loc[results['race'] == race].sort_values('position')['driver'].tolist()
+                                   for race in simulate_races}
+    if seed is not None:
+        _simulation_cache[key] = simulation
+        while len(_simulation_cache) > MAX_CACHED_SIMULATIONS:
+            _simulation_cache.popitem(last=False)
+    return simulation
+
+
+def clear_cache():
+    """清除冠軍模擬快取"""
+    _simulation_cache.clear()
+
+
+def standings_records(frame, top_positions=3):
+    """機率表轉為字典列表 (名次機率只列出前幾名)"""
+    records = []
+    for row in frame.to_dict('records'):
+        probabilities = row.pop("position_probabilities")
+        records.append({
+            "driver": row["driver"],
+            "team": row["team"],
+            "current_points": int(row["current_points"]),
+            "expected_points": round(float(row["expected_points"]), 2),
+            "points_p10": float(row["points_p10"]),
+            "points_p90": float(row["points_p90"]),
+            "title_probability": round(float(row["title_probability"]), 5),
+            "top3_probability": round(float(row["top3_probability"]), 5),
+            "expected_position": round(float(row["expected_position"]), 2),
+            "position_probabilities": [round(float(p), 5) for p in probabilities[:max(top_positions, 1)]],
+        })
+    return records
+
+
+def display_standings(frame, title, limit=20, delta=None):
+    """顯示冠軍機率表"""
+    table = PrettyTable()
+    fields = ["排名", "車手", "車隊", "目前積分", "預期積分", "積分 P10-P90", "冠軍機率", "前三機率", "預期名次"]
+    if delta is not None:
+        fields.append("冠軍機率變化")
+    table.field_names = fields
+    table.align = "c"
+    for rank, row in enumerate(frame.head(limit).to_dict('records'), 1):
+        values = [rank, row['driver'], row['team'], int(row['current_points']), f"{row['expected_points']:.1f}",
+                  f"{row['points_p10']:.0f}-{row['points_p90']:.0f}", f"{row['title_probability']:.2%}",
+                  f"{row['top3_probability']:.1%}", f"{row['expected_position']:.1f}"]
+        if delta is not None:
+            values.append(f"{delta.get(row['driver'], 0.0):+.2%}")
+        table.add_row(values)
+    print(f"\n🏆 {title}")
+    print(table)
+
+
+def _season_summary(simulation):
+    return {
+        "completed_races": simulation.completed_races,
+        "remaining_races": simulation.remaining_races,
+        "missing_races": getattr(simulation, 'missing_races', []),
+        "seasons": simulation.n_seasons,
+        "seed": simulation.seed,
+    }
+
+
+def run_championship_simulation(data_loader, year=None, n_seasons=DEFAULT_SEASONS, seed=None, what_if=None,
+                                show_detailed_output=True):
+    """全部車手年度冠軍模擬 (功能37.1)
+
+    Args:
+        year: 賽季 (None 時取數據載入器的年份)
+        n_seasons: 模擬賽季數
+        what_if: {分站: [完賽順序車手代碼]} 假設成績 (增量重算)
+    """
+    print("🏆 開始年度冠軍模擬...")
+    start = time.perf_counter()
+    year = year or getattr(data_loader, 'year', None)
+    if not year:
+        return {"success": False, "message": "年度冠軍模擬失敗：無法確定賽季年份", "function_id": "37.1"}
+
+    simulation = get_championship_simulation(year, data_loader, n_seasons=n_seasons, seed=seed)
+    if simulation is None:
+        return {"success": False, "message": f"年度冠軍模擬失敗：找不到 {year} 賽季已完成分站的正賽成績",
+                "function_id": "37.1"}
+    simulated_at = time.perf_counter()
+    standings = simulation.standings()
+
+    what_if_standings = None
+    if what_if:
+        standings_if = simulation.standings(override=what_if)
+        what_if_standings = standings_records(standings_if)
+    elapsed = time.perf_counter() - start
+
+    if show_detailed_output:
+        print(f"   已完成 {len(simulation.completed_races)} 站，模擬剩餘 {len(simulation.remaining_races)} 站 "
+              f"× {simulation.n_seasons:,} 個賽季 (耗時 {elapsed:.2f}s)")
+        if getattr(simulation, 'missing_races', None):
+            print(f"   [INFO] 沒有本地成績而視為未完成的分站: {', '.join(simulation.missing_races)}")
+        display_standings(standings, f"{year} 年度冠軍機率")
+        if what_if:
+            baseline = standings.set_index('driver')['title_probability']
+            delta = (standings_if.set_index('driver')['title_probability'] - baseline).to_dict()
+            display_standings(standings_if, f"假設成績: {', '.join(what_if)} (增量重算 {time.perf_counter() - simulated_at:.2f}s)",
+                              delta=delta)
+
+    print("\n✅ 年度冠軍模擬完成！")
+    return {
+        "success": True,
+        "message": f"{year} 年度冠軍模擬完成",
+        "data": {
+            "analysis_type": "championship_simulation",
+            "execution_time": f"{elapsed:.2f}秒",
+            "year": int(year),
+            **_season_summary(simulation),
+            "standings": standings_records(standings),
+            "what_if": what_if,
+            "what_if_standings": what_if_standings,
+        },
+        "function_id": "37.1",
+    }
+
+
+def run_championship_impact_analysis(data_loader, n_seasons=DEFAULT_SEASONS, seed=None, show_detailed_output=True):
+    """本場正賽對冠軍機率的影響 (功能37)
+
+    將本場視為未完成模擬賽季，再以實際成績增量重算，比較兩者的冠軍/名次機率
+    """
+    print("🏆 開始冠軍影響分析...")
+    start = time.perf_counter()
+    metadata = (getattr(data_loader, 'loaded_data', None) or {}).get('metadata') or {}
+    year, race = metadata.get('year'), metadata.get('race_name')
+    if metadata.get('session_type') != 'R' or not year or not race:
+        return {"success": False, "message": "冠軍影響分析需要載入正賽 (session R)", "function_id": "37"}
+
+    if seed is None:
+        # 衝擊分析固定種子，讓「賽前」與「賽後」機率使用相同的模擬賽季
+        seed = int(np.random.SeedSequence().entropy % (2 ** 32))
+    simulation = get_championship_simulation(year, data_loader, n_seasons=n_seasons, seed=seed, simulate_races=[race])
+    if simulation is None or race not in simulation.simulated_actual:
+        return {"success": False, "message": f"冠軍影響分析失敗：找不到 {year} {race} 之前的正賽成績",
+                "function_id": "37"}
+
+    before = simulation.standings()
+    after = simulation.standings(override={race: simulation.simulated_actual[race]})
+    before_title = before.set_index('driver')['title_probability']
+    after_indexed = after.set_index('driver')
+    delta = (after_indexed['title_probability'] - before_title).to_dict()
+    elapsed = time.perf_counter() - start
+
+    if show_detailed_output:
+        display_standings(after, f"{year} {race} 賽後冠軍機率 ({simulation.n_seasons:,} 個賽季，耗時 {elapsed:.2f}s)",
+                          delta=delta)
+
+    impact = []
+    for row in standings_records(after):
+        driver = row["driver"]
+        impact.append({
+            **row,
+            "title_probability_before": round(float(before_title.get(driver, 0.0)), 5),
+            "title_probability_change": round(float(delta.get(driver, 0.0)), 5),
+        })
+
+    print("\n✅ 冠軍影響分析完成！")
+    return {
+        "success": True,
+        "message": f"{year} {race} 冠軍影響分析完成",
+        "data": {
+            "analysis_type": "championship_impact",
+            "execution_time": f"{elapsed:.2f}秒",
+            "year": int(year),
+            "race": race,
+            **_season_summary(simulation),
+            "race_result": simulation.simulated_actual[race],
+            "impact": impact,
+        },
+        "function_id": "37",
+    }
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+F1 Analysis Chart Renderer - 無介面批次圖表渲染
+Agg 後端 + 可重複使用的圖表池，供賽後大量輸出 PNG 使用
+
+- FigurePool: 依 (尺寸, dpi, 主題) 重複使用 matplotlib Figure，避免每張圖重建
+- acquire_subplots / release_figure: 分析模組的 plt.subplots / plt.close 替代方案；
+  非 Agg 後端 (互動模式) 時自動退回 pyplot，行為不變
+- render_chart_jobs: 依工作清單在同一程序內批次渲染多張圖表；
+  除通用 line / bar 外，速度差距、距離差距與雙車手遙測比較圖也可作為具名渲染函數使用
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import importlib
+import os
+import time
+import threading
+
+import matplotlib
+
+# 環境變數強制無介面模式 (必須在 pyplot 匯入前設定後端)
+HEADLESS_ENV_VAR = "F1_HEADLESS_CHARTS"
+if os.environ.get(HEADLESS_ENV_VAR, "") not in ("", "0"):
+    matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+try:
+    from .tracing import span
+except ImportError:
+    from tracing import span
+
+# 每種圖表規格最多保留的閒置 Figure 數量
+DEFAULT_POOL_SIZE = 4
+
+
+def use_headless_backend():
+    """切換到 Agg 後端 (批次渲染使用)"""
+    if matplotlib.get_backend().lower() != "agg":
+        plt.switch_backend("Agg")
+
+
+def is_headless_backend():
+    """目前是否為無介面 (Agg) 後端"""
+    return matplotlib.get_backend().lower() == "agg"
+
+
+def _apply_theme(dark_theme):
+    """套用中文字體與主題 (已快取，重複呼叫無額外成本)"""
+    try:
+        from .base import setup_matplotlib_chinese
+    except ImportError:
+        from base import setup_matplotlib_chinese
+    setup_matplotlib_chinese(dark_theme=dark_theme)
+
+
+class FigurePool:
+    """matplotlib Figure 池
+
+    Figure 直接以 FigureCanvasAgg 建立，不經過 pyplot 的視窗管理器；
+    歸還時清空內容並保留畫布，下次取用只需重新建立子圖。
+    """
+
+    def __init__(self, max_idle_per_key=DEFAULT_POOL_SIZE):
+        self.max_idle_per_key = max_idle_per_key
+        self._idle = {}
+        self._lock = threading.Lock()
+        self.stats = {"created": 0, "reused": 0}
+
+    @staticmethod
+    def _key(figsize, dpi, dark_theme):
+        return (tuple(float(v) for v in figsize), float(dpi), bool(dark_theme))
+
+    def acquire(self, figsize=(10, 6), dpi=100, dark_theme=None, facecolor=None):
+        """取得一個空白 Figure"""
+        if dark_theme is not None:
+            _apply_theme(dark_theme)
+
+        key = self._key(figsize, dpi, dark_theme)
+        with self._lock:
+            idle = self._idle.get(key)
+            fig = idle.pop() if idle else None
+
+        if fig is None:
+            fig = Figure(figsize=figsize, dpi=dpi)
+            FigureCanvasAgg(fig)
+            fig._f1_pool_key = key
+            self.stats["created"] += 1
+        else:
+            self.stats["reused"] += 1
+
+        fig.set_facecolor(facecolor or matplotlib.rcParams["figure.facecolor"])
+        return fig
+
+    def release(self, fig):
+        """歸還 Figure - 清空內容後放回池中"""
+        key = getattr(fig, "_f1_pool_key", None)
+        if key is None:
+            return
+        fig.clf()
+        if hasattr(fig, "set_layout_engine"):
+            fig.set_layout_engine(None)
+        else:
+            fig.set_constrained_layout(False)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_key:
+                idle.append(fig)
+
+    def clear(self):
+        """清空閒置 Figure"""
+        with self._lock:
+            self._idle.clear()
+
+
+_figure_pool = FigurePool()
+
+
+def get_figure_pool():
+    """取得全域圖表池"""
+    return _figure_pool
+
+
+def acquire_subplots(nrows=1, ncols=1, figsize=(10, 6), dpi=100, dark_theme=None,
+                     constrained_layout=False, facecolor=None, **subplot_kw):
+    """取得 (fig, axes) - plt.subplots 的池化替代
+
+    Agg 後端時由圖表池取用；互動式後端時退回 plt.subplots，
+    確保 plt.show() 等既有行為不受影響。
+    """
+    if not is_headless_backend():
+        if dark_theme is not None:
+            _apply_theme(dark_theme)
+        kwargs = dict(subplot_kw)
+        if constrained_layout:
+            kwargs["constrained_layout"] = True
+        if facecolor:
+            kwargs["facecolor"] = facecolor
+        return plt.subplots(nrows, ncols, figsize=figsize, dpi=dpi, **kwargs)
+
+    fig = _figure_pool.acquire(figsize=figsize, dpi=dpi, dark_theme=dark_theme, facecolor=facecolor)
+    if constrained_layout:
+        if hasattr(fig, "set_layout_engine"):
+            fig.set_layout_engine("constrained")
+        else:
+            fig.set_constrained_layout(True)
+    axes = fig.subplots(nrows, ncols, **subplot_kw)
+    return fig, axes
+
+
+def acquire_figure(figsize=(10, 6), dpi=100, dark_theme=None, facecolor=None):
+    """取得空白 Figure - plt.figure 的池化替代"""
+    if not is_headless_backend():
+        if dark_theme is not None:
+            _apply_theme(dark_theme)
+        kwargs = {"facecolor": facecolor} if facecolor else {}
+        return plt.figure(figsize=figsize, dpi=dpi, **kwargs)
+    return _figure_pool.acquire(figsize=figsize, dpi=dpi, dark_theme=dark_theme, facecolor=facecolor)
+
+
+def release_figure(fig):
+    """釋放 Figure - 池化 Figure 歸還，pyplot Figure 關閉"""
+    if fig is None:
+        return
+    if getattr(fig, "_f1_pool_key", None) is not None:
+        _figure_pool.release(fig)
+    else:
+        plt.close(fig)
+
+
+def show_figure(fig):
+    """顯示圖表 - 僅 pyplot 管理的 Figure 於互動式後端顯示"""
+    if fig is None or getattr(fig, "_f1_pool_key", None) is not None or is_headless_backend():
+        return
+    plt.show()
+
+
+# ===========================================
+# 批次渲染
+# ===========================================
+
+CHART_RENDERERS = {}
+
+# 分析模組提供的具名渲染函數 → 所在模組 (首次使用時才匯入，避免循環匯入)
+MODULE_RENDERERS = {
+    "speed_gap": "speed_gap_analysis",
+    "distance_gap": "distance_gap_analysis",
+    "two_driver_comparison": "two_driver_telemetry_comparison_fixed",
+}
+
+
+def register_chart_renderer(name):
+    """註冊圖表渲染函數 - 簽名 renderer(fig, axes, **params)"""
+    def decorator(func):
+        CHART_RENDERERS[name] = func
+        return func
+    return decorator
+
+
+def get_chart_renderer(name):
+    """依名稱取得渲染函數 (分析模組的渲染函數於首次使用時匯入註冊)"""
+    if name not in CHART_RENDERERS and name in MODULE_RENDERERS:
+        module = MODULE_RENDERERS[name]
+        if __package__:
+            importlib.import_module(f".{module}", __package__)
+        else:
+            importlib.import_module(module)
+    return CHART_RENDERERS.get(name)
+
+
+@register_chart_renderer("line")
+def _render_line_chart(fig, ax, series=None, title="", xlabel="", ylabel="", grid=True):
+    """折線圖: series = [{'x': [...], 'y': [...], 'label': '', 'color': ''}, ...]"""
+    for item in series or []:
+        ax.plot(item.get("x", []), item.get("y", []), label=item.get("label"),
+                color=item.get("color"), linewidth=item.get("linewidth", 1.5))
+    ax.set_title(title, fontweight="bold")
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    if grid:
+        ax.grid(True, alpha=0.3)
+    if any(item.get("label") for item in series or []):
+        ax.legend()
+
+
+@register_chart_renderer("bar")
+def _render_bar_chart(fig, ax, labels=None, values=None, title="", xlabel="", ylabel="", color=None):
+    """長條圖: labels / values 等長列表"""
+    ax.bar(labels or [], values or [], color=color)
+    ax.set_title(title, fontweight="bold")
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.grid(True, axis="y", alpha=0.3)
+
+
+def render_chart_jobs(jobs, default_dpi=150, dark_theme=False):
+    """批次渲染圖表工作清單
+
+    Args:
+        jobs: [{'renderer': 名稱或函數, 'output': PNG 路徑, 'params': {...},
+                'figsize': (w, h), 'nrows': 1, 'ncols': 1, 'dpi': 150,
+                'dark_theme': False}, ...]
+              nrows=0 時只取得空白 Figure (axes 為 None)，由渲染函數自行建立版面
+        default_dpi: 預設輸出 dpi
+        dark_theme: 預設主題
+
+    Returns:
+        dict: {'success', 'rendered', 'failed', 'outputs', 'errors', 'elapsed_seconds', 'pool_stats'}
+    """
+    use_headless_backend()
+    start = time.perf_counter()
+    outputs, errors = [], []
+
+    for index, job in enumerate(jobs):
+        renderer = job.get("renderer")
+        if isinstance(renderer, str):
+            try:
+                renderer = get_chart_renderer(renderer)
+            except ImportError as e:
+                errors.append({"index": index, "error": f"無法載入渲染函數: {e}"})
+                continue
+        output = job.get("output")
+        if renderer is None or not output:
+            errors.append({"index": index, "error": "缺少渲染函數或輸出路徑"})
+            continue
+
+        dpi = job.get("dpi", default_dpi)
+        fig = None
+        try:
+            with span("plot.render", output=output):
+                figsize = tuple(job.get("figsize", (10, 6)))
+                theme = job.get("dark_theme", dark_theme)
+                if job.get("nrows", 1) == 0:
+                    fig, axes = acquire_figure(figsize=figsize, dpi=dpi, dark_theme=theme), None
+                else:
+                    fig, axes = acquire_subplots(job.get("nrows", 1), job.get("ncols", 1),
+                                                 figsize=figsize, dpi=dpi, dark_theme=theme)
+                renderer(fig, axes, **job.get("params", {}))
+                os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+                fig.savefig(output, dpi=dpi, bbox_inches=job.get("bbox_inches", "tight"))
+            outputs.append(output)
+        except Exception as e:
+            errors.append({"index": index, "output": output, "error": str(e)})
+            print(f"[ERROR] 圖表渲染失敗 ({output}): {e}")
+        finally:
+            release_figure(fig)
+
+    elapsed = time.perf_counter() - start
+    print(f"[INFO] 批次渲染完成: {len(outputs)} 張成功, {len(errors)} 張失敗, 耗時 {elapsed:.2f}s")
+    return {
+        "success": not errors,
+        "rendered": len(outputs),
+        "failed": len(errors),
+        "outputs": outputs,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "pool_stats": dict(_figure_pool.stats),
+    }
+
+
+if __name__ == "__main__":
+    # 由 JSON 工作清單批次渲染: python modules/chart_renderer.py jobs.json
+    import json
+    import sys
+
+    if len(sys.argv) < 2:
+        print("用法: python modules/chart_renderer.py <jobs.json>")
+        sys.exit(1)
+
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        job_list = json.load(f)
+
+    summary = render_chart_jobs(job_list.get("jobs", job_list) if isinstance(job_list, dict) else job_list)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    sys.exit(0 if summary["success"] else 1)
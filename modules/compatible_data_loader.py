@@ -16,6 +16,15 @@ import fastf1
 import pandas as pd
 import numpy as np
 
+try:
+    from .data_integrity import check_session_integrity, read_cache_manifest, write_manifest_entry
+    from .metrics import record_cache, upstream_call
+    from .tracing import span
+except ImportError:
+    from data_integrity import check_session_integrity, read_cache_manifest, write_manifest_entry
+    from metrics import record_cache, upstream_call
+    from tracing import span
+
 class F1OpenDataAnalyzer:
     """F1 OpenF1 API 數據分析器 - 完全復刻版"""
     def __init__(self):
@@ -26,8 +35,9 @@ class F1OpenDataAnalyzer:
         """發送 API 請求"""
         try:
             url = f"{self.base_url}/{endpoint}"
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
+            with upstream_call("openf1", endpoint):
+                response = requests.get(url, params=params, timeout=30)
+                response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             print(f"[ERROR] API 請求失敗: {e}")
@@ -172,9 +182,10 @@ class CompatibleF1DataLoader:
         if not force_reload and os.path.exists(cache_file):
             try:
                 print(f"[CACHE] 從快取載入資料: {cache_file}")
-                with open(cache_file, 'rb') as f:
+                with span("load.pickle_read", path=cache_file), open(cache_file, 'rb') as f:
                     self.loaded_data = pickle.load(f)
                 print(f"[SUCCESS] 快取資料載入成功")
+                record_cache("session_pickle", hit=True)
                 
                 # 設置便利屬性以便其他模組訪問
                 self.year = year
@@ -186,11 +197,14 @@ class CompatibleF1DataLoader:
                 self.results = self.loaded_data['results']
                 self.session_loaded = True
                 
+                # 舊快取尚未掃描過時補做完整性檢查
+                self._record_integrity_report(cache_file, refresh=False)
                 return True
             except Exception as e:
                 print(f"[WARNING]  快取載入失敗，將重新載入: {e}")
         
         # 從 FastF1 載入新資料
+        record_cache("session_pickle", hit=False)
         try:
             print(f"[REFRESH] 載入 {year} 年 {race_name} 大獎賽 ({session_type}) 資料...")
             
@@ -227,26 +241,33 @@ class CompatibleF1DataLoader:
             fastf1.Cache.enable_cache('f1_analysis_cache')
             
             # 載入 FastF1 session - 關鍵：要載入天氣數據
-            self.session = fastf1.get_session(year, fastf1_race_name, session_type)
-            self.session.load(weather=True)  # 確保載入天氣數據
+            with span("load.fastf1_session", year=year, race=fastf1_race_name, session=session_type):
+                with upstream_call("fastf1", "session_load"):
+                    self.session = fastf1.get_session(year, fastf1_race_name, session_type)
+                    self.session.load(weather=True)  # 確保載入天氣數據
             
             # 初始化 OpenF1 分析器
             openf1_analyzer = F1OpenDataAnalyzer()
             
-            # 尋找對應的 OpenF1 session
-            openf1_session = openf1_analyzer.find_race_session_by_name(year, race_name)
-            openf1_drivers = {}
-            openf1_team_mapping = {}
-            
-            if openf1_session:
-                session_key = openf1_session.get('session_key')
-                print(f"🔗 找到 OpenF1 session_key: {session_key}")
+            with span("load.openf1_lookup"):
+                # 尋找對應的 OpenF1 session
+                openf1_session = openf1_analyzer.find_race_session_by_name(year, race_name)
+                openf1_drivers = {}
+                openf1_team_mapping = {}
                 
-                # 獲取 OpenF1 車手資料
-                openf1_drivers = openf1_analyzer.get_drivers(session_key)
-                openf1_team_mapping = openf1_analyzer.get_driver_team_mapping(session_key)
-            else:
-                print(f"[WARNING]  未找到對應的 OpenF1 session，將只使用 FastF1 資料")
+                if openf1_session:
+                    session_key = openf1_session.get('session_key')
+                    print(f"🔗 找到 OpenF1 session_key: {session_key}")
+                    
+                    # 獲取 OpenF1 車手資料
+                    openf1_drivers = openf1_analyzer.get_drivers(session_key)
+                    openf1_team_mapping = openf1_analyzer.get_driver_team_mapping(session_key)
+                else:
+                    print(f"[WARNING]  未找到對應的 OpenF1 session，將只使用 FastF1 資料")
+            
+            # 同步車手資料 (於更新 loaded_data 前執行，與原本的求值順序相同)
+            with span("load.openf1_sync"):
+                synchronized_driver_data = self._synchronize_driver_data(openf1_drivers, openf1_team_mapping)
             
             # 收集所有相關資料
             self.loaded_data = {
@@ -270,12 +291,12 @@ class CompatibleF1DataLoader:
                 'drivers_info': self._extract_drivers_info(),
                 'openf1_drivers': openf1_drivers,
                 'openf1_team_mapping': openf1_team_mapping,
-                'synchronized_driver_data': self._synchronize_driver_data(openf1_drivers, openf1_team_mapping)
+                'synchronized_driver_data': synchronized_driver_data
             }
             
             # 儲存到快取
             try:
-                with open(cache_file, 'wb') as f:
+                with span("load.pickle_write", path=cache_file), open(cache_file, 'wb') as f:
                     pickle.dump(self.loaded_data, f)
                 print(f"[SAVE] 資料已儲存到快取: {cache_file}")
             except Exception as e:
@@ -294,6 +315,7 @@ class CompatibleF1DataLoader:
             self.session_loaded = True
             
             self._display_data_summary()
+            self._record_integrity_report(cache_file, refresh=True)
             return True
             
         except Exception as e:
@@ -500,6 +522,19 @@ class CompatibleF1DataLoader:
             else:
                 print(f"   [ERROR] 未找到對應的 OpenF1 session")
     
+    def _record_integrity_report(self, cache_file, refresh=True):
+        """完整性掃描並寫入快取 manifest (refresh=False 時已有報告則略過)"""
+        try:
+            name = os.path.basename(cache_file)
+            if not refresh and 'integrity' in read_cache_manifest(self.cache_dir)['sessions'].get(name, {}):
+                return
+            report = check_session_integrity(self.loaded_data)
+            write_manifest_entry(self.cache_dir, cache_file, report)
+            if report['issues']:
+                print(f"[WARNING]  數據完整性: {report['issues']} 項需注意 (詳見 {self.cache_dir}/manifest.json)")
+        except Exception as e:
+            print(f"[WARNING]  數據完整性檢查失敗: {e}")
+    
     def get_loaded_data(self):
         """取得已載入的資料並進行驗證 - 關鍵方法！"""
         # 添加資料驗證
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+F1 數據完整性檢查 - Session Data Integrity Scan
+對已載入的賽事數據做一次向量化完整性掃描，結果寫入快取資料夾的 manifest.json
+
+- 遙測: 全部車手 car_data 串接為一組陣列，一次 diff 找出取樣空檔、重複時間戳與時間倒退；
+  有 Distance 欄位時同時檢查距離不遞增
+- 圈速: 缺少 LapTime 的圈 (區分進/出站圈)、重複的 (Driver, LapNumber)、
+  非進出站圈的名次跳動 (依車手排序後一次 diff)
+- 車手對照: 圈速 / 成績中的車手未出現在 OpenF1 車手資料
+- 成績 vs 圈速: 只出現在其中一邊的車手、成績完成圈數與圈速最大圈數不符
+- 不逐列迴圈，一般正賽整體掃描遠低於一秒，可在每次載入後執行
+
+查詢範例:
+    report = check_session_integrity(data_loader)
+    report['checks']['telemetry']['gaps']          # 遙測取樣空檔
+    write_manifest_entry(data_loader.cache_dir, 'f1_data_2025_Japan_R.pkl', report)
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from prettytable import PrettyTable
+
+try:
+    from .json_export import dumps, loads
+    from .minisector_table import driver_code_map, resolve_session_sources
+    from .session_tables import json_value, to_seconds
+    from .tracing import span
+except ImportError:
+    from json_export import dumps, loads
+    from minisector_table import driver_code_map, resolve_session_sources
+    from session_tables import json_value, to_seconds
+    from tracing import span
+
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# car_data 取樣間隔超過此值 (秒) 視為遙測空檔 (正常約 0.2-0.3 秒)
+TELEMETRY_GAP_SECONDS = 1.0
+
+# Distance 倒退超過此值 (公尺) 才視為不遞增 (容許插值誤差)
+DISTANCE_TOLERANCE = 1.0
+
+# 非進出站圈之間名次變化達此值視為名次跳動
+POSITION_JUMP = 5
+
+# 報告中每項檢查最多列出的明細筆數 (計數仍為完整數量)
+MAX_REPORTED_ITEMS = 50
+
+
+def integrity_records(frame):
+    """明細表轉為字典列表 (最多 MAX_REPORTED_ITEMS 筆)"""
+    return [{key: json_value(value) for key, value in row.items()}
+            for row in frame.head(MAX_REPORTED_ITEMS).to_dict('records')]
+
+
+def _check(count, items=None, **extra):
+    result = {'status': 'warning' if count else 'ok', 'count': int(count)}
+    result.update(extra)
+    if items is not None:
+        result['items'] = items
+    return result
+
+
+def check_telemetry(car_data, codes):
+    """遙測取樣空檔、重複時間戳、時間倒退與 Distance 不遞增 (全部車手串接後一次 diff)"""
+    owners, times, distances = [], [], []
+    has_distance = True
+    keys = []
+    for number, frame in (car_data or {}).items():
+        if frame is None or len(frame) == 0 or 'SessionTime' not in frame.columns:
+            continue
+        keys.append(str(number))
+        owners.append(np.full(len(frame), len(keys) - 1))
+        times.append(to_seconds(frame['SessionTime']))
+        if 'Distance' in frame.columns:
+            distances.append(frame['Distance'].to_numpy(dtype=float))
+        else:
+            has_distance = False
+
+    drivers = [codes.get(key, key) for key in keys]
+    empty = pd.DataFrame(columns=['Driver', 'session_time', 'seconds'])
+    if not keys:
+        return {
+            'status': 'skipped', 'drivers': 0, 'samples': 0,
+            'gaps': _check(0, []), 'duplicate_timestamps': _check(0, []),
+            'time_reversals': _check(0, []), 'distance': {'status': 'skipped', 'count': 0},
+        }, set()
+
+    owner = np.concatenate(owners)
+    session_time = np.concatenate(times)
+    step = np.diff(session_time)
+    same = owner[1:] == owner[:-1]
+    label = np.asarray(drivers, dtype=object)
+
+    def events(mask, values):
+        index = np.flatnonzero(mask)
+        if not index.size:
+            return empty
+        return pd.DataFrame({'Driver': label[owner[index]], 'session_time': session_time[index],
+                             'seconds': values[index]})
+
+    gaps = events(same & (step > TELEMETRY_GAP_SECONDS), step)
+    duplicates = events(same & (step == 0), step)
+    reversals = events(same & (step < 0), step)
+
+    if has_distance and distances:
+        distance = np.concatenate(distances)
+        moved = np.diff(distance)
+        backwards = same & (moved < -DISTANCE_TOLERANCE)
+        index = np.flatnonzero(backwards)
+        frame = pd.DataFrame({'Driver': label[owner[index]], 'session_time': session_time[index],
+                              'distance_drop_m': -moved[index]})
+        distance_check = _check(len(frame), integrity_records(frame))
+    else:
+        distance_check = {'status': 'skipped', 'count': 0, 'reason': 'car_data 沒有 Distance 欄位'}
+
+    gap_seconds = gaps.groupby('Driver')['seconds'].sum() if not gaps.empty else pd.Series(dtype=float)
+    return {
+        'status': 'warning' if len(gaps) or len(duplicates) or len(reversals) or distance_check['count'] else 'ok',
+        'drivers': len(keys),
+        'samples': int(session_time.size),
+        'gaps': _check(len(gaps), integrity_records(gaps),
+                       missing_seconds={driver: json_value(seconds) for driver, seconds in gap_seconds.items()}),
+        'duplicate_timestamps': _check(len(duplicates), integrity_records(duplicates)),
+        'time_reversals': _check(len(reversals), integrity_records(reversals)),
+        'distance': distance_check,
+    }, set(drivers)
+
+
+def check_laps(laps):
+    """缺少 LapTime 的圈、重複圈號與名次跳動"""
+    keys = ['Driver', 'LapNumber']
+    frame = pd.DataFrame({
+        'Driver': laps['Driver'].astype(str).to_numpy(),
+        'LapNumber': pd.to_numeric(laps['LapNumber'], errors='coerce').to_numpy(),
+        'lap_seconds': to_seconds(laps['LapTime']) if 'LapTime' in laps.columns else np.nan,
+        'Position': pd.to_numeric(laps['Position'], errors='coerce').to_numpy()
+        if 'Position' in laps.columns else np.nan,
+    })
+    frame['pit'] = False
+    for column in ('PitInTime', 'PitOutTime'):
+        if column in laps.columns:
+            frame['pit'] |= laps[column].notna().to_numpy()
+
+    missing = frame[np.isnan(frame['lap_seconds'].to_numpy(dtype=float))]
+    unexpected = missing[~missing['pit'] & (missing['LapNumber'] > 1)]
+    duplicated = frame[frame.duplicated(keys, keep=False)].sort_values(keys, kind='mergesort')
+
+    ordered = frame.dropna(subset=['LapNumber']).sort_values(keys, kind='mergesort')
+    same = ordered['Driver'].to_numpy()[1:] == ordered['Driver'].to_numpy()[:-1]
+    consecutive = np.diff(ordered['LapNumber'].to_numpy(dtype=float)) == 1
+    pit = ordered['pit'].to_numpy()
+    position = ordered['Position'].to_numpy(dtype=float)
+    change = np.diff(position)
+    jumps = same & consecutive & ~pit[1:] & ~pit[:-1] & (np.abs(change) >= POSITION_JUMP)
+    index = np.flatnonzero(jumps) + 1
+    jump_frame = pd.DataFrame({
+        'Driver': ordered['Driver'].to_numpy()[index],
+        'LapNumber': ordered['LapNumber'].to_numpy()[index],
+        'position_before': position[index - 1],
+        'position_after': position[index],
+    })
+
+    return {
+        'status': 'warning' if len(unexpected) or len(duplicated) or len(jump_frame) else 'ok',
+        'laps': int(len(frame)),
+        'missing_lap_time': _check(len(unexpected), integrity_records(unexpected[keys]),
+                                   total_missing=int(len(missing)), pit_or_first_lap=int(len(missing) - len(unexpected))),
+        'duplicate_laps': _check(len(duplicated), integrity_records(duplicated[keys])),
+        'position_jumps': _check(len(jump_frame), integrity_records(jump_frame)),
+    }
+
+
+def check_driver_mapping(drivers, openf1_drivers, synchronized):
+    """圈速 / 成績中的車手是否都有 OpenF1 車手資料"""
+    acronyms = {str(driver.get('name_acronym')) for driver in (openf1_drivers or {}).values()
+                if isinstance(driver, dict) and driver.get('name_acronym')}
+    fastf1_only = sorted(code for code, entry in (synchronized or {}).items()
+                         if entry.get('reconciled_data', {}).get('data_source') == 'FastF1 only')
+    if not acronyms:
+        # 未載入 OpenF1 資料時無從比對，不列為問題
+        return {'status': 'skipped', 'count': 0, 'items': [], 'openf1_drivers': 0, 'fastf1_only': fastf1_only,
+                'reason': '沒有 OpenF1 車手資料'}
+    missing = sorted(drivers - acronyms)
+    return _check(len(missing), missing, openf1_drivers=len(acronyms), fastf1_only=fastf1_only)
+
+
+def check_results_vs_laps(results, laps):
+    """成績與圈速的車手與完成圈數是否一致"""
+    if not isinstance(results, pd.DataFrame) or results.empty or 'Abbreviation' not in results.columns:
+        return {'status': 'skipped', 'count': 0, 'reason': '沒有成績數據'}
+
+    lap_counts = pd.to_numeric(laps['LapNumber'], errors='coerce').groupby(laps['Driver'].astype(str)).max()
+    codes = results['Abbreviation'].astype(str)
+    only_results = sorted(set(codes) - set(lap_counts.index))
+    only_laps = sorted(set(lap_counts.index) - set(codes))
+
+    mismatched = pd.DataFrame(columns=['Driver', 'results_laps', 'laps_max'])
+    if 'Laps' in results.columns:
+        compared = pd.DataFrame({'Driver': codes.to_numpy(),
+                                 'results_laps': pd.to_numeric(results['Laps'], errors='coerce').to_numpy()})
+        compared['laps_max'] = compared['Driver'].map(lap_counts).to_numpy(dtype=float)
+        mismatched = compared[compared['results_laps'].notna() & compared['laps_max'].notna()
+                              & (compared['results_laps'] != compared['laps_max'])]
+
+    count = len(only_results) + len(only_laps) + len(mismatched)
+    return _check(count, integrity_records(mismatched), only_in_results=only_results, only_in_laps=only_laps)
+
+
+def check_session_integrity(source):
+    """完整性掃描
+
+    Args:
+        source: get_loaded_data() 字典、數據載入器或 FastF1 session
+
+    Returns:
+        dict: checked_at, elapsed_ms, status, issues, checks (telemetry / laps / driver_mapping / results_vs_laps)
+    """
+    started = time.perf_counter()
+    data = source if isinstance(source, dict) else getattr(source, 'loaded_data', None) or {}
+    laps, car_data, _, results = resolve_session_sources(source)
+
+    with span("integrity.scan"):
+        checks = {}
+        if laps is None or laps.empty or not {'Driver', 'LapNumber'}.issubset(laps.columns):
+            checks['laps'] = {'status': 'skipped', 'laps': 0, 'reason': '沒有圈速數據'}
+            drivers = set()
+            codes = {}
+        else:
+            checks['laps'] = check_laps(laps)
+            drivers = set(laps['Driver'].astype(str))
+            codes = driver_code_map(laps, results)
+        if isinstance(results, pd.DataFrame) and 'Abbreviation' in results.columns:
+            drivers |= set(results['Abbreviation'].dropna().astype(str))
+
+        telemetry, with_telemetry = check_telemetry(car_data, codes)
+        without = sorted(set(laps['Driver'].astype(str)) - with_telemetry) if checks['laps']['status'] != 'skipped' \
+            else []
+        telemetry['drivers_without_telemetry'] = without
+        if without and telemetry['status'] == 'ok':
+            telemetry['status'] = 'warning'
+        checks['telemetry'] = telemetry
+        checks['driver_mapping'] = check_driver_mapping(drivers, data.get('openf1_drivers'),
+                                                        data.get('synchronized_driver_data'))
+        checks['results_vs_laps'] = check_results_vs_laps(results, laps) if checks['laps']['status'] != 'skipped' \
+            else {'status': 'skipped', 'count': 0, 'reason': '沒有圈速數據'}
+
+    issues = sum(1 for check in checks.values() if check['status'] == 'warning')
+    return {
+        'checked_at': datetime.now().isoformat(timespec='seconds'),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        'status': 'warning' if issues else 'ok',
+        'issues': issues,
+        'metadata': {key: json_value(value) for key, value in (data.get('metadata') or {}).items()},
+        'checks': checks,
+    }
+
+
+def read_cache_manifest(cache_dir):
+    """讀取快取資料夾的 manifest.json (不存在或無法解析時回傳空清單)"""
+    path = os.path.join(cache_dir, MANIFEST_FILENAME)
+    try:
+        with open(path, 'rb') as f:
+            manifest = loads(f.read())
+    except (OSError, ValueError):
+        manifest = {}
+    if not isinstance(manifest, dict) or not isinstance(manifest.get('sessions'), dict):
+        manifest = {'version': MANIFEST_VERSION, 'sessions': {}}
+    return manifest
+
+
+def write_manifest_entry(cache_dir, cache_file, report):
+    """將完整性報告寫入 manifest.json 的對應快取檔項目 (先寫暫存檔再替換，避免寫到一半)"""
+    manifest = read_cache_manifest(cache_dir)
+    name = os.path.basename(cache_file)
+    entry = manifest['sessions'].get(name, {})
+    path = os.path.join(cache_dir, name)
+    if os.path.exists(path):
+        entry['size_bytes'] = os.path.getsize(path)
+        entry['modified_at'] = datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec='seconds')
+    entry['integrity'] = report
+    manifest['sessions'][name] = entry
+    manifest['version'] = MANIFEST_VERSION
+
+    os.makedirs(cache_dir, exist_ok=True)
+    target = os.path.join(cache_dir, MANIFEST_FILENAME)
+    temporary = f"{target}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as f:
+        f.write(dumps(manifest, pretty=True))
+    os.replace(temporary, target)
+    return target
+
+
+def display_integrity_report(report):
+    table = PrettyTable()
+    table.field_names = ["檢查項目", "狀態", "問題數", "說明"]
+    table.align = "l"
+    checks = report['checks']
+    telemetry = checks['telemetry']
+    if telemetry['status'] != 'skipped':
+        table.add_row(["遙測空檔", telemetry['gaps']['status'], telemetry['gaps']['count'],
+                       f"間隔 > {TELEMETRY_GAP_SECONDS:.1f}s"])
+        table.add_row(["重複時間戳", telemetry['duplicate_timestamps']['status'],
+                       telemetry['duplicate_timestamps']['count'], ""])
+        table.add_row(["時間倒退", telemetry['time_reversals']['status'], telemetry['time_reversals']['count'], ""])
+        table.add_row(["Distance 不遞增", telemetry['distance']['status'], telemetry['distance']['count'],
+                       telemetry['distance'].get('reason', "")])
+        table.add_row(["無遙測車手", "warning" if telemetry['drivers_without_telemetry'] else "ok",
+                       len(telemetry['drivers_without_telemetry']), ", ".join(telemetry['drivers_without_telemetry'])])
+    else:
+        table.add_row(["遙測", "skipped", 0, "沒有 car_data"])
+    laps = checks['laps']
+    if laps['status'] != 'skipped':
+        missing = laps['missing_lap_time']
+        table.add_row(["缺少 LapTime", missing['status'], missing['count'],
+                       f"另有 {missing['pit_or_first_lap']} 圈為進出站或第一圈"])
+        table.add_row(["重複圈號", laps['duplicate_laps']['status'], laps['duplicate_laps']['count'], ""])
+        table.add_row(["名次跳動", laps['position_jumps']['status'], laps['position_jumps']['count'],
+                       f"非進出站圈變化 ≥ {POSITION_JUMP}"])
+    else:
+        table.add_row(["圈速", "skipped", 0, laps.get('reason', "")])
+    mapping = checks['driver_mapping']
+    table.add_row(["OpenF1 車手對照", mapping['status'], mapping['count'],
+                   mapping.get('reason') or ", ".join(mapping['items'])])
+    results = checks['results_vs_laps']
+    detail = results.get('reason', "")
+    if results['status'] != 'skipped':
+        detail = f"僅成績: {', '.join(results['only_in_results']) or '-'} / 僅圈速: {', '.join(results['only_in_laps']) or '-'}"
+    table.add_row(["成績 vs 圈速", results['status'], results['count'], detail])
+    print(f"\n🩺 數據完整性檢查 ({report['elapsed_ms']:.1f} ms)")
+    print(table)
+
+
+def run_data_integrity_check(data_loader, show_detailed_output=True):
+    """數據完整性檢查 (功能53)"""
+    if not getattr(data_loader, 'loaded_data', None):
+        return {"success": False, "message": "沒有已載入的賽事數據", "function_id": "53"}
+
+    report = check_session_integrity(data_loader)
+    manifest = None
+    cache_dir = getattr(data_loader, 'cache_dir', None)
+    metadata = data_loader.loaded_data.get('metadata') or {}
+    if cache_dir and hasattr(data_loader, '_get_cache_filename') and metadata.get('race_name'):
+        cache_file = data_loader._get_cache_filename(metadata.get('year'), metadata['race_name'],
+                                                     metadata.get('session_type', 'R'))
+        try:
+            manifest = write_manifest_entry(cache_dir, cache_file, report)
+        except OSError as e:
+            print(f"[WARNING]  完整性報告寫入 manifest 失敗: {e}")
+
+    if show_detailed_output:
+        display_integrity_report(report)
+
+    return {
+        "success": True,
+        "message": f"數據完整性檢查完成 ({report['issues']} 項需注意，{report['elapsed_ms']:.1f} ms)",
+        "data": {"report": report, "manifest": manifest},
+        "function_id": "53",
+    }
@@ -23,6 +23,7 @@ from matplotlib.lines import Line2D
 sys.path.append(str(Path(__file__).parent.parent))
 
 from modules.base import F1AnalysisBase
+from modules.chart_renderer import acquire_figure, register_chart_renderer, release_figure, show_figure
 
 class DistanceGapAnalyzer(F1AnalysisBase):
     """距離差距分析器 - 專門分析兩車手之間的距離差距"""
@@ -588,127 +589,32 @@ class DistanceGapAnalyzer(F1AnalysisBase):
         driver1, driver2 = self.selected_drivers
         lap1_num, lap2_num = self.selected_laps
         
+        fig = None
         try:
-            # 設置圖表樣式
-            plt.style.use('default')
-            fig = plt.figure(figsize=(16, 12))
-            
-            # 創建子圖布局
-            gs = fig.add_gridspec(3, 2, height_ratios=[2, 1, 1], hspace=0.3, wspace=0.3)
-            
-            # 主標題
-            fig.suptitle(f'距離差距分析: {driver1} (第{lap1_num}圈) vs {driver2} (第{lap2_num}圈)', 
-                        fontsize=16, fontweight='bold')
-            
-            # 1. 賽道位置圖 (左上，跨兩列)
-            ax1 = fig.add_subplot(gs[0, :])
-            ax1.plot(x1_grid, y1_grid, label=f'{driver1} (第{lap1_num}圈)', 
-                    linewidth=3, color='blue', alpha=0.8)
-            ax1.plot(x2_grid, y2_grid, label=f'{driver2} (第{lap2_num}圈)', 
-                    linewidth=3, color='red', alpha=0.8)
-            
-            # 標註起點和終點
-            ax1.scatter(x1_grid[0], y1_grid[0], color='blue', s=100, marker='o', 
-                       label=f'{driver1} 起點', zorder=5)
-            ax1.scatter(x2_grid[0], y2_grid[0], color='red', s=100, marker='o', 
-                       label=f'{driver2} 起點', zorder=5)
-            ax1.scatter(x1_grid[-1], y1_grid[-1], color='blue', s=100, marker='s', 
-                       label=f'{driver1} 終點', zorder=5)
-            ax1.scatter(x2_grid[-1], y2_grid[-1], color='red', s=100, marker='s', 
-                       label=f'{driver2} 終點', zorder=5)
-            
-            # 標註最近和最遠點
-            min_dist_idx = np.argmin(distance_gap)
-            max_dist_idx = np.argmax(distance_gap)
-            
-            ax1.plot([x1_grid[min_dist_idx], x2_grid[min_dist_idx]], 
-                    [y1_grid[min_dist_idx], y2_grid[min_dist_idx]], 
-                    'g-', linewidth=2, alpha=0.7, label=f'最近距離 ({distance_gap[min_dist_idx]:.1f}m)')
-            ax1.plot([x1_grid[max_dist_idx], x2_grid[max_dist_idx]], 
-                    [y1_grid[max_dist_idx], y2_grid[max_dist_idx]], 
-                    'orange', linewidth=2, alpha=0.7, label=f'最遠距離 ({distance_gap[max_dist_idx]:.1f}m)')
-            
-            ax1.set_title('賽道位置對比', fontweight='bold', fontsize=14)
-            ax1.set_xlabel('X 位置 (m)', fontsize=12)
-            ax1.set_ylabel('Y 位置 (m)', fontsize=12)
-            ax1.set_aspect('equal')
-            ax1.grid(True, alpha=0.3)
-            ax1.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-            
-            # 2. 距離變化圖 (左下)
-            ax2 = fig.add_subplot(gs[1, 0])
-            ax2.plot(time_grid, distance_gap, color='purple', linewidth=2)
-            ax2.fill_between(time_grid, 0, distance_gap, alpha=0.3, color='purple')
-            
-            # 標註關鍵點
-            ax2.scatter(time_grid[min_dist_idx], distance_gap[min_dist_idx], 
-                       color='green', s=80, zorder=5)
-            ax2.scatter(time_grid[max_dist_idx], distance_gap[max_dist_idx], 
-                       color='orange', s=80, zorder=5)
-            
-            ax2.set_title('兩車距離變化', fontweight='bold', fontsize=12)
-            ax2.set_xlabel('時間 (s)', fontsize=11)
-            ax2.set_ylabel('距離 (m)', fontsize=11)
-            ax2.grid(True, alpha=0.3)
-            
-            # 3. 距離統計圖 (右下)
-            ax3 = fig.add_subplot(gs[1, 1])
-            
-            # 創建距離分布直方圖
-            ax3.hist(distance_gap, bins=20, alpha=0.7, color='skyblue', edgecolor='black')
-            ax3.axvline(np.mean(distance_gap), color='red', linestyle='--', 
-                       label=f'平均: {np.mean(distance_gap):.1f}m')
-            ax3.axvline(np.median(distance_gap), color='green', linestyle='--', 
-                       label=f'中位數: {np.median(distance_gap):.1f}m')
-            
-            ax3.set_title('距離分布統計', fontweight='bold', fontsize=12)
-            ax3.set_xlabel('距離 (m)', fontsize=11)
-            ax3.set_ylabel('頻次', fontsize=11)
-            ax3.legend()
-            ax3.grid(True, alpha=0.3)
-            
-            # 4. 速度對比圖 (如果有速度數據)
-            ax4 = fig.add_subplot(gs[2, :])
-            
-            # 計算相對速度（距離變化率）
-            if len(time_grid) > 1:
-                dt = time_grid[1] - time_grid[0]
-                relative_speed = np.gradient(distance_gap, dt)
-                
-                ax4.plot(time_grid, relative_speed, color='darkorange', linewidth=2)
-                ax4.axhline(y=0, color='black', linestyle='-', alpha=0.3)
-                ax4.fill_between(time_grid, 0, relative_speed, where=(relative_speed >= 0), 
-                               color='red', alpha=0.3, label='距離增加')
-                ax4.fill_between(time_grid, 0, relative_speed, where=(relative_speed < 0), 
-                               color='green', alpha=0.3, label='距離縮小')
-                
-                ax4.set_title('相對速度分析 (距離變化率)', fontweight='bold', fontsize=12)
-                ax4.set_xlabel('時間 (s)', fontsize=11)
-                ax4.set_ylabel('相對速度 (m/s)', fontsize=11)
-                ax4.legend()
-                ax4.grid(True, alpha=0.3)
-            
-            plt.tight_layout()
+            # 設置圖表樣式 (池化圖表，主題設定已快取)
+            fig = acquire_figure(figsize=(16, 12), dark_theme=False)
+            draw_distance_gap_chart(fig, None, time_grid, distance_gap, x1_grid, y1_grid, x2_grid, y2_grid,
+                                    driver1, driver2, lap1_num, lap2_num)
             
             # 儲存圖表
             cache_dir = self.get_cache_dir()
             filename = f"distance_gap_analysis_{driver1}_vs_{driver2}_{lap1_num}_{lap2_num}.png"
             filepath = cache_dir / filename
-            plt.savefig(filepath, dpi=300, bbox_inches='tight')
+            fig.savefig(filepath, dpi=300, bbox_inches='tight')
             print(f"[INFO] 距離差距分析圖已儲存: {filepath}")
             
             # 顯示圖表
             if self.f1_analysis_instance and hasattr(self.f1_analysis_instance, 'show_plots'):
                 if self.f1_analysis_instance.show_plots:
-                    plt.show()
+                    show_figure(fig)
             else:
-                plt.show()
+                show_figure(fig)
                 
         except Exception as e:
             print(f"[ERROR] 圖表生成失敗: {e}")
             traceback.print_exc()
         finally:
-            plt.close()
+            release_figure(fig)
     
     def _analyze_distance_gap_by_distance(self, telemetry1, telemetry2, driver1, driver2, lap1_num, lap2_num):
         """基於距離數據的差距分析（當無坐標數據時使用）"""
@@ -868,15 +774,12 @@ class DistanceGapAnalyzer(F1AnalysisBase):
     
     def _plot_distance_based_gap(self, distance_grid, time_gap, driver1, driver2, lap1_num, lap2_num):
         """繪製基於距離的差距分析圖表"""
+        fig = None
         try:
-            plt.style.use('default')
-            fig = plt.figure(figsize=(16, 10))
+            # 池化圖表 - 中文字體由快取的主題設定提供
+            fig = acquire_figure(figsize=(16, 10), dark_theme=False)
             gs = fig.add_gridspec(2, 2, hspace=0.3, wspace=0.3)
             
-            # 設置中文字體
-            plt.rcParams['font.sans-serif'] = ['Microsoft JhengHei', 'SimHei', 'DejaVu Sans']
-            plt.rcParams['axes.unicode_minus'] = False
-            
             fig.suptitle(f'距離基礎時間差距分析\n{driver1} 第{lap1_num}圈 vs {driver2} 第{lap2_num}圈', 
                         fontsize=16, fontweight='bold', y=0.95)
             
@@ -930,27 +833,135 @@ class DistanceGapAnalyzer(F1AnalysisBase):
             ax3.legend()
             ax3.grid(True, alpha=0.3)
             
-            plt.tight_layout()
+            fig.tight_layout()
             
             # 儲存圖表
             cache_dir = self.get_cache_dir()
             filename = f"distance_based_gap_analysis_{driver1}_vs_{driver2}_{lap1_num}_{lap2_num}.png"
             filepath = cache_dir / filename
-            plt.savefig(filepath, dpi=300, bbox_inches='tight')
+            fig.savefig(filepath, dpi=300, bbox_inches='tight')
             print(f"[INFO] 距離基礎差距分析圖已儲存: {filepath}")
             
             # 顯示圖表
             if self.f1_analysis_instance and hasattr(self.f1_analysis_instance, 'show_plots'):
                 if self.f1_analysis_instance.show_plots:
-                    plt.show()
+                    show_figure(fig)
             else:
-                plt.show()
+                show_figure(fig)
                 
         except Exception as e:
             print(f"[ERROR] 距離基礎圖表生成失敗: {e}")
             traceback.print_exc()
         finally:
-            plt.close()
+            release_figure(fig)
+
+
+@register_chart_renderer("distance_gap")
+def draw_distance_gap_chart(fig, axes, time_grid, distance_gap, x1_grid, y1_grid, x2_grid, y2_grid,
+                            driver1, driver2, lap1_num, lap2_num):
+    """距離差距圖 (賽道位置、距離變化、距離分布、相對速度)；自行建立版面，批次渲染工作使用 nrows=0, figsize=(16, 12)"""
+    time_grid = np.asarray(time_grid, dtype=float)
+    distance_gap = np.asarray(distance_gap, dtype=float)
+    x1_grid, y1_grid = np.asarray(x1_grid, dtype=float), np.asarray(y1_grid, dtype=float)
+    x2_grid, y2_grid = np.asarray(x2_grid, dtype=float), np.asarray(y2_grid, dtype=float)
+
+    # 創建子圖布局
+    gs = fig.add_gridspec(3, 2, height_ratios=[2, 1, 1], hspace=0.3, wspace=0.3)
+
+    # 主標題
+    fig.suptitle(f'距離差距分析: {driver1} (第{lap1_num}圈) vs {driver2} (第{lap2_num}圈)', 
+                fontsize=16, fontweight='bold')
+
+    # 1. 賽道位置圖 (左上，跨兩列)
+    ax1 = fig.add_subplot(gs[0, :])
+    ax1.plot(x1_grid, y1_grid, label=f'{driver1} (第{lap1_num}圈)', 
+            linewidth=3, color='blue', alpha=0.8)
+    ax1.plot(x2_grid, y2_grid, label=f'{driver2} (第{lap2_num}圈)', 
+            linewidth=3, color='red', alpha=0.8)
+
+    # 標註起點和終點
+    ax1.scatter(x1_grid[0], y1_grid[0], color='blue', s=100, marker='o', 
+               label=f'{driver1} 起點', zorder=5)
+    ax1.scatter(x2_grid[0], y2_grid[0], color='red', s=100, marker='o', 
+               label=f'{driver2} 起點', zorder=5)
+    ax1.scatter(x1_grid[-1], y1_grid[-1], color='blue', s=100, marker='s', 
+               label=f'{driver1} 終點', zorder=5)
+    ax1.scatter(x2_grid[-1], y2_grid[-1], color='red', s=100, marker='s', 
+               label=f'{driver2} 終點', zorder=5)
+
+    # 標註最近和最遠點
+    min_dist_idx = np.argmin(distance_gap)
+    max_dist_idx = np.argmax(distance_gap)
+
+    ax1.plot([x1_grid[min_dist_idx], x2_grid[min_dist_idx]], 
+            [y1_grid[min_dist_idx], y2_grid[min_dist_idx]], 
+            'g-', linewidth=2, alpha=0.7, label=f'最近距離 ({distance_gap[min_dist_idx]:.1f}m)')
+    ax1.plot([x1_grid[max_dist_idx], x2_grid[max_dist_idx]], 
+            [y1_grid[max_dist_idx], y2_grid[max_dist_idx]], 
+            'orange', linewidth=2, alpha=0.7, label=f'最遠距離 ({distance_gap[max_dist_idx]:.1f}m)')
+
+    ax1.set_title('賽道位置對比', fontweight='bold', fontsize=14)
+    ax1.set_xlabel('X 位置 (m)', fontsize=12)
+    ax1.set_ylabel('Y 位置 (m)', fontsize=12)
+    ax1.set_aspect('equal')
+    ax1.grid(True, alpha=0.3)
+    ax1.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+
+    # 2. 距離變化圖 (左下)
+    ax2 = fig.add_subplot(gs[1, 0])
+    ax2.plot(time_grid, distance_gap, color='purple', linewidth=2)
+    ax2.fill_between(time_grid, 0, distance_gap, alpha=0.3, color='purple')
+
+    # 標註關鍵點
+    ax2.scatter(time_grid[min_dist_idx], distance_gap[min_dist_idx], 
+               color='green', s=80, zorder=5)
+    ax2.scatter(time_grid[max_dist_idx], distance_gap[max_dist_idx], 
+               color='orange', s=80, zorder=5)
+
+    ax2.set_title('兩車距離變化', fontweight='bold', fontsize=12)
+    ax2.set_xlabel('時間 (s)', fontsize=11)
+    ax2.set_ylabel('距離 (m)', fontsize=11)
+    ax2.grid(True, alpha=0.3)
+
+    # 3. 距離統計圖 (右下)
+    ax3 = fig.add_subplot(gs[1, 1])
+
+    # 創建距離分布直方圖
+    ax3.hist(distance_gap, bins=20, alpha=0.7, color='skyblue', edgecolor='black')
+    ax3.axvline(np.mean(distance_gap), color='red', linestyle='--', 
+               label=f'平均: {np.mean(distance_gap):.1f}m')
+    ax3.axvline(np.median(distance_gap), color='green', linestyle='--', 
+               label=f'中位數: {np.median(distance_gap):.1f}m')
+
+    ax3.set_title('距離分布統計', fontweight='bold', fontsize=12)
+    ax3.set_xlabel('距離 (m)', fontsize=11)
+    ax3.set_ylabel('頻次', fontsize=11)
+    ax3.legend()
+    ax3.grid(True, alpha=0.3)
+
+    # 4. 速度對比圖 (如果有速度數據)
+    ax4 = fig.add_subplot(gs[2, :])
+
+    # 計算相對速度（距離變化率）
+    if len(time_grid) > 1:
+        dt = time_grid[1] - time_grid[0]
+        relative_speed = np.gradient(distance_gap, dt)
+
+        ax4.plot(time_grid, relative_speed, color='darkorange', linewidth=2)
+        ax4.axhline(y=0, color='black', linestyle='-', alpha=0.3)
+        ax4.fill_between(time_grid, 0, relative_speed, where=(relative_speed >= 0), 
+                       color='red', alpha=0.3, label='距離增加')
+        ax4.fill_between(time_grid, 0, relative_speed, where=(relative_speed < 0), 
+                       color='green', alpha=0.3, label='距離縮小')
+
+        ax4.set_title('相對速度分析 (距離變化率)', fontweight='bold', fontsize=12)
+        ax4.set_xlabel('時間 (s)', fontsize=11)
+        ax4.set_ylabel('相對速度 (m/s)', fontsize=11)
+        ax4.legend()
+        ax4.grid(True, alpha=0.3)
+
+    fig.tight_layout()
+
 
 def run_distance_gap_analysis(data_loader, open_analyzer=None, f1_analysis_instance=None):
     """執行距離差距分析 - 對外接口函數"""
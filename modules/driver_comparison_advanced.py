@@ -1257,6 +1257,16 @@ def run_driver_comparison_json(data_loader, f1_analysis_instance=None, enable_de
             if not lap1_data_query.empty and not lap2_data_query.empty:
                 comparison_analysis["telemetry_comparison"]["telemetry_available"] = True
                 comparison_analysis["telemetry_comparison"]["note"] = "遙測數據可用，但API版本僅提供基本統計"
+                
+                # 逐段差距取自共用的全場迷你分段表 (不再逐圈載入遙測)
+                from modules.minisector_table import get_minisector_table, minisector_records
+                minisectors = get_minisector_table(data_loader)
+                if selected_driver1 in minisectors.drivers and selected_driver2 in minisectors.drivers:
+                    deltas = minisectors.compare(selected_driver1, lap_data1['LapNumber'],
+                                                 selected_driver2, lap_data2['LapNumber'])
+                    comparison_analysis["telemetry_comparison"]["minisectors"] = minisector_records(deltas)
+                    comparison_analysis["telemetry_comparison"]["note"] = (
+                        f"{minisectors.n_minisectors} 個迷你分段差距 (正值表示 {selected_driver1} 較慢)")
             else:
                 comparison_analysis["telemetry_comparison"]["telemetry_available"] = False
                 comparison_analysis["telemetry_comparison"]["note"] = "遙測數據不可用"
@@ -13,6 +13,21 @@ from matplotlib.collections import LineCollection
 from prettytable import PrettyTable
 import warnings
 
+try:
+    from .chart_renderer import acquire_subplots, release_figure
+    from .base import setup_matplotlib_chinese
+    from .incident_timeline import get_incident_timeline
+    from .pitstop_table import get_pitstop_table, get_driver_pitstops
+    from .tire_stint_model import get_tire_model
+    from .weather_arrays import weather_for_laps, weather_label
+except ImportError:
+    from chart_renderer import acquire_subplots, release_figure
+    from base import setup_matplotlib_chinese
+    from incident_timeline import get_incident_timeline
+    from pitstop_table import get_pitstop_table, get_driver_pitstops
+    from tire_stint_model import get_tire_model
+    from weather_arrays import weather_for_laps, weather_label
+
 def run_single_driver_comprehensive_analysis(data_loader, open_analyzer, f1_analysis_instance=None):
     """執行單一車手綜合分析 - 完全復刻原始程式功能"""
     try:
@@ -231,6 +246,12 @@ def _display_complete_lap_analysis_replica(driver_laps, weather_data, driver_abb
         track_status = data.get('track_status')
         race_control_messages = data.get('race_control_messages')
         
+        # 賽事事件時間軸 - 每場賽事只建立一次，逐圈查詢為 O(log n)
+        timeline = get_incident_timeline(data)
+        
+        # 逐圈天氣 - 天氣樣本已依圈起點時間對齊
+        lap_weather = weather_for_laps(sorted_laps, data)
+        
         # 找出最快圈
         valid_times = sorted_laps['LapTime'].dropna()
         fastest_time = None
@@ -258,7 +279,7 @@ def _display_complete_lap_analysis_replica(driver_laps, weather_data, driver_abb
             pit_info = _check_pitstop_status(lap)
             
             # 對應天氣資料
-            weather_info = _get_weather_for_lap(lap, weather_data)
+            weather_info = _get_weather_for_lap(lap, weather_data, lap_weather)
             
             # 區段速度
             speed_i1 = f"{lap['SpeedI1']:.0f}" if pd.notna(lap.get('SpeedI1')) else 'N/A'
@@ -271,7 +292,7 @@ def _display_complete_lap_analysis_replica(driver_laps, weather_data, driver_abb
                 note = "🏆最快圈"
             
             # 檢查此圈是否有賽事事件
-            race_events = _get_race_events_for_lap(lap_num, track_status, race_control_messages)
+            race_events = _get_race_events_for_lap(lap_num, timeline)
             if race_events:
                 if note:
                     note += " | "
@@ -316,7 +337,7 @@ def _display_detailed_tire_strategy_replica(driver_laps, driver_abbr, data):
         print("=" * 120)
         
         # 輪胎使用統計
-        compound_stats = _analyze_tire_strategy_replica(driver_laps)
+        compound_stats = _analyze_tire_strategy_replica(driver_laps, data, driver_abbr)
         
         if not compound_stats:
             print("[ERROR] 無法分析輪胎策略")
@@ -344,7 +365,10 @@ def _display_detailed_tire_strategy_replica(driver_laps, driver_abbr, data):
             if stats['stint_info']:
                 stints = []
                 for stint in stats['stint_info']:
-                    stints.append(f"{stint['start_lap']}.0-{stint['end_lap']}.0")
+                    stint_range = f"{stint['start_lap']}.0-{stint['end_lap']}.0"
+                    if pd.notna(stint.get('degradation')):
+                        stint_range += f" ({stint['degradation']:+.3f}s/圈)"
+                    stints.append(stint_range)
                 stint_text = ", ".join(stints)
             else:
                 stint_text = "N/A"
@@ -564,8 +588,8 @@ def _plot_single_driver_telemetry_replica(session, lap_data, driver_abbr, driver
         _setup_chinese_font(dark_theme=False)
         
         # 建立 3x3 的子圖布局
-        fig, axes = plt.subplots(3, 3, figsize=(24, 18), constrained_layout=True, 
-                                facecolor='white')
+        fig, axes = acquire_subplots(3, 3, figsize=(24, 18), constrained_layout=True, 
+                                     facecolor='white')
 
         # 1. 速度曲線 - 使用黑色，線條粗度1
         ax = axes[0, 0]
@@ -782,6 +806,9 @@ def _plot_single_driver_telemetry_replica(session, lap_data, driver_abbr, driver
         # 顯示圖表
         # plt.show()  # 圖表顯示已禁用
 
+        # 顯示已禁用 - 釋放圖表避免 Figure 累積
+        release_figure(fig)
+
         print("[SUCCESS] 單一車手遙測圖表生成已完成（顯示已禁用）")
 
     except Exception as e:
@@ -824,22 +851,21 @@ def _check_pitstop_status(lap):
     except:
         return 'N/A'
 
-def _get_weather_for_lap(lap, weather_data):
+def _get_weather_for_lap(lap, weather_data, lap_weather):
     """根據圈次時間精確判斷天氣狀況"""
     try:
-        if weather_data is None or weather_data.empty:
+        if weather_data is None or weather_data.empty or lap.name not in lap_weather.index:
             return 'N/A'
-        return '晴朗'  # 簡化實現
+        row = lap_weather.loc[lap.name]
+        return weather_label(row['weather_track_temp'], row['weather_rainfall'])
     except:
         return 'N/A'
 
-def _get_race_events_for_lap(lap_number, track_status, race_control_messages):
-    """檢查指定圈數是否有賽事事件"""
-    events = []
+def _get_race_events_for_lap(lap_number, timeline):
+    """檢查指定圈數是否有賽事事件 (賽道狀態與重大事件)"""
     try:
-        # 簡化實現，返回空列表
-        return events
-    except:
+        return timeline.lap_annotations(lap_number)
+    except Exception:
         return []
 
 def _create_lap_time_trend_chart_replica(sorted_laps, driver_abbr, track_status, race_control_messages, data):
@@ -849,11 +875,16 @@ def _create_lap_time_trend_chart_replica(sorted_laps, driver_abbr, track_status,
     except Exception as e:
         print(f"[ERROR] 圈速趨勢圖生成失敗: {e}")
 
-def _analyze_tire_strategy_replica(driver_laps):
+def _analyze_tire_strategy_replica(driver_laps, data=None, driver_abbr=None):
     """分析輪胎策略 - 復刻原始程式"""
     try:
         compound_stats = {}
         
+        # stint 與衰退擬合由整場賽事共用的輪胎模型一次計算
+        driver_stints = get_tire_model(data).driver_stints(driver_abbr) if data and driver_abbr else None
+        if driver_stints is None or driver_stints.empty:
+            driver_stints = get_tire_model(driver_laps).stints
+        
         # 按輪胎配方分組分析
         for compound in driver_laps['Compound'].unique():
             if pd.isna(compound):
@@ -918,7 +949,7 @@ def _analyze_tire_strategy_replica(driver_laps):
             stats['speed_stats'] = speed_stats
             
             # 分析使用階段 (stint)
-            stint_info = _analyze_tire_stint(compound_laps, compound)
+            stint_info = _analyze_tire_stint(driver_stints, compound)
             stats['stint_info'] = stint_info
             
             compound_stats[compound] = stats
@@ -928,53 +959,65 @@ def _analyze_tire_strategy_replica(driver_laps):
         print(f"[ERROR] 輪胎策略分析失敗: {e}")
         return {}
 
-def _analyze_tire_stint(compound_laps, compound):
-    """分析輪胎使用階段"""
+def _analyze_tire_stint(driver_stints, compound):
+    """分析輪胎使用階段 - 取該配方的各 stint 與燃油修正衰退率"""
     try:
-        stints = []
-        sorted_laps = compound_laps.sort_values('LapNumber')
-        
-        if not sorted_laps.empty:
-            start_lap = sorted_laps.iloc[0]['LapNumber']
-            end_lap = sorted_laps.iloc[-1]['LapNumber']
-            
-            stints.append({
-                'start_lap': start_lap,
-                'end_lap': end_lap,
-                'compound': compound
-            })
-        
-        return stints
+        if driver_stints.empty:
+            return []
+        compound_stints = driver_stints[driver_stints['compound'] == compound]
+        return [
+            {
+                'start_lap': stint['start_lap'],
+                'end_lap': stint['end_lap'],
+                'compound': compound,
+                'degradation': stint['fuel_corrected_degradation']
+            }
+            for stint in compound_stints.to_dict('records')
+        ]
     except:
         return []
 
+def _driver_pitstop_table(driver_laps, session=None, driver_abbr=None):
+    """取得車手的進站列表 - 優先使用整場賽事的共用進站表"""
+    if session is not None and driver_abbr:
+        stops = get_driver_pitstops(session, driver_abbr)
+        if not stops.empty:
+            return stops
+    return get_pitstop_table(driver_laps)
+
 def _analyze_pitstop_records_replica(driver_laps, session, driver_abbr):
     """分析進站記錄 - 復刻原始程式"""
     try:
-        changes = []
-        total_pitstops = 0
-        
-        # 簡化實現 - 檢查輪胎配方變化
-        sorted_laps = driver_laps.sort_values('LapNumber')
-        prev_compound = None
+        stops = _driver_pitstop_table(driver_laps, session, driver_abbr)
+        changes = [
+            {
+                'lap_number': int(stop['lap']),
+                'from_compound': stop['compound_before'] if pd.notna(stop['compound_before']) else 'Unknown',
+                'to_compound': stop['compound_after'] if pd.notna(stop['compound_after']) else 'Unknown',
+                'pit_time': _format_time(stop['pit_in_time']),
+                'duration': f"{stop['pit_lane_time']:.1f}秒"
+            }
+            for stop in stops.to_dict('records')
+        ]
         
-        for _, lap in sorted_laps.iterrows():
-            current_compound = lap.get('Compound', 'Unknown')
-            
-            if prev_compound is not None and current_compound != prev_compound:
+        if not changes and 'Compound' in driver_laps.columns:
+            # 無進站時間資料時，以輪胎配方變化推測進站
+            sorted_laps = driver_laps.sort_values('LapNumber')
+            compounds = sorted_laps['Compound'].fillna('Unknown')
+            previous = compounds.shift(1)
+            changed = previous.notna() & (compounds != previous)
+            for lap_number, from_compound, to_compound in zip(
+                    sorted_laps['LapNumber'][changed], previous[changed], compounds[changed]):
                 changes.append({
-                    'lap_number': lap['LapNumber'],
-                    'from_compound': prev_compound,
-                    'to_compound': current_compound,
+                    'lap_number': lap_number,
+                    'from_compound': from_compound,
+                    'to_compound': to_compound,
                     'pit_time': 'N/A',
                     'duration': 'N/A'
                 })
-                total_pitstops += 1
-            
-            prev_compound = current_compound
         
         return {
-            'total_pitstops': total_pitstops,
+            'total_pitstops': len(changes),
             'changes': changes
         }
     except Exception as e:
@@ -984,49 +1027,57 @@ def _analyze_pitstop_records_replica(driver_laps, session, driver_abbr):
 def _analyze_detailed_pitstops_replica(driver_laps):
     """詳細分析進站圈次 - 復刻原始程式"""
     try:
-        pit_laps = []
         sorted_laps = driver_laps.sort_values('LapNumber')
+        pit_in = _column_or_nat(sorted_laps, 'PitInTime')
+        pit_out = _column_or_nat(sorted_laps, 'PitOutTime')
+        has_pit = (pit_in.notna() | pit_out.notna()).to_numpy()
+        if not has_pit.any():
+            return []
         
-        for _, lap in sorted_laps.iterrows():
-            lap_num = int(lap['LapNumber'])
-            compound = lap.get('Compound', 'Unknown')
-            
+        # 進站圈的進站時長 (進站通道時間) 由共用進站表取得
+        stops = get_pitstop_table(driver_laps)
+        durations = dict(zip(stops['lap'], stops['pit_lane_time']))
+        compounds = sorted_laps['Compound'] if 'Compound' in sorted_laps.columns else pd.Series('Unknown', index=sorted_laps.index)
+        
+        pit_laps = []
+        for lap_num, compound, in_time, out_time in zip(
+                sorted_laps['LapNumber'][has_pit].astype(int), compounds[has_pit],
+                pit_in[has_pit], pit_out[has_pit]):
             pit_info = {}
             pit_type = []
             
-            # 檢查進站時間
-            if pd.notna(lap.get('PitInTime')):
+            if pd.notna(in_time):
                 pit_type.append('進站')
-                pit_info['pit_in_time'] = str(lap['PitInTime'])
+                pit_info['pit_in_time'] = str(in_time)
             
-            if pd.notna(lap.get('PitOutTime')):
+            if pd.notna(out_time):
                 pit_type.append('出站')
-                pit_info['pit_out_time'] = str(lap['PitOutTime'])
+                pit_info['pit_out_time'] = str(out_time)
             
-            if pit_type:
-                pit_info.update({
-                    'lap': lap_num,
-                    'type': ' | '.join(pit_type),
-                    'compound': compound,
-                    'duration': None
-                })
-                pit_laps.append(pit_info)
+            duration = durations.get(lap_num) if pd.notna(in_time) else None
+            pit_info.update({
+                'lap': lap_num,
+                'type': ' | '.join(pit_type),
+                'compound': compound,
+                'duration': float(duration) if duration is not None else None
+            })
+            pit_laps.append(pit_info)
         
         return pit_laps
     except Exception as e:
         print(f"[ERROR] 詳細進站分析失敗: {e}")
         return []
 
+def _column_or_nat(frame, column):
+    """取得時間欄位，欄位不存在時回傳全 NaT"""
+    if column in frame.columns:
+        return frame[column]
+    return pd.Series(pd.NaT, index=frame.index)
+
 def _setup_chinese_font(dark_theme=False):
-    """設定中文字體"""
+    """設定中文字體 - 使用快取的全域主題設定，重複呼叫不會重設樣式"""
     try:
-        plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans']
-        plt.rcParams['axes.unicode_minus'] = False
-        
-        if dark_theme:
-            plt.style.use('dark_background')
-        else:
-            plt.style.use('default')
+        setup_matplotlib_chinese(dark_theme=dark_theme)
     except:
         pass
 
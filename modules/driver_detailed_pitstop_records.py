@@ -27,6 +27,11 @@ except ImportError:
         print("[WARNING] 無法導入 OpenF1 數據分析器")
         F1OpenDataAnalyzer = None
 
+try:
+    from .pitstop_table import get_pitstop_table
+except ImportError:
+    from pitstop_table import get_pitstop_table
+
 
 def check_cache(cache_key):
     """檢查緩存是否存在"""
@@ -188,7 +193,40 @@ def get_session_info(data_loader):
 
 
 def analyze_driver_detailed_pitstops(data_loader, session_info):
-    """分析車手進站詳細記錄數據"""
+    """分析車手進站詳細記錄數據 - 優先 OpenF1，無法取得時改用 FastF1 共用進站表"""
+    result = _analyze_driver_detailed_pitstops_openf1(data_loader, session_info)
+    if result:
+        return result
+    
+    print("[INFO] 改用 FastF1 圈速數據的進站表分析車手進站詳細記錄")
+    result = _analyze_driver_detailed_pitstops_fastf1(data_loader)
+    return result or None
+
+
+def _analyze_driver_detailed_pitstops_fastf1(data_loader):
+    """以 FastF1 共用進站表 (進站通道時間) 分析車手進站詳細記錄"""
+    table = get_pitstop_table(data_loader)
+    if table.empty:
+        print("[ERROR] FastF1 圈速數據中沒有可配對的進站記錄")
+        return None
+    
+    valid = table[table['is_valid'] & (table['lap'] > 1)]
+    driver_records = {}
+    for stop in valid.to_dict('records'):
+        records = driver_records.setdefault(stop['Driver'], [])
+        records.append({
+            'pitstop_number': len(records) + 1,
+            'lap_number': int(stop['lap']),
+            'pit_duration': round(float(stop['pit_lane_time']), 3),
+            'session_time': str(stop['pit_in_time']),
+            'team': stop['Team']
+        })
+    
+    return driver_records
+
+
+def _analyze_driver_detailed_pitstops_openf1(data_loader, session_info):
+    """分析車手進站詳細記錄數據 (OpenF1 API)"""
     if F1OpenDataAnalyzer is None:
         print("[ERROR] OpenF1 數據分析器未可用")
         return None
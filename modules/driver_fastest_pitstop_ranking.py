@@ -26,6 +26,11 @@ except ImportError:
         print("[WARNING] 無法導入 OpenF1 數據分析器")
         F1OpenDataAnalyzer = None
 
+try:
+    from .pitstop_table import get_pitstop_table
+except ImportError:
+    from pitstop_table import get_pitstop_table
+
 
 def format_time(time_obj):
     """標準時間格式化函數 - 禁止包含 day 或 days"""
@@ -197,7 +202,40 @@ def get_session_info(data_loader):
 
 
 def analyze_driver_fastest_pitstops(data_loader, session_info):
-    """分析車手最快進站時間數據"""
+    """分析車手最快進站時間數據 - 優先 OpenF1，無法取得時改用 FastF1 共用進站表"""
+    result = _analyze_driver_fastest_pitstops_openf1(data_loader, session_info)
+    if result:
+        return result
+    
+    print("[INFO] 改用 FastF1 圈速數據的進站表分析車手最快進站時間")
+    result = _analyze_driver_fastest_pitstops_fastf1(data_loader)
+    return result or None
+
+
+def _analyze_driver_fastest_pitstops_fastf1(data_loader):
+    """以 FastF1 共用進站表 (進站通道時間) 分析車手最快進站時間"""
+    table = get_pitstop_table(data_loader)
+    if table.empty:
+        print("[ERROR] FastF1 圈速數據中沒有可配對的進站記錄")
+        return None
+    
+    driver_best_times = {}
+    for stop in table[table['pit_lane_time'] > 0].to_dict('records'):
+        driver = stop['Driver']
+        if driver not in driver_best_times or stop['pit_lane_time'] < driver_best_times[driver]['fastest_time']:
+            driver_best_times[driver] = {
+                'driver': driver,
+                'team': stop['Team'],
+                'fastest_time': round(float(stop['pit_lane_time']), 3),
+                'lap_number': int(stop['lap']),
+                'session_time': str(stop['pit_in_time'])
+            }
+    
+    return sorted(driver_best_times.values(), key=lambda x: x['fastest_time'])
+
+
+def _analyze_driver_fastest_pitstops_openf1(data_loader, session_info):
+    """分析車手最快進站時間數據 (OpenF1 API)"""
     if F1OpenDataAnalyzer is None:
         print("[ERROR] OpenF1 數據分析器未可用")
         return None
@@ -11,48 +11,12 @@ import matplotlib.pyplot as plt
 import os
 from prettytable import PrettyTable
 from datetime import datetime
-import json
 
-def _make_serializable(obj):
-    """確保對象可以序列化為JSON"""
-    if obj is None:
-        return None
-    elif isinstance(obj, (int, float, str, bool)):
-        return obj
-    elif isinstance(obj, (list, tuple)):
-        return [_make_serializable(item) for item in obj]
-    elif isinstance(obj, dict):
-        result = {}
-        for key, value in obj.items():
-            # 跳過 driver_laps 以避免序列化問題
-            if key == 'driver_laps':
-                continue
-            result[key] = _make_serializable(value)
-        return result
-    elif isinstance(obj, (np.integer, np.int64, np.int32, np.int16, np.int8)):
-        return int(obj)
-    elif isinstance(obj, (np.floating, np.float64, np.float32, np.float16)):
-        return float(obj)
-    elif isinstance(obj, np.bool_):
-        return bool(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    elif isinstance(obj, pd.Timestamp):
-        return obj.isoformat()
-    elif isinstance(obj, pd.Timedelta):
-        return str(obj)
-    elif hasattr(obj, 'to_dict') and callable(getattr(obj, 'to_dict')):
-        try:
-            return _make_serializable(obj.to_dict())
-        except:
-            return str(obj)
-    elif hasattr(obj, 'tolist') and callable(getattr(obj, 'tolist')):
-        try:
-            return obj.tolist()
-        except:
-            return str(obj)
-    else:
-        return str(obj)
+try:
+    from .json_export import write_json
+except ImportError:
+    from json_export import write_json
+
 
 def run_driver_overtaking_analysis(data_loader, dynamic_team_mapping=None, f1_analysis_instance=None):
     """執行車手超車分析 - 功能 14.3"""
@@ -279,7 +243,7 @@ def run_driver_overtaking_analysis(data_loader, dynamic_team_mapping=None, f1_an
                 "timestamp": timestamp,
                 "total_drivers": len(all_driver_data)
             },
-            "overtaking_statistics": _make_serializable(overtaking_stats),
+            "overtaking_statistics": overtaking_stats,
             "race_summary": {
                 "total_overtakes": total_overtakes,
                 "average_overtakes_per_driver": round(total_overtakes / len(all_driver_data), 1) if all_driver_data else 0,
@@ -301,8 +265,7 @@ def run_driver_overtaking_analysis(data_loader, dynamic_team_mapping=None, f1_an
         os.makedirs(json_dir, exist_ok=True)
         
         filename = f"{json_dir}/driver_overtaking_analysis_{timestamp}.json"
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(json_output, f, ensure_ascii=False, indent=2, default=str)
+        write_json(filename, json_output)
         
         print(f"\n[SUCCESS] 車手超車分析完成！JSON輸出已保存到: {filename}")
         return True
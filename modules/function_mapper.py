@@ -12,6 +12,11 @@ import os
 import sys
 from typing import Union, Dict, Any, Optional
 
+try:
+    from .tracing import span
+except ImportError:
+    from modules.tracing import span
+
 
 class F1AnalysisFunctionMapper:
     """F1 Analysis 功能映射器 - 統一管理所有功能的執行"""
@@ -24,6 +29,7 @@ class F1AnalysisFunctionMapper:
         self.driver = driver or "VER"     # 預設主要車手
         self.driver2 = driver2 or "LEC"   # 預設次要車手
         self.open_analyzer = None  # 添加 open_analyzer 屬性
+        self.partial_callback = None  # 串流模式部分結果回呼 (None 表示停用)
         
         # 整數化功能映射表 (1-52)
         self.function_mapping = {
@@ -94,6 +100,9 @@ class F1AnalysisFunctionMapper:
         
         # 子功能映射表
         self.sub_function_mapping = {
+            # 賽道分析子功能 2.1
+            "2.1": self._execute_race_replay_export,
+            
             # 事故分析子功能 4.1-4.5
             "4.1": self._execute_accident_key_events,
             "4.2": self._execute_accident_special_incidents,
@@ -134,6 +143,9 @@ class F1AnalysisFunctionMapper:
             "16.2": self._execute_overtaking_performance_comparison,
             "16.3": self._execute_overtaking_visualization_analysis,
             "16.4": self._execute_overtaking_trends_analysis,
+            
+            # 冠軍模擬子功能 37.1
+            "37.1": self._execute_all_drivers_championship_simulation,
         }
     
     def _standardize_result(self, result: Any, function_id: Union[str, int], 
@@ -187,6 +199,12 @@ class F1AnalysisFunctionMapper:
         Returns:
             Dict[str, Any]: 執行結果
         """
+        # 追蹤啟用時記錄整個分析階段的耗時 (未啟用時 span 為空物件)
+        with span("analysis", function_id=str(function_id)):
+            return self._dispatch_function(function_id, **kwargs)
+    
+    def _dispatch_function(self, function_id: Union[str, int], **kwargs) -> Dict[str, Any]:
+        """依功能編號分派到對應的執行函數"""
         try:
             print(f"[START] 執行功能編號: {function_id}")
             
@@ -252,6 +270,40 @@ class F1AnalysisFunctionMapper:
         except Exception as e:
             return self._standardize_result(None, function_id, f"執行異常: {str(e)}")
     
+    def execute_function_streaming(self, function_id: Union[str, int], partial_callback=None, **kwargs):
+        """以串流模式執行分析功能 - 逐步產出部分結果
+        
+        支援串流的模組 (全部車手彎道分析、年度超車統計)
+        會在每位車手 / 每個彎道完成時回報部分結果；其他功能只產出最終結果。
+        
+        Args:
+            function_id: 功能編號
+            partial_callback: 額外的部分結果回呼 (可選，例如 CLI 輸出到 stdout)
+            **kwargs: 額外參數
+            
+        Yields:
+            Dict[str, Any]: 部分結果 {"type": "partial", ...}，
+                            最後一筆為 {"type": "final", "data": 標準化結果}
+        """
+        from modules.streaming_results import iter_streaming_results
+        
+        def _run(partial_callback):
+            def _forward(partial):
+                partial.setdefault("function_id", str(function_id))
+                partial_callback(partial)
+            
+            previous_callback = self.partial_callback
+            self.partial_callback = _forward
+            try:
+                return self.execute_function_by_number(function_id, **kwargs)
+            finally:
+                self.partial_callback = previous_callback
+        
+        for item in iter_streaming_results(_run):
+            if partial_callback is not None and item.get("type") == "partial":
+                partial_callback(item)
+            yield item
+    
     def _check_data_loaded(self, function_id: Union[str, int]) -> bool:
         """檢查是否需要載入數據"""
         # 系統功能不需要檢查數據載入
@@ -1327,6 +1379,13 @@ class F1AnalysisFunctionMapper:
                 "timestamp": datetime.now().isoformat()
             }
     
+    def _requested_drivers(self, kwargs):
+        """全場分析的車手篩選: drivers 列表或逗號分隔字串 (None 為全場)"""
+        drivers = kwargs.get('drivers')
+        if isinstance(drivers, str):
+            drivers = [item.strip() for item in drivers.split(',') if item.strip()]
+        return drivers or None
+
     def _report_analysis_results(self, data, analysis_type="analysis"):
         """報告分析結果狀態 - 符合開發核心原則"""
         if not data:
@@ -1598,7 +1657,8 @@ class F1AnalysisFunctionMapper:
                 self.data_loader,
                 f1_analysis_instance=self.f1_analysis_instance,
                 show_detailed_output=show_detailed_output,
-                driver=driver  # 傳遞車手參數，避免交互式輸入
+                driver=driver,  # 傳遞車手參數，避免交互式輸入
+                partial_callback=self.partial_callback
             )
             
             # 結果反饋
@@ -2032,6 +2092,20 @@ class F1AnalysisFunctionMapper:
             print(f"[ERROR] 所有事件詳細列表分析失敗: {str(e)}")
             return {"success": False, "message": f"所有事件詳細列表分析失敗: {str(e)}", "function_id": "4.6"}
     
+    def _execute_race_replay_export(self, **kwargs):
+        """執行全場回放數據匯出 - 所有車手時間索引位置緩衝區"""
+        try:
+            from modules.race_replay import run_race_replay_export
+            print("[TRACK] 執行全場回放數據匯出...")
+            result = run_race_replay_export(
+                self.data_loader,
+                show_detailed_output=kwargs.get('show_detailed_output', True)
+            )
+            self._report_analysis_results(result, "全場回放數據")
+            return result
+        except Exception as e:
+            return {"success": False, "message": f"全場回放數據匯出失敗: {str(e)}", "function_id": "2.1"}
+    
     def _execute_speed_gap_analysis(self, **kwargs):
         """執行速度差距分析"""
         try:
@@ -2144,7 +2218,8 @@ class F1AnalysisFunctionMapper:
             run_all_drivers_annual_overtaking_statistics(
                 self.data_loader,
                 self.dynamic_team_mapping,
-                self.f1_analysis_instance
+                self.f1_analysis_instance,
+                partial_callback=self.partial_callback
             )
             return {"success": True, "message": "年度超車統計完成", "function_id": "16.1"}
         except Exception as e:
@@ -2199,12 +2274,34 @@ class F1AnalysisFunctionMapper:
         return {"success": True, "message": "完整圈次遙測分析功能開發中", "function_id": "6.1"}
     
     def _execute_telemetry_tire_strategy(self, **kwargs):
-        """執行輪胎策略遙測分析"""
-        return {"success": True, "message": "輪胎策略遙測分析功能開發中", "function_id": "6.2"}
+        """執行輪胎策略遙測分析 - 共用 stint 與衰退模型"""
+        try:
+            from modules.tire_stint_model import run_driver_stint_analysis
+            driver = kwargs.get('driver', self.driver)
+            print(f"🛞 執行輪胎策略遙測分析 (車手: {driver})...")
+            result = run_driver_stint_analysis(
+                self.data_loader, driver,
+                show_detailed_output=kwargs.get('show_detailed_output', True)
+            )
+            self._report_analysis_results(result, "輪胎策略遙測")
+            return result
+        except Exception as e:
+            return {"success": False, "message": f"輪胎策略遙測分析失敗: {str(e)}", "function_id": "6.2"}
     
     def _execute_telemetry_tire_performance(self, **kwargs):
-        """執行輪胎性能遙測分析"""
-        return {"success": True, "message": "輪胎性能遙測分析功能開發中", "function_id": "6.3"}
+        """執行輪胎性能遙測分析 - 車手衰退率與全場比較"""
+        try:
+            from modules.tire_stint_model import run_driver_tire_performance
+            driver = kwargs.get('driver', self.driver)
+            print(f"🛞 執行輪胎性能遙測分析 (車手: {driver})...")
+            result = run_driver_tire_performance(
+                self.data_loader, driver,
+                show_detailed_output=kwargs.get('show_detailed_output', True)
+            )
+            self._report_analysis_results(result, "輪胎性能遙測")
+            return result
+        except Exception as e:
+            return {"success": False, "message": f"輪胎性能遙測分析失敗: {str(e)}", "function_id": "6.3"}
     
     def _execute_telemetry_pitstop_records(self, **kwargs):
         """執行進站記錄遙測分析"""
@@ -2304,8 +2401,17 @@ class F1AnalysisFunctionMapper:
         return {"success": True, "message": "高級天氣分析功能開發中", "function_id": "23"}
     
     def _execute_tire_strategy_optimization(self, **kwargs):
-        """輪胎策略優化"""
-        return {"success": True, "message": "輪胎策略優化功能開發中", "function_id": "24"}
+        """輪胎策略優化 - 以全場燃油修正衰退模型列舉一停/二停策略"""
+        try:
+            from modules.tire_stint_model import run_tire_strategy_optimization
+            result = run_tire_strategy_optimization(
+                self.data_loader,
+                show_detailed_output=kwargs.get('show_detailed_output', True)
+            )
+            self._report_analysis_results(result, "輪胎策略優化")
+            return result
+        except Exception as e:
+            return {"success": False, "message": f"輪胎策略優化失敗: {str(e)}", "function_id": "30"}
     
     def _execute_lap_time_prediction(self, **kwargs):
         """圈速預測分析"""
@@ -2320,28 +2426,91 @@ class F1AnalysisFunctionMapper:
         return {"success": True, "message": "空氣動力學效率分析功能開發中", "function_id": "27"}
     
     def _execute_brake_performance_analysis(self, **kwargs):
-        """煞車性能分析"""
-        return {"success": True, "message": "煞車性能分析功能開發中", "function_id": "28"}
+        """煞車性能分析 - 全場逐圈逐彎道煞車點、煞車時間與煞車比例 (可只計算指定車手)"""
+        try:
+            from modules.brake_engine_analytics import run_brake_performance_analysis
+            result = run_brake_performance_analysis(
+                self.data_loader,
+                drivers=self._requested_drivers(kwargs),
+                show_detailed_output=kwargs.get('show_detailed_output', True)
+            )
+            self._report_analysis_results(result, "煞車性能分析")
+            return result
+        except Exception as e:
+            return {"success": False, "message": f"煞車性能分析失敗: {str(e)}", "function_id": "34"}
     
     def _execute_engine_performance_analysis(self, **kwargs):
-        """引擎性能分析"""
-        return {"success": True, "message": "引擎性能分析功能開發中", "function_id": "29"}
+        """引擎性能分析 - 全場全油門比例、換檔 RPM 與 RPM 時間分佈 (可只計算指定車手)"""
+        try:
+            from modules.brake_engine_analytics import run_engine_performance_analysis
+            result = run_engine_performance_analysis(
+                self.data_loader,
+                drivers=self._requested_drivers(kwargs),
+                show_detailed_output=kwargs.get('show_detailed_output', True)
+            )
+            self._report_analysis_results(result, "引擎性能分析")
+            return result
+        except Exception as e:
+            return {"success": False, "message": f"引擎性能分析失敗: {str(e)}", "function_id": "35"}
     
     def _execute_race_strategy_simulation(self, **kwargs):
-        """賽事策略模擬"""
-        return {"success": True, "message": "賽事策略模擬功能開發中", "function_id": "30"}
+        """賽事策略模擬 - 以本場衰退、進站損失與安全車機率對候選策略進行 Monte Carlo 模擬"""
+        try:
+            from modules.race_strategy_simulator import DEFAULT_SIMULATIONS, run_race_strategy_simulation
+            result = run_race_strategy_simulation(
+                self.data_loader,
+                strategies=kwargs.get('strategies'),
+                n_sims=kwargs.get('simulations') or DEFAULT_SIMULATIONS,
+                workers=kwargs.get('simulation_workers', 1),
+                seed=kwargs.get('seed'),
+                sc_probability=kwargs.get('sc_probability'),
+                show_detailed_output=kwargs.get('show_detailed_output', True)
+            )
+            self._report_analysis_results(result, "賽事策略模擬")
+            return result
+        except Exception as e:
+            return {"success": False, "message": f"賽事策略模擬失敗: {str(e)}", "function_id": "36"}
     
     def _execute_championship_impact_analysis(self, **kwargs):
-        """championship impact analysis"""
-        return {"success": True, "message": "championship impact analysis功能開發中", "function_id": "31"}
+        """冠軍影響分析 - 本場正賽結果對年度冠軍機率的影響"""
+        try:
+            from modules.championship_simulator import DEFAULT_SEASONS, run_championship_impact_analysis
+            result = run_championship_impact_analysis(
+                self.data_loader,
+                n_seasons=kwargs.get('seasons') or DEFAULT_SEASONS,
+                seed=kwargs.get('seed'),
+                show_detailed_output=kwargs.get('show_detailed_output', True)
+            )
+            self._report_analysis_results(result, "冠軍影響分析")
+            return result
+        except Exception as e:
+            return {"success": False, "message": f"冠軍影響分析失敗: {str(e)}", "function_id": "37"}
     
     def _execute_track_evolution_analysis(self, **kwargs):
-        """賽道演化分析"""
-        return {"success": True, "message": "賽道演化分析功能開發中", "function_id": "32"}
+        """賽道演化分析 - 全場圈速對 session 時間與賽道溫度的固定效應回歸 (燃油與輪胎修正)"""
+        try:
+            from modules.track_evolution import run_track_evolution_analysis
+            result = run_track_evolution_analysis(
+                self.data_loader,
+                show_detailed_output=kwargs.get('show_detailed_output', True)
+            )
+            self._report_analysis_results(result, "賽道演化分析")
+            return result
+        except Exception as e:
+            return {"success": False, "message": f"賽道演化分析失敗: {str(e)}", "function_id": "38"}
     
     def _execute_safety_car_impact_analysis(self, **kwargs):
-        """安全車影響分析"""
-        return {"success": True, "message": "安全車影響分析功能開發中", "function_id": "33"}
+        """安全車影響分析 - SC/VSC/紅旗時段的名次得失與中立化進站省時"""
+        try:
+            from modules.safety_car_impact import run_safety_car_impact_analysis
+            result = run_safety_car_impact_analysis(
+                self.data_loader,
+                show_detailed_output=kwargs.get('show_detailed_output', True)
+            )
+            self._report_analysis_results(result, "安全車影響分析")
+            return result
+        except Exception as e:
+            return {"success": False, "message": f"安全車影響分析失敗: {str(e)}", "function_id": "39"}
     
     # ===== 全部車手分析模組實現 (34-46) =====
     
@@ -2350,36 +2519,97 @@ class F1AnalysisFunctionMapper:
         return {"success": True, "message": "全部車手統計總覽功能開發中", "function_id": "34"}
     
     def _execute_all_drivers_telemetry_comparison(self, **kwargs):
-        """全部車手遙測比較"""
-        return {"success": True, "message": "全部車手遙測比較功能開發中", "function_id": "35"}
+        """全部車手遙測比較 - 全場最快圈 (或指定圈) 重取樣至同一距離網格，一次計算與參考圈時間差"""
+        try:
+            from modules.telemetry_matrix import DEFAULT_GRID_STEP, run_all_drivers_telemetry_comparison
+            result = run_all_drivers_telemetry_comparison(
+                self.data_loader,
+                drivers=self._requested_drivers(kwargs),
+                laps=kwargs.get('laps'),
+                reference=kwargs.get('reference_driver'),
+                grid_step=kwargs.get('grid_step') or DEFAULT_GRID_STEP,
+                show_detailed_output=kwargs.get('show_detailed_output', True)
+            )
+            self._report_analysis_results(result, "全部車手遙測比較")
+            return result
+        except Exception as e:
+            return {"success": False, "message": f"全部車手遙測比較失敗: {str(e)}", "function_id": "41"}
     
     def _execute_all_drivers_consistency_analysis(self, **kwargs):
-        """全部車手一致性分析"""
-        return {"success": True, "message": "全部車手一致性分析功能開發中", "function_id": "36"}
+        """全部車手一致性分析 - 全場圈速標準差、IQR 與變異係數 (一次分組計算)"""
+        try:
+            from modules.race_pace_table import run_all_drivers_consistency_analysis
+            result = run_all_drivers_consistency_analysis(
+                self.data_loader,
+                show_detailed_output=kwargs.get('show_detailed_output', True)
+            )
+            self._report_analysis_results(result, "全部車手一致性分析")
+            return result
+        except Exception as e:
+            return {"success": False, "message": f"全部車手一致性分析失敗: {str(e)}", "function_id": "42"}
     
     def _execute_all_drivers_race_pace_analysis(self, **kwargs):
-        """全部車手比賽節奏分析"""
-        return {"success": True, "message": "全部車手比賽節奏分析功能開發中", "function_id": "37"}
+        """全部車手比賽節奏分析 - 車手與 stint 的燃油修正中位圈速及與領先者差距"""
+        try:
+            from modules.race_pace_table import run_all_drivers_race_pace_analysis
+            result = run_all_drivers_race_pace_analysis(
+                self.data_loader,
+                show_detailed_output=kwargs.get('show_detailed_output', True)
+            )
+            self._report_analysis_results(result, "全部車手比賽節奏分析")
+            return result
+        except Exception as e:
+            return {"success": False, "message": f"全部車手比賽節奏分析失敗: {str(e)}", "function_id": "43"}
     
     def _execute_all_drivers_qualifying_analysis(self, **kwargs):
-        """全部車手排位賽分析"""
-        return {"success": True, "message": "全部車手排位賽分析功能開發中", "function_id": "38"}
+        """全部車手排位賽分析 - Q1/Q2/Q3 各階段最快圈、理論最快圈與全車手遙測差距 (各階段並行)"""
+        try:
+            from modules.qualifying_analyzer import DEFAULT_WORKERS, run_all_drivers_qualifying_analysis
+            result = run_all_drivers_qualifying_analysis(
+                self.data_loader,
+                workers=kwargs.get('qualifying_workers') or DEFAULT_WORKERS,
+                show_detailed_output=kwargs.get('show_detailed_output', True)
+            )
+            self._report_analysis_results(result, "全部車手排位賽分析")
+            return result
+        except Exception as e:
+            return {"success": False, "message": f"全部車手排位賽分析失敗: {str(e)}", "function_id": "44"}
     
     def _execute_all_drivers_tire_management(self, **kwargs):
         """全部車手輪胎管理分析"""
         return {"success": True, "message": "全部車手輪胎管理分析功能開發中", "function_id": "39"}
     
     def _execute_all_drivers_sector_analysis(self, **kwargs):
-        """全部車手分段分析"""
-        return {"success": True, "message": "全部車手分段分析功能開發中", "function_id": "40"}
+        """全部車手分段分析 - 全場迷你分段時間、各分段最快車手與理論最快圈"""
+        try:
+            from modules.minisector_table import DEFAULT_MINISECTORS, run_all_drivers_sector_analysis
+            result = run_all_drivers_sector_analysis(
+                self.data_loader,
+                n_minisectors=kwargs.get('minisectors') or DEFAULT_MINISECTORS,
+                show_detailed_output=kwargs.get('show_detailed_output', True)
+            )
+            self._report_analysis_results(result, "全部車手分段分析")
+            return result
+        except Exception as e:
+            return {"success": False, "message": f"全部車手分段分析失敗: {str(e)}", "function_id": "46"}
     
     def _execute_all_drivers_cornering_analysis(self, **kwargs):
         """全部車手彎道分析"""
         return {"success": True, "message": "全部車手彎道分析功能開發中", "function_id": "41"}
     
     def _execute_all_drivers_straight_line_speed(self, **kwargs):
-        """全部車手直線速度分析"""
-        return {"success": True, "message": "全部車手直線速度分析功能開發中", "function_id": "42"}
+        """全部車手直線速度分析 - 自動定位直線，全場逐圈最高速、測速點、DRS 增益與加速曲線"""
+        try:
+            from modules.straight_line_speed import run_all_drivers_straight_line_speed
+            result = run_all_drivers_straight_line_speed(
+                self.data_loader,
+                trap_points=kwargs.get('trap_points'),
+                show_detailed_output=kwargs.get('show_detailed_output', True)
+            )
+            self._report_analysis_results(result, "全部車手直線速度分析")
+            return result
+        except Exception as e:
+            return {"success": False, "message": f"全部車手直線速度分析失敗: {str(e)}", "function_id": "48"}
     
     def _execute_all_drivers_race_starts_analysis(self, **kwargs):
         """全部車手起步分析"""
@@ -2394,8 +2624,21 @@ class F1AnalysisFunctionMapper:
         return {"success": True, "message": "全部車手雨天表現分析功能開發中", "function_id": "45"}
     
     def _execute_all_drivers_championship_simulation(self, **kwargs):
-        """全部車手championship模擬"""
-        return {"success": True, "message": "全部車手championship模擬功能開發中", "function_id": "46"}
+        """全部車手冠軍模擬 - 模擬剩餘分站，輸出冠軍/名次機率 (可指定假設成績)"""
+        try:
+            from modules.championship_simulator import DEFAULT_SEASONS, run_championship_simulation
+            result = run_championship_simulation(
+                self.data_loader,
+                year=kwargs.get('year'),
+                n_seasons=kwargs.get('seasons') or DEFAULT_SEASONS,
+                seed=kwargs.get('seed'),
+                what_if=kwargs.get('what_if'),
+                show_detailed_output=kwargs.get('show_detailed_output', True)
+            )
+            self._report_analysis_results(result, "全部車手冠軍模擬")
+            return result
+        except Exception as e:
+            return {"success": False, "message": f"全部車手冠軍模擬失敗: {str(e)}", "function_id": "37.1"}
     
     # ===== 系統功能實現 (47-52) =====
     
@@ -2412,12 +2655,39 @@ class F1AnalysisFunctionMapper:
         return {"success": True, "message": "系統診斷功能開發中", "function_id": "49"}
     
     def _execute_performance_benchmarking(self, **kwargs):
-        """效能基準測試"""
-        return {"success": True, "message": "效能基準測試功能開發中", "function_id": "50"}
+        """效能基準測試 - 以目前載入的賽段量測各功能冷/暖啟動效能並與基準線比較"""
+        try:
+            from modules.performance_benchmark import run_performance_benchmark
+            functions = kwargs.get('benchmark_functions')
+            if isinstance(functions, str):
+                functions = [item.strip() for item in functions.split(',') if item.strip()]
+            result = run_performance_benchmark(
+                self.data_loader,
+                f1_analysis_instance=self.f1_analysis_instance,
+                functions=functions,
+                update_baseline=kwargs.get('update_baseline', False),
+                driver=self.driver,
+                driver2=self.driver2,
+                show_detailed_output=kwargs.get('show_detailed_output', True)
+            )
+            self._report_analysis_results(result, "效能基準測試")
+            return result
+        except Exception as e:
+            print(f"[ERROR] 效能基準測試執行失敗: {e}")
+            return {"success": False, "message": f"效能基準測試失敗: {str(e)}", "function_id": "52"}
     
     def _execute_data_integrity_check(self, **kwargs):
-        """數據完整性檢查"""
-        return {"success": True, "message": "數據完整性檢查功能開發中", "function_id": "51"}
+        """數據完整性檢查 - 遙測空檔、圈速缺漏、名次跳動與車手對照，報告寫入快取 manifest"""
+        try:
+            from modules.data_integrity import run_data_integrity_check
+            result = run_data_integrity_check(
+                self.data_loader,
+                show_detailed_output=kwargs.get('show_detailed_output', True)
+            )
+            self._report_analysis_results(result, "數據完整性檢查")
+            return result
+        except Exception as e:
+            return {"success": False, "message": f"數據完整性檢查失敗: {str(e)}", "function_id": "53"}
     
     def _execute_api_health_check(self, **kwargs):
         """API 健康檢查"""
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全場比賽回放播放器 - Race Replay Widget
+以時間索引位置緩衝區 (modules.race_replay) 驅動賽道地圖，
+支援播放、暫停、拖曳時間軸與倍速播放 (30+ fps)
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import os
+import sys
+import subprocess
+
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
+                             QSlider, QLabel, QComboBox, QMessageBox)
+from PyQt5.QtCore import Qt, QThread, QTimer, QElapsedTimer, pyqtSignal
+
+# 獲取專案根目錄
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from modules.race_replay import ReplaySession, REPLAY_FILE_PREFIX
+
+try:
+    from .track_analysis_module import TrackMapWidget
+except ImportError:
+    from track_analysis_module import TrackMapWidget
+
+# 播放幀間隔 (毫秒) - 約 30 fps
+FRAME_INTERVAL_MS = 33
+
+# 時間軸刻度 (毫秒/格)
+SLIDER_RESOLUTION_MS = 100
+
+
+def format_session_time(t_ms):
+    """格式化賽事時間為 H:MM:SS"""
+    total_seconds = max(0, int(t_ms // 1000))
+    hours, remainder = divmod(total_seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+class ReplayExportWorker(QThread):
+    """回放數據匯出工作執行緒 - 以子程序執行功能 2.1"""
+
+    progress_updated = pyqtSignal(int, str)
+    replay_ready = pyqtSignal(str)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, year, race, session="R"):
+        super().__init__()
+        self.year = year
+        self.race = race
+        self.session = session
+
+    def run(self):
+        try:
+            main_script = os.path.join(project_root, "f1_analysis_modular_main.py")
+            cmd = [sys.executable, main_script, "-f", "2.1",
+                   "-y", str(self.year), "-r", self.race, "-s", self.session]
+
+            print(f"[INFO] 執行回放數據匯出: {' '.join(cmd)}")
+            self.progress_updated.emit(10, "正在載入賽事位置數據...")
+
+            env = os.environ.copy()
+            env["PYTHONIOENCODING"] = "utf-8"
+
+            result = subprocess.run(cmd, cwd=project_root, capture_output=True, text=True,
+                                    encoding="utf-8", errors="replace", env=env)
+
+            replay_file = None
+            for line in result.stdout.splitlines():
+                if line.startswith(REPLAY_FILE_PREFIX):
+                    replay_file = line[len(REPLAY_FILE_PREFIX):].strip()
+
+            if result.returncode != 0 or not replay_file or not os.path.exists(replay_file):
+                tail = "\n".join((result.stdout + result.stderr).splitlines()[-15:])
+                self.error_occurred.emit(f"回放數據匯出失敗:\n{tail}")
+                return
+
+            self.progress_updated.emit(100, "回放數據準備完成")
+            self.replay_ready.emit(replay_file)
+
+        except Exception as e:
+            self.error_occurred.emit(f"回放數據匯出錯誤: {str(e)}")
+
+
+class RaceReplayWidget(QWidget):
+    """全場比賽回放播放器"""
+
+    time_changed = pyqtSignal(int)  # 目前賽事時間 (毫秒)
+
+    def __init__(self, year=2025, race="Japan", session="R", parent=None):
+        super().__init__(parent)
+        self.year = year
+        self.race = race
+        self.session = session
+
+        self.replay = None
+        self.current_ms = 0
+        self.playback_speed = 1.0
+        self.playing = False
+        self.export_worker = None
+
+        # 幀計時器 - 以實際經過時間推進，避免計時器抖動累積誤差
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setInterval(FRAME_INTERVAL_MS)
+        self.frame_timer.timeout.connect(self.on_frame)
+        self.elapsed = QElapsedTimer()
+
+        self.init_ui()
+
+    def init_ui(self):
+        """初始化UI"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(2, 2, 2, 2)
+        layout.setSpacing(2)
+
+        self.track_map = TrackMapWidget()
+        self.track_map.set_display_options(show_start=False, show_finish=False,
+                                           show_markers=False, show_labels=False)
+        layout.addWidget(self.track_map, 1)
+
+        controls = QHBoxLayout()
+
+        self.load_button = QPushButton("載入回放")
+        self.load_button.clicked.connect(self.start_export)
+        controls.addWidget(self.load_button)
+
+        self.play_button = QPushButton("▶")
+        self.play_button.setFixedWidth(36)
+        self.play_button.setEnabled(False)
+        self.play_button.clicked.connect(self.toggle_play)
+        controls.addWidget(self.play_button)
+
+        self.time_slider = QSlider(Qt.Horizontal)
+        self.time_slider.setEnabled(False)
+        self.time_slider.sliderMoved.connect(self.on_slider_moved)
+        self.time_slider.sliderPressed.connect(self.on_slider_pressed)
+        self.time_slider.sliderReleased.connect(self.on_slider_released)
+        controls.addWidget(self.time_slider, 1)
+
+        self.time_label = QLabel("0:00:00 / 0:00:00")
+        controls.addWidget(self.time_label)
+
+        self.speed_combo = QComboBox()
+        for speed in (1, 2, 4, 8, 16, 32):
+            self.speed_combo.addItem(f"{speed}x", speed)
+        self.speed_combo.currentIndexChanged.connect(self.on_speed_changed)
+        controls.addWidget(self.speed_combo)
+
+        layout.addLayout(controls)
+
+        self.status_label = QLabel("尚未載入回放數據")
+        self.status_label.setStyleSheet("color: #666; font-size: 9px;")
+        layout.addWidget(self.status_label)
+
+    # ---- 數據載入 ----
+
+    def start_export(self):
+        """以功能 2.1 建立/讀取回放數據"""
+        if self.export_worker and self.export_worker.isRunning():
+            return
+        self.pause()
+        self.load_button.setEnabled(False)
+        self.status_label.setText("正在準備回放數據...")
+
+        self.export_worker = ReplayExportWorker(self.year, self.race, self.session)
+        self.export_worker.progress_updated.connect(lambda _, msg: self.status_label.setText(msg))
+        self.export_worker.replay_ready.connect(self.load_replay_file)
+        self.export_worker.error_occurred.connect(self.on_export_error)
+        self.export_worker.start()
+
+    def on_export_error(self, message):
+        self.load_button.setEnabled(True)
+        self.status_label.setText("回放數據載入失敗")
+        print(f"[ERROR] {message}")
+        QMessageBox.warning(self, "回放錯誤", message)
+
+    def load_replay_file(self, file_path):
+        """載入回放檔"""
+        self.load_button.setEnabled(True)
+        try:
+            self.load_replay_session(ReplaySession.load(file_path))
+        except Exception as e:
+            self.on_export_error(f"讀取回放檔失敗: {e}")
+
+    def load_replay_session(self, replay):
+        """設置回放數據並初始化賽道與時間軸"""
+        self.replay = replay
+
+        bounds = replay.track_bounds()
+        outline = replay.outline
+        if not outline:
+            # 沒有最快圈輪廓時，以任一車手前段樣本描繪賽道
+            first = next(iter(replay.buffers.values()))
+            outline = [{"position_x": float(x), "position_y": float(y), "distance_m": 0}
+                       for x, y in zip(first.x[:2000:4], first.y[:2000:4])]
+        self.track_map.set_track_data(outline, bounds)
+
+        self.time_slider.setRange(0, max(1, replay.duration_ms // SLIDER_RESOLUTION_MS))
+        self.time_slider.setEnabled(True)
+        self.play_button.setEnabled(True)
+
+        self.status_label.setText(
+            f"{len(replay.buffers)} 位車手 · {replay.nbytes / 1024 / 1024:.1f} MB 位置緩衝區")
+        print(f"[INFO] 回放數據載入完成: {len(replay.buffers)} 位車手, "
+              f"{replay.duration_ms / 1000:.0f} 秒")
+
+        self.seek(replay.start_ms)
+
+    # ---- 播放控制 ----
+
+    def play(self):
+        if not self.replay:
+            return
+        if self.current_ms >= self.replay.end_ms:
+            self.current_ms = self.replay.start_ms
+        self.playing = True
+        self.play_button.setText("⏸")
+        self.elapsed.start()
+        self.frame_timer.start()
+
+    def pause(self):
+        self.playing = False
+        self.play_button.setText("▶")
+        self.frame_timer.stop()
+
+    def toggle_play(self):
+        if self.playing:
+            self.pause()
+        else:
+            self.play()
+
+    def on_speed_changed(self, index):
+        self.playback_speed = float(self.speed_combo.itemData(index) or 1)
+
+    def seek(self, t_ms):
+        """跳轉到指定賽事時間並重繪"""
+        if not self.replay:
+            return
+        self.current_ms = int(min(max(t_ms, self.replay.start_ms), self.replay.end_ms))
+        self.render_frame()
+
+    def on_frame(self):
+        """播放幀 - 依實際經過時間與倍速推進"""
+        if not self.replay:
+            return
+        delta_ms = self.elapsed.restart() * self.playback_speed
+        self.current_ms += int(delta_ms)
+        if self.current_ms >= self.replay.end_ms:
+            self.current_ms = self.replay.end_ms
+            self.pause()
+        self.render_frame()
+
+    def render_frame(self):
+        """以目前時間內插所有車輛位置並更新畫面"""
+        cars = self.replay.positions_at(self.current_ms)
+        self.track_map.set_car_positions(cars)
+
+        if not self.time_slider.isSliderDown():
+            self.time_slider.blockSignals(True)
+            self.time_slider.setValue((self.current_ms - self.replay.start_ms) // SLIDER_RESOLUTION_MS)
+            self.time_slider.blockSignals(False)
+
+        self.time_label.setText(
+            f"{format_session_time(self.current_ms - self.replay.start_ms)} / "
+            f"{format_session_time(self.replay.duration_ms)}")
+        self.time_changed.emit(self.current_ms)
+
+    # ---- 時間軸拖曳 ----
+
+    def on_slider_pressed(self):
+        self._resume_after_scrub = self.playing
+        self.pause()
+
+    def on_slider_moved(self, value):
+        if self.replay:
+            self.seek(self.replay.start_ms + value * SLIDER_RESOLUTION_MS)
+
+    def on_slider_released(self):
+        if getattr(self, '_resume_after_scrub', False):
+            self.play()
+
+    def closeEvent(self, event):
+        self.pause()
+        super().closeEvent(event)
@@ -23,6 +23,11 @@ from matplotlib.figure import Figure
 import matplotlib.dates as mdates
 from matplotlib.patches import Rectangle
 
+try:
+    from ..weather_arrays import rain_period_bounds
+except ImportError:
+    from modules.weather_arrays import rain_period_bounds
+
 # 設置中文字體支援
 plt.rcParams['font.sans-serif'] = ['Microsoft JhengHei', 'SimHei', 'Arial Unicode MS', 'DejaVu Sans', 'Arial', 'sans-serif']
 plt.rcParams['axes.unicode_minus'] = False
@@ -219,23 +224,8 @@ class RainAnalysisChart(FigureCanvas):
     def mark_rain_periods(self, time_data, rainfall_data):
         """標記降雨時段"""
         try:
-            rain_periods = []
-            in_rain = False
-            start_time = None
-            
-            for i, (time_val, rain_val) in enumerate(zip(time_data, rainfall_data)):
-                if pd.notna(rain_val) and rain_val > 0:  # 有降雨
-                    if not in_rain:
-                        start_time = time_val
-                        in_rain = True
-                else:  # 無降雨
-                    if in_rain:
-                        rain_periods.append((start_time, time_val))
-                        in_rain = False
-            
-            # 處理最後一個降雨期間
-            if in_rain and start_time is not None:
-                rain_periods.append((start_time, time_data[-1]))
+            # run-length encoding 一次找出所有連續降雨區段
+            rain_periods, _ = rain_period_bounds(time_data, rainfall_data)
             
             # 在圖表上標記降雨時段
             for start, end in rain_periods:
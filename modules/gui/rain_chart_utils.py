@@ -13,6 +13,11 @@ import matplotlib.dates as mdates
 from matplotlib.patches import Rectangle
 from matplotlib.figure import Figure
 
+try:
+    from ..weather_arrays import rain_period_bounds
+except ImportError:
+    from modules.weather_arrays import rain_period_bounds
+
 class WeatherChartFormatter:
     """天氣圖表格式化工具"""
     
@@ -123,29 +128,9 @@ class WeatherChartFormatter:
     @staticmethod
     def mark_rain_periods(ax_temp, time_data, rainfall_data):
         """標記降雨時段"""
-        rain_periods = []
-        rain_markers = []
-        
         try:
-            # 識別降雨時段
-            in_rain = False
-            start_time = None
-            
-            for i, (time_val, rain_val) in enumerate(zip(time_data, rainfall_data)):
-                if pd.notna(rain_val) and rain_val > 0:  # 有降雨
-                    if not in_rain:
-                        start_time = time_val
-                        in_rain = True
-                    # 記錄降雨標記點
-                    rain_markers.append(time_val)
-                else:  # 無降雨
-                    if in_rain and start_time is not None:
-                        rain_periods.append((start_time, time_val))
-                        in_rain = False
-            
-            # 處理最後一個降雨期間
-            if in_rain and start_time is not None:
-                rain_periods.append((start_time, time_data[-1]))
+            # 識別降雨時段 - run-length encoding 一次找出所有連續降雨區段
+            rain_periods, rain_markers = rain_period_bounds(time_data, rainfall_data)
             
             # 在圖表上標記降雨時段
             for i, (start, end) in enumerate(rain_periods):
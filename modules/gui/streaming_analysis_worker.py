@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+串流分析工作執行緒 - Streaming Analysis Worker
+在背景執行緒中以 F1AnalysisFunctionMapper.execute_function_streaming() 執行分析，
+部分結果經 Qt 信號送回 GUI 執行緒，即時更新圖表、表格與進度條
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import os
+import sys
+
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+                             QProgressBar, QSplitter, QTableWidget, QTableWidgetItem,
+                             QHeaderView, QMessageBox)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+
+# 獲取專案根目錄
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from modules.streaming_results import partial_chart_points, partial_rows
+
+try:
+    from .universal_chart_widget import UniversalChartWidget
+except ImportError:
+    from universal_chart_widget import UniversalChartWidget
+
+# 支援串流的功能 - 功能樹名稱 → (功能編號, 視窗標題, x 軸標籤, y 軸標籤)
+STREAMING_FUNCTIONS = {
+    "彎道分析": ("20", "全部彎道分析", "彎道", "速度 (km/h)"),
+    "年度超車統計": ("16.1", "年度超車統計", "車手", "淨超車數"),
+}
+
+# 系列顏色 (依建立順序循環使用)
+SERIES_COLORS = ["#FFA366", "#66B3FF", "#7CD992", "#FF6B6B", "#C792EA",
+                 "#FFD166", "#4ECDC4", "#F78FB3", "#A0A0A0", "#9AD0EC"]
+
+
+class StreamingAnalysisWorker(QThread):
+    """串流分析工作執行緒 - 分析完成前即持續回報部分結果"""
+
+    partial_received = pyqtSignal(dict)
+    progress_updated = pyqtSignal(int, str)
+    analysis_completed = pyqtSignal(dict)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, function_id, year, race, session="R", driver=None, driver2=None):
+        super().__init__()
+        self.function_id = str(function_id)
+        self.year = year
+        self.race = race
+        self.session = session
+        self.driver = driver
+        self.driver2 = driver2
+        self._cancelled = False
+
+    def cancel(self):
+        """取消分析 - 停止轉送部分結果，分析本身於背景完成後丟棄"""
+        self._cancelled = True
+
+    def _on_partial(self, partial):
+        """映射器的部分結果回呼 (於分析執行緒呼叫) - 以信號交給 GUI 執行緒"""
+        if self._cancelled:
+            return
+        self.partial_received.emit(partial)
+        progress = partial.get("progress")
+        if progress is not None:
+            label = partial.get("driver") or partial.get("stage", "")
+            self.progress_updated.emit(int(progress), f"已接收部分結果: {label}")
+
+    def run(self):
+        """載入賽段數據並執行串流分析"""
+        try:
+            from modules.batch_runner import load_session_data
+            from modules.function_mapper import F1AnalysisFunctionMapper
+
+            self.progress_updated.emit(0, f"正在載入 {self.year} {self.race} {self.session} 數據...")
+            data_loader, f1_analysis_instance = load_session_data(self.year, self.race, self.session)
+            if data_loader is None:
+                self.error_occurred.emit("賽段數據載入失敗")
+                return
+
+            mapper = F1AnalysisFunctionMapper(
+                data_loader=data_loader,
+                f1_analysis_instance=f1_analysis_instance,
+                driver=self.driver,
+                driver2=self.driver2,
+            )
+
+            self.progress_updated.emit(0, "正在執行分析...")
+            final = None
+            for item in mapper.execute_function_streaming(
+                    self.function_id,
+                    partial_callback=self._on_partial,
+                    year=self.year,
+                    race=self.race,
+                    session=self.session,
+                    driver=self.driver,
+                    driver2=self.driver2,
+                    show_detailed_output=False):
+                if item.get("type") == "final":
+                    final = item.get("data") or {}
+                elif item.get("type") == "error":
+                    self.error_occurred.emit(f"分析錯誤: {item.get('error')}")
+                    return
+
+            if self._cancelled:
+                self.error_occurred.emit("分析已取消")
+                return
+
+            if not final or not final.get("success", False):
+                message = (final or {}).get("message", "未知錯誤")
+                self.error_occurred.emit(f"分析失敗: {message}")
+                return
+
+            self.progress_updated.emit(100, "分析完成")
+            self.analysis_completed.emit(final)
+
+        except Exception as e:
+            self.error_occurred.emit(f"串流分析錯誤: {str(e)}")
+
+
+class StreamingResultTable(QTableWidget):
+    """漸進式結果表格 - 每收到一筆部分結果即新增資料列"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.columns = []
+        self.setColumnCount(0)
+        self.setRowCount(0)
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.setAlternatingRowColors(True)
+
+    def reset(self):
+        """清除表格內容"""
+        self.columns = []
+        self.clear()
+        self.setRowCount(0)
+        self.setColumnCount(0)
+
+    def append_partial(self, partial):
+        """附加一筆部分結果"""
+        self.append_partial_rows(partial_rows(partial))
+
+    def append_partial_rows(self, rows):
+        """附加多筆資料列，遇到新欄位時自動擴充表頭"""
+        for row in rows:
+            new_columns = [key for key in row.keys() if key not in self.columns]
+            if new_columns:
+                self.columns.extend(new_columns)
+                self.setColumnCount(len(self.columns))
+                self.setHorizontalHeaderLabels([str(c) for c in self.columns])
+
+            row_index = self.rowCount()
+            self.insertRow(row_index)
+            for col_index, key in enumerate(self.columns):
+                if key in row:
+                    value = row[key]
+                    text = f"{value:.3f}" if isinstance(value, float) else str(value)
+                    self.setItem(row_index, col_index, QTableWidgetItem(text))
+
+        self.scrollToBottom()
+
+
+class StreamingAnalysisWidget(QWidget):
+    """串流分析視窗 - 圖表、表格與進度條隨部分結果漸進更新"""
+
+    def __init__(self, function_name, year=2025, race="Japan", session="R", driver=None, parent=None):
+        super().__init__(parent)
+        self.function_id, self.title, x_label, y_label = STREAMING_FUNCTIONS[function_name]
+        self.year = year
+        self.race = race
+        self.session = session
+        self.driver = driver
+        self.worker = None
+        self.series_colors = {}
+
+        self.init_ui(x_label, y_label)
+
+    def init_ui(self, x_label, y_label):
+        """初始化UI"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(2, 2, 2, 2)
+        layout.setSpacing(2)
+
+        controls = QHBoxLayout()
+        self.start_button = QPushButton("開始分析")
+        self.start_button.clicked.connect(self.start_analysis)
+        controls.addWidget(self.start_button)
+
+        self.cancel_button = QPushButton("取消")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_analysis)
+        controls.addWidget(self.cancel_button)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        controls.addWidget(self.progress_bar, 1)
+
+        self.status_label = QLabel("準備就緒")
+        controls.addWidget(self.status_label)
+        layout.addLayout(controls)
+
+        splitter = QSplitter(Qt.Vertical)
+        self.chart = UniversalChartWidget(f"{self.title} - {self.year} {self.race} {self.session}")
+        self.chart.set_axis_labels(x_label, y_label)
+        splitter.addWidget(self.chart)
+
+        self.table = StreamingResultTable()
+        splitter.addWidget(self.table)
+        splitter.setSizes([400, 200])
+        layout.addWidget(splitter, 1)
+
+    def get_title(self):
+        return f"{self.title}_{self.year}_{self.race}_{self.session}"
+
+    def start_analysis(self):
+        """啟動串流分析工作執行緒"""
+        if self.worker and self.worker.isRunning():
+            return
+
+        self.series_colors = {}
+        self.table.reset()
+        self.chart.begin_streaming("正在接收部分結果...")
+        self.progress_bar.setValue(0)
+        self.start_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+
+        self.worker = StreamingAnalysisWorker(self.function_id, self.year, self.race,
+                                              self.session, driver=self.driver)
+        self.worker.partial_received.connect(self.on_partial_received)
+        self.worker.progress_updated.connect(self.on_progress_updated)
+        self.worker.analysis_completed.connect(self.on_analysis_completed)
+        self.worker.error_occurred.connect(self.on_error_occurred)
+        self.worker.start()
+
+    def cancel_analysis(self):
+        """取消分析"""
+        if self.worker:
+            self.worker.cancel()
+        self.cancel_button.setEnabled(False)
+        self.status_label.setText("正在取消...")
+
+    def on_partial_received(self, partial):
+        """部分結果 - 附加到表格與圖表"""
+        self.table.append_partial(partial)
+        for series_name, x_values, y_values in partial_chart_points(partial):
+            color = self.series_colors.setdefault(
+                series_name, SERIES_COLORS[len(self.series_colors) % len(SERIES_COLORS)])
+            self.chart.append_stream_points(series_name, x_values, y_values, color=color)
+
+    def on_progress_updated(self, progress, message):
+        """進度更新"""
+        self.progress_bar.setValue(progress)
+        self.status_label.setText(message)
+        self.chart.set_stream_progress(progress, message)
+
+    def on_analysis_completed(self, result):
+        """分析完成"""
+        self.chart.end_streaming()
+        self.progress_bar.setValue(100)
+        self.status_label.setText(result.get("message", "分析完成"))
+        self.start_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+
+    def on_error_occurred(self, message):
+        """分析錯誤或取消"""
+        self.chart.end_streaming()
+        self.status_label.setText(message)
+        self.start_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        if message != "分析已取消":
+            QMessageBox.warning(self, "串流分析", message)
+
+    def closeEvent(self, event):
+        """關閉視窗時停止轉送部分結果"""
+        if self.worker and self.worker.isRunning():
+            self.worker.cancel()
+            self.worker.wait(1000)
+        super().closeEvent(event)
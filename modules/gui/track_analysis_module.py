@@ -29,6 +29,20 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer, QPoint, QPointF
 from PyQt5.QtGui import QFont, QPixmap, QPainter, QPen, QBrush, QColor, QPolygon, QPainterPath
 
+# 導入賽道場景快取與空間索引
+try:
+    from .track_scene import (TrackScene, build_segment_paths, draw_car_positions, draw_highlight,
+                              draw_segment_paths)
+except ImportError:
+    from track_scene import (TrackScene, build_segment_paths, draw_car_positions, draw_highlight,
+                             draw_segment_paths)
+
+# 導入共用 JSON 讀取 (支援陣列附檔與壓縮檔)
+try:
+    from ..json_export import load_json
+except ImportError:
+    from modules.json_export import load_json
+
 # 導入賽道地圖繪製元件
 try:
     from .track_map_widget import TrackMapWidget
@@ -183,8 +197,7 @@ class TrackAnalysisWorkerThread(QThread):
     def load_json_data(self, file_path):
         """載入JSON數據"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = load_json(file_path)
             
             # 驗證數據格式
             if (data.get('analysis_type') == 'track_position_analysis' and
@@ -202,7 +215,16 @@ class TrackMapWidget(QWidget):
     """
     專門用於繪製賽道地圖的 PyQt Widget
     使用 QPainter 繪製賽道路線和位置點
+
+    賽道路徑於 set_track_data() 時建立一次 (TrackScene)，縮放改變時
+    只重新映射快取路徑；懸停/點擊透過網格空間索引查詢最近位置點，
+    並可疊加多台車輛位置供全場回放使用。
     """
+
+    # 信號定義
+    point_hovered = pyqtSignal(dict)  # 座標點懸停信號
+    point_clicked = pyqtSignal(dict)  # 座標點點擊信號
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.position_data = []
@@ -211,6 +233,13 @@ class TrackMapWidget(QWidget):
         self.offset_x = 0
         self.offset_y = 0
         
+        # 場景快取 (路徑 + 空間索引)
+        self.scene = TrackScene(flip_y=True, smooth=True)
+        self.car_positions = []      # 疊加的車輛位置 (世界座標)
+        self.segment_paths = []      # 迷你分段著色路徑 (世界座標)
+        self.hovered_index = None    # 懸停中的位置點編號
+        self.pick_radius = 10        # 點選半徑 (像素)
+        
         # 顯示控制選項
         self.show_start_point = True      # 顯示起始點
         self.show_finish_point = True     # 顯示結束點
@@ -219,14 +248,17 @@ class TrackMapWidget(QWidget):
         
         # self.setMinimumSize(400, 300) - 尺寸限制已移除
         self.setStyleSheet("background-color: white; border: 1px solid #ccc;")
+        self.setMouseTracking(True)
         
     def set_track_data(self, position_data, track_bounds):
-        """設置賽道數據"""
+        """設置賽道數據 - 建立快取路徑與空間索引"""
         print(f"[TRACK_MAP] set_track_data: 接收 {len(position_data) if position_data else 0} 個位置點")
         print(f"[TRACK_MAP] set_track_data: 賽道邊界 {track_bounds}")
         
         self.position_data = position_data
         self.track_bounds = track_bounds
+        self.hovered_index = None
+        self.scene.set_records(position_data, track_bounds)
         
         # 立即計算縮放 (確保widget有正確尺寸)
         if track_bounds and self.width() > 0 and self.height() > 0:
@@ -241,6 +273,24 @@ class TrackMapWidget(QWidget):
         self.update()  # 觸發重繪
         print("[TRACK_MAP] set_track_data: ✅ 觸發重繪完成")
         
+    def set_car_positions(self, cars):
+        """設置疊加的車輛位置 - 只重繪，不重建賽道路徑
+
+        Args:
+            cars: [{'driver': 'VER', 'x': ..., 'y': ..., 'color': '#1E41FF'}, ...] (世界座標)
+        """
+        self.car_positions = cars or []
+        self.update()
+        
+    def set_minisector_segments(self, segments):
+        """設置迷你分段著色 (各分段最快車手的車隊顏色) - 路徑只建立一次
+
+        Args:
+            segments: MinisectorTable.track_map_segments() 的輸出，None 表示清除
+        """
+        self.segment_paths = build_segment_paths(segments)
+        self.update()
+        
     def set_display_options(self, show_start=True, show_finish=True, show_markers=True, show_labels=True):
         """設置顯示選項"""
         self.show_start_point = show_start
@@ -288,6 +338,13 @@ class TrackMapWidget(QWidget):
             self.offset_x = (widget_width - scaled_track_width) / 2
             self.offset_y = (widget_height - scaled_track_height) / 2
             
+            # 更新場景轉換 (螢幕快取於下次繪製時重建)
+            if self.scene.has_data():
+                self.scene.set_transform(self.scale_factor, self.offset_x, self.offset_y)
+            
+            self._last_width = widget_width
+            self._last_height = widget_height
+            
             print(f"[TRACK_MAP] calculate_scale: Widget={widget_width}x{widget_height}, 賽道={track_width:.0f}x{track_height:.0f}")
             print(f"[TRACK_MAP] calculate_scale: 縮放={self.scale_factor:.3f}, 偏移=({self.offset_x:.1f}, {self.offset_y:.1f})")
         else:
@@ -307,7 +364,7 @@ class TrackMapWidget(QWidget):
         return int(screen_x), int(screen_y)
     
     def paintEvent(self, event):
-        """繪製賽道地圖"""
+        """繪製賽道地圖 - 使用快取路徑，不逐點重建"""
         painter = QPainter(self)
         painter.setRenderHint(QPainter.Antialiasing)
         
@@ -320,109 +377,85 @@ class TrackMapWidget(QWidget):
             painter.setFont(QFont("Arial", 12))
             painter.drawText(self.rect(), Qt.AlignCenter, 
                            "賽道地圖已載入\n50 個位置點\n(點擊可查看詳細座標)")
-            print("[TRACK_MAP] paintEvent: 沒有數據，顯示提示文字")
             return
         
         try:
-            # 每次繪製時檢查是否需要重新計算縮放
+            # 尺寸變化時才重新計算縮放
             if (self.scale_factor <= 0 or 
                 self.width() != getattr(self, '_last_width', 0) or 
                 self.height() != getattr(self, '_last_height', 0)):
-                print(f"[TRACK_MAP] paintEvent: 檢測到尺寸變化，重新計算縮放")
                 self.calculate_scale()
-                self._last_width = self.width()
-                self._last_height = self.height()
-            
-            print(f"[TRACK_MAP] paintEvent: 開始繪製，包含 {len(self.position_data)} 個位置點")
-            print(f"[TRACK_MAP] paintEvent: 當前縮放因子 {self.scale_factor:.3f}, 偏移 ({self.offset_x:.1f}, {self.offset_y:.1f})")
-            
-            # 繪製賽道路線
-            if len(self.position_data) > 1:
-                points = []
-                for record in self.position_data:
-                    x = record.get('position_x', 0)
-                    y = record.get('position_y', 0)
-                    screen_x, screen_y = self.world_to_screen(x, y)
-                    points.append(QPointF(screen_x, screen_y))
-                
-                print(f"[TRACK_MAP] paintEvent: 轉換得到 {len(points)} 個螢幕座標點")
-                if len(points) >= 2:
-                    print(f"[TRACK_MAP] paintEvent: 第一個點 ({points[0].x():.1f}, {points[0].y():.1f}), 最後一個點 ({points[-1].x():.1f}, {points[-1].y():.1f})")
-                
-                # 創建平滑的賽道路徑
-                path = QPainterPath()
-                if len(points) >= 2:
-                    path.moveTo(points[0])
-                    
-                    # 使用二次貝茲曲線創建平滑路徑
-                    for i in range(1, len(points)):
-                        if i < len(points) - 1:
-                            # 計算控制點，使曲線更平滑
-                            control_point = QPointF(
-                                (points[i].x() + points[i+1].x()) / 2,
-                                (points[i].y() + points[i+1].y()) / 2
-                            )
-                            path.quadTo(points[i], control_point)
-                        else:
-                            # 最後一個點直接連接
-                            path.lineTo(points[i])
-                
-                # 繪製平滑的賽道線條
-                painter.setPen(QPen(QColor(50, 50, 200), 4))  # 稍微加粗線條
-                painter.drawPath(path)
-                
-                # 繪製賽道邊框 (淺色)
-                painter.setPen(QPen(QColor(100, 100, 255), 1))
-                painter.drawPath(path)
+            
+            if not self.scene.has_data():
+                return
+            
+            path = self.scene.screen_path()
+            points = self.scene.screen_points()
+            
+            # 繪製平滑的賽道線條
+            painter.setPen(QPen(QColor(50, 50, 200), 4))  # 稍微加粗線條
+            painter.drawPath(path)
+            
+            # 繪製賽道邊框 (淺色)
+            painter.setPen(QPen(QColor(100, 100, 255), 1))
+            painter.drawPath(path)
+            
+            # 迷你分段著色 (覆蓋於賽道線上)
+            if self.segment_paths:
+                draw_segment_paths(painter, self.scene, self.segment_paths)
+            
+            # 繪製起始點 (綠色，稍大)
+            if points and self.show_start_point:
+                painter.setBrush(QBrush(QColor(0, 200, 0)))
+                painter.setPen(QPen(QColor(0, 150, 0), 2))
+                painter.drawEllipse(int(points[0].x()) - 6, int(points[0].y()) - 6, 12, 12)
                 
-                # 繪製起始點 (綠色，稍大)
-                if points and self.show_start_point:
-                    painter.setBrush(QBrush(QColor(0, 200, 0)))
-                    painter.setPen(QPen(QColor(0, 150, 0), 2))
-                    painter.drawEllipse(int(points[0].x()) - 6, int(points[0].y()) - 6, 12, 12)
-                    
-                    # 起始點標籤
-                    if self.show_track_labels:
-                        painter.setPen(QPen(QColor(0, 100, 0)))
-                        painter.setFont(QFont("Arial", 8, QFont.Bold))
-                        painter.drawText(int(points[0].x()) + 10, int(points[0].y()) - 5, "START")
+                # 起始點標籤
+                if self.show_track_labels:
+                    painter.setPen(QPen(QColor(0, 100, 0)))
+                    painter.setFont(QFont("Arial", 8, QFont.Bold))
+                    painter.drawText(int(points[0].x()) + 10, int(points[0].y()) - 5, "START")
+            
+            # 繪製結束點 (紅色，稍大)
+            if len(points) > 1 and self.show_finish_point:
+                painter.setBrush(QBrush(QColor(200, 0, 0)))
+                painter.setPen(QPen(QColor(150, 0, 0), 2))
+                painter.drawEllipse(int(points[-1].x()) - 6, int(points[-1].y()) - 6, 12, 12)
                 
-                # 繪製結束點 (紅色，稍大)
-                if len(points) > 1 and self.show_finish_point:
-                    painter.setBrush(QBrush(QColor(200, 0, 0)))
-                    painter.setPen(QPen(QColor(150, 0, 0), 2))
-                    painter.drawEllipse(int(points[-1].x()) - 6, int(points[-1].y()) - 6, 12, 12)
+                # 結束點標籤
+                if self.show_track_labels:
+                    painter.setPen(QPen(QColor(100, 0, 0)))
+                    painter.setFont(QFont("Arial", 8, QFont.Bold))
+                    painter.drawText(int(points[-1].x()) + 10, int(points[-1].y()) - 5, "FINISH")
+            
+            # 繪製距離標記點 (每隔幾個點)
+            if self.show_distance_markers:
+                marker_pen = QPen(QColor(0, 0, 150), 1)
+                label_pen = QPen(QColor(0, 0, 100))
+                painter.setBrush(QBrush(QColor(0, 0, 200)))
+                painter.setFont(QFont("Arial", 7))
+                step = max(1, len(points) // 8)  # 約8個標記點
+                for i in range(step, len(points) - 1, step):  # 跳過起始和結束點
+                    painter.setPen(marker_pen)
+                    painter.drawEllipse(int(points[i].x()) - 3, int(points[i].y()) - 3, 6, 6)
                     
-                    # 結束點標籤
-                    if self.show_track_labels:
-                        painter.setPen(QPen(QColor(100, 0, 0)))
-                        painter.setFont(QFont("Arial", 8, QFont.Bold))
-                        painter.drawText(int(points[-1].x()) + 10, int(points[-1].y()) - 5, "FINISH")
-                
-                # 繪製距離標記點 (每隔幾個點)
-                if self.show_distance_markers:
-                    painter.setBrush(QBrush(QColor(0, 0, 200)))
-                    painter.setPen(QPen(QColor(0, 0, 150), 1))
-                    step = max(1, len(points) // 8)  # 約8個標記點
-                    for i in range(0, len(points), step):
-                        if i > 0 and i < len(points) - 1:  # 跳過起始和結束點
-                            painter.drawEllipse(int(points[i].x()) - 3, int(points[i].y()) - 3, 6, 6)
-                            
-                            # 顯示距離標記
-                            if i < len(self.position_data):
-                                distance_km = self.position_data[i].get('distance_m', 0) / 1000
-                                if distance_km > 0:
-                                    painter.setPen(QPen(QColor(0, 0, 100)))
-                                    painter.setFont(QFont("Arial", 7))
-                                    painter.drawText(int(points[i].x()) + 5, int(points[i].y()) + 15, f"{distance_km:.1f}km")
-                
-                print(f"[TRACK_MAP] paintEvent: ✅ 平滑賽道線條和標記繪製完成")
+                    # 顯示距離標記
+                    distance_km = self.position_data[i].get('distance_m', 0) / 1000
+                    if distance_km > 0:
+                        painter.setPen(label_pen)
+                        painter.drawText(int(points[i].x()) + 5, int(points[i].y()) + 15, f"{distance_km:.1f}km")
+            
+            # 懸停點高亮
+            if self.hovered_index is not None and self.hovered_index < len(points):
+                draw_highlight(painter, points[self.hovered_index])
+            
+            # 疊加車輛位置
+            if self.car_positions:
+                draw_car_positions(painter, self.scene, self.car_positions)
             
             # 隱藏圖例繪製
             # self.draw_legend(painter)
             
-            print("[TRACK_MAP] paintEvent: ✅ 賽道地圖繪製完成")
-            
         except Exception as e:
             print(f"[ERROR] paintEvent: 繪製賽道地圖時發生錯誤: {e}")
             import traceback
@@ -431,15 +464,44 @@ class TrackMapWidget(QWidget):
             painter.setFont(QFont("Arial", 10))
             painter.drawText(10, 20, f"繪製錯誤: {str(e)}")
     
+    def _pick_point_info(self, x, y):
+        """以空間索引查詢滑鼠位置最近的位置點"""
+        hit = self.scene.pick(x, y, self.pick_radius)
+        if hit is None:
+            return None
+        index, record = hit
+        info = dict(record)
+        info['index'] = index
+        info['screen_x'] = x
+        info['screen_y'] = y
+        return info
+    
+    def mouseMoveEvent(self, event):
+        """滑鼠移動 - 懸停最近位置點"""
+        info = self._pick_point_info(event.x(), event.y())
+        new_index = info['index'] if info else None
+        if new_index != self.hovered_index:
+            self.hovered_index = new_index
+            if info:
+                self.setToolTip(f"距離: {info.get('distance_m', 0):.0f} m\n"
+                                f"X: {info.get('position_x', 0):.0f}  Y: {info.get('position_y', 0):.0f}")
+                self.point_hovered.emit(info)
+            else:
+                self.setToolTip("")
+            self.update()
+        super().mouseMoveEvent(event)
+    
     def mousePressEvent(self, event):
-        """處理滑鼠點擊事件"""
+        """處理滑鼠點擊事件 - 空間索引查詢最近賽道點"""
         if event.button() == Qt.LeftButton:
             x = event.x()
             y = event.y()
-            print(f"[TRACK_MAP] 點擊位置: {{'x': {x}, 'y': {y}, 'total_points': {len(self.position_data)}}}")
-            
-            # 可以在這裡添加更多點擊處理邏輯
-            # 例如：找到最近的賽道點、顯示詳細資訊等
+            info = self._pick_point_info(x, y)
+            if info:
+                print(f"[TRACK_MAP] 點擊位置點 #{info['index']}: 距離 {info.get('distance_m', 0):.0f} m")
+                self.point_clicked.emit(info)
+            else:
+                print(f"[TRACK_MAP] 點擊位置: {{'x': {x}, 'y': {y}, 'total_points': {len(self.position_data)}}}")
             
         super().mousePressEvent(event)
     
@@ -498,15 +560,10 @@ class TrackMapWidget(QWidget):
     def resizeEvent(self, event):
         """視窗大小改變時重新計算縮放"""
         super().resizeEvent(event)
-        print(f"[TRACK_MAP] resizeEvent: 新尺寸 {event.size().width()}x{event.size().height()}")
         
         if self.track_bounds:
-            old_scale = self.scale_factor
             self.calculate_scale()
-            print(f"[TRACK_MAP] resizeEvent: 縮放更新 {old_scale:.3f} -> {self.scale_factor:.3f}")
             self.update()  # 觸發重繪
-        else:
-            print("[TRACK_MAP] resizeEvent: 等待賽道數據載入")
 
 class TrackAnalysisModule(QWidget):
     """賽道分析主模組"""
@@ -893,6 +950,7 @@ class TrackAnalysisModule(QWidget):
             
             # 設置賽道數據到地圖元件
             self.track_map.set_track_data(records, track_bounds)
+            self.track_map.set_minisector_segments(self.track_data.get('minisector_segments'))
             
             # 應用固定顯示選項
             self.update_display_options()
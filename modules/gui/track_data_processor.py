@@ -18,6 +18,11 @@ import os
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime
 
+try:
+    from ..json_export import load_json
+except ImportError:
+    from modules.json_export import load_json
+
 class TrackDataProcessor:
     """賽道數據處理器"""
     
@@ -51,8 +56,7 @@ class TrackDataProcessor:
                 print(f"[ERROR] 檔案不存在: {json_file_path}")
                 return None
             
-            with open(json_file_path, 'r', encoding='utf-8') as f:
-                raw_data = json.load(f)
+            raw_data = load_json(json_file_path)
             
             print(f"[TRACK_PROCESSOR] JSON解析成功，資料大小: {len(str(raw_data))} 字元")
             
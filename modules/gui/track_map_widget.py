@@ -19,6 +19,11 @@ from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel
 from PyQt5.QtCore import Qt, QPointF, pyqtSignal
 from PyQt5.QtGui import QPainter, QPen, QBrush, QColor, QFont
 
+try:
+    from .track_scene import TrackScene, draw_car_positions, draw_highlight
+except ImportError:
+    from track_scene import TrackScene, draw_car_positions, draw_highlight
+
 class TrackMapWidget(QWidget):
     """賽道地圖繪製元件 - 佔位符版本"""
     
@@ -37,6 +42,13 @@ class TrackMapWidget(QWidget):
         self.pan_offset = QPointF(0, 0)
         self.margin = 50  # 邊距
         
+        # 場景快取 (賽道路徑只建立一次) 與點選狀態
+        self.scene = TrackScene(flip_y=False, smooth=False)
+        self._scene_rect_key = None
+        self.car_positions = []
+        self.selected_index = None
+        self.pick_radius = 10
+        
         self.init_ui()
     
     def init_ui(self):
@@ -77,6 +89,9 @@ class TrackMapWidget(QWidget):
         try:
             # 提取位置記錄
             self.position_records = track_data.get('detailed_position_records', [])
+            self.scene.set_records(self.position_records)
+            self._scene_rect_key = None
+            self.selected_index = None
             
             # 提取賽道邊界
             position_analysis = track_data.get('position_analysis', {})
@@ -125,8 +140,29 @@ class TrackMapWidget(QWidget):
             # 繪製佔位符
             self.draw_placeholder(painter)
     
+    def _update_scene_transform(self, map_rect):
+        """依繪圖區域更新場景轉換 - 尺寸不變時沿用快取"""
+        key = (map_rect.left(), map_rect.top(), map_rect.width(), map_rect.height())
+        if key == self._scene_rect_key:
+            return True
+        
+        bounds = self.scene.bounds
+        x_range = bounds['x_max'] - bounds['x_min']
+        y_range = bounds['y_max'] - bounds['y_min']
+        if x_range == 0 or y_range == 0:
+            return False
+        
+        # 計算縮放因子
+        scale_x = map_rect.width() / x_range
+        scale_y = map_rect.height() / y_range
+        scale = min(scale_x, scale_y) * 0.9  # 留一些邊距
+        
+        self.scene.set_transform(scale, map_rect.left(), map_rect.top())
+        self._scene_rect_key = key
+        return True
+    
     def draw_simplified_track(self, painter):
-        """繪製簡化的賽道示意圖"""
+        """繪製簡化的賽道示意圖 - 使用快取路徑"""
         try:
             # 計算顯示範圍
             widget_rect = self.rect()
@@ -135,56 +171,34 @@ class TrackMapWidget(QWidget):
             if map_rect.width() <= 0 or map_rect.height() <= 0:
                 return
             
-            # 獲取座標範圍
-            x_coords = [record['position_x'] for record in self.position_records]
-            y_coords = [record['position_y'] for record in self.position_records]
-            
-            x_min, x_max = min(x_coords), max(x_coords)
-            y_min, y_max = min(y_coords), max(y_coords)
+            if not self.scene.has_data() or not self._update_scene_transform(map_rect):
+                return
             
-            x_range = x_max - x_min
-            y_range = y_max - y_min
+            # 繪製賽道路線
+            painter.setPen(QPen(QColor(60, 60, 60), 3))
+            painter.drawPath(self.scene.screen_path())
             
-            if x_range == 0 or y_range == 0:
-                return
+            # 繪製起終點
+            points = self.scene.screen_points()
+            start_point = points[0]
+            x, y = int(start_point.x()), int(start_point.y())
             
-            # 計算縮放因子
-            scale_x = map_rect.width() / x_range
-            scale_y = map_rect.height() / y_range
-            scale = min(scale_x, scale_y) * 0.9  # 留一些邊距
+            painter.setPen(QPen(QColor(255, 0, 0), 2))
+            painter.setBrush(QBrush(QColor(255, 0, 0)))
+            painter.drawEllipse(x-4, y-4, 8, 8)
             
-            # 設置繪筆
-            track_pen = QPen(QColor(60, 60, 60), 3)
-            point_pen = QPen(QColor(255, 0, 0), 2)
+            # 起點標籤
+            painter.setPen(QPen(QColor(0, 0, 0)))
+            painter.setFont(QFont("Arial", 8))
+            painter.drawText(x+10, y, "START")
             
-            # 繪製賽道路線
-            painter.setPen(track_pen)
-            for i in range(len(self.position_records) - 1):
-                current = self.position_records[i]
-                next_point = self.position_records[i + 1]
-                
-                # 轉換座標
-                x1 = int(map_rect.left() + (current['position_x'] - x_min) * scale)
-                y1 = int(map_rect.top() + (current['position_y'] - y_min) * scale)
-                x2 = int(map_rect.left() + (next_point['position_x'] - x_min) * scale)
-                y2 = int(map_rect.top() + (next_point['position_y'] - y_min) * scale)
-                
-                painter.drawLine(x1, y1, x2, y2)
+            # 選取點高亮
+            if self.selected_index is not None and self.selected_index < len(points):
+                draw_highlight(painter, points[self.selected_index])
             
-            # 繪製起終點
-            if self.position_records:
-                start_point = self.position_records[0]
-                x = int(map_rect.left() + (start_point['position_x'] - x_min) * scale)
-                y = int(map_rect.top() + (start_point['position_y'] - y_min) * scale)
-                
-                painter.setPen(point_pen)
-                painter.setBrush(QBrush(QColor(255, 0, 0)))
-                painter.drawEllipse(x-4, y-4, 8, 8)
-                
-                # 起點標籤
-                painter.setPen(QPen(QColor(0, 0, 0)))
-                painter.setFont(QFont("Arial", 8))
-                painter.drawText(x+10, y, "START")
+            # 疊加車輛位置
+            if self.car_positions:
+                draw_car_positions(painter, self.scene, self.car_positions)
             
             # 繪製資訊文字
             info_text = f"賽道位置點: {len(self.position_records)}"
@@ -195,6 +209,11 @@ class TrackMapWidget(QWidget):
         except Exception as e:
             print(f"[ERROR] 繪製賽道失敗: {e}")
     
+    def set_car_positions(self, cars):
+        """設置疊加的車輛位置 (世界座標) - 只重繪車輛層"""
+        self.car_positions = cars or []
+        self.update()
+    
     def draw_placeholder(self, painter):
         """繪製佔位符"""
         painter.setPen(QPen(QColor(200, 200, 200), 2))
@@ -210,12 +229,20 @@ class TrackMapWidget(QWidget):
     def mousePressEvent(self, event):
         """滑鼠點擊事件"""
         if event.button() == Qt.LeftButton and self.position_records:
-            # 簡化版本：顯示點擊位置的資訊
             click_info = {
                 'x': event.x(),
                 'y': event.y(),
                 'total_points': len(self.position_records)
             }
+            
+            # 空間索引查詢最近的位置點
+            hit = self.scene.pick(event.x(), event.y(), self.pick_radius)
+            if hit is not None:
+                index, record = hit
+                self.selected_index = index
+                click_info.update(record)
+                click_info['index'] = index
+                self.update()
             print(f"[TRACK_MAP] 點擊位置: {click_info}")
             self.point_clicked.emit(click_info)
     
@@ -242,6 +269,10 @@ class TrackMapWidget(QWidget):
         self.track_data = None
         self.position_records = []
         self.track_bounds = {}
+        self.scene.set_records([])
+        self._scene_rect_key = None
+        self.car_positions = []
+        self.selected_index = None
         self.placeholder_label.setText("賽道地圖\n(準備中...)")
         self.update()
     
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+賽道場景快取與空間索引 - Track Scene Cache & Spatial Index
+Track Scene Cache & Spatial Index
+
+提供賽道地圖元件共用的高效繪製工具：
+1. 每份數據只建立一次的世界座標 QPainterPath，縮放/平移以 QTransform 處理
+2. 依視窗尺寸快取的螢幕路徑與標記點 (尺寸不變時重繪零轉換成本)
+3. 均勻網格空間索引 - 懸停/點擊的最近點查詢不再線性搜尋
+4. 多車位置疊加繪製 - 供全場回放動畫使用
+5. 迷你分段著色 - 依各分段最快車手的車隊顏色繪製賽道
+
+純 QPainter 實作，不需要 OpenGL/GPU
+"""
+
+import math
+from PyQt5.QtCore import Qt, QPointF, QRectF
+from PyQt5.QtGui import QPainterPath, QTransform, QPen, QBrush, QColor, QFont
+
+
+class TrackSpatialIndex:
+    """均勻網格空間索引 - 最近點查詢
+
+    將點依世界座標分配到固定大小的網格，查詢時由查詢點所在格
+    逐圈向外搜尋，找到候選點且外圈已不可能更近時即停止。
+    """
+
+    def __init__(self, cell_size=None):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.points = []
+        self._cell_extent = (0, 0, 0, 0)
+
+    def build(self, points):
+        """建立索引
+
+        Args:
+            points: [(x, y), ...] 世界座標，索引位置即為回傳的點編號
+        """
+        self.points = [(float(x), float(y)) for x, y in points]
+        self.cells = {}
+
+        if not self.points:
+            return self
+
+        if not self.cell_size:
+            # 依資料範圍自動決定格子大小 (平均每格約 4 個點)
+            xs = [p[0] for p in self.points]
+            ys = [p[1] for p in self.points]
+            area = max(max(xs) - min(xs), 1.0) * max(max(ys) - min(ys), 1.0)
+            self.cell_size = max(math.sqrt(area * 4.0 / len(self.points)), 1e-6)
+
+        for index, (x, y) in enumerate(self.points):
+            self.cells.setdefault(self._cell_of(x, y), []).append(index)
+
+        cell_xs = [c[0] for c in self.cells]
+        cell_ys = [c[1] for c in self.cells]
+        self._cell_extent = (min(cell_xs), max(cell_xs), min(cell_ys), max(cell_ys))
+
+        return self
+
+    def _cell_of(self, x, y):
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    @staticmethod
+    def _ring_cells(cx, cy, ring):
+        """列出以 (cx, cy) 為中心第 ring 圈邊界上的格子"""
+        if ring == 0:
+            yield cx, cy
+            return
+        for gx in range(cx - ring, cx + ring + 1):
+            yield gx, cy - ring
+            yield gx, cy + ring
+        for gy in range(cy - ring + 1, cy + ring):
+            yield cx - ring, gy
+            yield cx + ring, gy
+
+    def nearest(self, x, y, max_distance=None):
+        """查詢最近點
+
+        Args:
+            x, y: 查詢點世界座標
+            max_distance: 最大允許距離 (世界座標單位)，超過時回傳 None
+
+        Returns:
+            (點編號, 距離) 或 None
+        """
+        if not self.points:
+            return None
+
+        cx, cy = self._cell_of(x, y)
+        best_index = None
+        best_dist_sq = float('inf')
+
+        # 搜尋圈數上限：涵蓋所有非空格子
+        min_x, max_x, min_y, max_y = self._cell_extent
+        max_ring = max(abs(cx - min_x), abs(cx - max_x), abs(cy - min_y), abs(cy - max_y))
+        if max_distance is not None:
+            max_ring = min(max_ring, int(math.ceil(max_distance / self.cell_size)))
+
+        for ring in range(0, max_ring + 1):
+            # 外圈最近可能距離已大於目前最佳值時停止
+            if best_index is not None and ((ring - 1) * self.cell_size) ** 2 > best_dist_sq:
+                break
+
+            for cell in self._ring_cells(cx, cy, ring):
+                for index in self.cells.get(cell, ()):
+                    px, py = self.points[index]
+                    dist_sq = (px - x) ** 2 + (py - y) ** 2
+                    if dist_sq < best_dist_sq:
+                        best_dist_sq = dist_sq
+                        best_index = index
+
+        if best_index is None:
+            return None
+
+        distance = math.sqrt(best_dist_sq)
+        if max_distance is not None and distance > max_distance:
+            return None
+        return best_index, distance
+
+    def within(self, x, y, radius):
+        """查詢半徑內的所有點編號"""
+        if not self.points:
+            return []
+
+        cx, cy = self._cell_of(x, y)
+        ring = int(math.ceil(radius / self.cell_size))
+        radius_sq = radius * radius
+        found = []
+
+        for gx in range(cx - ring, cx + ring + 1):
+            for gy in range(cy - ring, cy + ring + 1):
+                for index in self.cells.get((gx, gy), ()):
+                    px, py = self.points[index]
+                    if (px - x) ** 2 + (py - y) ** 2 <= radius_sq:
+                        found.append(index)
+        return found
+
+
+class TrackScene:
+    """賽道場景快取
+
+    世界座標路徑與空間索引在 set_records() 時建立一次；
+    螢幕路徑與標記點依 (寬, 高) 快取，只在尺寸或縮放改變時重新映射。
+    """
+
+    def __init__(self, flip_y=True, smooth=True):
+        self.flip_y = flip_y
+        self.smooth = smooth
+        self.records = []
+        self.world_points = []
+        self.world_path = QPainterPath()
+        self.bounds = None
+        self.index = TrackSpatialIndex()
+        self.transform = QTransform()
+        self.scale = 1.0
+
+        self._screen_key = None
+        self._screen_path = None
+        self._screen_points = None
+
+    def set_records(self, records, bounds=None):
+        """設置位置記錄並建立路徑與索引
+
+        Args:
+            records: [{'position_x':..., 'position_y':..., ...}, ...]
+            bounds: {'x_min','x_max','y_min','y_max'} (可選，預設由資料計算)
+        """
+        self.records = records or []
+        self.world_points = [
+            (float(r.get('position_x', 0) or 0), float(r.get('position_y', 0) or 0))
+            for r in self.records
+        ]
+
+        if bounds and all(k in bounds for k in ('x_min', 'x_max', 'y_min', 'y_max')):
+            self.bounds = dict(bounds)
+        elif self.world_points:
+            xs = [p[0] for p in self.world_points]
+            ys = [p[1] for p in self.world_points]
+            self.bounds = {'x_min': min(xs), 'x_max': max(xs), 'y_min': min(ys), 'y_max': max(ys)}
+        else:
+            self.bounds = None
+
+        self.world_path = self._build_world_path(self.world_points)
+        self.index.cell_size = None
+        self.index.build(self.world_points)
+        self.invalidate()
+
+    def _build_world_path(self, points):
+        """以世界座標建立賽道路徑 (只在數據改變時執行一次)"""
+        path = QPainterPath()
+        if len(points) < 2:
+            return path
+
+        qpoints = [QPointF(x, y) for x, y in points]
+        path.moveTo(qpoints[0])
+
+        if self.smooth:
+            # 二次貝茲曲線平滑 - 以相鄰點中點為端點
+            for i in range(1, len(qpoints) - 1):
+                mid = QPointF((qpoints[i].x() + qpoints[i + 1].x()) / 2,
+                              (qpoints[i].y() + qpoints[i + 1].y()) / 2)
+                path.quadTo(qpoints[i], mid)
+            path.lineTo(qpoints[-1])
+        else:
+            for point in qpoints[1:]:
+                path.lineTo(point)
+
+        return path
+
+    def has_data(self):
+        return len(self.world_points) > 1 and self.bounds is not None
+
+    def invalidate(self):
+        """清除螢幕快取 (尺寸或縮放改變時)"""
+        self._screen_key = None
+        self._screen_path = None
+        self._screen_points = None
+
+    def fit(self, width, height, margin=40, fill_ratio=0.85, origin=None):
+        """計算世界座標到螢幕座標的轉換
+
+        Args:
+            width, height: 元件尺寸
+            margin: 邊距 (像素)
+            fill_ratio: 填滿比例
+            origin: 指定左上角原點 (x, y)，None 表示置中
+
+        Returns:
+            bool: 是否成功
+        """
+        if not self.bounds:
+            return False
+
+        track_width = self.bounds['x_max'] - self.bounds['x_min']
+        track_height = self.bounds['y_max'] - self.bounds['y_min']
+        available_width = width - margin
+        available_height = height - margin
+
+        if track_width <= 0 or track_height <= 0 or available_width <= 0 or available_height <= 0:
+            return False
+
+        scale = min(available_width / track_width, available_height / track_height) * fill_ratio
+
+        if origin is None:
+            offset_x = (width - track_width * scale) / 2
+            offset_y = (height - track_height * scale) / 2
+        else:
+            offset_x, offset_y = origin
+
+        self.set_transform(scale, offset_x, offset_y)
+        return True
+
+    def set_transform(self, scale, offset_x, offset_y):
+        """直接設定縮放與偏移"""
+        self.scale = scale
+        if self.flip_y:
+            # screen_y = (y_max - y) * scale + offset_y
+            self.transform = QTransform(scale, 0, 0, -scale,
+                                        offset_x - self.bounds['x_min'] * scale,
+                                        offset_y + self.bounds['y_max'] * scale)
+        else:
+            # screen_y = (y - y_min) * scale + offset_y
+            self.transform = QTransform(scale, 0, 0, scale,
+                                        offset_x - self.bounds['x_min'] * scale,
+                                        offset_y - self.bounds['y_min'] * scale)
+        self.invalidate()
+
+    def _ensure_screen_cache(self):
+        key = (self.transform.m11(), self.transform.m22(), self.transform.dx(), self.transform.dy())
+        if self._screen_key == key:
+            return
+        # 以轉換映射快取路徑，畫筆寬度維持像素單位
+        self._screen_path = self.transform.map(self.world_path)
+        self._screen_points = [self.transform.map(QPointF(x, y)) for x, y in self.world_points]
+        self._screen_key = key
+
+    def screen_path(self):
+        """取得螢幕座標路徑 (快取)"""
+        self._ensure_screen_cache()
+        return self._screen_path
+
+    def screen_points(self):
+        """取得螢幕座標點列表 (快取)"""
+        self._ensure_screen_cache()
+        return self._screen_points
+
+    def world_to_screen(self, x, y):
+        """世界座標轉螢幕座標"""
+        return self.transform.map(QPointF(x, y))
+
+    def screen_to_world(self, sx, sy):
+        """螢幕座標轉世界座標"""
+        inverted, ok = self.transform.inverted()
+        if not ok:
+            return None
+        point = inverted.map(QPointF(sx, sy))
+        return point.x(), point.y()
+
+    def pick(self, sx, sy, pixel_radius=10):
+        """螢幕座標點選最近的位置記錄
+
+        Returns:
+            (記錄編號, 記錄) 或 None
+        """
+        if not self.has_data() or self.scale <= 0:
+            return None
+        world = self.screen_to_world(sx, sy)
+        if world is None:
+            return None
+        hit = self.index.nearest(world[0], world[1], max_distance=pixel_radius / self.scale)
+        if hit is None:
+            return None
+        index = hit[0]
+        return index, self.records[index]
+
+
+def draw_car_positions(painter, scene, cars, radius=5, show_labels=True):
+    """在賽道上疊加多台車輛位置
+
+    每台車只做一次座標轉換並共用字型，適合全場回放每幀重繪。
+
+    Args:
+        painter: QPainter
+        scene: TrackScene
+        cars: [{'driver': 'VER', 'x': ..., 'y': ..., 'color': '#1E41FF'}, ...] (世界座標)
+        radius: 標記半徑 (像素)
+        show_labels: 是否顯示車手代碼
+    """
+    if not cars or not scene.has_data():
+        return
+
+    transform = scene.transform
+    label_font = QFont("Arial", 7, QFont.Bold)
+    outline_pen = QPen(QColor(20, 20, 20), 1)
+    diameter = radius * 2
+
+    painter.save()
+    painter.setFont(label_font)
+    for car in cars:
+        x = car.get('x')
+        y = car.get('y')
+        if x is None or y is None:
+            continue
+        point = transform.map(QPointF(x, y))
+        color = QColor(car.get('color') or '#FF3333')
+
+        painter.setPen(outline_pen)
+        painter.setBrush(QBrush(color))
+        painter.drawEllipse(QRectF(point.x() - radius, point.y() - radius, diameter, diameter))
+
+        if show_labels and car.get('driver'):
+            painter.setPen(QPen(color.darker(150)))
+            painter.drawText(QPointF(point.x() + radius + 2, point.y() - radius), str(car['driver']))
+    painter.restore()
+
+
+def build_segment_paths(segments):
+    """建立迷你分段著色路徑 (世界座標，每份數據只建立一次)
+
+    Args:
+        segments: MinisectorTable.track_map_segments() 的輸出
+                  [{'minisector': 1, 'owner': 'NOR', 'color': '#FF8000', 'x': [...], 'y': [...]}, ...]
+
+    Returns:
+        list: [(QPainterPath, QColor), ...]
+    """
+    paths = []
+    for segment in segments or []:
+        xs = segment.get('x') or []
+        ys = segment.get('y') or []
+        if len(xs) < 2 or len(xs) != len(ys):
+            continue
+        path = QPainterPath()
+        path.moveTo(QPointF(xs[0], ys[0]))
+        for x, y in zip(xs[1:], ys[1:]):
+            path.lineTo(QPointF(x, y))
+        paths.append((path, QColor(segment.get('color') or '#888888')))
+    return paths
+
+
+def draw_segment_paths(painter, scene, segment_paths, width=5):
+    """以場景轉換繪製迷你分段著色路徑"""
+    if not segment_paths or not scene.has_data():
+        return
+
+    painter.save()
+    painter.setBrush(Qt.NoBrush)
+    for path, color in segment_paths:
+        pen = QPen(color, width)
+        pen.setCapStyle(Qt.FlatCap)
+        painter.setPen(pen)
+        painter.drawPath(scene.transform.map(path))
+    painter.restore()
+
+
+def draw_highlight(painter, point, radius=7, color=QColor(255, 140, 0)):
+    """繪製懸停/選取點的高亮圈"""
+    painter.save()
+    painter.setPen(QPen(color, 2))
+    painter.setBrush(Qt.NoBrush)
+    painter.drawEllipse(QRectF(point.x() - radius, point.y() - radius, radius * 2, radius * 2))
+    painter.restore()
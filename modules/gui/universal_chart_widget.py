@@ -127,6 +127,11 @@ class UniversalChartWidget(QWidget):
         if not hasattr(self, 'rain_text_markers'):
             self.rain_text_markers = []        # 降雨文字標記
         
+        # 串流模式狀態 - 長時間分析的部分結果漸進顯示
+        self.streaming_active = False
+        self.stream_progress = None     # 0-100 或 None (未知進度)
+        self.stream_message = ""
+        
         # 設置size policy讓圖表能夠自適應MDI視窗大小
         from PyQt5.QtWidgets import QSizePolicy
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
@@ -550,7 +555,7 @@ class UniversalChartWidget(QWidget):
         if not self.data_series:
             painter.setPen(QPen(QColor(200, 200, 200), 1))
             painter.setFont(QFont("Arial", max(self.axis_font_size + 2, 12)))
-            message = f"正在載入數據..."
+            message = self.stream_message if self.streaming_active and self.stream_message else f"正在載入數據..."
             text_rect = painter.fontMetrics().boundingRect(message)
             center_x = chart_area.center().x() - text_rect.width() // 2
             center_y = chart_area.center().y()
@@ -589,6 +594,10 @@ class UniversalChartWidget(QWidget):
         # 繪製圖例
         if self.show_legend:
             self.draw_legend(painter)
+        
+        # 串流模式進度指示
+        if self.streaming_active:
+            self.draw_stream_progress(painter, chart_area)
     
     def draw_axes(self, painter, chart_area):
         """繪製坐標軸"""
@@ -1194,6 +1203,78 @@ class UniversalChartWidget(QWidget):
         self.update()
         print(f"[DEBUG] 數值提示: {'開啟' if self.show_value_tooltips else '關閉'}")
     
+    # 串流模式 - 部分結果漸進顯示
+    def begin_streaming(self, message="正在接收部分結果..."):
+        """開始串流模式 - 清除舊數據並顯示進度指示"""
+        self.clear_data()
+        self.streaming_active = True
+        self.stream_progress = 0
+        self.stream_message = message
+        self.update()
+    
+    def append_stream_points(self, series_name, x_values, y_values, color="#FFA366", y_axis="left"):
+        """附加部分結果數據點到指定系列 (系列不存在時自動建立)"""
+        if not x_values or len(x_values) != len(y_values):
+            return
+        
+        series = next((s for s in self.data_series if s.name == series_name), None)
+        if series is None:
+            series = ChartDataSeries(
+                name=series_name,
+                x_data=list(x_values),
+                y_data=list(y_values),
+                color=color,
+                line_width=2,
+                y_axis=y_axis
+            )
+            self.add_data_series(series)
+        else:
+            series.x_data.extend(x_values)
+            series.y_data.extend(y_values)
+        
+        # 範圍隨新數據擴張，update() 由 Qt 合併重繪請求
+        self.recalculate_data_ranges()
+        self.update()
+    
+    def set_stream_progress(self, progress, message=""):
+        """更新串流進度 (0-100，None 表示未知進度)"""
+        self.stream_progress = progress
+        if message:
+            self.stream_message = message
+        self.update()
+    
+    def end_streaming(self):
+        """結束串流模式 - 移除進度指示並調整視圖"""
+        self.streaming_active = False
+        self.stream_progress = None
+        self.stream_message = ""
+        self.auto_fit_to_window()
+        self.update()
+    
+    def draw_stream_progress(self, painter, chart_area):
+        """繪製串流進度指示條 (圖表區域頂端)"""
+        bar_height = 4
+        bar_rect_width = chart_area.width()
+        top = max(0, chart_area.top() - bar_height - 2)
+        
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QBrush(QColor(220, 220, 220)))
+        painter.drawRect(chart_area.left(), top, bar_rect_width, bar_height)
+        
+        if self.stream_progress is not None:
+            filled = int(bar_rect_width * max(0, min(100, self.stream_progress)) / 100)
+            painter.setBrush(QBrush(QColor(102, 179, 255)))
+            painter.drawRect(chart_area.left(), top, filled, bar_height)
+        
+        if self.stream_message:
+            painter.setPen(QPen(QColor(80, 80, 80), 1))
+            painter.setFont(QFont("Arial", self.legend_font_size))
+            progress_text = f" ({self.stream_progress}%)" if self.stream_progress is not None else ""
+            painter.drawText(chart_area.right() - 220, top + bar_height + 12,
+                             f"{self.stream_message}{progress_text}")
+        
+        painter.setBrush(Qt.NoBrush)
+    
     def draw_legend(self, painter):
         """繪製圖例"""
         if not self.data_series:
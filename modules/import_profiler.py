@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+F1 Analysis Import Profiler - 匯入耗時量測工具
+量測 GUI 啟動與延遲載入時各模組的匯入時間，找出拖慢啟動的模組
+
+啟用方式:
+    python f1t_gui_main.py --profile-imports
+    或設定環境變數 F1T_PROFILE_IMPORTS=1
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import builtins
+import importlib
+import os
+import sys
+import time
+
+PROFILE_ENV_VAR = "F1T_PROFILE_IMPORTS"
+PROFILE_CLI_FLAG = "--profile-imports"
+
+
+class ImportProfiler:
+    """匯入耗時量測器
+
+    啟用後包裝 builtins.__import__，記錄每個首次載入的頂層模組
+    (含其子依賴) 的累計匯入時間；延遲載入則透過 lazy_import() 記錄。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.timings = {}
+        self._original_import = None
+        self._depth = 0
+
+    def enable(self):
+        """開始量測匯入時間"""
+        if self.enabled:
+            return
+        self.enabled = True
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def disable(self):
+        """停止量測並還原 __import__"""
+        if not self.enabled:
+            return
+        builtins.__import__ = self._original_import
+        self._original_import = None
+        self.enabled = False
+
+    def record(self, module_name, elapsed):
+        """記錄模組匯入耗時 (秒)"""
+        self.timings[module_name] = self.timings.get(module_name, 0.0) + elapsed
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # 相對匯入或已載入的模組不需量測
+        if level != 0 or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        # 僅記錄最外層的匯入，避免子依賴重複計算
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._depth -= 1
+            if self._depth == 0:
+                self.record(name, elapsed)
+
+    def slowest(self, limit=10):
+        """回傳耗時最長的模組清單 [(模組名稱, 秒數), ...]"""
+        ordered = sorted(self.timings.items(), key=lambda item: item[1], reverse=True)
+        return ordered[:limit]
+
+    def report(self, limit=10, title="匯入耗時排行"):
+        """輸出耗時最長的模組"""
+        slowest = self.slowest(limit)
+        if not slowest:
+            print("[INFO] 沒有匯入耗時記錄")
+            return slowest
+
+        total = sum(self.timings.values())
+        print(f"[INFO] {title} (共 {len(self.timings)} 個模組，總計 {total:.3f}s)")
+        for module_name, elapsed in slowest:
+            print(f"   {elapsed * 1000:8.1f} ms  {module_name}")
+        return slowest
+
+
+# 全域量測器實例
+import_profiler = ImportProfiler()
+
+
+def profiling_requested(argv=None):
+    """檢查是否透過 CLI 參數或環境變數要求量測匯入時間"""
+    argv = sys.argv if argv is None else argv
+    return PROFILE_CLI_FLAG in argv or os.environ.get(PROFILE_ENV_VAR, "") not in ("", "0")
+
+
+def lazy_import(module_name):
+    """延遲匯入模組並記錄首次載入耗時
+
+    供 GUI 在使用者第一次開啟分析視窗時才導入分析模組、
+    FastF1 或 matplotlib 後端使用。
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    elapsed = time.perf_counter() - start
+
+    if import_profiler.enabled:
+        import_profiler.record(f"{module_name} (延遲載入)", elapsed)
+        print(f"[INFO] 延遲載入 {module_name}: {elapsed * 1000:.1f} ms")
+
+    return module
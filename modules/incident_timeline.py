@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+F1 賽事事件時間軸索引 - Session Incident Timeline
+將賽道狀態 (track_status)、賽事控制訊息與圈數合併為每場賽事只建立一次的區間索引
+
+- 賽道狀態為不重疊的時間區間 (綠旗/黃旗/SC/VSC/紅旗)，以排序陣列 + searchsorted 查詢
+- 每圈的 session 時間範圍取領先者的 LapStartTime，支援時間 ↔ 圈數互查
+- 賽事控制訊息 (共用分類引擎結果) 依圈數與時間排序，區間查詢 O(log n)
+
+查詢範例:
+    timeline = get_incident_timeline(data_loader)
+    timeline.events_between_laps(12, 18)      # 第 12-18 圈的事件
+    timeline.is_lap_under(23, 'SC')           # 第 23 圈是否在安全車下
+    timeline.lap_annotations(23)              # ['🚗 安全車', '[CRITICAL] 事故']
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .race_control_classifier import get_classified_messages
+    from .session_tables import IdentityCache
+except ImportError:
+    from race_control_classifier import get_classified_messages
+    from session_tables import IdentityCache
+
+# FastF1 track_status 狀態碼
+TRACK_STATUS_CODES = {
+    '1': 'GREEN',
+    '2': 'YELLOW',
+    '4': 'SC',
+    '5': 'RED',
+    '6': 'VSC',
+    '7': 'VSC_ENDING',
+}
+
+TRACK_STATUS_LABELS = {
+    'YELLOW': '🟡 黃旗',
+    'SC': '🚗 安全車',
+    'RED': '🔴 紅旗',
+    'VSC': '🟡 虛擬安全車',
+    'VSC_ENDING': '🟡 虛擬安全車結束',
+}
+
+# 圈數註記中列出的事件類別 (共用分類引擎的 incident_category)
+INCIDENT_EVENT_LABELS = {
+    'ACCIDENT': '[CRITICAL] 事故',
+    'CONTACT': '[CRITICAL] 接觸',
+    'INVESTIGATION': '[DEBUG] 調查',
+    'PENALTY': '[WARNING] 處罰',
+}
+
+# 記憶體快取保留的賽事數
+MAX_CACHED_TIMELINES = 4
+
+
+def _to_ms(values):
+    """timedelta 欄位轉毫秒 (NaT 轉 NaN)"""
+    return pd.to_timedelta(pd.Series(values), errors='coerce').dt.total_seconds().to_numpy(dtype=float) * 1000.0
+
+
+def _event_time_ms(race_control, t0_date=None):
+    """賽事控制訊息時間轉 session 毫秒
+
+    FastF1 的訊息時間為絕對時間，需以 session.t0_date 換算；
+    已是 timedelta 時直接轉換，無法換算時回傳 NaN。
+    """
+    if 'Time' not in race_control.columns:
+        return np.full(len(race_control), np.nan)
+    times = race_control['Time']
+    if pd.api.types.is_timedelta64_dtype(times):
+        return _to_ms(times)
+    if pd.api.types.is_datetime64_any_dtype(times) and t0_date is not None:
+        try:
+            return _to_ms(times - pd.Timestamp(t0_date))
+        except Exception:
+            pass
+    return np.full(len(race_control), np.nan)
+
+
+class IncidentTimeline:
+    """賽事事件時間軸區間索引"""
+
+    def __init__(self):
+        # 圈數邊界 (依圈數排序)
+        self.lap_numbers = np.array([], dtype=float)
+        self.lap_start_ms = np.array([], dtype=float)
+        self.lap_end_ms = np.array([], dtype=float)
+
+        # 賽道狀態區間 (依開始時間排序，彼此不重疊)
+        self.status_start_ms = np.array([], dtype=float)
+        self.status_end_ms = np.array([], dtype=float)
+        self.status_codes = np.array([], dtype=object)
+
+        # 賽事控制訊息 (共用分類結果)，依圈數與時間排序
+        self.events = pd.DataFrame()
+        self.event_laps = np.array([], dtype=float)
+        self._time_order = np.array([], dtype=int)
+        self._event_times_sorted = np.array([], dtype=float)
+
+    # ---- 建立 ----
+
+    def set_laps(self, laps):
+        """以領先者的 LapStartTime 建立每圈的 session 時間範圍"""
+        if laps is None or len(laps) == 0 or 'LapNumber' not in laps.columns or 'LapStartTime' not in laps.columns:
+            return self
+
+        starts = pd.DataFrame({
+            'lap': pd.to_numeric(laps['LapNumber'], errors='coerce'),
+            'start': _to_ms(laps['LapStartTime']),
+        }).dropna().groupby('lap')['start'].min().sort_index()
+
+        if starts.empty:
+            return self
+
+        self.lap_numbers = starts.index.to_numpy(dtype=float)
+        # 圈起點必須單調遞增，才能以 searchsorted 由時間反查圈數
+        self.lap_start_ms = np.maximum.accumulate(starts.to_numpy(dtype=float))
+
+        session_end = np.inf
+        if 'Time' in laps.columns:
+            lap_end_times = _to_ms(laps['Time'])
+            if np.isfinite(lap_end_times).any():
+                session_end = float(np.nanmax(lap_end_times))
+        self.lap_end_ms = np.append(self.lap_start_ms[1:], max(session_end, self.lap_start_ms[-1]))
+        return self
+
+    def set_track_status(self, track_status):
+        """將狀態變更序列轉為 [開始, 結束) 區間"""
+        if track_status is None or len(track_status) == 0 or 'Time' not in track_status.columns:
+            return self
+
+        frame = pd.DataFrame({
+            'start': _to_ms(track_status['Time']),
+            'status': track_status['Status'].astype(str).to_numpy() if 'Status' in track_status.columns else '1',
+        }).dropna(subset=['start']).sort_values('start', kind='stable')
+
+        self.status_start_ms = frame['start'].to_numpy(dtype=float)
+        self.status_end_ms = np.append(self.status_start_ms[1:], np.inf)
+        self.status_codes = np.array([TRACK_STATUS_CODES.get(code, code) for code in frame['status']], dtype=object)
+        return self
+
+    def set_race_control(self, race_control, t0_date=None):
+        """以共用分類結果建立依圈數排序的事件表 (缺少圈數時由時間反查)"""
+        classified = get_classified_messages(race_control)
+        if classified is None or classified.empty:
+            return self
+
+        event_ms = _event_time_ms(classified, t0_date)
+        if 'Lap' in classified.columns:
+            laps = pd.to_numeric(classified['Lap'], errors='coerce').to_numpy(dtype=float, copy=True)
+        else:
+            laps = np.full(len(classified), np.nan)
+
+        missing = np.isnan(laps) & np.isfinite(event_ms)
+        if missing.any() and len(self.lap_numbers):
+            laps[missing] = [self.lap_at(t) or np.nan for t in event_ms[missing]]
+
+        events = classified.assign(timeline_lap=laps, timeline_ms=event_ms)
+        order = np.lexsort((np.nan_to_num(event_ms, nan=np.inf), np.nan_to_num(laps, nan=np.inf)))
+        self.events = events.iloc[order].reset_index(drop=True)
+        self.event_laps = self.events['timeline_lap'].to_numpy(dtype=float)
+
+        times = self.events['timeline_ms'].to_numpy(dtype=float)
+        self._time_order = np.argsort(np.nan_to_num(times, nan=np.inf), kind='stable')
+        self._event_times_sorted = times[self._time_order]
+        return self
+
+    # ---- 圈數 / 時間 ----
+
+    def lap_at(self, t_ms):
+        """session 時間所在的圈數 (無法對應時回傳 None)"""
+        if not len(self.lap_numbers) or t_ms is None or np.isnan(t_ms):
+            return None
+        index = int(np.searchsorted(self.lap_start_ms, t_ms, side='right')) - 1
+        if index < 0 or t_ms >= self.lap_end_ms[-1]:
+            return None
+        return int(self.lap_numbers[index])
+
+    def lap_time_range(self, lap_number):
+        """圈數的 session 時間範圍 (start_ms, end_ms)，未知圈數回傳 None"""
+        index = int(np.searchsorted(self.lap_numbers, lap_number))
+        if index >= len(self.lap_numbers) or self.lap_numbers[index] != lap_number:
+            return None
+        return float(self.lap_start_ms[index]), float(self.lap_end_ms[index])
+
+    def laps_time_range(self, start_lap, end_lap):
+        """連續圈數範圍的 session 時間範圍"""
+        lo = int(np.searchsorted(self.lap_numbers, start_lap, side='left'))
+        hi = int(np.searchsorted(self.lap_numbers, end_lap, side='right')) - 1
+        if lo >= len(self.lap_numbers) or hi < lo:
+            return None
+        return float(self.lap_start_ms[lo]), float(self.lap_end_ms[hi])
+
+    # ---- 賽道狀態 ----
+
+    def status_at(self, t_ms):
+        """session 時間的賽道狀態 ('GREEN'、'SC'、'VSC'、'RED'、'YELLOW'...)"""
+        if not len(self.status_start_ms):
+            return 'GREEN'
+        index = int(np.searchsorted(self.status_start_ms, t_ms, side='right')) - 1
+        return self.status_codes[index] if index >= 0 else 'GREEN'
+
+    def statuses_between(self, start_ms, end_ms):
+        """時間區間內出現過的賽道狀態 (依出現順序，不含綠旗)"""
+        if not len(self.status_start_ms) or end_ms <= start_ms:
+            return []
+        first = max(int(np.searchsorted(self.status_start_ms, start_ms, side='right')) - 1, 0)
+        last = int(np.searchsorted(self.status_start_ms, end_ms, side='left'))
+        statuses = []
+        for index in range(first, last):
+            code = self.status_codes[index]
+            if code != 'GREEN' and self.status_end_ms[index] > start_ms and code not in statuses:
+                statuses.append(code)
+        return statuses
+
+    def statuses_for_lap(self, lap_number):
+        """該圈出現過的賽道狀態"""
+        time_range = self.lap_time_range(lap_number)
+        return self.statuses_between(*time_range) if time_range else []
+
+    def is_lap_under(self, lap_number, status='SC'):
+        """該圈是否出現指定賽道狀態 (例如 'SC'、'VSC'、'RED'、'YELLOW')"""
+        return status in self.statuses_for_lap(lap_number)
+
+    def status_periods(self, include_green=False):
+        """賽道狀態區間列表，附開始/結束圈數"""
+        periods = []
+        for start, end, code in zip(self.status_start_ms, self.status_end_ms, self.status_codes):
+            if code == 'GREEN' and not include_green:
+                continue
+            end_probe = end - 1 if np.isfinite(end) else (self.lap_end_ms[-1] - 1 if len(self.lap_end_ms) else start)
+            periods.append({
+                'status': code,
+                'label': TRACK_STATUS_LABELS.get(code, code),
+                'start_ms': float(start),
+                'end_ms': float(end),
+                'start_lap': self.lap_at(start),
+                'end_lap': self.lap_at(end_probe),
+            })
+        return periods
+
+    # ---- 事件 ----
+
+    def events_between_laps(self, start_lap, end_lap, mask_column=None):
+        """圈數區間 [start_lap, end_lap] 內的事件
+
+        Args:
+            mask_column: 只保留該布林欄位為 True 的事件 (例如 'is_accident_message')
+        """
+        if self.events.empty:
+            return self.events
+        lo = int(np.searchsorted(self.event_laps, start_lap, side='left'))
+        hi = int(np.searchsorted(self.event_laps, end_lap, side='right'))
+        selected = self.events.iloc[lo:hi]
+        if mask_column:
+            selected = selected[selected[mask_column].to_numpy(dtype=bool)]
+        return selected
+
+    def events_for_lap(self, lap_number, mask_column=None):
+        """單圈事件"""
+        return self.events_between_laps(lap_number, lap_number, mask_column)
+
+    def events_between_times(self, start_ms, end_ms):
+        """session 時間區間 [start_ms, end_ms) 內的事件"""
+        if self.events.empty:
+            return self.events
+        lo = int(np.searchsorted(self._event_times_sorted, start_ms, side='left'))
+        hi = int(np.searchsorted(self._event_times_sorted, end_ms, side='left'))
+        return self.events.iloc[np.sort(self._time_order[lo:hi])]
+
+    def lap_annotations(self, lap_number, include_events=True):
+        """該圈的賽道狀態與重大事件標籤 (圈數報表備註用)"""
+        labels = [TRACK_STATUS_LABELS.get(code, code) for code in self.statuses_for_lap(lap_number)]
+        if include_events:
+            for category in self.events_for_lap(lap_number, 'is_incident')['incident_category']:
+                label = INCIDENT_EVENT_LABELS.get(category)
+                if label and label not in labels:
+                    labels.append(label)
+        return labels
+
+
+def build_incident_timeline(laps=None, track_status=None, race_control=None, t0_date=None):
+    """建立事件時間軸索引"""
+    timeline = IncidentTimeline()
+    timeline.set_laps(laps)
+    timeline.set_track_status(track_status)
+    if race_control is not None:
+        timeline.set_race_control(race_control, t0_date)
+    return timeline
+
+
+_timeline_cache = IdentityCache("incident_timeline", MAX_CACHED_TIMELINES)
+
+
+def _resolve_sources(source):
+    """由 get_loaded_data() 字典 / 數據載入器 / FastF1 session 取得圈數、狀態與訊息"""
+    if isinstance(source, dict):
+        data = source
+    elif isinstance(getattr(source, 'loaded_data', None), dict):
+        data = source.loaded_data
+    else:
+        data = {'session': source}
+
+    session = data.get('session')
+
+    def pick(key):
+        value = data.get(key)
+        if value is None and session is not None:
+            value = getattr(session, key, None)
+        return value if isinstance(value, pd.DataFrame) else None
+
+    return pick('laps'), pick('track_status'), pick('race_control_messages'), getattr(session, 't0_date', None)
+
+
+def get_incident_timeline(source):
+    """取得賽事事件時間軸 (每場賽事只建立一次)
+
+    Args:
+        source: get_loaded_data() 字典、數據載入器或 FastF1 session
+    """
+    laps, track_status, race_control, t0_date = _resolve_sources(source)
+    return _timeline_cache.get_or_build(
+        (laps, track_status, race_control), lambda: build_incident_timeline(laps, track_status, race_control, t0_date),
+        span_name="table.incident_timeline")
+
+
+def clear_cache():
+    """清除事件時間軸快取"""
+    _timeline_cache.clear()
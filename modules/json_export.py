@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+F1 JSON 輸出層 - Compact JSON Export
+分析模組共用的 JSON 寫入/讀取工具，取代各模組的 clean_for_json / _make_serializable 遞迴轉換
+
+- 已安裝 orjson 時使用 orjson 編碼 (numpy 陣列/純量由編碼器原生處理)，否則退回標準 json；
+  兩種路徑的 NaN / inf 一律輸出為 null，numpy 鍵值轉為一般鍵
+- numpy / pandas / Timestamp / Timedelta 於編碼器的 default 回呼中轉換，不再預先遞迴整棵資料
+- 預設不縮排 (緊湊輸出)；除錯時設定環境變數 F1_JSON_PRETTY=1 改為縮排輸出
+- 大型數值陣列可移至同名 .arrays.npz 附檔，JSON 內只留參照；讀取時可只載入需要的陣列
+- 可選 gzip / zstd 壓縮 (zstd 需安裝 zstandard，未安裝時改用 gzip)
+
+使用範例:
+    path = write_json("json/result.json", data, array_threshold=DEFAULT_ARRAY_THRESHOLD)
+    data = load_json(path)                                   # 所有陣列還原為 list
+    data = load_json(path, arrays=["telemetry_comparison/Speed"], as_numpy=True)
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import gzip
+import json
+import math
+import os
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from .tracing import span
+except ImportError:
+    from tracing import span
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 環境變數強制縮排輸出 (除錯用)
+PRETTY_ENV_VAR = "F1_JSON_PRETTY"
+
+# 陣列附檔: 元素數達到門檻的數值陣列移至 .npz，JSON 內以參照物件取代
+DEFAULT_ARRAY_THRESHOLD = 256
+ARRAY_REF_KEY = "$array"
+ARRAY_SIDECAR_KEY = "_array_sidecar"
+
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    """編碼器無法直接處理的型別 (只在遇到時呼叫，不遞迴整棵資料)"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, pd.DataFrame):
+        return obj.to_dict(orient="records")
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return obj.tolist()
+    if obj is pd.NaT:
+        return None
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, timedelta):
+        return str(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return str(obj)
+
+
+def _json_key(key):
+    """字典鍵轉為標準 json 可接受的型別 (numpy 純量、日期等與 orjson 的 OPT_NON_STR_KEYS 輸出一致)"""
+    if isinstance(key, np.generic):
+        key = key.item()
+    if key is None or isinstance(key, (str, int, float, bool)):
+        return key
+    if isinstance(key, (datetime, date, time)):
+        return key.isoformat()
+    return str(key)
+
+
+def _json_safe(obj):
+    """標準 json 退回路徑: NaN / inf 轉為 None (與 orjson 輸出 null 一致)，其餘型別經 _default 轉換"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if obj is None or isinstance(obj, (str, int)):
+        return obj
+    if isinstance(obj, dict):
+        return {_json_key(key): _json_safe(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [_json_safe(value) for value in obj]
+    return _json_safe(_default(obj))
+
+
+def _pretty_requested(pretty):
+    if pretty is None:
+        return os.environ.get(PRETTY_ENV_VAR, "") not in ("", "0")
+    return bool(pretty)
+
+
+def dumps(obj, pretty=None):
+    """序列化為 JSON bytes (UTF-8)"""
+    pretty = _pretty_requested(pretty)
+    if orjson is not None:
+        options = _ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if pretty else 0)
+        try:
+            return orjson.dumps(obj, default=_default, option=options)
+        except TypeError:
+            # orjson 不支援的鍵值型別等情況，退回標準 json
+            pass
+    obj = _json_safe(obj)
+    if pretty:
+        text = json.dumps(obj, ensure_ascii=False, indent=2, allow_nan=False)
+    else:
+        text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+    return text.encode("utf-8")
+
+
+def loads(data):
+    """解析 JSON (bytes 或 str)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def to_jsonable(obj):
+    """轉為純 Python 結構 (串流部分結果等需直接傳遞物件的情況)"""
+    return loads(dumps(obj, pretty=False))
+
+
+def _split_arrays(obj, threshold, path, arrays):
+    """將字典中的大型數值陣列移出，只走訪字典節點 (不逐一檢查陣列元素)"""
+    if isinstance(obj, dict):
+        return {
+            key: _split_arrays(value, threshold, f"{path}/{key}" if path else str(key), arrays)
+            for key, value in obj.items()
+        }
+    # 多維陣列以元素總數判斷 (如全場遙測矩陣的 車手 × 通道 × 距離)
+    size = obj.size if isinstance(obj, np.ndarray) else len(obj) if isinstance(obj, (list, pd.Series)) else 0
+    if size >= threshold:
+        values = np.asarray(obj)
+        if values.dtype.kind in "biuf":
+            name = f"a{len(arrays)}"
+            arrays[name] = values
+            return {ARRAY_REF_KEY: name, "path": path, "dtype": str(values.dtype), "shape": list(values.shape)}
+    return obj
+
+
+def _sidecar_path(path):
+    base = path
+    for suffix in COMPRESSION_SUFFIXES.values():
+        if base.endswith(suffix):
+            base = base[:-len(suffix)]
+    if base.endswith(".json"):
+        base = base[:-len(".json")]
+    return base + ".arrays.npz"
+
+
+def _resolve_compression(compress):
+    if compress in (None, False, "", "none"):
+        return None
+    if compress not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"不支援的壓縮格式: {compress}")
+    if compress == "zstd" and zstandard is None:
+        print("[WARNING] 未安裝 zstandard，改用 gzip 壓縮")
+        return "gzip"
+    return compress
+
+
+def write_json(path, obj, pretty=None, compress=None, array_threshold=None):
+    """寫入 JSON 檔案
+
+    Args:
+        path: 輸出路徑 (.json)；壓縮時自動加上 .gz / .zst
+        obj: 要輸出的資料
+        pretty: 是否縮排 (None 時依 F1_JSON_PRETTY 環境變數，預設緊湊輸出)
+        compress: None / 'gzip' / 'zstd'
+        array_threshold: 數值陣列元素數達此門檻時移至 .arrays.npz 附檔 (None 表示不拆分)
+
+    Returns:
+        str: 實際寫入的檔案路徑
+    """
+    with span("export.json", path=path) as export_span:
+        path = _write_json(path, obj, pretty, compress, array_threshold)
+        export_span.set(bytes=os.path.getsize(path))
+    return path
+
+
+def _write_json(path, obj, pretty, compress, array_threshold):
+    compress = _resolve_compression(compress)
+    if compress:
+        path += COMPRESSION_SUFFIXES[compress]
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    sidecar = _sidecar_path(path)
+    if array_threshold and isinstance(obj, dict):
+        arrays = {}
+        obj = _split_arrays(obj, array_threshold, "", arrays)
+        if arrays:
+            (np.savez_compressed if compress else np.savez)(sidecar, **arrays)
+            obj[ARRAY_SIDECAR_KEY] = os.path.basename(sidecar)
+        elif os.path.exists(sidecar):
+            # 移除同名舊附檔，避免與新的 JSON 不一致
+            os.remove(sidecar)
+
+    data = dumps(obj, pretty=pretty)
+    if compress == "gzip":
+        with gzip.open(path, "wb") as f:
+            f.write(data)
+    elif compress == "zstd":
+        with open(path, "wb") as f:
+            f.write(zstandard.ZstdCompressor().compress(data))
+    else:
+        with open(path, "wb") as f:
+            f.write(data)
+    return path
+
+
+def _read_bytes(path):
+    if path.endswith(COMPRESSION_SUFFIXES["gzip"]):
+        with gzip.open(path, "rb") as f:
+            return f.read()
+    if path.endswith(COMPRESSION_SUFFIXES["zstd"]):
+        if zstandard is None:
+            raise ImportError("讀取 .zst 檔案需要安裝 zstandard")
+        with open(path, "rb") as f:
+            return zstandard.ZstdDecompressor().decompressobj().decompress(f.read())
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _attach_arrays(obj, archive, selected, as_numpy):
+    if isinstance(obj, dict):
+        name = obj.get(ARRAY_REF_KEY)
+        if isinstance(name, str):
+            path = obj.get("path", "")
+            if selected is not True and not any(path == p or path.startswith(p + "/") for p in selected):
+                return obj
+            values = archive[name]
+            return values if as_numpy else values.tolist()
+        return {key: _attach_arrays(value, archive, selected, as_numpy) for key, value in obj.items()}
+    return obj
+
+
+def load_json(path, arrays=True, as_numpy=False):
+    """讀取 write_json 輸出的檔案 (亦相容一般 JSON 檔)
+
+    Args:
+        path: JSON 路徑 (.json / .json.gz / .json.zst)
+        arrays: True 載入全部附檔陣列；False 保留參照；或指定陣列路徑前綴清單 (只載入需要的陣列)
+        as_numpy: 陣列以 numpy 陣列回傳 (預設轉為 list，與原本 JSON 結構相同)
+    """
+    obj = loads(_read_bytes(path))
+    if not arrays or not isinstance(obj, dict) or ARRAY_SIDECAR_KEY not in obj:
+        return obj
+
+    sidecar = os.path.join(os.path.dirname(path), obj.pop(ARRAY_SIDECAR_KEY))
+    if not os.path.exists(sidecar):
+        print(f"[WARNING] 找不到陣列附檔: {sidecar}")
+        return obj
+
+    selected = True if arrays is True else [str(p).strip("/") for p in arrays]
+    # npz 為延遲載入，只會讀取被參照的陣列
+    with np.load(sidecar, allow_pickle=False) as archive:
+        return _attach_arrays(obj, archive, selected, as_numpy)
@@ -12,6 +12,13 @@ import pandas as pd
 from datetime import datetime
 from prettytable import PrettyTable
 
+try:
+    from .race_control_classifier import get_classified_messages, derived_column, extract_driver_info as _extract_driver_info
+    from .incident_timeline import get_incident_timeline
+except ImportError:
+    from modules.race_control_classifier import get_classified_messages, derived_column, extract_driver_info as _extract_driver_info
+    from modules.incident_timeline import get_incident_timeline
+
 def generate_cache_key(session_info):
     """生成快取鍵值"""
     return f"key_events_summary_{session_info.get('year', 2024)}_{session_info.get('event_name', 'Unknown')}_{session_info.get('session_type', 'R')}"
@@ -53,23 +60,7 @@ def format_time(time_obj):
 
 def extract_driver_info(message):
     """從訊息中提取車手資訊"""
-    import re
-    
-    # 提取車號和車手代碼
-    car_pattern = r'CAR[S]?\s+(\d+)\s*\(([A-Z]{3})\)'
-    cars = re.findall(car_pattern, message.upper())
-    
-    if cars:
-        return [{'car_number': car[0], 'driver_code': car[1]} for car in cars]
-    
-    # 僅提取車號
-    car_number_pattern = r'CAR[S]?\s+(\d+)'
-    car_numbers = re.findall(car_number_pattern, message.upper())
-    
-    if car_numbers:
-        return [{'car_number': num, 'driver_code': 'UNK'} for num in car_numbers]
-    
-    return []
+    return _extract_driver_info(message)
 
 def classify_key_event(message, lap, total_laps):
     """分類關鍵事件"""
@@ -264,140 +255,143 @@ def analyze_key_events(session):
                 # 估算總圈數
                 total_laps = race_control['Lap'].max() if 'Lap' in race_control.columns else 50
                 
-                for _, message in race_control.iterrows():
-                    msg_text = str(message.get('Message', ''))
-                    msg_upper = msg_text.upper()
+                # 共用分類引擎 - 訊息分類與車手擷取每場賽事只計算一次
+                classified = get_classified_messages(race_control)
+                laps = classified['Lap'] if 'Lap' in classified.columns else [0] * len(classified)
+                event_types = derived_column(classified, 'key_event_type', lambda f: [
+                    classify_key_event(text, lap, total_laps) for text, lap in zip(f['message_text'], laps)
+                ])
+                selected = classified[event_types.notna().to_numpy(dtype=bool) & ~classified['is_final_chequered']]
+                
+                # 事件時間軸 - 標註每個關鍵事件所在圈的賽道狀態 (SC/VSC/紅旗/黃旗)
+                timeline = get_incident_timeline(session)
+                
+                for message in selected.to_dict('records'):
+                    msg_text = message['message_text']
+                    msg_upper = message['message_upper']
                     lap = message.get('Lap', 0)
                     time = message.get('Time', 'N/A')
+                    event_type = message['key_event_type']
+                    involved_drivers_info = message['involved_drivers']
                     
-                    # 過濾最後一圈的正常比賽結束 CHEQUERED FLAG
-                    if 'CHEQUERED FLAG' in msg_upper and lap == total_laps:
-                        continue  # 跳過正常的比賽結束標誌
+                    # 評估冠軍影響
+                    championship_impact, impact_factors = assess_championship_impact(
+                        msg_text, event_type, lap, total_laps
+                    )
                     
-                    # 分類關鍵事件
-                    event_type = classify_key_event(msg_text, lap, total_laps)
+                    # 計算轉捩點評分
+                    turning_point_score = calculate_turning_point_score(
+                        event_type, lap, total_laps, len(involved_drivers_info)
+                    )
                     
-                    if event_type:
-                        # 提取車手資訊
-                        involved_drivers_info = extract_driver_info(msg_text)
-                        
-                        # 評估冠軍影響
-                        championship_impact, impact_factors = assess_championship_impact(
-                            msg_text, event_type, lap, total_laps
-                        )
-                        
-                        # 計算轉捩點評分
-                        turning_point_score = calculate_turning_point_score(
-                            event_type, lap, total_laps, len(involved_drivers_info)
-                        )
-                        
-                        # 分析戰略窗口
-                        strategic_window = analyze_strategic_window(lap, total_laps)
+                    # 分析戰略窗口
+                    strategic_window = analyze_strategic_window(lap, total_laps)
+                    
+                    # 提取戰略要素
+                    strategic_elements = extract_strategic_elements(msg_text)
+                    
+                    key_event = {
+                        'key_sequence': key_sequence,
+                        'lap': lap,
+                        'time': format_time(time) if time != 'N/A' else str(time),
+                        'raw_time': str(time),
+                        'event_type': event_type,
+                        'championship_impact': championship_impact,
+                        'impact_factors': impact_factors,
+                        'turning_point_score': turning_point_score,
+                        'strategic_window': strategic_window,
+                        'strategic_elements': strategic_elements,
+                        'message': msg_text,
+                        'involved_drivers': involved_drivers_info,
+                        'driver_codes': [d['driver_code'] for d in involved_drivers_info],
+                        'race_implications': analyze_race_implications(msg_upper, event_type),
+                        'decision_impact': assess_decision_impact(msg_upper, strategic_elements),
+                        'track_status': timeline.statuses_for_lap(lap) if pd.notna(lap) else []
+                    }
+                    
+                    key_events_data['key_events'].append(key_event)
+                    
+                    # 分類存儲
+                    if turning_point_score >= 80:
+                        key_events_data['race_turning_points'].append(key_event)
+                    
+                    if championship_impact in ['CRITICAL', 'HIGH']:
+                        key_events_data['championship_moments'].append(key_event)
+                    
+                    if strategic_elements:
+                        key_events_data['strategic_decisions'].append(key_event)
+                    
+                    if strategic_window == 'ENDGAME':
+                        key_events_data['late_race_drama'].append(key_event)
+                    
+                    # 按階段分析
+                    key_events_data['phase_analysis'][strategic_window].append(key_event)
+                    
+                    # 統計分析
+                    key_events_data['summary_statistics']['total_key_events'] += 1
+                    
+                    if championship_impact == 'CRITICAL':
+                        key_events_data['summary_statistics']['critical_moments'] += 1
+                    elif championship_impact == 'HIGH':
+                        key_events_data['summary_statistics']['high_impact_events'] += 1
+                    
+                    if strategic_elements:
+                        key_events_data['summary_statistics']['strategic_windows'] += 1
+                    
+                    if turning_point_score >= 85:
+                        key_events_data['summary_statistics']['championship_decisive_moments'] += 1
+                    
+                    key_events_data['summary_statistics']['race_phases_with_events'].add(strategic_window)
+                    
+                    # 車手關鍵時刻分析
+                    for driver in involved_drivers_info:
+                        driver_code = driver['driver_code']
                         
-                        # 提取戰略要素
-                        strategic_elements = extract_strategic_elements(msg_text)
+                        if driver_code not in key_events_data['driver_key_moments']:
+                            key_events_data['driver_key_moments'][driver_code] = {
+                                'total_key_moments': 0,
+                                'championship_critical': 0,
+                                'turning_points': 0,
+                                'strategic_decisions': 0,
+                                'highest_impact_score': 0,
+                                'moment_details': []
+                            }
                         
-                        key_event = {
-                            'key_sequence': key_sequence,
-                            'lap': lap,
-                            'time': format_time(time) if time != 'N/A' else str(time),
-                            'raw_time': str(time),
-                            'event_type': event_type,
-                            'championship_impact': championship_impact,
-                            'impact_factors': impact_factors,
-                            'turning_point_score': turning_point_score,
-                            'strategic_window': strategic_window,
-                            'strategic_elements': strategic_elements,
-                            'message': msg_text,
-                            'involved_drivers': involved_drivers_info,
-                            'driver_codes': [d['driver_code'] for d in involved_drivers_info],
-                            'race_implications': analyze_race_implications(msg_upper, event_type),
-                            'decision_impact': assess_decision_impact(msg_upper, strategic_elements)
-                        }
+                        driver_data = key_events_data['driver_key_moments'][driver_code]
+                        driver_data['total_key_moments'] += 1
                         
-                        key_events_data['key_events'].append(key_event)
+                        if championship_impact == 'CRITICAL':
+                            driver_data['championship_critical'] += 1
                         
-                        # 分類存儲
                         if turning_point_score >= 80:
-                            key_events_data['race_turning_points'].append(key_event)
-                        
-                        if championship_impact in ['CRITICAL', 'HIGH']:
-                            key_events_data['championship_moments'].append(key_event)
+                            driver_data['turning_points'] += 1
                         
                         if strategic_elements:
-                            key_events_data['strategic_decisions'].append(key_event)
-                        
-                        if strategic_window == 'ENDGAME':
-                            key_events_data['late_race_drama'].append(key_event)
-                        
-                        # 按階段分析
-                        key_events_data['phase_analysis'][strategic_window].append(key_event)
+                            driver_data['strategic_decisions'] += 1
                         
-                        # 統計分析
-                        key_events_data['summary_statistics']['total_key_events'] += 1
+                        if turning_point_score > driver_data['highest_impact_score']:
+                            driver_data['highest_impact_score'] = turning_point_score
                         
-                        if championship_impact == 'CRITICAL':
-                            key_events_data['summary_statistics']['critical_moments'] += 1
-                        elif championship_impact == 'HIGH':
-                            key_events_data['summary_statistics']['high_impact_events'] += 1
-                        
-                        if strategic_elements:
-                            key_events_data['summary_statistics']['strategic_windows'] += 1
-                        
-                        if turning_point_score >= 85:
-                            key_events_data['summary_statistics']['championship_decisive_moments'] += 1
-                        
-                        key_events_data['summary_statistics']['race_phases_with_events'].add(strategic_window)
-                        
-                        # 車手關鍵時刻分析
-                        for driver in involved_drivers_info:
-                            driver_code = driver['driver_code']
-                            
-                            if driver_code not in key_events_data['driver_key_moments']:
-                                key_events_data['driver_key_moments'][driver_code] = {
-                                    'total_key_moments': 0,
-                                    'championship_critical': 0,
-                                    'turning_points': 0,
-                                    'strategic_decisions': 0,
-                                    'highest_impact_score': 0,
-                                    'moment_details': []
-                                }
-                            
-                            driver_data = key_events_data['driver_key_moments'][driver_code]
-                            driver_data['total_key_moments'] += 1
-                            
-                            if championship_impact == 'CRITICAL':
-                                driver_data['championship_critical'] += 1
-                            
-                            if turning_point_score >= 80:
-                                driver_data['turning_points'] += 1
-                            
-                            if strategic_elements:
-                                driver_data['strategic_decisions'] += 1
-                            
-                            if turning_point_score > driver_data['highest_impact_score']:
-                                driver_data['highest_impact_score'] = turning_point_score
-                            
-                            driver_data['moment_details'].append({
-                                'sequence': key_sequence,
-                                'lap': lap,
-                                'event_type': event_type,
-                                'championship_impact': championship_impact,
-                                'turning_point_score': turning_point_score,
-                                'strategic_window': strategic_window
-                            })
-                        
-                        # 事件時間軸
-                        key_events_data['event_timeline'].append({
+                        driver_data['moment_details'].append({
                             'sequence': key_sequence,
                             'lap': lap,
                             'event_type': event_type,
+                            'championship_impact': championship_impact,
                             'turning_point_score': turning_point_score,
-                            'championship_impact': championship_impact
+                            'strategic_window': strategic_window
                         })
-                        
-                        total_turning_point_score += turning_point_score
-                        key_sequence += 1
+                    
+                    # 事件時間軸
+                    key_events_data['event_timeline'].append({
+                        'sequence': key_sequence,
+                        'lap': lap,
+                        'event_type': event_type,
+                        'turning_point_score': turning_point_score,
+                        'championship_impact': championship_impact
+                    })
+                    
+                    total_turning_point_score += turning_point_score
+                    key_sequence += 1
                 
                 # 計算平均轉捩點評分
                 if key_events_data['summary_statistics']['total_key_events'] > 0:
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+F1 逐圈情境表 - Session Lap Context Table
+每場賽事一次建立全場逐圈情境 (天氣、賽道狀態、stint、進站)，供賽道演化與安全車影響分析共用
+
+- stint / 配方 / 輪胎圈齡 / 燃油修正圈速沿用輪胎 stint 模型 (annotate_stint_laps)；
+  輪胎衰退不預先扣除 (各 stint 的擬合斜率含有賽道演化)，由使用端與其他效應一起估計
+- 天氣欄位沿用 weather_arrays 的逐圈天氣 (searchsorted 對齊)
+- 賽道狀態: 各圈 [LapStartTime, Time) 與事件時間軸的 SC / VSC / 紅旗 / 黃旗區間
+  以 searchsorted 一次判斷重疊，不逐圈查詢
+- 進站: 由共用進站表標記進站圈、出站圈與進站通道時間
+- 以 (Driver, LapNumber) 合併，每份圈速數據只建立一次
+
+查詢範例:
+    context = get_lap_context(data_loader)
+    context.laps[['Driver', 'LapNumber', 'fuel_corrected', 'weather_track_temp', 'under_sc']]
+    context.field_lap_median()          # 各圈全場中位圈速 (不含進/出站圈)
+    context.position_matrix()           # 車手 × 圈數 名次
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .incident_timeline import get_incident_timeline
+    from .pitstop_table import get_pitstop_table, resolve_laps
+    from .session_tables import IdentityCache, to_seconds
+    from .tire_stint_model import get_tire_model
+    from .weather_arrays import LAP_WEATHER_COLUMNS, get_lap_weather
+except ImportError:
+    from incident_timeline import get_incident_timeline
+    from pitstop_table import get_pitstop_table, resolve_laps
+    from session_tables import IdentityCache, to_seconds
+    from tire_stint_model import get_tire_model
+    from weather_arrays import LAP_WEATHER_COLUMNS, get_lap_weather
+
+# 逐圈賽道狀態欄位 → 事件時間軸狀態碼
+STATUS_FLAGS = {
+    'under_sc': ('SC',),
+    'under_vsc': ('VSC', 'VSC_ENDING'),
+    'under_red': ('RED',),
+    'under_yellow': ('YELLOW',),
+}
+
+MAX_CACHED_TABLES = 4
+
+
+def overlaps_intervals(start, end, interval_start, interval_end):
+    """各區間 [start, end) 是否與一組已排序且不重疊的區間重疊 (向量化)"""
+    if not len(interval_start):
+        return np.zeros(len(start), dtype=bool)
+    valid = np.isfinite(start) & np.isfinite(end)
+    began = np.searchsorted(interval_start, np.where(valid, end, -np.inf), side='left')
+    finished = np.searchsorted(interval_end, np.where(valid, start, -np.inf), side='right')
+    return valid & (began > finished)
+
+
+class LapContext:
+    """全場逐圈情境表
+
+    Attributes:
+        laps: 依 (Driver, LapNumber) 排序的逐圈表，含 stint 標記、session 時間 (秒/分鐘)、
+              天氣欄位、賽道狀態旗標與進站標記
+        total_laps: 總圈數
+    """
+
+    def __init__(self, laps, tire_model, lap_weather=None, timeline=None, pitstops=None):
+        self.laps = pd.DataFrame()
+        self.total_laps = 0
+        if laps is None or len(laps) == 0 or tire_model.laps.empty:
+            return
+        self.total_laps = tire_model.total_laps
+        self.laps = self._build(laps, tire_model, lap_weather, timeline, pitstops)
+
+    @property
+    def empty(self):
+        return self.laps.empty
+
+    @staticmethod
+    def _build(laps, tire_model, lap_weather, timeline, pitstops):
+        keys = ['Driver', 'LapNumber']
+        frame = tire_model.laps.copy()
+
+        times = pd.DataFrame({
+            'Driver': laps['Driver'].to_numpy(),
+            'LapNumber': laps['LapNumber'].to_numpy(),
+            'session_start': to_seconds(laps['LapStartTime']) if 'LapStartTime' in laps.columns else np.nan,
+            'session_end': to_seconds(laps['Time']) if 'Time' in laps.columns else np.nan,
+        })
+        if lap_weather is not None and len(lap_weather) == len(laps):
+            for column in LAP_WEATHER_COLUMNS:
+                times[column] = lap_weather[column].to_numpy() if column in lap_weather.columns else np.nan
+        else:
+            for column in LAP_WEATHER_COLUMNS:
+                times[column] = np.nan
+        frame = frame.merge(times.drop_duplicates(keys), on=keys, how='left', sort=False)
+        frame['session_start'] = frame['session_start'].where(
+            frame['session_start'].notna(), frame['session_end'] - frame['lap_seconds'])
+        frame['session_minutes'] = frame['session_start'] / 60.0
+
+        # 賽道狀態: 每圈一次 searchsorted 判斷與各狀態區間重疊
+        start_ms = frame['session_start'].to_numpy(dtype=float) * 1000.0
+        end_ms = frame['session_end'].to_numpy(dtype=float) * 1000.0
+        codes = timeline.status_codes if timeline is not None else np.array([], dtype=object)
+        for column, status in STATUS_FLAGS.items():
+            selected = np.isin(codes, status)
+            frame[column] = overlaps_intervals(start_ms, end_ms, timeline.status_start_ms[selected],
+                                               timeline.status_end_ms[selected]) if selected.any() \
+                else np.zeros(len(frame), dtype=bool)
+        frame['neutralised'] = frame['under_sc'] | frame['under_vsc'] | frame['under_red']
+        frame['green'] = ~(frame['neutralised'] | frame['under_yellow'])
+
+        # 進站: 進站圈與出站圈
+        frame['pit_in'] = False
+        frame['pit_out'] = False
+        frame['pit_lane_time'] = np.nan
+        if pitstops is not None and not pitstops.empty:
+            stops = pitstops[['Driver', 'lap', 'pit_lane_time']].rename(columns={'lap': 'LapNumber'})
+            marked = frame[keys].merge(stops.drop_duplicates(keys), on=keys, how='left')
+            frame['pit_in'] = marked['pit_lane_time'].notna().to_numpy()
+            frame['pit_lane_time'] = marked['pit_lane_time'].to_numpy()
+            outs = pitstops[['Driver', 'out_lap']].rename(columns={'out_lap': 'LapNumber'}).assign(_out=True)
+            frame['pit_out'] = frame[keys].merge(outs.drop_duplicates(keys), on=keys, how='left')['_out'] \
+                .eq(True).to_numpy()
+        if 'PitInTime' in frame.columns:
+            frame['pit_in'] |= frame['PitInTime'].notna()
+        if 'PitOutTime' in frame.columns:
+            frame['pit_out'] |= frame['PitOutTime'].notna()
+        return frame
+
+    def field_lap_median(self):
+        """各圈全場中位圈速 (不含進/出站圈)"""
+        if self.empty:
+            return pd.Series(dtype=float)
+        racing = self.laps[~self.laps['pit_in'] & ~self.laps['pit_out']]
+        return racing.groupby('LapNumber')['lap_seconds'].median()
+
+    def position_matrix(self):
+        """車手 × 圈數 名次 (每圈結束時)"""
+        if self.empty:
+            return pd.DataFrame()
+        positions = pd.to_numeric(self.laps['Position'], errors='coerce')
+        return self.laps.assign(Position=positions).pivot_table(
+            index='Driver', columns='LapNumber', values='Position', aggfunc='last')
+
+
+_context_cache = IdentityCache("lap_context", MAX_CACHED_TABLES)
+
+
+def get_lap_context(source):
+    """取得逐圈情境表 (每份圈速數據只建立一次)
+
+    Args:
+        source: get_loaded_data() 字典、數據載入器或 FastF1 session
+    """
+    laps = resolve_laps(source)
+    timeline = get_incident_timeline(source) if laps is not None else None
+
+    def build():
+        if laps is None or not {'Driver', 'LapNumber'}.issubset(laps.columns):
+            return LapContext(None, None)
+        return LapContext(laps, get_tire_model(laps), get_lap_weather(source), timeline,
+                          get_pitstop_table(laps))
+
+    # 事件時間軸重建時一併重建
+    return _context_cache.get_or_build((laps, timeline), build, span_name="table.lap_context")
+
+
+def clear_cache():
+    """清除逐圈情境表快取"""
+    _context_cache.clear()
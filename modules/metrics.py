@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+F1 服務指標 - Prometheus-style Metrics
+程序內的計數器 / 量表 / 直方圖，供 APIserver 的 /metrics 端點以 Prometheus 文字格式輸出
+
+- 只使用標準函式庫 (不需 prometheus_client)，每次記錄只是一次加鎖的字典更新
+- 量表可指定回呼函數，於抓取 (scrape) 時才計算 (記憶體、快取項目數)
+- record_cache() 依命名空間記錄快取命中/未命中
+- upstream_call() 記錄 OpenF1 / FastF1 上游請求的耗時與失敗次數
+
+使用範例:
+    record_cache("pitstop_table", hit=True)
+    with upstream_call("openf1", "drivers"):
+        response = requests.get(url, timeout=30)
+    text = render_metrics()
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# 分析請求耗時的直方圖分界 (秒) - 快取命中約數十毫秒，冷載入可達數分鐘
+ANALYSIS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# 上游請求耗時的直方圖分界 (秒)
+UPSTREAM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 90.0, 300.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_registry = OrderedDict()
+_registry_lock = threading.Lock()
+_registered_caches = OrderedDict()
+
+
+def _format_labels(labelnames, values):
+    if not labelnames:
+        return ""
+    pairs = []
+    for name, value in zip(labelnames, values):
+        text = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{text}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """指標基底類別"""
+
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"指標 {self.name} 需要標籤 {self.labelnames}")
+        return tuple(str(value) for value in labels)
+
+    def samples(self):
+        """返回 [(名稱後綴, 標籤名稱, 標籤值, 數值), ...]"""
+        with self._lock:
+            return [("", self.labelnames, key, value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labelnames, values, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(labelnames, values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """只增不減的計數器"""
+
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """可增減的量表；指定 callback 時於輸出時計算"""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def set(self, value, *labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def samples(self):
+        if self.callback is None:
+            return super().samples()
+        try:
+            value = self.callback()
+        except Exception:
+            return []
+        if isinstance(value, dict):
+            return [("", self.labelnames, self._key(key if isinstance(key, tuple) else (key,)), v)
+                    for key, v in value.items()]
+        return [("", self.labelnames, (), value)]
+
+
+class Histogram(_Metric):
+    """累積分界直方圖"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=ANALYSIS_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        labelnames = self.labelnames + ("le",)
+        rows = []
+        with self._lock:
+            items = [(key, list(entry[0]), entry[1], entry[2]) for key, entry in self._values.items()]
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                rows.append(("_bucket", labelnames, key + (_format_value(float(bound)),), cumulative))
+            rows.append(("_sum", self.labelnames, key, round(total, 6)))
+            rows.append(("_count", self.labelnames, key, count))
+        return rows
+
+
+def _register(metric_class, name, documentation, labelnames=(), **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = metric_class(name, documentation, labelnames, **kwargs)
+        return metric
+
+
+def counter(name, documentation, labelnames=()):
+    """取得 (或建立) 計數器"""
+    return _register(Counter, name, documentation, labelnames)
+
+
+def gauge(name, documentation, labelnames=(), callback=None):
+    """取得 (或建立) 量表"""
+    return _register(Gauge, name, documentation, labelnames, callback=callback)
+
+
+def histogram(name, documentation, labelnames=(), buckets=ANALYSIS_BUCKETS):
+    """取得 (或建立) 直方圖"""
+    return _register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+
+# 快取命中率 (依命名空間)
+CACHE_REQUESTS = counter("f1_cache_requests_total", "Cache lookups by namespace and result", ("namespace", "result"))
+
+# 上游 (OpenF1 / FastF1) 請求
+UPSTREAM_LATENCY = histogram("f1_upstream_request_seconds", "Upstream fetch latency",
+                             ("source", "endpoint"), buckets=UPSTREAM_BUCKETS)
+UPSTREAM_FAILURES = counter("f1_upstream_failures_total", "Upstream fetch failures", ("source", "endpoint"))
+
+
+def record_cache(namespace, hit):
+    """記錄一次快取查詢結果"""
+    CACHE_REQUESTS.inc(namespace, "hit" if hit else "miss")
+
+
+def register_cache(namespace, cache):
+    """登記記憶體快取 (任何具 len() 的容器)，輸出目前項目數"""
+    _registered_caches[namespace] = cache
+
+
+def _cache_entries():
+    return {namespace: len(cache) for namespace, cache in _registered_caches.items()}
+
+
+CACHE_ENTRIES = gauge("f1_cache_entries", "Entries held in in-memory session caches", ("namespace",),
+                      callback=_cache_entries)
+
+
+def record_upstream(source, endpoint, seconds, failed=False):
+    """記錄一次上游請求"""
+    UPSTREAM_LATENCY.observe(seconds, source, endpoint)
+    if failed:
+        UPSTREAM_FAILURES.inc(source, endpoint)
+
+
+@contextmanager
+def upstream_call(source, endpoint):
+    """計時上游請求；區塊內拋出例外時計為失敗"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        record_upstream(source, endpoint, time.perf_counter() - start, failed=True)
+        raise
+    record_upstream(source, endpoint, time.perf_counter() - start)
+
+
+def process_rss_bytes():
+    """目前程序的常駐記憶體 (bytes)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return None
+
+
+PROCESS_RSS = gauge("f1_process_resident_memory_bytes", "Resident memory of the service process",
+                    callback=lambda: process_rss_bytes() or 0)
+
+
+def render_metrics():
+    """以 Prometheus 文字格式輸出所有指標"""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+F1 全場迷你分段表 - Whole-Grid Mini-Sector Table
+每場賽事一次建立全場車手每一圈的迷你分段時間，供分段分析、賽道地圖著色與車手比較共用
+
+- 依距離將單圈等分為 N 個迷你分段 (預設 25 段，可設定)
+- 每位車手只走訪一次 session.car_data (速度積分為行駛距離)，所有圈次的分段邊界
+  以單次 np.interp 向量化求得通過時間，不逐圈呼叫 get_telemetry()
+- 以各圈起訖距離正規化，消除速度積分的累積誤差；分段時間總和等於該圈圈速
+- 結果為 (車手, 圈, 迷你分段) float32 陣列，另有有效圈遮罩 (排除第 1 圈、進/出站圈、
+  刪除圈與距離異常圈)
+- 最快分段歸屬 (fastest owner) 與理論最快圈由有效圈計算
+
+查詢範例:
+    table = get_minisector_table(data_loader)
+    table.lap_minisectors('VER', 12)        # 單圈各分段時間
+    table.fastest_owners()                  # 各分段最快車手
+    table.theoretical_best()                # 全場理論最快圈
+    table.compare('VER', 12, 'NOR', 15)     # 兩圈逐段差距
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+from prettytable import PrettyTable
+
+try:
+    from .session_tables import IdentityCache, json_value, to_seconds
+except ImportError:
+    from session_tables import IdentityCache, json_value, to_seconds
+
+DEFAULT_MINISECTORS = 25
+
+# 單圈行駛距離偏離全場中位數超過此比例時視為無效圈 (遙測缺漏、進站路線)
+LAP_DISTANCE_TOLERANCE = 0.05
+
+MAX_CACHED_TABLES = 4
+
+
+def _nanmin(values, axis):
+    """忽略 NaN 的最小值 (全為 NaN 時為 NaN，不發出警告)"""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return np.nanmin(values, axis=axis)
+
+
+def _column(frame, name):
+    if name in frame.columns:
+        return frame[name]
+    return pd.Series(np.nan, index=frame.index)
+
+
+def resolve_session_sources(source):
+    """由 get_loaded_data() 字典 / 數據載入器 / FastF1 session 取得 laps、car_data、pos_data、results"""
+    if isinstance(source, dict):
+        data = source
+    elif isinstance(getattr(source, 'loaded_data', None), dict):
+        data = source.loaded_data
+    else:
+        data = {'session': source}
+
+    session = data.get('session') or getattr(source, 'session', None)
+
+    def pick(key):
+        value = data.get(key)
+        if value is None and session is not None:
+            try:
+                value = getattr(session, key, None)
+            except Exception:
+                value = None
+        return value
+
+    laps = pick('laps')
+    return (laps if isinstance(laps, pd.DataFrame) else None,
+            pick('car_data') or {}, pick('pos_data') or {}, pick('results'))
+
+
+def driver_code_map(laps, results):
+    """車號 → 車手代碼對照"""
+    mapping = {}
+    if isinstance(results, pd.DataFrame) and {'DriverNumber', 'Abbreviation'}.issubset(results.columns):
+        for number, code in zip(results['DriverNumber'], results['Abbreviation']):
+            mapping[str(number)] = str(code)
+    if 'DriverNumber' in laps.columns:
+        for number, code in laps[['DriverNumber', 'Driver']].drop_duplicates().itertuples(index=False):
+            mapping.setdefault(str(number), str(code))
+    return mapping
+
+
+def team_colors(results):
+    """車手代碼 → 車隊顏色"""
+    colors = {}
+    if isinstance(results, pd.DataFrame) and 'Abbreviation' in results.columns and 'TeamColor' in results.columns:
+        for code, color in zip(results['Abbreviation'], results['TeamColor']):
+            color = str(color or '').strip()
+            if color and color != 'nan':
+                colors[str(code)] = color if color.startswith('#') else f"#{color}"
+    return colors
+
+
+def distance_trace(car, pos):
+    """單一車手的 (時間秒, 累積距離公尺)；優先以速度積分，無速度數據時改用 X/Y 路徑長"""
+    for frame, use_speed in ((car, True), (pos, False)):
+        if frame is None or len(frame) < 2 or 'SessionTime' not in frame.columns:
+            continue
+        if use_speed and 'Speed' not in frame.columns:
+            continue
+        if not use_speed and not {'X', 'Y'}.issubset(frame.columns):
+            continue
+        times = to_seconds(frame['SessionTime'])
+        order = np.argsort(times, kind='stable')
+        times = times[order]
+        if use_speed:
+            speed = np.nan_to_num(frame['Speed'].to_numpy(dtype=float)[order]) / 3.6
+            steps = np.diff(times) * (speed[1:] + speed[:-1]) / 2
+        else:
+            # FastF1 位置座標單位為 1/10 公尺
+            steps = np.hypot(np.diff(frame['X'].to_numpy(dtype=float)[order]),
+                             np.diff(frame['Y'].to_numpy(dtype=float)[order])) / 10
+        steps = np.clip(np.nan_to_num(steps), 0, None)
+        return times, np.concatenate(([0.0], np.cumsum(steps)))
+    return None, None
+
+
+class MinisectorTable:
+    """全場迷你分段時間表
+
+    Attributes:
+        drivers: 車手代碼 (陣列第 0 軸)
+        lap_numbers: 圈數 (陣列第 1 軸，自 1 起連續)
+        times: float32 (車手, 圈, 迷你分段) 分段時間 (秒)，無數據為 NaN
+        valid: bool (車手, 圈) 可用於最快分段/理論最快圈的有效圈
+        lap_distance: 全場單圈距離中位數 (公尺)
+    """
+
+    def __init__(self, laps, car_data, pos_data=None, results=None, n_minisectors=DEFAULT_MINISECTORS):
+        self.n_minisectors = int(n_minisectors)
+        if self.n_minisectors < 1:
+            raise ValueError("迷你分段數必須大於 0")
+        self.drivers = []
+        self.lap_numbers = np.zeros(0, dtype=int)
+        self.times = np.zeros((0, 0, self.n_minisectors), dtype=np.float32)
+        self.valid = np.zeros((0, 0), dtype=bool)
+        self.lap_distance = np.nan
+        self.colors = team_colors(results)
+        self.reference = None
+        self._owners = None
+        self._theoretical = None
+
+        required = {'Driver', 'LapNumber', 'LapStartTime', 'Time'}
+        if laps is None or len(laps) == 0 or not required.issubset(laps.columns) or not car_data:
+            return
+        self._build(laps, car_data, pos_data or {}, results)
+
+    @property
+    def empty(self):
+        return not self.drivers
+
+    @property
+    def boundaries(self):
+        """各迷你分段起點距離 (公尺)，最後一個元素為單圈距離"""
+        return np.linspace(0.0, self.lap_distance, self.n_minisectors + 1)
+
+    def _build(self, laps, car_data, pos_data, results):
+        numbers = driver_code_map(laps, results)
+        lap_numbers = pd.to_numeric(laps['LapNumber'], errors='coerce')
+        total_laps = int(np.nanmax(lap_numbers.to_numpy(dtype=float))) if lap_numbers.notna().any() else 0
+        if total_laps < 1:
+            return
+
+        starts = to_seconds(laps['LapStartTime'])
+        ends = to_seconds(laps['Time'])
+        excluded = (_column(laps, 'PitInTime').notna() | _column(laps, 'PitOutTime').notna()
+                    | (lap_numbers <= 1)).to_numpy(copy=True)
+        if 'Deleted' in laps.columns:
+            excluded |= laps['Deleted'].fillna(False).astype(bool).to_numpy()
+        driver_codes = laps['Driver'].astype(str).to_numpy()
+
+        fractions = np.linspace(0.0, 1.0, self.n_minisectors + 1)
+        traces = {}
+        blocks = []
+        for number, car in car_data.items():
+            code = numbers.get(str(number), str(number))
+            rows = np.flatnonzero((driver_codes == code) & np.isfinite(starts) & np.isfinite(ends)
+                                  & (ends > starts) & lap_numbers.notna().to_numpy())
+            if rows.size == 0:
+                continue
+            times, distance = distance_trace(car, pos_data.get(number))
+            if times is None:
+                continue
+            inside = (starts[rows] >= times[0]) & (ends[rows] <= times[-1])
+            rows = rows[inside]
+            if rows.size == 0:
+                continue
+
+            # 所有圈次的分段邊界一次內插: 距離 → 通過時間
+            lap_start = np.interp(starts[rows], times, distance)
+            lap_end = np.interp(ends[rows], times, distance)
+            span_m = lap_end - lap_start
+            boundary_distance = lap_start[:, None] + span_m[:, None] * fractions
+            boundary_time = np.interp(boundary_distance.ravel(), distance, times).reshape(boundary_distance.shape)
+            boundary_time[:, 0] = starts[rows]
+            boundary_time[:, -1] = ends[rows]
+            blocks.append((code, lap_numbers.to_numpy()[rows].astype(int), np.diff(boundary_time, axis=1),
+                           span_m, excluded[rows], rows))
+            traces[code] = (times, distance)
+
+        if not blocks:
+            return
+
+        self.drivers = sorted(code for code, *_ in blocks)
+        index = {code: i for i, code in enumerate(self.drivers)}
+        self.lap_numbers = np.arange(1, total_laps + 1)
+        self.times = np.full((len(self.drivers), total_laps, self.n_minisectors), np.nan, dtype=np.float32)
+        distances = np.full((len(self.drivers), total_laps), np.nan)
+        excluded_mask = np.ones((len(self.drivers), total_laps), dtype=bool)
+        for code, lap_index, sector_times, span_m, lap_excluded, _ in blocks:
+            self.times[index[code], lap_index - 1] = sector_times
+            distances[index[code], lap_index - 1] = span_m
+            excluded_mask[index[code], lap_index - 1] = lap_excluded
+
+        clean = distances[~excluded_mask]
+        self.lap_distance = float(np.nanmedian(clean)) if np.isfinite(clean).any() else float(np.nanmedian(distances))
+        within = np.abs(distances - self.lap_distance) <= self.lap_distance * LAP_DISTANCE_TOLERANCE
+        self.valid = within & ~excluded_mask & np.isfinite(self.times).all(axis=2)
+        self.reference = self._reference_path(laps, starts, ends, blocks, traces, pos_data, numbers)
+
+    def _reference_path(self, laps, starts, ends, blocks, traces, pos_data, numbers):
+        """全場最快有效圈的 X/Y 路徑與各點所屬迷你分段 (賽道地圖著色用)"""
+        lap_totals = np.where(self.valid, self.times.sum(axis=2), np.inf)
+        if not np.isfinite(lap_totals).any():
+            return None
+        d, lap = np.unravel_index(np.argmin(lap_totals), lap_totals.shape)
+        code = self.drivers[d]
+        number = next((n for n in pos_data if numbers.get(str(n), str(n)) == code), None)
+        pos = pos_data.get(number) if number is not None else None
+        if pos is None or len(pos) < 2 or not {'SessionTime', 'X', 'Y'}.issubset(pos.columns):
+            return None
+        row = next(rows[lap_index == lap + 1][0] for c, lap_index, _, _, _, rows in blocks if c == code)
+        pos_times = to_seconds(pos['SessionTime'])
+        inside = (pos_times >= starts[row]) & (pos_times <= ends[row])
+        if inside.sum() < 2:
+            return None
+        times, distance = traces[code]
+        lap_start, lap_end = np.interp([starts[row], ends[row]], times, distance)
+        fraction = (np.interp(pos_times[inside], times, distance) - lap_start) / (lap_end - lap_start)
+        segment = np.clip((fraction * self.n_minisectors).astype(int), 0, self.n_minisectors - 1)
+        return {
+            "driver": code,
+            "lap": int(lap + 1),
+            "x": pos['X'].to_numpy(dtype=float)[inside],
+            "y": pos['Y'].to_numpy(dtype=float)[inside],
+            "minisector": segment,
+        }
+
+    def driver_minisectors(self, driver):
+        """車手所有圈次的分段時間 (圈, 迷你分段)"""
+        return self.times[self.drivers.index(driver)]
+
+    def lap_minisectors(self, driver, lap):
+        """單圈各分段時間"""
+        return self.times[self.drivers.index(driver), int(lap) - 1]
+
+    def best_minisectors(self):
+        """各車手各分段的有效圈最快時間 (車手, 迷你分段)"""
+        return _nanmin(np.where(self.valid[:, :, None], self.times, np.nan), axis=1)
+
+    def fastest_owners(self, laps=None):
+        """各迷你分段的最快車手與領先幅度
+
+        Args:
+            laps: 只在指定圈數範圍內比較 (例如 range(40, 58))，None 為全場有效圈
+        """
+        if laps is None and self._owners is not None:
+            return self._owners
+        columns = ['minisector', 'start_m', 'end_m', 'owner', 'time', 'runner_up', 'margin']
+        if self.empty:
+            return pd.DataFrame(columns=columns)
+
+        if laps is None:
+            best = self.best_minisectors()
+        else:
+            selected = np.zeros(len(self.lap_numbers), dtype=bool)
+            lap_index = np.asarray(list(laps), dtype=int) - 1
+            selected[lap_index[(lap_index >= 0) & (lap_index < len(selected))]] = True
+            best = _nanmin(np.where((self.valid & selected)[:, :, None], self.times, np.nan), axis=1)
+
+        filled = np.where(np.isnan(best), np.inf, best)
+        order = np.argsort(filled, axis=0)
+        owner = order[0]
+        columns_index = np.arange(self.n_minisectors)
+        owner_time = filled[owner, columns_index]
+        second = order[1] if len(self.drivers) > 1 else owner
+        second_time = filled[second, columns_index]
+        boundaries = self.boundaries
+        has_owner = np.isfinite(owner_time)
+        has_second = has_owner & np.isfinite(second_time) & (len(self.drivers) > 1)
+        owners = pd.DataFrame({
+            'minisector': columns_index + 1,
+            'start_m': boundaries[:-1],
+            'end_m': boundaries[1:],
+            'owner': np.where(has_owner, np.asarray(self.drivers, dtype=object)[owner], None),
+            'time': np.where(has_owner, owner_time, np.nan),
+            'runner_up': np.where(has_second, np.asarray(self.drivers, dtype=object)[second], None),
+            'margin': np.where(has_second, second_time - owner_time, np.nan),
+        }, columns=columns)
+        if laps is None:
+            self._owners = owners
+        return owners
+
+    def theoretical_best(self):
+        """各車手理論最快圈 (各分段最佳總和) 與實際最快有效圈"""
+        if self._theoretical is not None:
+            return self._theoretical
+        columns = ['driver', 'theoretical_best', 'best_lap', 'best_lap_number', 'potential_gain', 'owned_minisectors']
+        if self.empty:
+            self._theoretical = pd.DataFrame(columns=columns)
+            return self._theoretical
+
+        best = self.best_minisectors()
+        theoretical = np.where(np.isnan(best).any(axis=1), np.nan, np.nansum(best, axis=1))
+        lap_totals = np.where(self.valid, self.times.sum(axis=2), np.inf)
+        best_lap_index = np.argmin(lap_totals, axis=1)
+        best_lap = lap_totals[np.arange(len(self.drivers)), best_lap_index]
+        has_lap = np.isfinite(best_lap)
+        owned = self.fastest_owners()['owner'].value_counts()
+        table = pd.DataFrame({
+            'driver': self.drivers,
+            'theoretical_best': theoretical,
+            'best_lap': np.where(has_lap, best_lap, np.nan),
+            'best_lap_number': np.where(has_lap, best_lap_index + 1, 0),
+            'owned_minisectors': [int(owned.get(driver, 0)) for driver in self.drivers],
+        })
+        table['potential_gain'] = table['best_lap'] - table['theoretical_best']
+        self._theoretical = table[columns].sort_values('theoretical_best', na_position='last').reset_index(drop=True)
+        return self._theoretical
+
+    def compare(self, driver1, lap1, driver2, lap2):
+        """兩圈逐段時間差 (正值表示第一位車手較慢)
+
+        Returns:
+            DataFrame: minisector, start_m, end_m, time1, time2, delta, cumulative_delta
+        """
+        times1 = self.lap_minisectors(driver1, lap1).astype(float)
+        times2 = self.lap_minisectors(driver2, lap2).astype(float)
+        boundaries = self.boundaries
+        delta = times1 - times2
+        return pd.DataFrame({
+            'minisector': np.arange(1, self.n_minisectors + 1),
+            'start_m': boundaries[:-1],
+            'end_m': boundaries[1:],
+            'time1': times1,
+            'time2': times2,
+            'delta': delta,
+            'cumulative_delta': np.cumsum(delta),
+        })
+
+    def track_map_segments(self, laps=None):
+        """賽道地圖著色: 以最快圈路徑切分的各迷你分段，附最快車手與車隊顏色"""
+        if self.reference is None:
+            return []
+        owners = self.fastest_owners(laps)
+        reference = self.reference
+        boundaries = np.flatnonzero(np.diff(reference['minisector'])) + 1
+        starts = np.concatenate(([0], boundaries))
+        stops = np.concatenate((boundaries, [len(reference['minisector'])]))
+        segments = []
+        for start, stop in zip(starts, stops):
+            # 與下一段首點相接，避免地圖上出現斷線
+            stop = min(stop + 1, len(reference['x']))
+            minisector = int(reference['minisector'][start])
+            owner = owners['owner'].iloc[minisector]
+            segments.append({
+                "minisector": minisector + 1,
+                "owner": owner,
+                "color": self.colors.get(owner) if owner else None,
+                "x": reference['x'][start:stop].tolist(),
+                "y": reference['y'][start:stop].tolist(),
+            })
+        return segments
+
+
+_table_cache = IdentityCache("minisectors", MAX_CACHED_TABLES)
+
+
+def get_minisector_table(source, n_minisectors=DEFAULT_MINISECTORS):
+    """取得全場迷你分段表 (每份圈速數據與分段數只建立一次)
+
+    Args:
+        source: get_loaded_data() 字典、數據載入器或 FastF1 session
+        n_minisectors: 單圈迷你分段數
+    """
+    laps, car_data, pos_data, results = resolve_session_sources(source)
+    return _table_cache.get_or_build(
+        laps, lambda: MinisectorTable(laps, car_data, pos_data, results, n_minisectors),
+        key=int(n_minisectors), span_name="table.minisectors", minisectors=int(n_minisectors))
+
+
+def clear_cache():
+    """清除迷你分段表快取"""
+    _table_cache.clear()
+
+
+def minisector_records(frame):
+    """分段表轉為字典列表"""
+    return [{key: json_value(value) for key, value in row.items()} for row in frame.to_dict('records')]
+
+
+def _format_lap(seconds):
+    if seconds is None or seconds != seconds:
+        return "N/A"
+    return f"{int(seconds // 60)}:{seconds % 60:06.3f}"
+
+
+def display_theoretical_best(theoretical, n_minisectors):
+    table = PrettyTable()
+    table.field_names = ["排名", "車手", "理論最快圈", "最快有效圈", "圈數", "可提升", "最快分段數"]
+    table.align = "c"
+    for rank, row in enumerate(theoretical.to_dict('records'), 1):
+        gain = row['potential_gain']
+        table.add_row([
+            rank,
+            row['driver'],
+            _format_lap(row['theoretical_best']),
+            _format_lap(row['best_lap']),
+            int(row['best_lap_number']) or "N/A",
+            f"{gain:.3f}s" if gain == gain else "N/A",
+            f"{row['owned_minisectors']}/{n_minisectors}",
+        ])
+    print(f"\n⏱️ 全場理論最快圈 ({n_minisectors} 個迷你分段)")
+    print(table)
+
+
+def display_fastest_owners(owners):
+    table = PrettyTable()
+    table.field_names = ["分段", "距離 (m)", "最快車手", "分段時間", "次快車手", "領先"]
+    table.align = "c"
+    for row in owners.to_dict('records'):
+        table.add_row([
+            row['minisector'],
+            f"{row['start_m']:.0f}-{row['end_m']:.0f}",
+            row['owner'] or "N/A",
+            f"{row['time']:.3f}s" if row['time'] == row['time'] else "N/A",
+            row['runner_up'] or "N/A",
+            f"{row['margin']:.3f}s" if row['margin'] == row['margin'] else "N/A",
+        ])
+    print("\n🏁 各迷你分段最快車手")
+    print(table)
+
+
+def run_all_drivers_sector_analysis(data_loader, n_minisectors=DEFAULT_MINISECTORS, show_detailed_output=True):
+    """全場迷你分段分析 (功能46)"""
+    table = get_minisector_table(data_loader, n_minisectors)
+    if table.empty:
+        return {"success": False, "message": "沒有可用的遙測與圈速數據，無法計算迷你分段", "function_id": "46"}
+
+    owners = table.fastest_owners()
+    theoretical = table.theoretical_best()
+    if show_detailed_output:
+        print(f"\n[INFO] 單圈距離約 {table.lap_distance:.0f} m，{len(table.drivers)} 位車手，"
+              f"有效圈 {int(table.valid.sum())} 圈")
+        display_theoretical_best(theoretical, table.n_minisectors)
+        display_fastest_owners(owners)
+
+    best = table.best_minisectors()
+    return {
+        "success": True,
+        "message": f"全場迷你分段分析完成 ({table.n_minisectors} 段)",
+        "data": {
+            "n_minisectors": table.n_minisectors,
+            "lap_distance": json_value(table.lap_distance, 1),
+            "boundaries_m": [json_value(value, 1) for value in table.boundaries],
+            "theoretical_best": minisector_records(theoretical),
+            "fastest_owners": minisector_records(owners),
+            "best_minisectors": {
+                driver: [json_value(value) for value in best[i]] for i, driver in enumerate(table.drivers)
+            },
+            "track_map": table.track_map_segments(),
+        },
+        "function_id": "46",
+    }
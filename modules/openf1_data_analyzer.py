@@ -16,6 +16,11 @@ import os
 from datetime import datetime
 from typing import Dict, List, Optional
 
+try:
+    from .metrics import upstream_call
+except ImportError:
+    from metrics import upstream_call
+
 
 class F1OpenDataAnalyzer:
     """F1 OpenF1 API 數據分析器 - 完全復刻版"""
@@ -37,8 +42,9 @@ class F1OpenDataAnalyzer:
                 # 增加基本請求間隔以避免服務器過載
                 time.sleep(1.0)  # 每個請求間隔1秒
                 # 增加超時時間到90秒
-                response = requests.get(url, params=params, timeout=90)
-                response.raise_for_status()
+                with upstream_call("openf1", endpoint):
+                    response = requests.get(url, params=params, timeout=90)
+                    response.raise_for_status()
                 return response.json()
             except requests.exceptions.Timeout:
                 print(f"⏰ API 請求超時 (嘗試 {attempt + 1}/{max_retries})")
@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+F1 效能基準測試 - Performance Benchmark Suite (功能 52)
+以本地賽段快取 (f1_analysis_cache/*.pkl，不連網) 執行指定的分析功能並與基準線比較
+
+- 每個功能量測冷啟動 (清空結果快取與共用表) 與暖啟動 (命中結果快取) 兩種情況
+- 記錄牆鐘時間、CPU 時間、執行前後的 RSS 增加、程序最高 RSS 與快取命中/寫入
+- 分析在暫存工作目錄執行，cache/ 與 json/ 輸出不影響專案目錄
+- 與 benchmarks/benchmark_baseline.json 比較，超過門檻即列為效能退化
+
+執行方式:
+    python -m modules.performance_benchmark                       # 依 benchmarks/benchmark_config.json
+    python -m modules.performance_benchmark -f 1,3,18 --update-baseline
+    python f1_analysis_modular_main.py -y 2025 -r Japan -s R -f 52   # 以目前載入的賽段測試
+    python -m pytest tests/test_performance_benchmark.py
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from prettytable import PrettyTable
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 分析在暫存目錄執行，確保延遲匯入的 modules.* 仍可找到
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+try:
+    from .json_export import write_json
+except ImportError:
+    from modules.json_export import write_json
+
+BENCHMARK_DIR = os.path.join(PROJECT_ROOT, "benchmarks")
+DEFAULT_CONFIG_PATH = os.path.join(BENCHMARK_DIR, "benchmark_config.json")
+DEFAULT_BASELINE_PATH = os.path.join(BENCHMARK_DIR, "benchmark_baseline.json")
+
+# 與 CompatibleF1DataLoader 相同的賽段快取位置
+FIXTURE_CACHE_DIR = os.path.join(PROJECT_ROOT, "f1_analysis_cache")
+
+DEFAULT_FUNCTIONS = ["1", "3", "4", "5", "6", "10", "18", "26", "30"]
+
+# 退化門檻: 超過 基準值 × 比例 + 最小容許秒數 即視為退化
+DEFAULT_THRESHOLDS = {
+    "wall_ratio": 1.25,
+    "cpu_ratio": 1.25,
+    "min_seconds": 0.05,
+    "rss_growth_mb": 100.0,
+}
+
+# 冷啟動前清空的共用記憶體快取
+SHARED_CACHE_MODULES = (
+    "pitstop_table",
+    "tire_stint_model",
+    "weather_arrays",
+    "incident_timeline",
+    "race_control_classifier",
+)
+
+PHASES = ("cold", "warm")
+
+
+def _peak_rss_mb():
+    """目前程序的最高 RSS (MB)；無法取得時返回 None"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS 單位為 bytes，Linux 為 KB
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except Exception:
+        return None
+
+
+def _current_rss_mb():
+    """目前程序的 RSS (MB) - psutil，否則讀取 /proc/self/statm；無法取得時返回 None
+
+    最高 RSS 只增不減，前一次執行留下的高峰會遮蔽之後的記憶體增加，
+    因此每次執行的 RSS 增加以執行前後的目前 RSS 計算。
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except Exception:
+        pass
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def fixture_key(fixture):
+    return f"{fixture['year']}_{fixture['race']}_{fixture.get('session', 'R')}"
+
+
+def fixture_cache_path(fixture):
+    """賽段快取檔案路徑 (命名規則同 CompatibleF1DataLoader._get_cache_filename)"""
+    safe_race_name = str(fixture["race"]).replace(" ", "_").replace("'", "")
+    return os.path.join(FIXTURE_CACHE_DIR, f"f1_data_{fixture['year']}_{safe_race_name}_{fixture.get('session', 'R')}.pkl")
+
+
+def load_benchmark_config(config_path=None):
+    """讀取基準測試設定 (檔案不存在時使用預設值)"""
+    config = {"fixtures": [], "functions": list(DEFAULT_FUNCTIONS), "thresholds": dict(DEFAULT_THRESHOLDS),
+              "warm_runs": 1}
+    path = config_path or DEFAULT_CONFIG_PATH
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            loaded = json.load(f)
+        thresholds = dict(DEFAULT_THRESHOLDS)
+        thresholds.update(loaded.get("thresholds") or {})
+        config.update(loaded)
+        config["thresholds"] = thresholds
+    elif config_path:
+        print(f"[WARNING] 找不到基準測試設定: {config_path}，使用預設值")
+    config["functions"] = [str(function_id) for function_id in config["functions"]]
+    return config
+
+
+def available_fixtures(config=None):
+    """本地已有快取的賽段"""
+    config = config or load_benchmark_config()
+    return [fixture for fixture in config["fixtures"] if os.path.exists(fixture_cache_path(fixture))]
+
+
+def fixture_readable(fixture):
+    """賽段快取可否讀取 (快取損壞或 pandas 版本不符時載入器會改為連網下載，基準測試改為略過)"""
+    try:
+        with open(fixture_cache_path(fixture), "rb") as f:
+            data = pickle.load(f)
+    except Exception as e:
+        print(f"[WARNING] 賽段快取無法讀取: {fixture_cache_path(fixture)} ({type(e).__name__})")
+        return False
+    return isinstance(data, dict) and data.get("laps") is not None
+
+
+def clear_shared_caches():
+    """清空各模組共用的記憶體表 (進站表、輪胎模型、天氣陣列、事件時間軸、訊息分類)"""
+    for name in SHARED_CACHE_MODULES:
+        module = sys.modules.get(f"modules.{name}") or sys.modules.get(name)
+        if module is None:
+            try:
+                module = importlib.import_module(f"modules.{name}")
+            except ImportError:
+                continue
+        clear = getattr(module, "clear_cache", None)
+        if callable(clear):
+            clear()
+
+
+def _cache_snapshot(directory="cache"):
+    if not os.path.isdir(directory):
+        return {}
+    return {entry.name: entry.stat().st_mtime for entry in os.scandir(directory) if entry.is_file()}
+
+
+def _is_success(result):
+    if isinstance(result, dict):
+        return bool(result.get("success", False))
+    return bool(result)
+
+
+def _measure(run):
+    """執行一次並量測時間、記憶體與快取"""
+    before = _cache_snapshot()
+    rss_before = _current_rss_mb()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        result = run()
+        status = "success" if _is_success(result) else "failed"
+        error = None
+    except Exception as e:
+        result, status, error = None, "error", str(e)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    rss_after = _current_rss_mb()
+    peak_rss = _peak_rss_mb()
+
+    after = _cache_snapshot()
+    written = sum(1 for name, mtime in after.items() if before.get(name) != mtime)
+    cache_used = result.get("cache_used") if isinstance(result, dict) else None
+    if isinstance(cache_used, bool):
+        cache_hit = cache_used
+    else:
+        # 模組未回報時以快取目錄推斷：有寫入即未命中，未寫入且已有快取視為命中
+        cache_hit = None if not before and not written else written == 0
+
+    measurement = {
+        "status": status,
+        "wall_s": round(wall, 4),
+        "cpu_s": round(cpu, 4),
+        "peak_rss_mb": round(peak_rss, 1) if peak_rss is not None else None,
+        "rss_growth_mb": round(rss_after - rss_before, 1) if rss_after is not None and rss_before is not None else None,
+        "cache_hit": cache_hit,
+        "cache_files_written": written,
+    }
+    if error:
+        measurement["error"] = error
+    return measurement
+
+
+def _best_run(runs):
+    """多次暖啟動取牆鐘時間最短的一次"""
+    return min(runs, key=lambda run: run["wall_s"])
+
+
+def benchmark_session(data_loader, f1_analysis_instance, functions, driver=None, driver2=None,
+                      lap=None, corner=None, warm_runs=1, quiet=True):
+    """在已載入的賽段上量測各功能的冷/暖啟動效能
+
+    Returns:
+        dict: {功能編號: {"cold": 量測, "warm": 量測}}
+    """
+    try:
+        from .function_mapper import F1AnalysisFunctionMapper
+    except ImportError:
+        from modules.function_mapper import F1AnalysisFunctionMapper
+
+    mapper = F1AnalysisFunctionMapper(
+        data_loader=data_loader,
+        f1_analysis_instance=f1_analysis_instance,
+        driver=driver,
+        driver2=driver2,
+    )
+
+    def run(function_id):
+        return mapper.execute_function_by_number(
+            function_id,
+            year=getattr(data_loader, "year", None),
+            race=getattr(data_loader, "race_name", None),
+            session=getattr(data_loader, "session_type", None),
+            driver=driver,
+            driver2=driver2,
+            lap=lap,
+            corner=corner,
+            show_detailed_output=False,
+        )
+
+    results = {}
+    original_cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="f1_benchmark_")
+    try:
+        os.chdir(workdir)
+        for function_id in functions:
+            print(f"[BENCH] 功能 {function_id} ...", flush=True)
+            with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+                # 冷啟動: 清空結果快取與共用表
+                shutil.rmtree("cache", ignore_errors=True)
+                clear_shared_caches()
+                cold = _measure(lambda: run(function_id))
+                warm = _best_run([_measure(lambda: run(function_id)) for _ in range(max(1, warm_runs))])
+            results[function_id] = {"cold": cold, "warm": warm}
+            print(f"[BENCH] 功能 {function_id}: 冷 {cold['wall_s']:.2f}s ({cold['status']}) / "
+                  f"暖 {warm['wall_s']:.2f}s ({warm['status']})")
+    finally:
+        os.chdir(original_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def compare_with_baseline(results, baseline, thresholds=None):
+    """與基準線比較
+
+    Args:
+        results: {賽段: {功能編號: {"cold": ..., "warm": ...}}}
+        baseline: 基準線 JSON 內容 (同 results 結構，位於 "results" 欄位)
+        thresholds: 退化門檻 (預設 DEFAULT_THRESHOLDS)
+
+    Returns:
+        list: 退化項目
+    """
+    limits = dict(DEFAULT_THRESHOLDS)
+    limits.update(thresholds or {})
+    reference = (baseline or {}).get("results", {})
+
+    regressions = []
+    for session, functions in results.items():
+        for function_id, phases in functions.items():
+            for phase in PHASES:
+                current = phases.get(phase)
+                base = reference.get(session, {}).get(function_id, {}).get(phase)
+                if not current or not base:
+                    continue
+
+                def add(metric, baseline_value, current_value, limit):
+                    regressions.append({
+                        "session": session, "function": function_id, "phase": phase, "metric": metric,
+                        "baseline": baseline_value, "current": current_value, "limit": limit,
+                    })
+
+                if base.get("status") == "success" and current.get("status") != "success":
+                    add("status", base["status"], current.get("status"), "success")
+
+                for metric, ratio in (("wall_s", "wall_ratio"), ("cpu_s", "cpu_ratio")):
+                    if base.get(metric) is None or current.get(metric) is None:
+                        continue
+                    limit = base[metric] * limits[ratio] + limits["min_seconds"]
+                    if current[metric] > limit:
+                        add(metric, base[metric], current[metric], round(limit, 4))
+
+                if base.get("rss_growth_mb") is not None and current.get("rss_growth_mb") is not None:
+                    limit = base["rss_growth_mb"] + limits["rss_growth_mb"]
+                    if current["rss_growth_mb"] > limit:
+                        add("rss_growth_mb", base["rss_growth_mb"], current["rss_growth_mb"], round(limit, 1))
+    return regressions
+
+
+def display_benchmark_results(results, regressions):
+    """顯示基準測試結果表格"""
+    flagged = {(r["session"], r["function"], r["phase"]) for r in regressions}
+    table = PrettyTable()
+    table.field_names = ["賽段", "功能", "階段", "狀態", "牆鐘(秒)", "CPU(秒)", "RSS增加(MB)", "快取命中", "退化"]
+    table.align = "l"
+    for session, functions in results.items():
+        for function_id, phases in functions.items():
+            for phase in PHASES:
+                run = phases[phase]
+                hit = {True: "命中", False: "未命中"}.get(run["cache_hit"], "-")
+                rss = run["rss_growth_mb"] if run["rss_growth_mb"] is not None else "-"
+                table.add_row([session, function_id, phase, run["status"], f"{run['wall_s']:.3f}",
+                               f"{run['cpu_s']:.3f}", rss, hit,
+                               "[WARNING]" if (session, function_id, phase) in flagged else ""])
+    print("\n[BENCH] 效能基準測試結果")
+    print(table)
+
+    if regressions:
+        print(f"\n[WARNING] 發現 {len(regressions)} 項效能退化:")
+        for item in regressions:
+            print(f"   • {item['session']} 功能 {item['function']} ({item['phase']}) {item['metric']}: "
+                  f"{item['baseline']} → {item['current']} (上限 {item['limit']})")
+    else:
+        print("\n[OK] 未發現效能退化")
+
+
+def _load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def run_performance_benchmark(data_loader=None, f1_analysis_instance=None, functions=None,
+                              config_path=None, baseline_path=None, update_baseline=False,
+                              driver=None, driver2=None, quiet=True, show_detailed_output=True):
+    """執行效能基準測試 - 功能 52
+
+    Args:
+        data_loader: 已載入的數據載入器；提供時只測試該賽段，否則依設定檔載入本地賽段快取
+        f1_analysis_instance: 分析實例 (可選)
+        functions: 功能編號清單 (預設依設定檔)
+        config_path: 設定檔路徑 (預設 benchmarks/benchmark_config.json)
+        baseline_path: 基準線路徑 (預設 benchmarks/benchmark_baseline.json)
+        update_baseline: 以本次結果覆寫基準線
+        driver / driver2: 車手相關功能使用的車手
+        quiet: 隱藏分析模組的輸出 (避免終端輸出影響計時)
+        show_detailed_output: 是否顯示結果表格
+
+    Returns:
+        dict: {"success", "message", "function_id", "data"}
+    """
+    config = load_benchmark_config(config_path)
+    # 排除功能 52 本身，避免遞迴執行
+    functions = [str(function_id) for function_id in (functions or config["functions"]) if str(function_id) != "52"]
+    baseline_path = baseline_path or config.get("baseline") or DEFAULT_BASELINE_PATH
+    driver = driver or config.get("driver")
+    driver2 = driver2 or config.get("driver2")
+
+    sessions = []
+    skipped = []
+    if data_loader is not None and getattr(data_loader, "session_loaded", False):
+        sessions.append((fixture_key({
+            "year": data_loader.year, "race": data_loader.race_name, "session": data_loader.session_type,
+        }), data_loader, f1_analysis_instance))
+    else:
+        try:
+            from .batch_runner import load_session_data
+        except ImportError:
+            from modules.batch_runner import load_session_data
+        for fixture in config["fixtures"]:
+            # 只使用本地快取，不連網下載
+            if not os.path.exists(fixture_cache_path(fixture)):
+                print(f"[WARNING] 賽段快取不存在，略過: {fixture_cache_path(fixture)}")
+                skipped.append(fixture_key(fixture))
+                continue
+            if not fixture_readable(fixture):
+                skipped.append(fixture_key(fixture))
+                continue
+            original_cwd = os.getcwd()
+            try:
+                os.chdir(PROJECT_ROOT)
+                loader, instance = load_session_data(fixture["year"], fixture["race"], fixture.get("session", "R"))
+            finally:
+                os.chdir(original_cwd)
+            if loader is None:
+                skipped.append(fixture_key(fixture))
+                continue
+            sessions.append((fixture_key(fixture), loader, instance))
+
+    if not sessions:
+        return {
+            "success": False,
+            "message": "沒有可用的本地賽段快取，無法執行效能基準測試",
+            "function_id": "52",
+            "data": {"skipped_fixtures": skipped},
+        }
+
+    results = {}
+    for key, loader, instance in sessions:
+        print(f"\n[BENCH] 賽段 {key}: {len(functions)} 個功能")
+        results[key] = benchmark_session(loader, instance, functions, driver=driver, driver2=driver2,
+                                         lap=config.get("lap"), corner=config.get("corner"),
+                                         warm_runs=int(config.get("warm_runs", 1)), quiet=quiet)
+
+    baseline = _load_baseline(baseline_path)
+    regressions = compare_with_baseline(results, baseline, config["thresholds"]) if baseline else []
+    if show_detailed_output:
+        display_benchmark_results(results, regressions)
+    if baseline is None and not update_baseline:
+        print(f"[INFO] 尚無基準線 ({baseline_path})，可使用 --update-baseline 建立")
+
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "functions": functions,
+        "thresholds": config["thresholds"],
+        "results": results,
+    }
+    if update_baseline:
+        if baseline:
+            # 保留本次未測試的賽段基準
+            merged = dict(baseline.get("results", {}))
+            merged.update(results)
+            report["results"] = merged
+        write_json(baseline_path, report, pretty=True)
+        print(f"[SAVE] 基準線已更新: {baseline_path}")
+
+    return {
+        "success": not regressions,
+        "message": f"效能基準測試完成，{len(regressions)} 項退化" if regressions else "效能基準測試完成，未發現退化",
+        "function_id": "52",
+        "data": {
+            "results": results,
+            "regressions": regressions,
+            "baseline_path": baseline_path,
+            "baseline_found": baseline is not None,
+            "skipped_fixtures": skipped,
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="F1 Analysis 效能基準測試 (功能 52)")
+    parser.add_argument("--config", type=str, default=None, help="設定檔 (預設 benchmarks/benchmark_config.json)")
+    parser.add_argument("--baseline", type=str, default=None, help="基準線 JSON (預設 benchmarks/benchmark_baseline.json)")
+    parser.add_argument("-f", "--functions", type=str, default=None, help="功能編號，以逗號分隔 (如 1,3,18)")
+    parser.add_argument("-d", "--driver", type=str, default=None, help="主要車手代碼")
+    parser.add_argument("-d2", "--driver2", type=str, default=None, help="次要車手代碼")
+    parser.add_argument("--update-baseline", action="store_true", help="以本次結果更新基準線")
+    parser.add_argument("--verbose", action="store_true", help="顯示分析模組的完整輸出")
+    args = parser.parse_args(argv)
+
+    functions = [item.strip() for item in args.functions.split(",") if item.strip()] if args.functions else None
+    result = run_performance_benchmark(
+        functions=functions,
+        config_path=args.config,
+        baseline_path=args.baseline,
+        update_baseline=args.update_baseline,
+        driver=args.driver,
+        driver2=args.driver2,
+        quiet=not args.verbose,
+    )
+    print(f"\n[INFO] {result['message']}")
+    return 0 if result["success"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -31,6 +31,11 @@ except ImportError:
         print("[ERROR] 無法導入基礎模組 F1AnalysisBase")
         sys.exit(1)
 
+try:
+    from .pitstop_table import get_pitstop_table
+except ImportError:
+    from pitstop_table import get_pitstop_table
+
 # 導入 OpenF1 分析器 - 優先使用 OpenF1 API
 try:
     from .openf1_data_analyzer import F1OpenDataAnalyzer
@@ -444,31 +449,25 @@ class F1PitstopAnalyzer(F1AnalysisBase):
                 print("[ERROR] 沒有圈速數據")
                 return False
             
-            # 分析進站資料
-            pitstops = []
-            drivers_pitstops = {}
+            # 共用進站表 - 以車手分組配對進站圈/出站圈
+            table = get_pitstop_table(data)
+            pitstops = [
+                {
+                    'driver': row['Driver'],
+                    'lap': int(row['lap']),
+                    'pit_time': float(row['pit_lane_time']),
+                    'compound_before': row['compound_before'] if pd.notna(row['compound_before']) else 'Unknown',
+                    'compound_after': row['compound_after'] if pd.notna(row['compound_after']) else 'Unknown',
+                    'tyre_life': row['tyre_life'] if pd.notna(row['tyre_life']) else 0,
+                    'stationary_estimate': row['stationary_estimate'],
+                    'stint': row['stint_after'],
+                }
+                for row in table.to_dict('records')
+            ]
             
-            for _, lap in laps.iterrows():
-                driver = lap['Driver']
-                
-                # 檢查是否有進站時間資料
-                if pd.notna(lap.get('PitInTime')) and pd.notna(lap.get('PitOutTime')):
-                    pit_time = lap['PitOutTime'] - lap['PitInTime']
-                    pit_duration = pit_time.total_seconds()
-                    
-                    pitstop_info = {
-                        'driver': driver,
-                        'lap': int(lap['LapNumber']),
-                        'pit_time': pit_duration,
-                        'compound_before': lap.get('Compound', 'Unknown'),
-                        'tyre_life': lap.get('TyreLife', 0)
-                    }
-                    
-                    pitstops.append(pitstop_info)
-                    
-                    if driver not in drivers_pitstops:
-                        drivers_pitstops[driver] = []
-                    drivers_pitstops[driver].append(pitstop_info)
+            drivers_pitstops = {}
+            for pitstop_info in pitstops:
+                drivers_pitstops.setdefault(pitstop_info['driver'], []).append(pitstop_info)
             
             if not pitstops:
                 print("[ERROR] 沒有找到有效的進站資料")
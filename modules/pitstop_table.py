@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+F1 進站表 - Shared Pit Stop Table
+由 FastF1 圈速數據一次建立全場進站表，供進站分析、排行榜與車手綜合分析共用
+
+- FastF1 的 PitInTime 記在進站圈、PitOutTime 記在下一圈 (出站圈)，
+  以車手分組 shift 一次配對所有車手的進/出站圈，不再逐圈 iterrows
+- 每次進站計算進站通道時間、靜止時間估算、輪胎配方更換與 stint 編號
+- 每場賽事 (同一份 laps) 只建立一次
+
+欄位:
+    Driver, Team, lap, out_lap, stop_number, pit_in_time, pit_out_time,
+    pit_lane_time, stationary_estimate, compound_before, compound_after,
+    compound_changed, tyre_life, stint_before, stint_after, is_valid
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .session_tables import IdentityCache
+except ImportError:
+    from session_tables import IdentityCache
+
+PITSTOP_TABLE_COLUMNS = [
+    'Driver', 'Team', 'lap', 'out_lap', 'stop_number', 'pit_in_time', 'pit_out_time',
+    'pit_lane_time', 'stationary_estimate', 'compound_before', 'compound_after',
+    'compound_changed', 'tyre_life', 'stint_before', 'stint_after', 'is_valid',
+]
+
+# 有效進站通道時間範圍 (秒) - 與 OpenF1 排行榜的過濾條件一致，排除紅旗/車庫停留
+VALID_PIT_LANE_RANGE = (15.0, 60.0)
+
+# 全場最快一次進站的假設靜止時間 (秒)，用於推算進站通道行駛時間
+MIN_STATIONARY_SECONDS = 2.0
+
+MAX_CACHED_TABLES = 4
+
+UNKNOWN_TEAM = 'Unknown Team'
+
+
+def _empty_table():
+    return pd.DataFrame(columns=PITSTOP_TABLE_COLUMNS)
+
+
+def _column(frame, name, default=np.nan):
+    if name in frame.columns:
+        return frame[name]
+    return pd.Series(default, index=frame.index)
+
+
+def build_pitstop_table(laps):
+    """建立全場進站表
+
+    Args:
+        laps: FastF1 圈速數據 (需含 Driver, LapNumber, PitInTime, PitOutTime)
+
+    Returns:
+        DataFrame: 每次進站一列，依車手與圈數排序
+    """
+    required = {'Driver', 'LapNumber', 'PitInTime', 'PitOutTime'}
+    if laps is None or len(laps) == 0 or not required.issubset(laps.columns):
+        return _empty_table()
+
+    columns = [c for c in ('Driver', 'Team', 'LapNumber', 'PitInTime', 'PitOutTime',
+                           'Compound', 'TyreLife', 'Stint') if c in laps.columns]
+    frame = laps[columns].sort_values(['Driver', 'LapNumber'], kind='mergesort').reset_index(drop=True)
+
+    grouped = frame.groupby('Driver', sort=False)
+    next_lap = grouped['LapNumber'].shift(-1)
+    next_out = grouped['PitOutTime'].shift(-1)
+    compound = _column(frame, 'Compound')
+    stint = _column(frame, 'Stint')
+    next_compound = compound.groupby(frame['Driver'], sort=False).shift(-1)
+    next_stint = stint.groupby(frame['Driver'], sort=False).shift(-1)
+
+    pit_in = frame['PitInTime']
+    # 進站圈的 PitInTime 與下一圈 (出站圈) 的 PitOutTime 配對；
+    # 少數數據源兩者記在同一圈，作為備援
+    paired_next = next_out.notna() & (next_lap == frame['LapNumber'] + 1)
+    same_row_out = frame['PitOutTime'].where(frame['PitOutTime'] > pit_in)
+    pit_out = next_out.where(paired_next, same_row_out)
+
+    mask = (pit_in.notna() & pit_out.notna()).to_numpy()
+    if not mask.any():
+        return _empty_table()
+
+    lane_time = (pit_out[mask] - pit_in[mask]).dt.total_seconds().to_numpy()
+    positive = lane_time > 0
+    index = np.flatnonzero(mask)[positive]
+    lane_time = lane_time[positive]
+    if len(index) == 0:
+        return _empty_table()
+
+    table = pd.DataFrame({
+        'Driver': frame['Driver'].to_numpy()[index],
+        'Team': _column(frame, 'Team', UNKNOWN_TEAM).fillna(UNKNOWN_TEAM).to_numpy()[index],
+        'lap': frame['LapNumber'].to_numpy()[index].astype(int),
+        'out_lap': np.where(paired_next.to_numpy()[index],
+                            next_lap.to_numpy()[index], frame['LapNumber'].to_numpy()[index]).astype(int),
+        'pit_in_time': pit_in.to_numpy()[index],
+        'pit_out_time': pit_out.to_numpy()[index],
+        'pit_lane_time': lane_time,
+        'compound_before': compound.to_numpy()[index],
+        'compound_after': np.where(paired_next.to_numpy()[index],
+                                   next_compound.to_numpy()[index], compound.to_numpy()[index]),
+        'tyre_life': _column(frame, 'TyreLife').to_numpy()[index],
+        'stint_before': stint.to_numpy()[index],
+        'stint_after': next_stint.to_numpy()[index],
+    })
+
+    table['stop_number'] = table.groupby('Driver', sort=False).cumcount() + 1
+    # 沒有 Stint 欄位時，以進站次數推算出站後的 stint
+    table['stint_after'] = table['stint_after'].where(table['stint_after'].notna(), table['stop_number'] + 1)
+    table['stint_before'] = table['stint_before'].where(table['stint_before'].notna(), table['stop_number'])
+
+    before = table['compound_before']
+    after = table['compound_after']
+    table['compound_changed'] = before.notna() & after.notna() & (before != after)
+
+    low, high = VALID_PIT_LANE_RANGE
+    table['is_valid'] = table['pit_lane_time'].between(low, high)
+
+    # 靜止時間估算: 全場最快有效進站視為 MIN_STATIONARY_SECONDS，其餘差值即為多停留的時間
+    valid_times = table.loc[table['is_valid'], 'pit_lane_time']
+    if not valid_times.empty:
+        transit = valid_times.min() - MIN_STATIONARY_SECONDS
+        table['stationary_estimate'] = (table['pit_lane_time'] - transit).where(table['is_valid'])
+    else:
+        table['stationary_estimate'] = np.nan
+
+    return table[PITSTOP_TABLE_COLUMNS]
+
+
+_table_cache = IdentityCache("pitstop_table", MAX_CACHED_TABLES)
+
+
+def resolve_laps(source):
+    """由 laps DataFrame / get_loaded_data() 字典 / 數據載入器 / FastF1 session 取得圈速數據"""
+    if isinstance(source, pd.DataFrame):
+        return source
+    if isinstance(source, dict):
+        data = source
+    elif isinstance(getattr(source, 'loaded_data', None), dict):
+        data = source.loaded_data
+    else:
+        data = {}
+
+    laps = data.get('laps')
+    if not isinstance(laps, pd.DataFrame):
+        for holder in (data.get('session'), source):
+            try:
+                laps = getattr(holder, 'laps', None)
+            except Exception:
+                laps = None
+            if isinstance(laps, pd.DataFrame):
+                break
+    return laps if isinstance(laps, pd.DataFrame) else None
+
+
+def get_pitstop_table(source):
+    """取得全場進站表 (每份圈速數據只建立一次)
+
+    Args:
+        source: laps DataFrame、get_loaded_data() 字典、數據載入器或 FastF1 session
+    """
+    laps = resolve_laps(source)
+    if laps is None:
+        return _empty_table()
+
+    return _table_cache.get_or_build(laps, lambda: build_pitstop_table(laps),
+                                     span_name="table.pitstops", laps=len(laps))
+
+
+def get_driver_pitstops(source, driver):
+    """取得指定車手的進站列表 (依圈數排序)"""
+    table = get_pitstop_table(source)
+    return table[table['Driver'] == driver]
+
+
+def clear_cache():
+    """清除進站表快取"""
+    _table_cache.clear()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+F1 排位賽分析 - Qualifying Session Analyzer
+將排位賽拆為 Q1 / Q2 / Q3，計算各車手各階段最快圈、理論最快圈與遙測差距
+
+- 分段: FastF1 Laps 提供 split_qualifying_sessions() 時直接使用，
+  否則以圈起點時間的最大兩段空檔 (階段間休息) 一次 searchsorted 切分
+- 各階段最快圈、分段最佳 (Sector1-3) 與理論最快圈以 groupby 一次求得
+- 遙測差距: 各階段所有車手的最快圈以 telemetry_matrix 重取樣到同一距離網格，
+  三個階段由執行緒並行處理 (共用同一份 car_data，不需跨程序複製；
+  各工作以 copy_context 提交，沿用呼叫端的追蹤)
+- 各階段結果依圈速數據快取，重複查詢不重算
+
+查詢範例:
+    quali = get_qualifying_analysis(data_loader)
+    quali.best_laps('Q3')                  # Q3 各車手最快圈與理論最快圈
+    quali.telemetry(workers=3)['Q3'].summary()
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from prettytable import PrettyTable
+
+try:
+    from .minisector_table import resolve_session_sources
+    from .session_tables import IdentityCache, json_value, to_seconds
+    from .telemetry_matrix import build_telemetry_matrix
+    from .tracing import span
+except ImportError:
+    from minisector_table import resolve_session_sources
+    from session_tables import IdentityCache, json_value, to_seconds
+    from telemetry_matrix import build_telemetry_matrix
+    from tracing import span
+
+SEGMENTS = ('Q1', 'Q2', 'Q3')
+
+# 排位賽 / 衝刺排位賽的 session 類型
+QUALIFYING_SESSIONS = ('Q', 'SQ', 'SS')
+
+# 階段間空檔至少需要的時間 (秒)
+MIN_SEGMENT_GAP = 240.0
+
+SECTORS = ('Sector1Time', 'Sector2Time', 'Sector3Time')
+
+DEFAULT_WORKERS = 3
+
+MAX_CACHED_ANALYSES = 4
+
+
+def split_qualifying(laps):
+    """將排位賽圈速拆為 {'Q1': laps, 'Q2': laps, 'Q3': laps} (缺少的階段不列出)"""
+    splitter = getattr(laps, 'split_qualifying_sessions', None)
+    if callable(splitter):
+        try:
+            parts = splitter()
+            return {name: part for name, part in zip(SEGMENTS, parts) if part is not None and len(part)}
+        except Exception:
+            pass
+
+    starts = to_seconds(laps['LapStartTime']) if 'LapStartTime' in laps.columns else np.full(len(laps), np.nan)
+    finite = np.sort(starts[np.isfinite(starts)])
+    if finite.size == 0:
+        return {}
+    gaps = np.diff(finite)
+    # 最大的兩段空檔即為階段之間的休息 (需超過 MIN_SEGMENT_GAP)
+    candidates = np.argsort(gaps)[::-1][:len(SEGMENTS) - 1]
+    boundaries = np.sort(finite[candidates[gaps[candidates] >= MIN_SEGMENT_GAP] + 1])
+    segment = np.searchsorted(boundaries, starts, side='right')
+    return {
+        name: laps[np.isfinite(starts) & (segment == index)]
+        for index, name in enumerate(SEGMENTS)
+        if np.any(np.isfinite(starts) & (segment == index))
+    }
+
+
+def segment_best_laps(laps):
+    """單一階段各車手最快圈、分段最佳與理論最快圈 (依最快圈排序)"""
+    columns = ['position', 'Driver', 'LapNumber', 'best_lap', 'gap_to_first', 'sector1', 'sector2', 'sector3',
+               'best_sector1', 'best_sector2', 'best_sector3', 'ideal_lap', 'potential_gain']
+    frame = pd.DataFrame({
+        'Driver': laps['Driver'].astype(str).to_numpy(),
+        'LapNumber': pd.to_numeric(laps['LapNumber'], errors='coerce').to_numpy(),
+        'lap_seconds': to_seconds(laps['LapTime']),
+    })
+    for number, column in enumerate(SECTORS, 1):
+        frame[f'sector{number}'] = to_seconds(laps[column]) if column in laps.columns else np.nan
+    valid = np.isfinite(frame['lap_seconds'].to_numpy()) & np.isfinite(frame['LapNumber'].to_numpy(dtype=float))
+    if 'Deleted' in laps.columns:
+        valid &= ~laps['Deleted'].fillna(False).astype(bool).to_numpy()
+    frame = frame[valid]
+    if frame.empty:
+        return pd.DataFrame(columns=columns)
+
+    grouped = frame.groupby('Driver', sort=False)
+    best = frame.loc[grouped['lap_seconds'].idxmin()].rename(columns={'lap_seconds': 'best_lap'})
+    sector_best = grouped[['sector1', 'sector2', 'sector3']].min().add_prefix('best_')
+    best = best.join(sector_best, on='Driver')
+    best['ideal_lap'] = best[['best_sector1', 'best_sector2', 'best_sector3']].sum(axis=1, min_count=3)
+    best['potential_gain'] = best['best_lap'] - best['ideal_lap']
+    best = best.sort_values('best_lap', kind='mergesort').reset_index(drop=True)
+    best['gap_to_first'] = best['best_lap'] - best['best_lap'].iloc[0]
+    best['position'] = np.arange(1, len(best) + 1)
+    return best[columns]
+
+
+class QualifyingAnalysis:
+    """排位賽 Q1 / Q2 / Q3 分析 (各階段結果與遙測矩陣延遲建立並保留)"""
+
+    def __init__(self, laps, car_data, results=None):
+        self._laps = laps
+        self._car_data = car_data
+        self._results = results
+        self.segments = split_qualifying(laps) if laps is not None and len(laps) else {}
+        self._best = {}
+        self._matrices = {}
+
+    @property
+    def empty(self):
+        return not self.segments
+
+    def best_laps(self, segment):
+        """階段最快圈表 (含淘汰標記: 未進入下一階段的車手)"""
+        if segment not in self._best:
+            best = segment_best_laps(self.segments[segment])
+            following = SEGMENTS.index(segment) + 1
+            if following < len(SEGMENTS) and SEGMENTS[following] in self.segments:
+                advanced = set(self.segments[SEGMENTS[following]]['Driver'].astype(str))
+                best['eliminated'] = ~best['Driver'].isin(advanced)
+            else:
+                best['eliminated'] = False
+            self._best[segment] = best
+        return self._best[segment]
+
+    def _segment_matrix(self, segment):
+        best = self.best_laps(segment)
+        chosen = dict(zip(best['Driver'], best['LapNumber'].astype(int)))
+        with span("table.qualifying_telemetry", segment=segment, drivers=len(chosen)):
+            return build_telemetry_matrix({'laps': self._laps, 'car_data': self._car_data, 'results': self._results},
+                                          drivers=list(chosen), laps=chosen)
+
+    def telemetry(self, workers=DEFAULT_WORKERS):
+        """各階段全部車手最快圈的遙測矩陣 {階段: TelemetryMatrix}，未建立的階段並行計算"""
+        missing = [segment for segment in self.segments if segment not in self._matrices]
+        if missing and self._car_data:
+            workers = max(1, min(int(workers or 1), len(missing)))
+            if workers == 1:
+                matrices = [self._segment_matrix(segment) for segment in missing]
+            else:
+                # 每個工作複製一份呼叫端 context，執行緒內的 span 才會記入同一份追蹤
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = [executor.submit(contextvars.copy_context().run, self._segment_matrix, segment)
+                               for segment in missing]
+                    matrices = [future.result() for future in futures]
+            self._matrices.update(zip(missing, matrices))
+        return {segment: self._matrices[segment] for segment in self.segments if segment in self._matrices}
+
+
+_analysis_cache = IdentityCache("qualifying", MAX_CACHED_ANALYSES)
+
+
+def get_qualifying_analysis(source):
+    """取得排位賽分析 (每份圈速數據只建立一次，各階段結果保留於同一物件)
+
+    Args:
+        source: get_loaded_data() 字典、數據載入器或 FastF1 session
+    """
+    laps, car_data, _, results = resolve_session_sources(source)
+    return _analysis_cache.get_or_build(laps, lambda: QualifyingAnalysis(laps, car_data, results),
+                                        span_name="table.qualifying")
+
+
+def clear_cache():
+    """清除排位賽分析快取"""
+    _analysis_cache.clear()
+
+
+def qualifying_records(frame):
+    """排位賽表轉為字典列表"""
+    return [{key: json_value(value) for key, value in row.items()} for row in frame.to_dict('records')]
+
+
+def _format_lap(seconds):
+    if seconds is None or seconds != seconds:
+        return "N/A"
+    return f"{int(seconds // 60)}:{seconds % 60:06.3f}"
+
+
+def display_segment(segment, best, summary=None):
+    losses = dict(zip(summary['driver'], summary['largest_loss_at_m'])) if summary is not None else {}
+    table = PrettyTable()
+    table.field_names = ["名次", "車手", "最快圈", "差距", "理論最快圈", "可提升", "最大失時位置", ""]
+    table.align = "c"
+    for row in best.to_dict('records'):
+        loss = losses.get(row['Driver'], np.nan)
+        table.add_row([
+            row['position'], row['Driver'], _format_lap(row['best_lap']),
+            f"+{row['gap_to_first']:.3f}s" if row['position'] > 1 else "-",
+            _format_lap(row['ideal_lap']),
+            f"{row['potential_gain']:.3f}s" if row['potential_gain'] == row['potential_gain'] else "N/A",
+            f"{loss:.0f} m" if row['position'] > 1 and loss == loss else "N/A",
+            "淘汰" if row['eliminated'] else "",
+        ])
+    print(f"\n⏱️ {segment}")
+    print(table)
+
+
+def run_all_drivers_qualifying_analysis(data_loader, workers=DEFAULT_WORKERS, show_detailed_output=True):
+    """全部車手排位賽分析 (功能44)"""
+    session_type = getattr(data_loader, 'session_type', None)
+    if session_type and str(session_type).upper() not in QUALIFYING_SESSIONS:
+        return {"success": False, "message": f"排位賽分析需要載入排位賽資料 (目前為 {session_type})",
+                "function_id": "44"}
+
+    analysis = get_qualifying_analysis(data_loader)
+    if analysis.empty:
+        return {"success": False, "message": "沒有可用的排位賽圈速數據", "function_id": "44"}
+
+    matrices = analysis.telemetry(workers)
+    segments = {}
+    for segment in analysis.segments:
+        best = analysis.best_laps(segment)
+        matrix = matrices.get(segment)
+        summary = matrix.summary() if matrix is not None and not matrix.empty else None
+        if show_detailed_output:
+            display_segment(segment, best, summary)
+        segments[segment] = {
+            "drivers": len(best),
+            "best_laps": qualifying_records(best),
+            "telemetry_reference": matrix.reference if summary is not None else None,
+            "telemetry": qualifying_records(summary) if summary is not None else [],
+        }
+
+    return {
+        "success": True,
+        "message": f"全部車手排位賽分析完成 ({'/'.join(analysis.segments)})",
+        "data": {"segments": segments},
+        "function_id": "44",
+    }
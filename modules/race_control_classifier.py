@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+F1 賽事控制訊息分類引擎 - Race Control Message Classifier
+所有事故/事件分析模組共用的訊息分類與車手擷取
+
+- 關鍵字規則表預先編譯為正則表達式 (單一交替式)，不再逐字串 `in` 比對
+- 每場賽事只對 Message 欄位向量化分類一次，結果 (類別、嚴重程度、涉及車手、圈數)
+  以增補欄位的 DataFrame 快取於記憶體與 cache/ 目錄
+- 各模組專屬的分類結果可透過 derived_column() 在同一份快取上只計算一次
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import os
+import re
+import pickle
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .metrics import record_cache, register_cache
+except ImportError:
+    from metrics import record_cache, register_cache
+
+# 規則或增補欄位變更時遞增，使舊快取失效
+CLASSIFIER_VERSION = 1
+CACHE_DIR = "cache"
+
+# 記憶體快取保留的賽事數
+MAX_CACHED_SESSIONS = 4
+
+
+def keywords(*words):
+    """任一關鍵字出現即匹配 (子字串語意，與原 `in` 比對相同)"""
+    return re.compile("|".join(re.escape(word) for word in words))
+
+
+def all_of(*words):
+    """所有關鍵字皆出現才匹配 (不限順序)"""
+    return re.compile("".join(f"(?=.*{re.escape(word)})" for word in words), re.DOTALL)
+
+
+def patterns(*regexes):
+    """任一正則片段匹配即成立"""
+    return re.compile("|".join(f"(?:{regex})" for regex in regexes))
+
+
+# ===========================================
+# 規則表 - 依序比對，第一個匹配的標籤勝出 (對應原 if/elif 鏈)
+# ===========================================
+
+# F1AccidentAnalyzer - 事故相關訊息篩選與中文分類
+ACCIDENT_MESSAGE_PATTERN = keywords(
+    'ACCIDENT', 'COLLISION', 'CRASH', 'CONTACT', 'INCIDENT',
+    'FLAG', 'YELLOW', 'RED', 'SAFETY CAR', 'VSC'
+)
+CATEGORY_ZH_RULES = [
+    ('紅旗', keywords('RED')),
+    ('黃旗', keywords('YELLOW')),
+    ('安全車', keywords('SAFETY CAR', 'SC')),
+    ('虛擬安全車', keywords('VSC')),
+    ('事故', keywords('ACCIDENT', 'COLLISION', 'CRASH')),
+    ('調查', keywords('INVESTIGATION', 'PENALTY')),
+]
+
+# 事件詳細列表 - 統一事件類別與嚴重程度
+INCIDENT_MESSAGE_PATTERN = keywords(
+    'ACCIDENT', 'COLLISION', 'CRASH', 'INCIDENT',
+    'SAFETY CAR', 'RED FLAG', 'YELLOW FLAG',
+    'INVESTIGATION', 'PENALTY', 'CONTACT', 'CHEQUERED FLAG',
+    'PIT EXIT', 'TRACK LIMITS', 'ADVANTAGE'
+)
+INCIDENT_CATEGORY_RULES = [
+    ('RACE_END', keywords('CHEQUERED FLAG')),
+    ('ACCIDENT', keywords('ACCIDENT', 'COLLISION', 'CRASH')),
+    ('SAFETY_CAR', keywords('SAFETY CAR')),
+    ('RED_FLAG', keywords('RED FLAG')),
+    ('YELLOW_FLAG', keywords('YELLOW FLAG')),
+    ('INVESTIGATION', keywords('INVESTIGATION')),
+    ('PENALTY', keywords('PENALTY')),
+    ('CONTACT', keywords('CONTACT', 'INCIDENT')),
+    ('PIT_RELATED', keywords('PIT')),
+    ('TRACK_LIMITS', keywords('TRACK', 'LIMIT', 'ADVANTAGE')),
+]
+INCIDENT_SEVERITY_RULES = [
+    ('CRITICAL', keywords('RED FLAG', 'RACE SUSPENSION', 'MEDICAL CAR')),
+    ('HIGH', keywords('SAFETY CAR', 'YELLOW FLAG', 'COLLISION', 'CRASH')),
+    ('MEDIUM', keywords('INVESTIGATION', 'CONTACT', 'PENALTY')),
+]
+INCIDENT_KEYWORD_LIST = ['ACCIDENT', 'COLLISION', 'CRASH', 'SAFETY CAR', 'RED FLAG', 'YELLOW FLAG',
+                         'INVESTIGATION', 'PENALTY', 'CONTACT', 'PIT EXIT', 'TRACK LIMITS', 'ADVANTAGE']
+FLAG_KEYWORD_LIST = ['RED FLAG', 'YELLOW FLAG', 'CHEQUERED FLAG', 'SAFETY CAR']
+
+# 重要事件篩選 (事故分析主流程)
+IGNORED_MESSAGE_PATTERN = keywords(
+    'GREEN LIGHT - PIT EXIT OPEN', 'PIT EXIT OPEN', 'PIT ENTRY OPEN',
+    'PIT EXIT CLOSED', 'DRS ENABLED', 'DRS DISABLED', 'RISK OF RAIN'
+)
+IMPORTANT_MESSAGE_PATTERN = keywords(
+    'TRACK LIMIT', 'DELETED', 'INCIDENT', 'INVESTIGATION',
+    'YELLOW FLAG', 'RED FLAG', 'SAFETY CAR', 'VSC',
+    'BLUE FLAG', 'CHEQUERED FLAG', 'PENALTY', 'WARNING'
+)
+IMPORTANCE_SEVERITY_RULES = [
+    ('MEDIUM', keywords('DELETED', 'TRACK LIMIT')),
+    ('LOW', keywords('BLUE FLAG', 'INCIDENT')),
+    ('HIGH', keywords('PENALTY', 'INVESTIGATION')),
+    ('CRITICAL', keywords('RED FLAG')),
+]
+EVENT_SEVERITY_RULES = [
+    ('CRITICAL', keywords('RED FLAG')),
+    ('HIGH', keywords('PENALTY', 'INVESTIGATION')),
+    ('HIGH', keywords('ACCIDENT', 'COLLISION', 'CRASH')),
+    ('MEDIUM', keywords('DELETED', 'TRACK LIMIT')),
+    ('LOW', keywords('BLUE FLAG', 'INCIDENT')),
+]
+
+# 車手風險分數 (依序比對，第一個匹配的分數計入)
+DRIVER_RISK_SCORE_RULES = [
+    (3, keywords('ACCIDENT', 'COLLISION', 'CRASH')),
+    (2, keywords('PENALTY')),
+    (1, keywords('INVESTIGATION', 'WARNING')),
+    (2, keywords('TRACK LIMIT', 'DELETED')),
+]
+
+# 彎道分析模組的事件標籤
+CORNER_INCIDENT_RULES = [
+    ('🔴 紅旗', all_of('RED', 'FLAG')),
+    ('🚗 安全車', keywords('SAFETY CAR')),
+    ('🟡 虛擬安全車', keywords('VIRTUAL SAFETY CAR', 'VSC')),
+    ('🟡 黃旗', all_of('YELLOW', 'FLAG')),
+    ('[DEBUG] 調查', keywords('INVESTIGATION')),
+    ('[WARNING] 處罰', keywords('PENALTY')),
+]
+
+# 責任事件分類 (碰撞/罰秒/安全車)
+INVESTIGATION_STATUS_PATTERN = re.compile(patterns(
+    'UNDER INVESTIGATION', 'NOTED', 'NO FURTHER ACTION', 'NO ACTION NECESSARY',
+    'INVESTIGATION ONGOING', 'WILL BE INVESTIGATED'
+).pattern, re.IGNORECASE)
+ACTUAL_PENALTY_PATTERN = re.compile(patterns(
+    'TIME PENALTY', 'GRID PENALTY', 'STOP.*GO', 'DRIVE.*THROUGH',
+    'FINE', 'FINED', 'PENALISED', 'PENALIZED', 'REPRIMAND',
+    'DELETED', 'BLACK AND WHITE FLAG', 'BLACK.*WHITE.*FLAG'
+).pattern, re.IGNORECASE)
+COLLISION_PATTERN = re.compile(patterns(
+    'COLLISION', 'COLLIDED', 'CRASHED', 'CONTACT', 'HIT', 'STRUCK',
+    'CAUSING.*COLLISION', 'INVOLVED.*COLLISION', 'COLLISION.*WITH',
+    'CRASH', 'ACCIDENT'
+).pattern, re.IGNORECASE)
+PENALTY_PATTERN = re.compile(patterns(
+    'PENALTY', 'PENALISED', 'PENALIZED', 'FINE', 'FINED',
+    'TIME PENALTY', 'GRID PENALTY', 'STOP.*GO', 'DRIVE.*THROUGH',
+    'INFRINGEMENT', 'VIOLATION', 'BREACH', 'INVESTIGATION'
+).pattern, re.IGNORECASE)
+SAFETY_CAR_PATTERN = re.compile(patterns(
+    'SAFETY CAR', 'VIRTUAL SAFETY CAR', 'VSC', 'SC DEPLOYED',
+    'CAUSED.*SAFETY CAR', 'TRIGGERING.*SAFETY CAR', 'INCIDENT.*SAFETY CAR'
+).pattern, re.IGNORECASE)
+COLLISION_CONSEQUENCE_PATTERN = re.compile(patterns(
+    'TIME PENALTY', 'GRID PENALTY', 'FINE', 'FINED', 'PENALISED', 'PENALIZED',
+    'REPRIMAND', 'WARNING', 'DELETED', 'BLACK AND WHITE FLAG',
+    'CAUSED.*RETIREMENT', 'CAUSED.*DAMAGE', 'RESPONSIBLE FOR'
+).pattern, re.IGNORECASE)
+
+# 車手擷取
+CAR_DRIVER_PATTERN = re.compile(r'CAR[S]?\s+(\d+)\s*\(([A-Z]{3})\)')
+CAR_NUMBER_PATTERN = re.compile(r'CAR[S]?\s+(\d+)')
+SINGLE_CAR_DRIVER_PATTERN = re.compile(r'CAR\s+\d+\s+\(([A-Z]{3})\)')
+
+
+# ===========================================
+# 單一訊息分類 (純量)
+# ===========================================
+
+def classify_text(message_upper, rules, default=None):
+    """依規則表分類單一訊息 (需已轉大寫)"""
+    for label, pattern in rules:
+        if pattern.search(message_upper):
+            return label
+    return default
+
+
+def extract_driver_info(message):
+    """從訊息中提取車號與車手代碼
+
+    Returns:
+        list: [{'car_number': '1', 'driver_code': 'VER'}, ...]，只有車號時代碼為 'UNK'
+    """
+    message_upper = str(message).upper()
+
+    cars = CAR_DRIVER_PATTERN.findall(message_upper)
+    if cars:
+        return [{'car_number': car[0], 'driver_code': car[1]} for car in cars]
+
+    car_numbers = CAR_NUMBER_PATTERN.findall(message_upper)
+    if car_numbers:
+        return [{'car_number': num, 'driver_code': 'UNK'} for num in car_numbers]
+
+    return []
+
+
+_driver_lookup_patterns = {}
+
+
+def _driver_lookup_pattern(known_drivers):
+    """建立已知車手代碼的預編譯交替式 (以前瞻匹配取得重疊位置)"""
+    key = tuple(known_drivers)
+    pattern = _driver_lookup_patterns.get(key)
+    if pattern is None:
+        alternation = "|".join(re.escape(code) for code in key if code)
+        pattern = re.compile(f"(?=({alternation}))") if alternation else None
+        _driver_lookup_patterns[key] = pattern
+    return pattern
+
+
+def find_known_driver(message_upper, known_drivers):
+    """在訊息中尋找已知車手代碼
+
+    一次掃描取得所有出現的代碼，回傳在 known_drivers 中排序最前者
+    (與逐一代碼 `in` 比對的結果相同)。
+    """
+    if not known_drivers:
+        return None
+    pattern = _driver_lookup_pattern(known_drivers)
+    if pattern is None:
+        return None
+    found = set(pattern.findall(message_upper))
+    if not found:
+        return None
+    for code in known_drivers:
+        if code in found:
+            return code
+    return None
+
+
+def extract_driver_code(message, known_drivers=None):
+    """提取單一車手代碼 - 優先 "CAR N (DRV)" 格式，其次已知車手代碼"""
+    if not message:
+        return 'N/A'
+    message_upper = str(message).upper()
+    match = SINGLE_CAR_DRIVER_PATTERN.search(message_upper)
+    if match:
+        return match.group(1)
+    return find_known_driver(message_upper, known_drivers) or 'N/A'
+
+
+def classify_responsibility(message, category):
+    """分類責任事件類型與嚴重程度
+
+    Returns:
+        tuple: (incident_type, severity, is_responsibility_incident)
+    """
+    combined_text = f"{(message or '').upper()} {(category or '').upper()}"
+
+    # 調查中/註記狀態必須有明確罰則才算責任事故
+    if INVESTIGATION_STATUS_PATTERN.search(combined_text) and not ACTUAL_PENALTY_PATTERN.search(combined_text):
+        return ("investigation", "none", False)
+
+    if COLLISION_PATTERN.search(combined_text):
+        # 碰撞事件必須有實際後果才算責任事故
+        if not COLLISION_CONSEQUENCE_PATTERN.search(combined_text):
+            return ("collision_noted", "none", False)
+        return ("collision", "high", True)
+    if PENALTY_PATTERN.search(combined_text):
+        return ("penalty", "medium", True)
+    if SAFETY_CAR_PATTERN.search(combined_text):
+        return ("safety_car", "medium", True)
+    return ("other", "none", False)
+
+
+# ===========================================
+# 向量化分類 (整欄)
+# ===========================================
+
+def match_series(upper_series, pattern):
+    """整欄比對正則，回傳布林陣列"""
+    return upper_series.str.contains(pattern, regex=True).to_numpy(dtype=bool)
+
+
+def classify_series(upper_series, rules, default=None):
+    """依規則表整欄分類 (np.select 保留 if/elif 的先後順序)"""
+    if len(upper_series) == 0:
+        return np.array([], dtype=object)
+    conditions = [match_series(upper_series, pattern) for _, pattern in rules]
+    choices = [label for label, _ in rules]
+    return np.select(conditions, choices, default=default).astype(object) if conditions else \
+        np.full(len(upper_series), default, dtype=object)
+
+
+def keywords_present(upper_series, keyword_list):
+    """整欄列出每則訊息包含的關鍵字 (保留清單順序)"""
+    masks = [match_series(upper_series, keywords(word)) for word in keyword_list]
+    return [[word for word, mask in zip(keyword_list, masks) if mask[i]] for i in range(len(upper_series))]
+
+
+def enrich_race_control(race_control):
+    """對賽事控制訊息做一次性分類，回傳增補欄位後的副本
+
+    增補欄位:
+        message_text / message_upper: 訊息文字 (原樣 / 大寫)
+        involved_drivers / driver_codes / car_numbers: 涉及車手
+        incident_category / incident_severity / is_incident: 統一事件類別與嚴重程度
+        category_zh / is_accident_message: 事故分析器中文分類
+        is_important / importance_severity / event_severity: 重要事件篩選與嚴重程度
+        is_final_chequered: 最後一圈的正常方格旗 (各模組統一過濾)
+    """
+    frame = race_control.copy()
+    if 'Message' in frame.columns:
+        messages = frame['Message'].map(str)
+    else:
+        messages = pd.Series([''] * len(frame), index=frame.index)
+
+    upper = messages.str.upper()
+    frame['message_text'] = messages.to_numpy(dtype=object)
+    frame['message_upper'] = upper.to_numpy(dtype=object)
+
+    # 車手擷取 - 預編譯正則整欄 findall，只在沒有 "CAR N (DRV)" 時退回車號
+    car_driver_matches = upper.str.findall(CAR_DRIVER_PATTERN)
+    car_number_matches = upper.str.findall(CAR_NUMBER_PATTERN)
+    involved = []
+    for cars, numbers in zip(car_driver_matches, car_number_matches):
+        if cars:
+            involved.append([{'car_number': car[0], 'driver_code': car[1]} for car in cars])
+        elif numbers:
+            involved.append([{'car_number': num, 'driver_code': 'UNK'} for num in numbers])
+        else:
+            involved.append([])
+    frame['involved_drivers'] = involved
+    frame['driver_codes'] = [[d['driver_code'] for d in drivers] for drivers in involved]
+    frame['car_numbers'] = [[d['car_number'] for d in drivers] for drivers in involved]
+
+    frame['incident_category'] = classify_series(upper, INCIDENT_CATEGORY_RULES, 'OTHER')
+    frame['incident_severity'] = classify_series(upper, INCIDENT_SEVERITY_RULES, 'LOW')
+    frame['is_incident'] = match_series(upper, INCIDENT_MESSAGE_PATTERN)
+
+    frame['category_zh'] = classify_series(upper, CATEGORY_ZH_RULES, '其他')
+    frame['is_accident_message'] = match_series(upper, ACCIDENT_MESSAGE_PATTERN)
+
+    frame['is_important'] = (~match_series(upper, IGNORED_MESSAGE_PATTERN)) & match_series(upper, IMPORTANT_MESSAGE_PATTERN)
+    frame['importance_severity'] = classify_series(upper, IMPORTANCE_SEVERITY_RULES, 'LOW')
+    frame['event_severity'] = classify_series(upper, EVENT_SEVERITY_RULES, 'LOW')
+
+    if 'Lap' in frame.columns and len(frame):
+        max_lap = frame['Lap'].max()
+        is_last_lap = (frame['Lap'] == max_lap).to_numpy(dtype=bool)
+    else:
+        is_last_lap = np.zeros(len(frame), dtype=bool)
+    frame['is_final_chequered'] = match_series(upper, keywords('CHEQUERED FLAG')) & is_last_lap
+
+    return frame
+
+
+# ===========================================
+# 每場賽事快取
+# ===========================================
+
+_classified_cache = OrderedDict()
+_last_source = {'ref': None, 'fingerprint': None}
+register_cache("race_control", _classified_cache)
+
+
+def _resolve_race_control(source):
+    """由 DataFrame / 數據載入器 / FastF1 session 取得賽事控制訊息"""
+    if source is None:
+        return None
+    if isinstance(source, pd.DataFrame):
+        return source
+
+    loaded_data = getattr(source, 'loaded_data', None)
+    if isinstance(loaded_data, dict) and loaded_data.get('race_control_messages') is not None:
+        return loaded_data.get('race_control_messages')
+
+    race_control = getattr(source, 'race_control_messages', None)
+    if race_control is None and getattr(source, 'session', None) is not None:
+        race_control = getattr(source.session, 'race_control_messages', None)
+    return race_control
+
+
+def _fingerprint(race_control):
+    """以訊息與圈數內容計算快取指紋"""
+    columns = [col for col in ('Time', 'Lap', 'Category', 'Message') if col in race_control.columns]
+    digest = hashlib.md5(f"v{CLASSIFIER_VERSION}:{len(race_control)}:{','.join(columns)}".encode('utf-8'))
+    if columns and len(race_control):
+        hashed = pd.util.hash_pandas_object(race_control[columns].astype(str), index=False)
+        digest.update(hashed.to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _cache_path(fingerprint):
+    return os.path.join(CACHE_DIR, f"race_control_classified_{fingerprint[:16]}.pkl")
+
+
+def _remember(fingerprint, frame):
+    _classified_cache[fingerprint] = frame
+    _classified_cache.move_to_end(fingerprint)
+    while len(_classified_cache) > MAX_CACHED_SESSIONS:
+        _classified_cache.popitem(last=False)
+
+
+def get_classified_messages(source, use_disk_cache=True):
+    """取得已分類的賽事控制訊息 (每場賽事只分類一次)
+
+    Args:
+        source: race_control_messages DataFrame、數據載入器或 FastF1 session
+        use_disk_cache: 是否讀寫 cache/ 目錄的分類快取
+
+    Returns:
+        DataFrame: 增補分類欄位的訊息表；沒有訊息時回傳 None
+    """
+    race_control = _resolve_race_control(source)
+    if race_control is None or not isinstance(race_control, pd.DataFrame):
+        return None
+
+    # 同一個 DataFrame 物件重複查詢時免計算指紋
+    if _last_source['ref'] is race_control and _last_source['fingerprint'] in _classified_cache:
+        record_cache("race_control", hit=True)
+        return _classified_cache[_last_source['fingerprint']]
+
+    fingerprint = _fingerprint(race_control)
+    frame = _classified_cache.get(fingerprint)
+
+    if frame is None and use_disk_cache:
+        cache_path = _cache_path(fingerprint)
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'rb') as f:
+                    frame = pickle.load(f)
+            except Exception as e:
+                print(f"[WARNING] 讀取訊息分類快取失敗: {e}")
+                frame = None
+
+    record_cache("race_control", hit=frame is not None)
+    if frame is None:
+        frame = enrich_race_control(race_control)
+        if use_disk_cache:
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                with open(_cache_path(fingerprint), 'wb') as f:
+                    pickle.dump(frame, f)
+            except Exception as e:
+                print(f"[WARNING] 保存訊息分類快取失敗: {e}")
+
+    _remember(fingerprint, frame)
+    _last_source['ref'] = race_control
+    _last_source['fingerprint'] = fingerprint
+    return frame
+
+
+def derived_column(frame, column, builder):
+    """在已分類訊息表上建立模組專屬欄位 (同一場賽事只計算一次)
+
+    Args:
+        frame: get_classified_messages() 回傳的 DataFrame
+        column: 欄位名稱
+        builder: builder(frame) -> 與 frame 等長的序列
+    """
+    if column not in frame.columns:
+        values = builder(frame)
+        frame[column] = values if not isinstance(values, list) else pd.Series(values, index=frame.index, dtype=object)
+    return frame[column]
+
+
+def driver_code_column(frame, known_drivers=None):
+    """已分類訊息表的單一車手代碼欄 (依已知車手清單快取)"""
+    drivers = tuple(known_drivers or ())
+    column = f"driver_code:{hashlib.md5('|'.join(drivers).encode('utf-8')).hexdigest()[:8]}"
+    return derived_column(frame, column, lambda f: [
+        extract_driver_code(message, drivers) for message in f['message_text']
+    ])
+
+
+def clear_cache():
+    """清除記憶體中的分類快取"""
+    _classified_cache.clear()
+    _last_source['ref'] = None
+    _last_source['fingerprint'] = None
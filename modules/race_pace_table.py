@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+F1 全場比賽節奏與一致性表 - Race Pace & Consistency Table
+每場賽事以一次分組計算取得全場車手 (與各 stint) 的比賽節奏與穩定度，取代逐位車手的分析呼叫
+
+- 逐圈標記沿用輪胎 stint 模型 (annotate_stint_laps)：排除第 1 圈、進/出站圈、非綠旗圈
+  與超過 stint 中位數 107% 的慢圈，並提供燃油修正圈速
+- 車手與 stint 統計各以一次 groupby 完成：中位數、平均、標準差、IQR、變異係數、燃油修正中位數
+- 與領先者差距以燃油修正中位圈速計算；stint 另與同配方最佳 stint 比較
+
+查詢範例:
+    pace = get_race_pace(data_loader)
+    pace.driver_pace                     # 全場車手節奏 (依燃油修正中位圈速排序)
+    pace.consistency()                   # 依圈速標準差排序
+    pace.stint_pace[pace.stint_pace['Driver'] == 'VER']
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import numpy as np
+import pandas as pd
+from prettytable import PrettyTable
+
+try:
+    from .session_tables import IdentityCache, json_value
+    from .tire_stint_model import get_tire_model
+except ImportError:
+    from session_tables import IdentityCache, json_value
+    from tire_stint_model import get_tire_model
+
+# 有效圈數不足時不列入排名
+MIN_PACE_LAPS = 5
+
+MAX_CACHED_TABLES = 4
+
+
+def _pace_statistics(frame, keys):
+    """依分組鍵一次計算節奏與一致性統計 (只用有效圈；沒有有效圈的分組保留，統計為 NaN)"""
+    fit = frame['is_fit_lap'].astype(bool)
+    frame = frame.assign(lap_seconds=frame['lap_seconds'].where(fit),
+                         fuel_corrected=frame['fuel_corrected'].where(fit))
+    grouped = frame.groupby(keys, sort=False)
+    stats = grouped.agg(
+        team=('Team', 'first'),
+        clean_laps=('lap_seconds', 'count'),
+        total_laps=('LapNumber', 'size'),
+        median_pace=('lap_seconds', 'median'),
+        mean_pace=('lap_seconds', 'mean'),
+        best_lap=('lap_seconds', 'min'),
+        std=('lap_seconds', 'std'),
+        fuel_corrected_pace=('fuel_corrected', 'median'),
+    )
+    # 沒有任何有效圈時 unstack 不會產生分位數欄位
+    quartiles = grouped['lap_seconds'].quantile([0.25, 0.75]).unstack().reindex(columns=[0.25, 0.75])
+    stats['iqr'] = quartiles[0.75] - quartiles[0.25]
+    stats['cv_percent'] = stats['std'] / stats['mean_pace'] * 100
+    return stats
+
+
+class RacePaceTable:
+    """全場車手與 stint 的比賽節奏表"""
+
+    def __init__(self, annotated_laps):
+        if annotated_laps is None or annotated_laps.empty:
+            self.driver_pace = pd.DataFrame()
+            self.stint_pace = pd.DataFrame()
+            return
+
+        drivers = _pace_statistics(annotated_laps, 'Driver')
+        ranked = drivers['clean_laps'] >= MIN_PACE_LAPS
+        leader = drivers.loc[ranked, 'fuel_corrected_pace'].min() if ranked.any() else np.nan
+        drivers['gap_to_leader'] = (drivers['fuel_corrected_pace'] - leader).where(ranked)
+        drivers['ranked'] = ranked
+        self.driver_pace = drivers.sort_values(['ranked', 'fuel_corrected_pace'],
+                                               ascending=[False, True]).reset_index()
+
+        stints = _pace_statistics(annotated_laps, ['Driver', 'stint'])
+        stints['compound'] = annotated_laps.groupby(['Driver', 'stint'], sort=False)['compound'].first()
+        stints = stints[stints['clean_laps'] > 0]
+        stints['gap_to_leader'] = stints['fuel_corrected_pace'] - leader
+        usable = stints['clean_laps'] >= MIN_PACE_LAPS
+        compound_best = stints['fuel_corrected_pace'].where(usable).groupby(stints['compound']).transform('min')
+        stints['gap_to_compound_best'] = (stints['fuel_corrected_pace'] - compound_best).where(usable)
+        self.stint_pace = stints.reset_index().sort_values(['Driver', 'stint'], kind='mergesort')
+
+    @property
+    def empty(self):
+        return self.driver_pace.empty
+
+    def consistency(self):
+        """依圈速標準差排序 (有效圈數足夠者優先)"""
+        if self.empty:
+            return self.driver_pace
+        return self.driver_pace.sort_values(['ranked', 'std'], ascending=[False, True]).reset_index(drop=True)
+
+    def driver_stints(self, driver):
+        """車手各 stint 節奏"""
+        if self.stint_pace.empty:
+            return self.stint_pace
+        return self.stint_pace[self.stint_pace['Driver'] == driver]
+
+
+_pace_cache = IdentityCache("race_pace", MAX_CACHED_TABLES)
+
+
+def get_race_pace(source):
+    """取得全場比賽節奏表 (每份圈速數據只建立一次)
+
+    Args:
+        source: laps DataFrame、get_loaded_data() 字典、數據載入器或 FastF1 session
+    """
+    annotated = get_tire_model(source).laps
+    return _pace_cache.get_or_build(annotated, lambda: RacePaceTable(annotated), span_name="table.race_pace")
+
+
+def clear_cache():
+    """清除比賽節奏表快取"""
+    _pace_cache.clear()
+
+
+def pace_records(frame):
+    """節奏表轉為字典列表"""
+    return [{key: json_value(value) for key, value in row.items()} for row in frame.to_dict('records')]
+
+
+def _format_lap(seconds):
+    if seconds is None or seconds != seconds:
+        return "N/A"
+    return f"{int(seconds // 60)}:{seconds % 60:06.3f}"
+
+
+def _format_seconds(value, sign=False):
+    if value is None or value != value:
+        return "N/A"
+    return f"{value:+.3f}s" if sign else f"{value:.3f}s"
+
+
+def display_consistency_table(consistency):
+    table = PrettyTable()
+    table.field_names = ["排名", "車手", "車隊", "有效圈", "中位圈速", "標準差", "IQR", "變異係數"]
+    table.align = "c"
+    for rank, row in enumerate(consistency.to_dict('records'), 1):
+        table.add_row([
+            rank if row['ranked'] else "-",
+            row['Driver'],
+            row['team'] if isinstance(row['team'], str) else "",
+            f"{row['clean_laps']}/{row['total_laps']}",
+            _format_lap(row['median_pace']),
+            _format_seconds(row['std']),
+            _format_seconds(row['iqr']),
+            f"{row['cv_percent']:.2f}%" if row['cv_percent'] == row['cv_percent'] else "N/A",
+        ])
+    print("\n📏 全場車手圈速一致性 (排除進出站圈、非綠旗圈與慢圈)")
+    print(table)
+
+
+def display_race_pace_table(driver_pace):
+    table = PrettyTable()
+    table.field_names = ["排名", "車手", "車隊", "有效圈", "中位圈速", "燃油修正", "與領先差距", "最快圈"]
+    table.align = "c"
+    for rank, row in enumerate(driver_pace.to_dict('records'), 1):
+        table.add_row([
+            rank if row['ranked'] else "-",
+            row['Driver'],
+            row['team'] if isinstance(row['team'], str) else "",
+            row['clean_laps'],
+            _format_lap(row['median_pace']),
+            _format_lap(row['fuel_corrected_pace']),
+            _format_seconds(row['gap_to_leader'], sign=True),
+            _format_lap(row['best_lap']),
+        ])
+    print("\n🏎️ 全場比賽節奏 (燃油修正中位圈速)")
+    print(table)
+
+
+def display_stint_pace_table(stint_pace):
+    table = PrettyTable()
+    table.field_names = ["車手", "Stint", "配方", "有效圈", "中位圈速", "燃油修正", "標準差", "與同配方最佳"]
+    table.align = "c"
+    for row in stint_pace.to_dict('records'):
+        table.add_row([
+            row['Driver'], row['stint'], row['compound'], row['clean_laps'],
+            _format_lap(row['median_pace']),
+            _format_lap(row['fuel_corrected_pace']),
+            _format_seconds(row['std']),
+            _format_seconds(row['gap_to_compound_best'], sign=True),
+        ])
+    print("\n🛞 各 Stint 比賽節奏")
+    print(table)
+
+
+def run_all_drivers_consistency_analysis(data_loader, show_detailed_output=True):
+    """全部車手一致性分析 (功能42)"""
+    pace = get_race_pace(data_loader)
+    if pace.empty:
+        return {"success": False, "message": "沒有可用的圈速數據，無法計算一致性", "function_id": "42"}
+
+    consistency = pace.consistency()
+    if show_detailed_output:
+        display_consistency_table(consistency)
+
+    columns = ['Driver', 'team', 'clean_laps', 'total_laps', 'median_pace', 'std', 'iqr', 'cv_percent', 'ranked']
+    stint_columns = ['Driver', 'stint', 'compound', 'clean_laps', 'median_pace', 'std', 'iqr', 'cv_percent']
+    return {
+        "success": True,
+        "message": f"全部車手一致性分析完成 ({len(consistency)} 位車手)",
+        "data": {
+            "drivers": pace_records(consistency[columns]),
+            "stints": pace_records(pace.stint_pace[stint_columns]),
+        },
+        "function_id": "42",
+    }
+
+
+def run_all_drivers_race_pace_analysis(data_loader, show_detailed_output=True):
+    """全部車手比賽節奏分析 (功能43)"""
+    pace = get_race_pace(data_loader)
+    if pace.empty:
+        return {"success": False, "message": "沒有可用的圈速數據，無法計算比賽節奏", "function_id": "43"}
+
+    if show_detailed_output:
+        display_race_pace_table(pace.driver_pace)
+        display_stint_pace_table(pace.stint_pace)
+
+    columns = ['Driver', 'team', 'clean_laps', 'median_pace', 'mean_pace', 'fuel_corrected_pace',
+               'gap_to_leader', 'best_lap', 'ranked']
+    stint_columns = ['Driver', 'stint', 'compound', 'clean_laps', 'median_pace', 'fuel_corrected_pace',
+                     'gap_to_leader', 'gap_to_compound_best']
+    return {
+        "success": True,
+        "message": f"全部車手比賽節奏分析完成 ({len(pace.driver_pace)} 位車手)",
+        "data": {
+            "drivers": pace_records(pace.driver_pace[columns]),
+            "stints": pace_records(pace.stint_pace[stint_columns]),
+        },
+        "function_id": "43",
+    }
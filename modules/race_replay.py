@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+F1 Analysis Race Replay - 全場比賽回放數據模組 (功能2.1)
+將整場賽事所有車手的位置數據 (session.pos_data) 轉為以時間索引的陣列緩衝區，
+供 GUI 回放播放器依賽事時間即時內插所有車輛的 X/Y 座標
+
+記憶體設計:
+- X/Y 座標以 float32 儲存
+- 時間戳以 uint16 毫秒差值 (delta) 編碼，每 BLOCK_SIZE 筆設置一個 int64 錨點
+- 查詢時先以 searchsorted 二分搜尋錨點 (O(log n))，再解碼單一區塊
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import os
+import pickle
+from datetime import datetime
+
+import numpy as np
+
+# 每個解碼區塊的樣本數
+BLOCK_SIZE = 256
+
+# uint16 可表示的最大時間差 (毫秒) - 超過時強制建立新錨點
+MAX_DELTA_MS = np.iinfo(np.uint16).max
+
+# 相鄰樣本時間差超過此值時不內插，維持最後已知位置
+DEFAULT_MAX_GAP_MS = 5000
+
+# stdout 回放檔路徑輸出前綴
+REPLAY_FILE_PREFIX = "[REPLAY_FILE]"
+
+
+class DriverPositionBuffer:
+    """單一車手的時間索引位置緩衝區
+
+    Attributes:
+        deltas: uint16 相鄰樣本時間差 (毫秒)，區塊首筆為 0
+        anchor_idx: int32 各區塊起始樣本索引
+        anchor_ms: int64 各區塊起始樣本的絕對時間 (毫秒)
+        x, y: float32 座標
+    """
+
+    def __init__(self, deltas, anchor_idx, anchor_ms, x, y, max_gap_ms=DEFAULT_MAX_GAP_MS):
+        self.deltas = deltas
+        self.anchor_idx = anchor_idx
+        self.anchor_ms = anchor_ms
+        self.x = x
+        self.y = y
+        self.max_gap_ms = max_gap_ms
+
+        # 最近一次解碼的區塊 (循序播放時重複使用)
+        self._cached_block = -1
+        self._cached_times = None
+
+    @classmethod
+    def from_arrays(cls, times_ms, x, y, block_size=BLOCK_SIZE, max_gap_ms=DEFAULT_MAX_GAP_MS):
+        """由已排序的絕對時間 (毫秒) 與座標建立緩衝區"""
+        times_ms = np.asarray(times_ms, dtype=np.int64)
+        x = np.asarray(x, dtype=np.float32)
+        y = np.asarray(y, dtype=np.float32)
+
+        # 移除無效座標
+        valid = np.isfinite(x) & np.isfinite(y)
+        times_ms, x, y = times_ms[valid], x[valid], y[valid]
+
+        # 依時間排序並移除重複時間戳
+        order = np.argsort(times_ms, kind='stable')
+        times_ms, x, y = times_ms[order], x[order], y[order]
+        if len(times_ms) > 1:
+            keep = np.concatenate(([True], np.diff(times_ms) > 0))
+            times_ms, x, y = times_ms[keep], x[keep], y[keep]
+
+        n = len(times_ms)
+        if n == 0:
+            return cls(np.zeros(0, np.uint16), np.zeros(0, np.int32), np.zeros(0, np.int64),
+                       x, y, max_gap_ms)
+
+        diffs = np.diff(times_ms, prepend=times_ms[0])
+
+        # 錨點：固定間隔 + 時間差超出 uint16 範圍的位置
+        anchors = set(range(0, n, block_size))
+        anchors.update(np.nonzero(diffs > MAX_DELTA_MS)[0].tolist())
+        anchor_idx = np.array(sorted(anchors), dtype=np.int32)
+
+        deltas = np.minimum(diffs, MAX_DELTA_MS).astype(np.uint16)
+        deltas[anchor_idx] = 0
+
+        return cls(deltas, anchor_idx, times_ms[anchor_idx].astype(np.int64), x, y, max_gap_ms)
+
+    def __len__(self):
+        return len(self.x)
+
+    @property
+    def nbytes(self):
+        """緩衝區佔用記憶體 (bytes)"""
+        return int(self.deltas.nbytes + self.anchor_idx.nbytes + self.anchor_ms.nbytes
+                   + self.x.nbytes + self.y.nbytes)
+
+    @property
+    def start_ms(self):
+        return int(self.anchor_ms[0]) if len(self.anchor_ms) else None
+
+    @property
+    def end_ms(self):
+        if not len(self.anchor_ms):
+            return None
+        return int(self._block_times(len(self.anchor_idx) - 1)[-1])
+
+    def _block_range(self, block):
+        start = int(self.anchor_idx[block])
+        end = int(self.anchor_idx[block + 1]) if block + 1 < len(self.anchor_idx) else len(self.x)
+        return start, end
+
+    def _block_times(self, block):
+        """解碼單一區塊的絕對時間"""
+        if block == self._cached_block:
+            return self._cached_times
+        start, end = self._block_range(block)
+        times = self.anchor_ms[block] + np.cumsum(self.deltas[start:end], dtype=np.int64)
+        self._cached_block = block
+        self._cached_times = times
+        return times
+
+    def decode_times(self):
+        """解碼全部時間戳 (毫秒) - 供匯出或除錯使用"""
+        if not len(self.x):
+            return np.zeros(0, np.int64)
+        return np.concatenate([self._block_times(b) for b in range(len(self.anchor_idx))])
+
+    def position_at(self, t_ms):
+        """內插指定時間的座標
+
+        Returns:
+            (x, y) 或 None (時間超出此車手數據範圍)
+        """
+        if not len(self.x) or t_ms < self.anchor_ms[0]:
+            return None
+
+        # 二分搜尋所屬區塊
+        block = int(np.searchsorted(self.anchor_ms, t_ms, side='right')) - 1
+        times = self._block_times(block)
+        start, _ = self._block_range(block)
+
+        pos = int(np.searchsorted(times, t_ms, side='right')) - 1
+        i = start + pos
+
+        if i >= len(self.x) - 1:
+            # 最後一筆之後視為已結束 (完賽或退賽)
+            if t_ms > times[-1]:
+                return None
+            return float(self.x[i]), float(self.y[i])
+
+        t_i = times[pos]
+        if pos + 1 < len(times):
+            t_next = times[pos + 1]
+        else:
+            t_next = self.anchor_ms[block + 1]
+
+        gap = t_next - t_i
+        if gap <= 0 or gap > self.max_gap_ms:
+            return float(self.x[i]), float(self.y[i])
+
+        ratio = (t_ms - t_i) / gap
+        x = self.x[i] + (self.x[i + 1] - self.x[i]) * ratio
+        y = self.y[i] + (self.y[i + 1] - self.y[i]) * ratio
+        return float(x), float(y)
+
+    def slice_between(self, start_ms, end_ms):
+        """取得時間區間內的原始樣本 (times_ms, x, y)"""
+        times = self.decode_times()
+        lo = int(np.searchsorted(times, start_ms, side='left'))
+        hi = int(np.searchsorted(times, end_ms, side='right'))
+        return times[lo:hi], self.x[lo:hi], self.y[lo:hi]
+
+    def to_dict(self):
+        return {
+            "deltas": self.deltas,
+            "anchor_idx": self.anchor_idx,
+            "anchor_ms": self.anchor_ms,
+            "x": self.x,
+            "y": self.y,
+            "max_gap_ms": self.max_gap_ms,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["deltas"], data["anchor_idx"], data["anchor_ms"],
+                   data["x"], data["y"], data.get("max_gap_ms", DEFAULT_MAX_GAP_MS))
+
+
+class ReplaySession:
+    """全場回放數據 - 所有車手的位置緩衝區與賽道輪廓"""
+
+    def __init__(self, buffers, driver_info=None, outline=None, metadata=None):
+        self.buffers = buffers
+        self.driver_info = driver_info or {}
+        self.outline = outline or []
+        self.metadata = metadata or {}
+
+        starts = [b.start_ms for b in buffers.values() if len(b)]
+        ends = [b.end_ms for b in buffers.values() if len(b)]
+        self.start_ms = min(starts) if starts else 0
+        self.end_ms = max(ends) if ends else 0
+
+    @property
+    def duration_ms(self):
+        return self.end_ms - self.start_ms
+
+    @property
+    def nbytes(self):
+        return sum(b.nbytes for b in self.buffers.values())
+
+    def track_bounds(self):
+        """所有車手座標的邊界"""
+        xs = [b.x for b in self.buffers.values() if len(b)]
+        ys = [b.y for b in self.buffers.values() if len(b)]
+        if not xs:
+            return None
+        return {
+            "x_min": float(min(arr.min() for arr in xs)),
+            "x_max": float(max(arr.max() for arr in xs)),
+            "y_min": float(min(arr.min() for arr in ys)),
+            "y_max": float(max(arr.max() for arr in ys)),
+        }
+
+    def positions_at(self, t_ms):
+        """取得指定賽事時間所有車輛的位置
+
+        Returns:
+            list: [{'driver', 'x', 'y', 'color', 'team'}, ...]
+        """
+        cars = []
+        for driver, buffer in self.buffers.items():
+            position = buffer.position_at(t_ms)
+            if position is None:
+                continue
+            info = self.driver_info.get(driver, {})
+            cars.append({
+                "driver": driver,
+                "x": position[0],
+                "y": position[1],
+                "color": info.get("color"),
+                "team": info.get("team"),
+            })
+        return cars
+
+    def to_dict(self):
+        return {
+            "buffers": {driver: buffer.to_dict() for driver, buffer in self.buffers.items()},
+            "driver_info": self.driver_info,
+            "outline": self.outline,
+            "metadata": self.metadata,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        buffers = {driver: DriverPositionBuffer.from_dict(b) for driver, b in data["buffers"].items()}
+        return cls(buffers, data.get("driver_info"), data.get("outline"), data.get("metadata"))
+
+    def save(self, file_path):
+        """儲存回放數據 (pickle)"""
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        with open(file_path, 'wb') as f:
+            pickle.dump(self.to_dict(), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, file_path):
+        """載入回放數據"""
+        with open(file_path, 'rb') as f:
+            return cls.from_dict(pickle.load(f))
+
+
+def _timedelta_to_ms(values):
+    """將 pandas Timedelta 序列轉為毫秒整數陣列"""
+    return (np.asarray(values, dtype='timedelta64[ns]').astype(np.int64) // 1_000_000).astype(np.int64)
+
+
+def _build_driver_info(session):
+    """由賽事結果建立車手代碼、車號與車隊顏色對照"""
+    driver_info = {}
+    number_to_code = {}
+    results = getattr(session, 'results', None)
+    if results is None or results.empty:
+        return driver_info, number_to_code
+
+    for _, row in results.iterrows():
+        number = str(row.get('DriverNumber', '')).strip()
+        code = str(row.get('Abbreviation', '') or number)
+        color = str(row.get('TeamColor', '') or '').strip()
+        driver_info[code] = {
+            "number": number,
+            "team": str(row.get('TeamName', '')),
+            "color": f"#{color}" if color and not color.startswith('#') else (color or None),
+        }
+        number_to_code[number] = code
+    return driver_info, number_to_code
+
+
+def _build_outline(session, buffers):
+    """以最快圈的位置樣本建立賽道輪廓"""
+    try:
+        laps = session.laps
+        valid_laps = laps[laps['LapTime'].notna() & laps['LapStartTime'].notna() & laps['Time'].notna()]
+        if valid_laps.empty:
+            return []
+        fastest = valid_laps.loc[valid_laps['LapTime'].idxmin()]
+        driver = str(fastest['Driver'])
+        if driver not in buffers:
+            return []
+
+        start_ms = int(_timedelta_to_ms([fastest['LapStartTime']])[0])
+        end_ms = int(_timedelta_to_ms([fastest['Time']])[0])
+        _, xs, ys = buffers[driver].slice_between(start_ms, end_ms)
+        if len(xs) < 2:
+            return []
+
+        steps = np.hypot(np.diff(xs), np.diff(ys))
+        distances = np.concatenate(([0.0], np.cumsum(steps)))
+        return [
+            {
+                "point_index": i + 1,
+                "distance_m": float(distances[i]),
+                "position_x": float(xs[i]),
+                "position_y": float(ys[i]),
+            }
+            for i in range(len(xs))
+        ]
+    except Exception as e:
+        print(f"[WARNING] 建立賽道輪廓失敗: {e}")
+        return []
+
+
+def build_replay_session(data_loader):
+    """由已載入的 FastF1 賽事建立全場回放數據
+
+    Args:
+        data_loader: 數據載入器 (需已載入 session)
+
+    Returns:
+        ReplaySession 或 None
+    """
+    session = getattr(data_loader, 'session', None)
+    if session is None:
+        print("[ERROR] 無法獲取賽事數據")
+        return None
+
+    try:
+        pos_data = session.pos_data
+    except Exception as e:
+        print(f"[ERROR] 賽事未載入位置數據: {e}")
+        return None
+
+    if not pos_data:
+        print("[ERROR] 沒有位置數據")
+        return None
+
+    driver_info, number_to_code = _build_driver_info(session)
+
+    buffers = {}
+    for number, telemetry in pos_data.items():
+        if telemetry is None or telemetry.empty:
+            continue
+        if not {'SessionTime', 'X', 'Y'}.issubset(telemetry.columns):
+            continue
+        code = number_to_code.get(str(number), str(number))
+        buffers[code] = DriverPositionBuffer.from_arrays(
+            _timedelta_to_ms(telemetry['SessionTime'].values),
+            telemetry['X'].values,
+            telemetry['Y'].values,
+        )
+
+    if not buffers:
+        print("[ERROR] 沒有可用的車手位置數據")
+        return None
+
+    metadata = {
+        "year": getattr(data_loader, 'year', None),
+        "race": getattr(data_loader, 'race_name', None),
+        "session": getattr(data_loader, 'session_type', None),
+        "generated_at": datetime.now().isoformat(),
+    }
+    return ReplaySession(buffers, driver_info, _build_outline(session, buffers), metadata)
+
+
+def get_replay_cache_path(year, race, session_type):
+    """回放數據緩存檔路徑"""
+    return os.path.join("cache", f"race_replay_{year}_{race}_{session_type}.pkl")
+
+
+def run_race_replay_export(data_loader, show_detailed_output=True):
+    """主要功能：匯出全場回放數據 (功能2.1)
+
+    Returns:
+        dict: 標準結果格式，data 含回放檔路徑與統計
+    """
+    print("[START] 開始建立全場回放數據...")
+
+    year = getattr(data_loader, 'year', None)
+    race = getattr(data_loader, 'race_name', None)
+    session_type = getattr(data_loader, 'session_type', None)
+    cache_path = get_replay_cache_path(year, race, session_type)
+    cache_used = os.path.exists(cache_path)
+
+    if cache_used:
+        print(f"📦 使用緩存數據: {cache_path}")
+        replay = ReplaySession.load(cache_path)
+    else:
+        print("🔄 重新計算 - 轉換所有車手位置數據...")
+        replay = build_replay_session(data_loader)
+        if replay is None:
+            return {"success": False, "message": "全場回放數據建立失敗：無位置數據", "function_id": "2.1"}
+        replay.save(cache_path)
+        print("💾 回放數據已緩存")
+
+    summary = {
+        "replay_file": os.path.abspath(cache_path),
+        "driver_count": len(replay.buffers),
+        "sample_count": sum(len(b) for b in replay.buffers.values()),
+        "duration_s": round(replay.duration_ms / 1000, 1),
+        "memory_bytes": replay.nbytes,
+        "outline_points": len(replay.outline),
+    }
+
+    if show_detailed_output:
+        print(f"[INFO] 車手數: {summary['driver_count']}")
+        print(f"[INFO] 位置樣本: {summary['sample_count']}")
+        print(f"[INFO] 回放長度: {summary['duration_s']} 秒")
+        print(f"[INFO] 緩衝區記憶體: {summary['memory_bytes'] / 1024 / 1024:.2f} MB")
+
+    # GUI 回放播放器依此行取得回放檔路徑
+    print(f"{REPLAY_FILE_PREFIX} {summary['replay_file']}")
+
+    print("\n✅ 全場回放數據建立完成！")
+    return {
+        "success": True,
+        "message": "全場回放數據建立完成",
+        "data": summary,
+        "cache_used": cache_used,
+        "cache_key": os.path.basename(cache_path),
+        "function_id": "2.1",
+    }
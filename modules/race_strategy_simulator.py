@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+F1 賽事策略模擬 - Monte Carlo Race Strategy Simulator
+以本場實測的輪胎衰退、進站損失與安全車機率，對候選策略進行大量比賽結果模擬
+
+- 候選策略預設取輪胎策略優化 (功能30) 的最佳組合，亦可自行指定配方與進站圈
+- 所有模擬以 (模擬次數 × 圈數) 的 NumPy 陣列批次計算，不逐次迴圈
+- 各策略使用相同的隨機情境 (共同隨機數)，策略間的比較只反映策略差異
+- 安全車/虛擬安全車出現在預定進站圈前的窗口內時提前進站，進站損失依類型打折
+- 可選多程序 (workers) 分配候選策略，各程序以相同種子重建情境
+
+模型:
+    stint 時間 = 圈數 × 基準圈速 + 衰退率 × 圈數 × (圈數 + 1) / 2 + 圈速雜訊
+    衰退率每次模擬依全場 stint 的離散程度抽樣，進站損失依本場有效進站抽樣
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from prettytable import PrettyTable
+
+try:
+    from .incident_timeline import get_incident_timeline
+    from .pitstop_table import get_pitstop_table
+    from .tire_stint_model import DEFAULT_PIT_LOSS, get_tire_model, simulate_strategies, stint_records
+except ImportError:
+    from incident_timeline import get_incident_timeline
+    from pitstop_table import get_pitstop_table
+    from tire_stint_model import DEFAULT_PIT_LOSS, get_tire_model, simulate_strategies, stint_records
+
+DEFAULT_SIMULATIONS = 20000
+
+# 預設候選策略數 (取自功能30的最佳策略)
+DEFAULT_CANDIDATES = 8
+
+# 沒有觀測到中性化時的先驗: 一場比賽出現安全車/虛擬安全車的機率
+DEFAULT_NEUTRALISATION_PROBABILITY = 0.45
+
+# 中性化期間進站的損失比例 (相對綠旗進站)
+NEUTRALISED_PIT_LOSS_FACTOR = {'SC': 0.45, 'VSC': 0.65}
+
+# 沒有觀測數據時的中性化平均圈數與 VSC 比例
+DEFAULT_NEUTRALISED_LAPS = {'SC': 4.0, 'VSC': 2.0}
+DEFAULT_VSC_SHARE = 0.4
+MAX_NEUTRALISED_LAPS = 8
+
+# 預定進站圈前幾圈內出現中性化即提前進站
+SC_PIT_WINDOW = 3
+
+# 單一策略最多進站次數
+MAX_STOPS = 5
+
+# 無法由擬合殘差估計時的單圈雜訊 (秒)
+DEFAULT_LAP_NOISE = 0.4
+
+# 無法估計時，衰退率標準差為平均衰退率的比例
+DEFAULT_DEGRADATION_SPREAD = 0.3
+
+# 進站損失的最小標準差 (秒)
+MIN_PIT_LOSS_STD = 0.5
+
+PERCENTILES = (10, 50, 90)
+
+
+def _lap_noise_by_compound(model):
+    """擬合圈相對所屬 stint 直線的殘差標準差 (依配方)"""
+    if model.laps.empty or model.stints.empty:
+        return {}
+    fit = model.laps.loc[model.laps['is_fit_lap'], ['Driver', 'stint', 'compound', 'tyre_age', 'fuel_corrected']]
+    lines = model.stints[['Driver', 'stint', 'base_lap_time', 'fuel_corrected_degradation']]
+    fit = fit.merge(lines, on=['Driver', 'stint'], how='inner').dropna(subset=['fuel_corrected_degradation'])
+    if fit.empty:
+        return {}
+    residual = fit['fuel_corrected'] - (fit['base_lap_time'] + fit['fuel_corrected_degradation'] * fit['tyre_age'])
+    return residual.groupby(fit['compound']).std().dropna().to_dict()
+
+
+def _neutralisation_inputs(data_loader, total_laps, sc_probability=None):
+    """本場安全車/虛擬安全車的每圈出現率、持續圈數與 VSC 比例"""
+    periods = []
+    try:
+        periods = [p for p in get_incident_timeline(data_loader).status_periods() if p['status'] in ('SC', 'VSC')]
+    except Exception as e:
+        print(f"[WARNING] 無法取得賽道狀態區間，使用預設安全車機率: {e}")
+
+    durations = {'SC': [], 'VSC': []}
+    for period in periods:
+        if period['start_lap'] is not None and period['end_lap'] is not None:
+            durations[period['status']].append(period['end_lap'] - period['start_lap'] + 1)
+
+    mean_laps = {
+        status: float(np.mean(values)) if values else DEFAULT_NEUTRALISED_LAPS[status]
+        for status, values in durations.items()
+    }
+    deployments = len(periods)
+    vsc_share = (len(durations['VSC']) / deployments) if deployments else DEFAULT_VSC_SHARE
+
+    laps = max(total_laps, 1)
+    if sc_probability is not None:
+        # 指定每場比賽的中性化機率時換算為每圈出現率
+        hazard = -np.log(max(1.0 - float(sc_probability), 1e-6)) / laps
+    else:
+        # 本場觀測與先驗 (相當於一場比賽) 的平均，避免單場 0 次或多次時過度外推
+        prior = -np.log(1.0 - DEFAULT_NEUTRALISATION_PROBABILITY)
+        hazard = (deployments + prior) / (2 * laps)
+
+    return {
+        "deployments": deployments,
+        "hazard_per_lap": float(hazard),
+        "race_probability": float(1.0 - np.exp(-hazard * laps)),
+        "vsc_share": float(vsc_share),
+        "mean_laps": mean_laps,
+    }
+
+
+def estimate_strategy_inputs(data_loader, sc_probability=None):
+    """由本場數據估計模擬參數
+
+    Returns:
+        dict: total_laps、compounds {配方: base/degradation/degradation_std/lap_noise}、
+              pit_loss、pit_loss_std、neutralisation；沒有擬合數據時返回 None
+    """
+    model = get_tire_model(data_loader)
+    summary = model.compound_summary()
+    if summary.empty or not model.total_laps:
+        return None
+
+    noise = _lap_noise_by_compound(model)
+    fitted = model.stints[model.stints['fuel_corrected_degradation'].notna()]
+    spread = fitted.groupby('compound')['fuel_corrected_degradation'].std()
+
+    compounds = {}
+    for row in summary.to_dict('records'):
+        if row['base_lap_time'] != row['base_lap_time']:
+            continue
+        degradation = float(row['fuel_corrected_degradation'])
+        degradation_std = spread.get(row['compound'], np.nan)
+        if degradation_std != degradation_std:
+            degradation_std = abs(degradation) * DEFAULT_DEGRADATION_SPREAD
+        compounds[row['compound']] = {
+            "base": float(row['base_lap_time']),
+            "degradation": degradation,
+            "degradation_std": float(degradation_std),
+            "lap_noise": float(noise.get(row['compound'], DEFAULT_LAP_NOISE)),
+        }
+    if not compounds:
+        return None
+
+    pitstops = get_pitstop_table(data_loader)
+    valid_stops = pitstops.loc[pitstops['is_valid'], 'pit_lane_time'].dropna() if not pitstops.empty else pd.Series(dtype=float)
+    pit_loss = float(valid_stops.median()) if len(valid_stops) else DEFAULT_PIT_LOSS
+    pit_loss_std = float(valid_stops.std()) if len(valid_stops) > 1 else 0.0
+
+    return {
+        "total_laps": int(model.total_laps),
+        "compounds": compounds,
+        "pit_loss": pit_loss,
+        "pit_loss_std": max(pit_loss_std, MIN_PIT_LOSS_STD),
+        "neutralisation": _neutralisation_inputs(data_loader, model.total_laps, sc_probability),
+        "compound_summary": summary,
+    }
+
+
+def draw_scenarios(inputs, n_sims, seed):
+    """抽樣所有策略共用的隨機情境
+
+    Returns:
+        dict: pit_factor (n_sims × 圈數，該圈進站的損失比例，綠旗為 1)、
+              pit_loss (n_sims × 最多進站次數)、衰退率與雜訊的標準常態抽樣
+    """
+    rng = np.random.default_rng(seed)
+    total_laps = inputs['total_laps']
+    neutral = inputs['neutralisation']
+
+    # 每圈是否開始中性化、類型與持續圈數
+    starts = rng.random((n_sims, total_laps)) < neutral['hazard_per_lap']
+    is_vsc = rng.random((n_sims, total_laps)) < neutral['vsc_share']
+    mean_laps = np.where(is_vsc, neutral['mean_laps']['VSC'], neutral['mean_laps']['SC'])
+    durations = np.minimum(1 + rng.poisson(np.maximum(mean_laps - 1, 0)), MAX_NEUTRALISED_LAPS)
+    start_factor = np.where(is_vsc, NEUTRALISED_PIT_LOSS_FACTOR['VSC'], NEUTRALISED_PIT_LOSS_FACTOR['SC'])
+    start_factor = np.where(starts, start_factor, 1.0)
+
+    # 依持續圈數向後展開 (迴圈次數為最長持續圈數，與模擬次數無關)
+    pit_factor = start_factor.copy()
+    for offset in range(1, MAX_NEUTRALISED_LAPS):
+        active = starts[:, :-offset] & (durations[:, :-offset] > offset)
+        shifted = np.where(active, start_factor[:, :-offset], 1.0)
+        np.minimum(pit_factor[:, offset:], shifted, out=pit_factor[:, offset:])
+
+    return {
+        "pit_factor": pit_factor,
+        "pit_loss": rng.normal(inputs['pit_loss'], inputs['pit_loss_std'], (n_sims, MAX_STOPS)),
+        "degradation_z": {compound: rng.standard_normal(n_sims) for compound in sorted(inputs['compounds'])},
+        "noise_z": rng.standard_normal((n_sims, MAX_STOPS + 1)),
+    }
+
+
+def simulate_strategy_times(strategy, inputs, scenarios):
+    """以共用情境計算單一策略在所有模擬中的比賽時間
+
+    Returns:
+        (ndarray, ndarray): 比賽時間 (秒)、是否至少一次於中性化期間進站
+    """
+    total_laps = inputs['total_laps']
+    pit_factor = scenarios['pit_factor']
+    n_sims = pit_factor.shape[0]
+
+    pit_laps = [int(lap) for lap in strategy['pit_laps']]
+    actual_laps = []
+    pit_time = np.zeros(n_sims)
+    neutralised_stop = np.zeros(n_sims, dtype=bool)
+    previous = np.zeros(n_sims, dtype=int)
+    for stop, planned in enumerate(pit_laps):
+        # 預定進站圈前的窗口內第一個中性化圈 (圈數 1 起算，欄位索引為圈數 - 1)
+        first = max(planned - SC_PIT_WINDOW, 1)
+        window = pit_factor[:, first - 1:planned] < 1.0
+        has_neutral = window.any(axis=1)
+        lap = np.where(has_neutral, first + window.argmax(axis=1), planned)
+        lap = np.minimum(np.maximum(lap, previous + 1), total_laps - 1)
+        factor = pit_factor[np.arange(n_sims), lap - 1]
+        pit_time += scenarios['pit_loss'][:, stop] * factor
+        neutralised_stop |= factor < 1.0
+        actual_laps.append(lap)
+        previous = lap
+
+    boundaries = [np.zeros(n_sims, dtype=int)] + actual_laps + [np.full(n_sims, total_laps)]
+    race_time = pit_time
+    for index, compound in enumerate(strategy['compounds']):
+        params = inputs['compounds'][compound]
+        length = (boundaries[index + 1] - boundaries[index]).astype(float)
+        degradation = np.maximum(params['degradation'] + params['degradation_std'] * scenarios['degradation_z'][compound], 0.0)
+        race_time = (race_time + length * params['base'] + degradation * length * (length + 1) / 2
+                     + params['lap_noise'] * np.sqrt(length) * scenarios['noise_z'][:, index])
+    return race_time, neutralised_stop
+
+
+def _simulate_chunk(payload):
+    """程序池工作函數: 以相同種子重建情境並計算一組策略 (需為模組層級以便序列化)"""
+    strategies, inputs, n_sims, seed = payload
+    scenarios = draw_scenarios(inputs, n_sims, seed)
+    return [simulate_strategy_times(strategy, inputs, scenarios) for strategy in strategies]
+
+
+def normalise_strategy(strategy, inputs):
+    """檢查並整理策略 ({'compounds': [...], 'pit_laps': [...]})，不合法時返回 None"""
+    compounds = [str(c).upper() for c in strategy.get('compounds', [])]
+    pit_laps = sorted(int(lap) for lap in strategy.get('pit_laps', []))
+    total_laps = inputs['total_laps']
+    if len(compounds) != len(pit_laps) + 1 or not pit_laps or len(pit_laps) > MAX_STOPS:
+        return None
+    if any(c not in inputs['compounds'] for c in compounds):
+        return None
+    if pit_laps[0] < 1 or pit_laps[-1] >= total_laps or len(set(pit_laps)) != len(pit_laps):
+        return None
+    stint_lengths = np.diff([0] + pit_laps + [total_laps]).tolist()
+    return {"stops": len(pit_laps), "compounds": compounds, "pit_laps": pit_laps, "stint_lengths": stint_lengths}
+
+
+def _candidate_strategies(inputs, strategies, candidates):
+    if strategies:
+        normalised = [normalise_strategy(s, inputs) for s in strategies]
+        invalid = sum(1 for s in normalised if s is None)
+        if invalid:
+            print(f"[WARNING] {invalid} 個指定策略不合法 (配方/進站圈)，已略過")
+        return [s for s in normalised if s is not None]
+
+    params = {c: (p['base'], p['degradation']) for c, p in inputs['compounds'].items()}
+    best = simulate_strategies(params, inputs['total_laps'], inputs['pit_loss'])
+    return [normalise_strategy(s, inputs) for s in best[:candidates]]
+
+
+def run_monte_carlo(inputs, strategies, n_sims=DEFAULT_SIMULATIONS, workers=1, seed=None):
+    """對候選策略執行 Monte Carlo 模擬
+
+    Returns:
+        (list, int): 各策略的統計 (依平均比賽時間排序)、使用的隨機種子
+    """
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % (2 ** 32))
+    workers = max(1, min(int(workers or 1), len(strategies)))
+
+    if workers == 1:
+        outcomes = _simulate_chunk((strategies, inputs, n_sims, seed))
+    else:
+        # 策略輪流分配給各程序，完成後依原順序合併
+        chunks = [strategies[i::workers] for i in range(workers)]
+        worker_inputs = {key: value for key, value in inputs.items() if key != 'compound_summary'}
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(_simulate_chunk, [(chunk, worker_inputs, n_sims, seed) for chunk in chunks]))
+        outcomes = [None] * len(strategies)
+        for offset, part in enumerate(parts):
+            outcomes[offset::workers] = part
+
+    times = np.vstack([race_time for race_time, _ in outcomes])
+    fastest = np.bincount(times.argmin(axis=0), minlength=len(strategies)) / n_sims
+    reference = times.mean(axis=1).min()
+
+    results = []
+    for index, strategy in enumerate(strategies):
+        race_time, neutralised_stop = outcomes[index]
+        p10, p50, p90 = np.percentile(race_time, PERCENTILES)
+        results.append({
+            **strategy,
+            "mean_time": round(float(race_time.mean()), 3),
+            "std_time": round(float(race_time.std()), 3),
+            "p10_time": round(float(p10), 3),
+            "p50_time": round(float(p50), 3),
+            "p90_time": round(float(p90), 3),
+            "gap_to_best": round(float(race_time.mean() - reference), 3),
+            "win_probability": round(float(fastest[index]), 4),
+            "neutralised_stop_probability": round(float(neutralised_stop.mean()), 4),
+        })
+    results.sort(key=lambda item: item['mean_time'])
+    return results, seed
+
+
+def display_simulation_results(results, inputs, n_sims, elapsed):
+    """顯示策略模擬結果表格"""
+    neutral = inputs['neutralisation']
+    print(f"\n🎲 Monte Carlo 策略模擬 ({n_sims:,} 次/策略，比賽 {inputs['total_laps']} 圈，耗時 {elapsed:.2f}s)")
+    print(f"   進站損失 {inputs['pit_loss']:.1f}s ± {inputs['pit_loss_std']:.1f}s | "
+          f"中性化機率 {neutral['race_probability']:.0%}/場 (本場 {neutral['deployments']} 次)")
+
+    table = PrettyTable()
+    table.field_names = ["排名", "進站", "配方順序", "進站圈", "平均差距", "P10-P90 範圍", "最快機率", "中性化進站"]
+    table.align = "c"
+    for rank, item in enumerate(results, 1):
+        table.add_row([
+            rank, f"{item['stops']} 停", " → ".join(item['compounds']),
+            ", ".join(str(v) for v in item['pit_laps']),
+            f"+{item['gap_to_best']:.1f}s",
+            f"{item['p90_time'] - item['p10_time']:.1f}s",
+            f"{item['win_probability']:.1%}",
+            f"{item['neutralised_stop_probability']:.0%}",
+        ])
+    print(table)
+
+
+def run_race_strategy_simulation(data_loader, strategies=None, n_sims=DEFAULT_SIMULATIONS, workers=1,
+                                 seed=None, sc_probability=None, candidates=DEFAULT_CANDIDATES,
+                                 show_detailed_output=True):
+    """賽事策略模擬 (功能36)
+
+    Args:
+        data_loader: 已載入賽段的數據載入器
+        strategies: 指定候選策略 [{'compounds': ['MEDIUM', 'HARD'], 'pit_laps': [22]}, ...]；
+                    None 時取功能30的最佳策略
+        n_sims: 每個策略的模擬次數
+        workers: 平行處理候選策略的程序數
+        seed: 隨機種子 (相同種子可重現結果)
+        sc_probability: 指定每場比賽的安全車/虛擬安全車機率 (None 時由本場數據估計)
+        candidates: 預設候選策略數
+    """
+    print("🎲 開始賽事策略模擬...")
+    start = time.perf_counter()
+    inputs = estimate_strategy_inputs(data_loader, sc_probability=sc_probability)
+    if inputs is None:
+        return {"success": False, "message": "賽事策略模擬失敗：沒有足夠的 stint 擬合數據", "function_id": "36"}
+
+    candidate_list = [s for s in _candidate_strategies(inputs, strategies, candidates) if s is not None]
+    if not candidate_list:
+        return {"success": False, "message": "賽事策略模擬失敗：沒有可模擬的候選策略", "function_id": "36"}
+
+    n_sims = max(int(n_sims or DEFAULT_SIMULATIONS), 1)
+    results, seed = run_monte_carlo(inputs, candidate_list, n_sims=n_sims, workers=workers, seed=seed)
+    elapsed = time.perf_counter() - start
+
+    if show_detailed_output:
+        display_simulation_results(results, inputs, n_sims, elapsed)
+
+    print("\n✅ 賽事策略模擬完成！")
+    return {
+        "success": True,
+        "message": "賽事策略模擬完成",
+        "data": {
+            "analysis_type": "race_strategy_simulation",
+            "execution_time": f"{elapsed:.2f}秒",
+            "total_laps": inputs['total_laps'],
+            "simulations": n_sims,
+            "seed": seed,
+            "pit_loss": round(inputs['pit_loss'], 3),
+            "pit_loss_std": round(inputs['pit_loss_std'], 3),
+            "neutralisation": inputs['neutralisation'],
+            "compounds": inputs['compounds'],
+            "compound_summary": stint_records(inputs['compound_summary']),
+            "strategies": results,
+        },
+        "function_id": "36",
+    }
@@ -9,9 +9,17 @@ import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 import os
-import json
 import re
 
+try:
+    from .weather_arrays import get_weather_arrays, get_lap_weather, rain_mask
+    from .pitstop_table import resolve_laps
+    from .json_export import write_json
+except ImportError:
+    from weather_arrays import get_weather_arrays, get_lap_weather, rain_mask
+    from pitstop_table import resolve_laps
+    from json_export import write_json
+
 def sanitize_filename(filename):
     """清理檔案名稱，移除不合法字符
     
@@ -454,6 +462,72 @@ class RainIntensityAnalyzerJSON:
         except Exception as e:
             print(f"[WARNING] 顯示JSON預覽時發生錯誤: {e}")
 
+    @staticmethod
+    def _build_weather_timeline(weather_data):
+        """由天氣欄位陣列建立時間序列紀錄"""
+        n = len(weather_data)
+        index_values = weather_data.index.to_numpy()
+        if 'Time' in weather_data.columns:
+            time_points = [format_time_for_json(t) for t in weather_data['Time']]
+        else:
+            time_points = [f"T+{index}" for index in index_values]
+        
+        def numeric(column):
+            if column not in weather_data.columns:
+                return None
+            return pd.to_numeric(weather_data[column], errors='coerce').to_numpy(dtype=float)
+        
+        measurements = [
+            (key, values, unit)
+            for key, values, unit in (
+                ("air_temperature", numeric('AirTemp'), "°C"),
+                ("humidity", numeric('Humidity'), "%"),
+                ("pressure", numeric('Pressure'), "mb"),
+                ("wind_speed", numeric('WindSpeed'), "m/s"),
+            )
+            if values is not None
+        ]
+        
+        raining = rain_mask(weather_data['Rainfall']) if 'Rainfall' in weather_data.columns else None
+        intensity = description = None
+        humidity = numeric('Humidity')
+        if raining is not None and humidity is not None:
+            # 基於濕度推算降雨強度
+            conditions = [humidity >= 85, humidity >= 80, humidity >= 75, ~np.isnan(humidity)]
+            intensity = np.select(conditions, ["heavy", "moderate", "light", "drizzle"], default="")
+            description = np.select(conditions, ["大雨 [RAIN][RAIN][RAIN]", "中雨 [RAIN][RAIN]",
+                                                 "小雨 [RAIN]", "毛毛雨 [DROPLET]"], default="")
+        
+        timeline_data = []
+        for i in range(n):
+            weather_point = {
+                "time_index": int(index_values[i]),
+                "time_point": time_points[i],
+                "weather_data": {}
+            }
+            
+            # 添加所有可用的天氣參數
+            for key, values, unit in measurements:
+                if not np.isnan(values[i]):
+                    weather_point["weather_data"][key] = {
+                        "value": float(values[i]),
+                        "unit": unit
+                    }
+            
+            if raining is not None:
+                is_raining = bool(raining[i])
+                weather_point["weather_data"]["rainfall"] = {
+                    "is_raining": is_raining,
+                    "status": "wet" if is_raining else "dry"
+                }
+                if is_raining and intensity is not None and intensity[i]:
+                    weather_point["weather_data"]["rainfall"]["intensity"] = str(intensity[i])
+                    weather_point["weather_data"]["rainfall"]["description"] = str(description[i])
+            
+            timeline_data.append(weather_point)
+        
+        return timeline_data
+    
     def generate_json_output(self, enable_debug=False):
         """生成JSON格式的分析結果，包含標註系統和完整數據"""
         try:
@@ -537,67 +611,24 @@ class RainIntensityAnalyzerJSON:
                             "std": float(data.std()) if len(data) > 1 else 0.0
                         }
             
-            # 生成詳細的天氣時間序列數據
-            timeline_data = []
-            for index, row in self.weather_data.iterrows():
-                weather_point = {
-                    "time_index": int(index),
-                    "time_point": format_time_for_json(row.get('Time', f"T+{index}")),
-                    "weather_data": {}
+            # 生成詳細的天氣時間序列數據 - 先轉為欄位陣列，再組合每筆紀錄
+            timeline_data = self._build_weather_timeline(self.weather_data)
+            
+            # 降雨時段 (run-length encoding) 與降雨圈次 (逐圈對齊天氣樣本)
+            weather = get_weather_arrays(self.weather_data)
+            analysis["rain_periods"] = [
+                {
+                    "start": format_time_for_json(timedelta(seconds=start)),
+                    "end": format_time_for_json(timedelta(seconds=end)),
+                    "duration_minutes": round((end - start) / 60, 1)
                 }
-                
-                # 添加所有可用的天氣參數
-                if 'AirTemp' in row and pd.notna(row['AirTemp']):
-                    weather_point["weather_data"]["air_temperature"] = {
-                        "value": float(row['AirTemp']),
-                        "unit": "°C"
-                    }
-                
-                if 'Humidity' in row and pd.notna(row['Humidity']):
-                    weather_point["weather_data"]["humidity"] = {
-                        "value": float(row['Humidity']),
-                        "unit": "%"
-                    }
-                
-                if 'Pressure' in row and pd.notna(row['Pressure']):
-                    weather_point["weather_data"]["pressure"] = {
-                        "value": float(row['Pressure']),
-                        "unit": "mb"
-                    }
-                
-                if 'WindSpeed' in row and pd.notna(row['WindSpeed']):
-                    weather_point["weather_data"]["wind_speed"] = {
-                        "value": float(row['WindSpeed']),
-                        "unit": "m/s"
-                    }
-                
-                if 'Rainfall' in row:
-                    is_raining = bool(row['Rainfall'])
-                    weather_point["weather_data"]["rainfall"] = {
-                        "is_raining": is_raining,
-                        "status": "wet" if is_raining else "dry"
-                    }
-                    
-                    # 基於濕度推算降雨強度
-                    if is_raining and 'Humidity' in row and pd.notna(row['Humidity']):
-                        humidity = float(row['Humidity'])
-                        if humidity >= 85:
-                            rain_intensity_level = "heavy"
-                            rain_description = "大雨 [RAIN][RAIN][RAIN]"
-                        elif humidity >= 80:
-                            rain_intensity_level = "moderate"
-                            rain_description = "中雨 [RAIN][RAIN]"
-                        elif humidity >= 75:
-                            rain_intensity_level = "light"
-                            rain_description = "小雨 [RAIN]"
-                        else:
-                            rain_intensity_level = "drizzle"
-                            rain_description = "毛毛雨 [DROPLET]"
-                        
-                        weather_point["weather_data"]["rainfall"]["intensity"] = rain_intensity_level
-                        weather_point["weather_data"]["rainfall"]["description"] = rain_description
-                
-                timeline_data.append(weather_point)
+                for start, end in weather.rain_periods()
+            ]
+            laps = resolve_laps(self.data_loader if self.data_loader is not None else self.session)
+            lap_weather = get_lap_weather({'weather_data': self.weather_data, 'laps': laps})
+            if lap_weather is not None and 'LapNumber' in lap_weather.columns:
+                rain_laps = lap_weather.loc[lap_weather['weather_rainfall'].astype(bool), 'LapNumber'].dropna()
+                analysis["rain_laps"] = sorted(int(lap) for lap in rain_laps.unique())
             
             analysis["detailed_weather_timeline"] = timeline_data
             analysis["total_data_points"] = len(timeline_data)
@@ -683,9 +714,7 @@ def run_rain_intensity_analysis_json(data_loader, enable_debug=False, output_fil
                     
                     if output_file:
                         try:
-                            os.makedirs("json", exist_ok=True)
-                            with open(output_file, 'w', encoding='utf-8') as f:
-                                json.dump(cached_result, f, ensure_ascii=False, indent=2)
+                            write_json(output_file, cached_result)
                             
                             # 獲取絕對路徑供點選
                             abs_path = os.path.abspath(output_file)
@@ -715,9 +744,7 @@ def run_rain_intensity_analysis_json(data_loader, enable_debug=False, output_fil
                     
                     if output_file:
                         try:
-                            os.makedirs("json", exist_ok=True)
-                            with open(output_file, 'w', encoding='utf-8') as f:
-                                json.dump(cached_result, f, ensure_ascii=False, indent=2)
+                            write_json(output_file, cached_result)
                             
                             # 獲取絕對路徑供點選
                             abs_path = os.path.abspath(output_file)
@@ -776,9 +803,7 @@ def run_rain_intensity_analysis_json(data_loader, enable_debug=False, output_fil
         
         if output_file:
             try:
-                os.makedirs("json", exist_ok=True)
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(json_result, f, ensure_ascii=False, indent=2)
+                write_json(output_file, json_result)
                 
                 # 獲取絕對路徑供點選
                 abs_path = os.path.abspath(output_file)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+F1 安全車影響分析 - Safety Car Impact Analysis
+以逐圈情境表與事件時間軸的 SC / VSC / 紅旗區間，計算全場車手的名次得失與進站省時
+
+- 中立化時段取自事件時間軸 (VSC 結束階段併入前一個 VSC)
+- 名次得失: 時段開始前一圈與恢復比賽後 RESTART_LAPS 圈的名次差 (車手 × 圈數名次矩陣一次查詢)
+- 進站損失: (進站圈 + 出站圈) - 同圈全場中位圈速 × 2，中立化下進站與綠旗進站中位數比較即為省時
+- 全部以 DataFrame 合併 / 分組完成，不逐車手迴圈
+
+查詢範例:
+    impact = analyze_safety_car_impact(get_lap_context(data_loader), get_incident_timeline(data_loader))
+    impact['periods']            # 各中立化時段
+    impact['drivers']            # 各車手名次得失與進站省時
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import numpy as np
+import pandas as pd
+from prettytable import PrettyTable
+
+try:
+    from .incident_timeline import TRACK_STATUS_LABELS, get_incident_timeline
+    from .lap_context import get_lap_context, overlaps_intervals
+    from .session_tables import json_value
+    from .tracing import span
+except ImportError:
+    from incident_timeline import TRACK_STATUS_LABELS, get_incident_timeline
+    from lap_context import get_lap_context, overlaps_intervals
+    from session_tables import json_value
+    from tracing import span
+
+NEUTRALISED_STATUSES = ('SC', 'VSC', 'RED')
+
+# 恢復比賽後幾圈再比較名次 (讓重新起跑的名次變化穩定)
+RESTART_LAPS = 2
+
+
+def neutralisation_periods(timeline):
+    """SC / VSC / 紅旗時段 (VSC_ENDING 併入前一個 VSC)"""
+    periods = []
+    for period in timeline.status_periods():
+        if period['status'] == 'VSC_ENDING' and periods and periods[-1]['status'] == 'VSC':
+            periods[-1]['end_ms'] = period['end_ms']
+            periods[-1]['end_lap'] = period['end_lap'] or periods[-1]['end_lap']
+            continue
+        if period['status'] in NEUTRALISED_STATUSES and period['start_lap'] is not None:
+            periods.append(dict(period))
+    for number, period in enumerate(periods, 1):
+        period['period'] = number
+        if period['end_lap'] is None:
+            period['end_lap'] = period['start_lap']
+    return periods
+
+
+def position_changes(context, periods):
+    """各時段各車手的名次得失 (正值為前進)"""
+    positions = context.position_matrix()
+    columns = ['period', 'status', 'Driver', 'position_before', 'position_after', 'positions_gained']
+    if positions.empty or not periods:
+        return pd.DataFrame(columns=columns)
+    laps = positions.columns.to_numpy(dtype=float)
+    frames = []
+    for period in periods:
+        before_lap = period['start_lap'] - 1
+        after_lap = min(period['end_lap'] + RESTART_LAPS, laps.max())
+        before = positions[before_lap] if before_lap in positions.columns else pd.Series(np.nan, positions.index)
+        after = positions[after_lap] if after_lap in positions.columns else pd.Series(np.nan, positions.index)
+        frames.append(pd.DataFrame({
+            'period': period['period'],
+            'status': period['status'],
+            'Driver': positions.index,
+            'position_before': before.to_numpy(),
+            'position_after': after.to_numpy(),
+        }))
+    changes = pd.concat(frames, ignore_index=True)
+    changes['positions_gained'] = changes['position_before'] - changes['position_after']
+    return changes[columns]
+
+
+def pit_stop_losses(context):
+    """每次進站的損失時間與是否在中立化下進站"""
+    laps = context.laps
+    columns = ['Driver', 'LapNumber', 'neutralised', 'under_sc', 'under_vsc', 'pit_loss']
+    stops = laps[laps['pit_in']]
+    if stops.empty:
+        return pd.DataFrame(columns=columns)
+
+    field = context.field_lap_median()
+    out_laps = laps[['Driver', 'LapNumber', 'lap_seconds']].assign(LapNumber=laps['LapNumber'] - 1) \
+        .rename(columns={'lap_seconds': 'out_lap_seconds'})
+    stops = stops.merge(out_laps, on=['Driver', 'LapNumber'], how='left')
+    reference = stops['LapNumber'].map(field) + (stops['LapNumber'] + 1).map(field)
+    stops['pit_loss'] = stops['lap_seconds'] + stops['out_lap_seconds'] - reference
+    return stops[columns].reset_index(drop=True)
+
+
+def stop_periods(context, stops, periods):
+    """中立化下進站所屬的時段編號 (與 neutralised 旗標相同的圈時間重疊判斷；其餘為 NaN)"""
+    period_of = np.full(len(stops), np.nan)
+    if stops.empty or not periods:
+        return period_of
+    keys = ['Driver', 'LapNumber']
+    lap_times = context.laps[keys + ['session_start', 'session_end']].drop_duplicates(keys)
+    times = stops[keys].merge(lap_times, on=keys, how='left')
+    start_ms = times['session_start'].to_numpy(dtype=float) * 1000.0
+    end_ms = times['session_end'].to_numpy(dtype=float) * 1000.0
+    neutralised = stops['neutralised'].to_numpy(dtype=bool)
+    for period in periods:
+        inside = neutralised & np.isnan(period_of) & overlaps_intervals(
+            start_ms, end_ms, np.array([period['start_ms']]), np.array([period['end_ms']]))
+        period_of[inside] = period['period']
+    return period_of
+
+
+def analyze_safety_car_impact(context, timeline):
+    """安全車影響: 時段、名次得失、進站省時與車手摘要
+
+    Returns:
+        dict: periods, positions, stops, green_pit_loss, drivers；無中立化時段時 periods 為空
+    """
+    periods = neutralisation_periods(timeline)
+    positions = position_changes(context, periods)
+    stops = pit_stop_losses(context)
+
+    green = stops.loc[~stops['neutralised'], 'pit_loss'].dropna() if not stops.empty else pd.Series(dtype=float)
+    green_loss = float(green.median()) if not green.empty else np.nan
+    stops['time_saved'] = green_loss - stops['pit_loss'].astype(float)
+
+    drivers = pd.DataFrame({'Driver': sorted(context.laps['Driver'].unique())}) if not context.empty \
+        else pd.DataFrame(columns=['Driver'])
+    if not positions.empty:
+        gained = positions.groupby('Driver').agg(periods=('period', 'nunique'),
+                                                 positions_gained=('positions_gained', 'sum'))
+        drivers = drivers.merge(gained.reset_index(), on='Driver', how='left')
+    else:
+        drivers['periods'] = 0
+        drivers['positions_gained'] = 0.0
+    neutral_stops = stops[stops['neutralised'].astype(bool)]
+    saved = neutral_stops.groupby('Driver').agg(neutralised_stops=('LapNumber', 'size'),
+                                                time_saved=('time_saved', 'sum'))
+    drivers = drivers.merge(saved.reset_index(), on='Driver', how='left')
+    drivers['neutralised_stops'] = drivers['neutralised_stops'].fillna(0).astype(int)
+    drivers = drivers.sort_values('positions_gained', ascending=False, kind='mergesort', na_position='last')
+
+    stop_period = stop_periods(context, stops, periods)
+    for period in periods:
+        period['label'] = TRACK_STATUS_LABELS.get(period['status'], period['status'])
+        period['pit_stops'] = int((stop_period == period['period']).sum())
+    return {
+        'periods': periods,
+        'positions': positions,
+        'stops': stops,
+        'green_pit_loss': green_loss,
+        'drivers': drivers.reset_index(drop=True),
+    }
+
+
+def impact_records(frame):
+    """影響表轉為字典列表"""
+    return [{key: json_value(value) for key, value in row.items()} for row in frame.to_dict('records')]
+
+
+def display_periods(periods):
+    table = PrettyTable()
+    table.field_names = ["時段", "狀態", "開始圈", "結束圈", "中立化下進站"]
+    table.align = "c"
+    for period in periods:
+        table.add_row([period['period'], period['label'], period['start_lap'], period['end_lap'],
+                       period['pit_stops']])
+    print("\n🚗 中立化時段")
+    print(table)
+
+
+def display_driver_impact(drivers, green_loss):
+    table = PrettyTable()
+    table.field_names = ["車手", "經歷時段", "名次得失", "中立化進站", "進站省時"]
+    table.align = "c"
+    for row in drivers.to_dict('records'):
+        gained = row['positions_gained']
+        saved = row['time_saved']
+        table.add_row([
+            row['Driver'], int(row['periods']) if row['periods'] == row['periods'] else 0,
+            f"{gained:+.0f}" if gained == gained else "N/A",
+            row['neutralised_stops'], f"{saved:.1f}s" if saved == saved else "-",
+        ])
+    baseline = f"{green_loss:.1f}s" if green_loss == green_loss else "N/A"
+    print(f"\n📊 各車手安全車影響 (綠旗進站損失中位數: {baseline})")
+    print(table)
+
+
+def run_safety_car_impact_analysis(data_loader, show_detailed_output=True):
+    """安全車影響分析 (功能39)"""
+    context = get_lap_context(data_loader)
+    if context.empty:
+        return {"success": False, "message": "沒有可用的圈速數據，無法分析安全車影響", "function_id": "39"}
+
+    with span("analysis.safety_car_impact"):
+        impact = analyze_safety_car_impact(context, get_incident_timeline(data_loader))
+    if not impact['periods']:
+        return {
+            "success": True,
+            "message": "本場沒有安全車、虛擬安全車或紅旗時段",
+            "data": {"periods": [], "green_pit_loss": json_value(impact['green_pit_loss'])},
+            "function_id": "39",
+        }
+
+    if show_detailed_output:
+        display_periods(impact['periods'])
+        display_driver_impact(impact['drivers'], impact['green_pit_loss'])
+
+    return {
+        "success": True,
+        "message": f"安全車影響分析完成 ({len(impact['periods'])} 個中立化時段)",
+        "data": {
+            "periods": [{key: json_value(value) for key, value in period.items()} for period in impact['periods']],
+            "green_pit_loss": json_value(impact['green_pit_loss']),
+            "drivers": impact_records(impact['drivers']),
+            "positions": impact_records(impact['positions']),
+            "pit_stops": impact_records(impact['stops']),
+        },
+        "function_id": "39",
+    }
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+F1 分析表共用工具 - Session Table Helpers
+各場賽事分析表模組 (事件時間軸、進站表、輪胎模型等) 共用的快取與數值轉換
+
+- IdentityCache 為每場賽事的 LRU 快取，以來源物件本身確認，避免 id 被回收後誤用
+- 快取自動登記到 /metrics 的項目數量表，並記錄命中/未命中；建立時包在追蹤 span 內
+- json_value() / to_seconds() 為輸出列與 timedelta 欄位的數值轉換
+
+使用範例:
+    _table_cache = IdentityCache("pitstop_table", MAX_CACHED_TABLES)
+    table = _table_cache.get_or_build(laps, lambda: build_pitstop_table(laps), span_name="table.pitstops")
+    row = {"lap_time": json_value(lap_time), "sectors": to_seconds(laps["Sector1Time"])}
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .metrics import record_cache, register_cache
+    from .tracing import span
+except ImportError:
+    from metrics import record_cache, register_cache
+    from tracing import span
+
+
+class IdentityCache:
+    """以來源 DataFrame 等物件為鍵的 LRU 快取
+
+    鍵為來源物件的 id() 加上額外參數；取用時以物件本身確認，避免 id 被回收後誤用
+    """
+
+    def __init__(self, namespace, maxsize):
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        register_cache(namespace, self)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_build(self, sources, builder, key=None, span_name=None, record=True, **span_attrs):
+        """取得快取值，未命中時以 builder() 建立
+
+        Args:
+            sources: 來源物件 (單一物件或 tuple，任一被替換即視為未命中)
+            builder: 無參數的建立函數 (返回值可為 None)
+            key: 額外的快取鍵 (如分段數、測速點)
+            span_name: 建立時的追蹤 span 名稱
+            record: 是否記錄命中/未命中 (呼叫端自行記錄時設為 False)
+        """
+        sources = sources if isinstance(sources, tuple) else (sources,)
+        cache_key = tuple(id(source) for source in sources) + (key,)
+        entry = self._entries.get(cache_key)
+        if entry is not None and all(a is b for a, b in zip(entry[0], sources)):
+            self._entries.move_to_end(cache_key)
+            if record:
+                record_cache(self.namespace, hit=True)
+            return entry[1]
+
+        if record:
+            record_cache(self.namespace, hit=False)
+        if span_name is None:
+            value = builder()
+        else:
+            with span(span_name, **span_attrs):
+                value = builder()
+        self._entries[cache_key] = (sources, value)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+
+def json_value(value, digits=3):
+    """轉為可 JSON 序列化的數值 (NaN → None，浮點數取 digits 位小數)"""
+    if value is None or (isinstance(value, (float, np.floating)) and np.isnan(value)):
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (np.integer, int)):
+        return int(value)
+    if isinstance(value, (np.floating, float)):
+        return round(float(value), digits)
+    return value
+
+
+def to_seconds(values):
+    """timedelta / 數值欄位轉為秒 (float ndarray，無法轉換為 NaN)"""
+    if pd.api.types.is_timedelta64_dtype(values):
+        return values.dt.total_seconds().to_numpy(dtype=float)
+    return pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
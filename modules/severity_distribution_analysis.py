@@ -12,6 +12,31 @@ import pandas as pd
 from datetime import datetime
 from prettytable import PrettyTable
 
+try:
+    from .race_control_classifier import (get_classified_messages, derived_column, keywords,
+                                          classify_text, classify_series, match_series)
+except ImportError:
+    from modules.race_control_classifier import (get_classified_messages, derived_column, keywords,
+                                                 classify_text, classify_series, match_series)
+
+# 嚴重程度分佈的事故篩選與分類規則 (依序比對)
+SEVERITY_INCIDENT_PATTERN = keywords(
+    'ACCIDENT', 'COLLISION', 'CRASH', 'INCIDENT',
+    'SAFETY CAR', 'RED FLAG', 'YELLOW FLAG',
+    'INVESTIGATION', 'PENALTY', 'CONTACT'
+)
+SEVERITY_RULES = [
+    ('CRITICAL', keywords('RED FLAG', 'RACE SUSPENSION', 'MEDICAL CAR', 'AMBULANCE', 'CHEQUERED FLAG')),
+    ('HIGH', keywords('SAFETY CAR', 'YELLOW FLAG', 'COLLISION', 'CRASH')),
+    ('MEDIUM', keywords('INVESTIGATION', 'CONTACT', 'PENALTY', 'TIME PENALTY')),
+]
+SEVERITY_CATEGORY_RULES = [
+    ('ACCIDENT', keywords('ACCIDENT', 'COLLISION', 'CRASH', 'CONTACT')),
+    ('FLAG', keywords('SAFETY CAR', 'RED FLAG', 'YELLOW FLAG', 'CHEQUERED FLAG')),
+    ('INVESTIGATION', keywords('INVESTIGATION')),
+    ('PENALTY', keywords('PENALTY')),
+]
+
 def generate_cache_key(session_info):
     """生成快取鍵值"""
     return f"severity_distribution_{session_info.get('year', 2024)}_{session_info.get('event_name', 'Unknown')}_{session_info.get('session_type', 'R')}"
@@ -40,23 +65,7 @@ def save_cache(data, cache_key):
 
 def assess_severity(message):
     """評估事故嚴重程度"""
-    message = message.upper()
-    
-    # CRITICAL - 最高嚴重程度
-    if any(word in message for word in ['RED FLAG', 'RACE SUSPENSION', 'MEDICAL CAR', 'AMBULANCE', 'CHEQUERED FLAG']):
-        return 'CRITICAL'
-    
-    # HIGH - 高嚴重程度  
-    elif any(word in message for word in ['SAFETY CAR', 'YELLOW FLAG', 'COLLISION', 'CRASH']):
-        return 'HIGH'
-    
-    # MEDIUM - 中等嚴重程度
-    elif any(word in message for word in ['INVESTIGATION', 'CONTACT', 'PENALTY', 'TIME PENALTY']):
-        return 'MEDIUM'
-    
-    # LOW - 低嚴重程度
-    else:
-        return 'LOW'
+    return classify_text(message.upper(), SEVERITY_RULES, 'LOW')
 
 def calculate_risk_score(severity_data):
     """計算比賽風險評分 (0-100)"""
@@ -117,42 +126,38 @@ def analyze_severity_distribution(session):
             race_control = session.race_control_messages
             
             if race_control is not None and not race_control.empty:
-                # 找出最後一圈圈數，用於過濾正常結束的 CHEQUERED FLAG
-                max_lap = race_control['Lap'].max() if 'Lap' in race_control.columns else 0
                 incidents_by_lap = {}
                 
-                for _, message in race_control.iterrows():
-                    msg_text = str(message.get('Message', '')).upper()
+                # 共用分類引擎 - 整欄分類一次，並過濾最後一圈的正常比賽結束 CHEQUERED FLAG
+                classified = get_classified_messages(race_control)
+                is_incident = derived_column(classified, 'severity_dist_is_incident',
+                                             lambda f: match_series(f['message_upper'], SEVERITY_INCIDENT_PATTERN))
+                derived_column(classified, 'severity_dist_severity',
+                               lambda f: classify_series(f['message_upper'], SEVERITY_RULES, 'LOW'))
+                derived_column(classified, 'severity_dist_category',
+                               lambda f: classify_series(f['message_upper'], SEVERITY_CATEGORY_RULES, 'OTHER'))
+                incidents = classified[is_incident.to_numpy(dtype=bool) & ~classified['is_final_chequered']]
+                
+                for message in incidents.to_dict('records'):
                     lap = message.get('Lap', 0)
                     time = message.get('Time', 'N/A')
+                    severity = message['severity_dist_severity']
+                    severity_data['severity_distribution'][severity] += 1
                     
-                    # 過濾最後一圈的正常比賽結束 CHEQUERED FLAG
-                    if 'CHEQUERED FLAG' in msg_text and lap == max_lap:
-                        continue  # 跳過正常的比賽結束標誌
+                    # 詳細記錄
+                    incident_detail = {
+                        'lap': lap,
+                        'time': str(time),
+                        'severity': severity,
+                        'message': message.get('Message', ''),
+                        'category': message['severity_dist_category']
+                    }
+                    severity_data['severity_details'].append(incident_detail)
                     
-                    # 識別事故相關關鍵字
-                    if any(keyword in msg_text for keyword in [
-                        'ACCIDENT', 'COLLISION', 'CRASH', 'INCIDENT', 
-                        'SAFETY CAR', 'RED FLAG', 'YELLOW FLAG',
-                        'INVESTIGATION', 'PENALTY', 'CONTACT'
-                    ]):
-                        severity = assess_severity(msg_text)
-                        severity_data['severity_distribution'][severity] += 1
-                        
-                        # 詳細記錄
-                        incident_detail = {
-                            'lap': lap,
-                            'time': str(time),
-                            'severity': severity,
-                            'message': message.get('Message', ''),
-                            'category': categorize_incident(msg_text)
-                        }
-                        severity_data['severity_details'].append(incident_detail)
-                        
-                        # 按圈數記錄嚴重程度
-                        if lap not in incidents_by_lap:
-                            incidents_by_lap[lap] = []
-                        incidents_by_lap[lap].append(severity)
+                    # 按圈數記錄嚴重程度
+                    if lap not in incidents_by_lap:
+                        incidents_by_lap[lap] = []
+                    incidents_by_lap[lap].append(severity)
                 
                 severity_data['severity_by_lap'] = incidents_by_lap
                 
@@ -190,17 +195,7 @@ def analyze_severity_distribution(session):
 
 def categorize_incident(message):
     """事故分類"""
-    message = message.upper()
-    if any(word in message for word in ['ACCIDENT', 'COLLISION', 'CRASH', 'CONTACT']):
-        return 'ACCIDENT'
-    elif any(word in message for word in ['SAFETY CAR', 'RED FLAG', 'YELLOW FLAG', 'CHEQUERED FLAG']):
-        return 'FLAG'
-    elif 'INVESTIGATION' in message:
-        return 'INVESTIGATION'
-    elif 'PENALTY' in message:
-        return 'PENALTY'
-    else:
-        return 'OTHER'
+    return classify_text(message.upper(), SEVERITY_CATEGORY_RULES, 'OTHER')
 
 def generate_safety_recommendations(severity_dist):
     """生成安全建議"""
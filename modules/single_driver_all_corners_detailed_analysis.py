@@ -22,12 +22,18 @@ import json
 import pickle
 from driver_selection_utils import get_user_driver_selection
 
+try:
+    from .streaming_results import emit_partial, calculate_progress
+except ImportError:
+    from streaming_results import emit_partial, calculate_progress
+
 # 設定中文字體和忽略警告
 matplotlib.rcParams['font.sans-serif'] = ['Microsoft JhengHei']
 matplotlib.rcParams['axes.unicode_minus'] = False
 warnings.filterwarnings("ignore")
 
-def run_single_driver_all_corners_detailed_analysis(data_loader, f1_analysis_instance=None, show_detailed_output=True, driver=None):
+def run_single_driver_all_corners_detailed_analysis(data_loader, f1_analysis_instance=None, show_detailed_output=True, driver=None,
+                                                    partial_callback=None):
     """
     執行單一車手指定賽事全部彎道詳細分析
     
@@ -36,6 +42,7 @@ def run_single_driver_all_corners_detailed_analysis(data_loader, f1_analysis_ins
         f1_analysis_instance: F1分析實例（可選）
         show_detailed_output: 是否顯示詳細輸出（默認True）
         driver: 指定車手代碼（可選，如 'VER'）
+        partial_callback: 串流模式回呼，逐車手 / 逐彎道回報部分結果（可選）
     """
     print("\n[INFO] 單一車手指定賽事全部彎道詳細分析")
     print("=" * 60)
@@ -43,7 +50,8 @@ def run_single_driver_all_corners_detailed_analysis(data_loader, f1_analysis_ins
     try:
         # 初始化分析器
         analyzer = SingleDriverCornerAnalyzer()
-        return analyzer.analyze(data_loader, f1_analysis_instance, show_detailed_output=show_detailed_output, driver=driver)
+        return analyzer.analyze(data_loader, f1_analysis_instance, show_detailed_output=show_detailed_output, driver=driver,
+                                partial_callback=partial_callback)
         
     except Exception as e:
         print(f"[ERROR] 分析過程中發生錯誤: {e}")
@@ -59,6 +67,8 @@ class SingleDriverCornerAnalyzer:
         self.cache_dir = "corner_analysis_cache"
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
+        # 串流模式回呼 (由 analyze 設定)
+        self.partial_callback = None
     
     def _get_cache_filename(self, year, race_name, driver_name):
         """生成暫存檔案名稱"""
@@ -167,7 +177,8 @@ class SingleDriverCornerAnalyzer:
             print(f"[WARNING] 讀取暫存檔失敗: {e}")
             return None
     
-    def analyze(self, data_loader, f1_analysis_instance=None, show_detailed_output=True, driver=None):
+    def analyze(self, data_loader, f1_analysis_instance=None, show_detailed_output=True, driver=None,
+                partial_callback=None):
         """執行分析
         
         Args:
@@ -175,7 +186,9 @@ class SingleDriverCornerAnalyzer:
             f1_analysis_instance: F1分析實例（可選）
             show_detailed_output: 是否顯示詳細輸出（默認True）
             driver: 指定車手代碼（可選，如 'VER'）
+            partial_callback: 串流模式回呼（可選）
         """
+        self.partial_callback = partial_callback
         try:
             # 檢查數據載入器
             if not data_loader or not hasattr(data_loader, 'session') or data_loader.session is None:
@@ -541,7 +554,7 @@ class SingleDriverCornerAnalyzer:
         
         print(f"   [INFO] 正在收集 {len(all_drivers)} 位車手的彎道數據...")
         
-        for driver in all_drivers:
+        for driver_index, driver in enumerate(all_drivers):
             try:
                 driver_laps = laps[laps['Driver'] == driver].copy()
                 
@@ -551,6 +564,8 @@ class SingleDriverCornerAnalyzer:
                 if len(valid_laps) < 3:
                     continue
                 
+                driver_corner_avg = {}
+                
                 # 分析每個彎道
                 for corner_num in corners_data.keys():
                     corner_speeds = []
@@ -569,6 +584,14 @@ class SingleDriverCornerAnalyzer:
                         if corner_num not in all_drivers_corner_speeds:
                             all_drivers_corner_speeds[corner_num] = []
                         all_drivers_corner_speeds[corner_num].extend(corner_speeds)
+                        driver_corner_avg[str(corner_num)] = float(np.mean(corner_speeds))
+                
+                # 串流模式：每位車手的彎道平均速度
+                emit_partial(
+                    self.partial_callback, "driver", {"corner_avg_speeds": driver_corner_avg},
+                    progress=calculate_progress(driver_index, len(all_drivers)),
+                    driver=driver, index=driver_index + 1, total=len(all_drivers)
+                )
                         
             except Exception as e:
                 continue
@@ -793,7 +816,7 @@ class SingleDriverCornerAnalyzer:
                 lap_by_lap_data.append(lap_data)
             
             # 計算每個彎道的統計數據
-            for corner_num, stats in corner_statistics.items():
+            for corner_index, (corner_num, stats) in enumerate(corner_statistics.items()):
                 if len(stats['speeds']) > 5:
                     corner_statistics[corner_num].update({
                         'avg_speed': np.mean(stats['speeds']),
@@ -801,6 +824,20 @@ class SingleDriverCornerAnalyzer:
                         'median_speed': np.median(stats['speeds']),
                         'std_deviation': np.std(stats['speeds']),
                     })
+                    
+                    # 串流模式：每個彎道的統計結果
+                    emit_partial(
+                        self.partial_callback, "corner", {
+                            'avg_speed': float(corner_statistics[corner_num]['avg_speed']),
+                            'max_speed': float(corner_statistics[corner_num]['max_speed']),
+                            'median_speed': float(corner_statistics[corner_num]['median_speed']),
+                            'std_deviation': float(corner_statistics[corner_num]['std_deviation']),
+                            'lap_count': stats['lap_count']
+                        },
+                        progress=calculate_progress(corner_index, len(corner_statistics)),
+                        driver=driver, corner=str(corner_num),
+                        index=corner_index + 1, total=len(corner_statistics)
+                    )
             
             driver_analysis['corner_statistics'] = corner_statistics
             driver_analysis['lap_by_lap_data'] = lap_by_lap_data
@@ -13,6 +13,11 @@ import json
 import pickle
 from datetime import datetime
 
+try:
+    from .weather_arrays import get_weather_arrays, weather_label
+except ImportError:
+    from weather_arrays import get_weather_arrays, weather_label
+
 class SingleDriverDetailedLaptimeAnalysis:
     """車手每圈圈速詳細分析類"""
     
@@ -98,6 +103,9 @@ class SingleDriverDetailedLaptimeAnalysis:
         # 排序圈數
         driver_laps = driver_laps.sort_values('LapNumber').reset_index(drop=True)
         
+        # 逐圈天氣 - 天氣陣列每場賽事只建立一次，以 searchsorted 對齊各圈起點
+        lap_weather = get_weather_arrays(weather_data).align_laps(driver_laps)
+        
         # 創建詳細分析表格
         table = PrettyTable()
         table.field_names = ["圈數", "圈速", "輪胎", "胎齡", "進站", "天氣", "I1速度", "I2速度", "終點速", "備註"]
@@ -105,7 +113,7 @@ class SingleDriverDetailedLaptimeAnalysis:
         
         detailed_data = []
         
-        for _, lap in driver_laps.iterrows():
+        for index, lap in driver_laps.iterrows():
             lap_number = int(lap['LapNumber'])
             
             # 圈速時間
@@ -121,7 +129,7 @@ class SingleDriverDetailedLaptimeAnalysis:
                 pit_status = "🔧進站"
             
             # 天氣信息
-            weather = self._get_weather_for_lap(lap_number, weather_data)
+            weather = self._get_weather_for_lap(lap_weather.loc[index], weather_data)
             
             # 速度信息 (如果有遙測數據)
             speeds = self._get_speed_data(lap)
@@ -210,22 +218,13 @@ class SingleDriverDetailedLaptimeAnalysis:
             return f"{seconds:.3f}s"
         return str(time_obj)
     
-    def _get_weather_for_lap(self, lap_number, weather_data):
-        """獲取特定圈數的天氣信息"""
+    def _get_weather_for_lap(self, lap_weather, weather_data):
+        """獲取特定圈數的天氣信息 (該圈對齊的天氣樣本)"""
         if weather_data is None or weather_data.empty:
             return "N/A"
         
         try:
-            # 簡化的天氣判斷
-            if 'TrackTemp' in weather_data.columns:
-                avg_temp = weather_data['TrackTemp'].mean()
-                if avg_temp > 40:
-                    return "🌡️熱"
-                elif avg_temp < 25:
-                    return "❄️涼"
-                else:
-                    return "🌤️適中"
-            return "☀️乾"
+            return weather_label(lap_weather['weather_track_temp'], lap_weather['weather_rainfall'])
         except:
             return "N/A"
     
@@ -12,6 +12,11 @@ from datetime import datetime
 from typing import Dict, Any, Optional, List
 from prettytable import PrettyTable
 
+try:
+    from .tire_stint_model import get_tire_model, stint_records
+except ImportError:
+    from tire_stint_model import get_tire_model, stint_records
+
 class SingleDriverTireAnalysis:
     """單一車手輪胎策略分析器"""
     
@@ -80,6 +85,9 @@ class SingleDriverTireAnalysis:
             if driver_data.empty:
                 raise ValueError(f"找不到車手 {driver} 的數據")
             
+            # 全場 stint 與衰退模型 (每場賽事只建立一次)
+            driver_stints = stint_records(get_tire_model(laps_data).driver_stints(driver))
+            
             # 分析輪胎策略
             result = {
                 "success": True,
@@ -90,10 +98,10 @@ class SingleDriverTireAnalysis:
                 "analysis_timestamp": datetime.now().isoformat(),
                 "tire_strategy": {
                     "tire_compounds_used": self._get_tire_compounds_used(driver_data),
-                    "pit_stops": self._analyze_pit_stops(driver_data),
+                    "pit_stops": self._analyze_pit_stops(driver_stints),
                     "tire_performance": self._analyze_tire_performance(driver_data),
-                    "stint_analysis": self._analyze_stints(driver_data),
-                    "tire_degradation": self._analyze_tire_degradation(driver_data),
+                    "stint_analysis": self._analyze_stints(driver_stints),
+                    "tire_degradation": self._analyze_tire_degradation(driver_stints),
                     "strategy_effectiveness": self._evaluate_strategy(driver_data)
                 }
             }
@@ -134,20 +142,17 @@ class SingleDriverTireAnalysis:
         except:
             return []
     
-    def _analyze_pit_stops(self, driver_data) -> Dict[str, Any]:
-        """分析進站策略"""
+    def _analyze_pit_stops(self, driver_stints: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """分析進站策略 (相鄰 stint 之間即為一次進站)"""
         try:
-            # 檢測進站 (輪胎年齡重置為1的圈數)
-            pit_stops = []
-            if 'TyreLife' in driver_data.columns:
-                tyre_life = driver_data['TyreLife'].fillna(0)
-                for i in range(1, len(tyre_life)):
-                    if tyre_life.iloc[i] == 1 and tyre_life.iloc[i-1] > 1:
-                        pit_stops.append({
-                            "lap": int(driver_data.iloc[i]['LapNumber']),
-                            "from_compound": driver_data.iloc[i-1].get('Compound', 'Unknown'),
-                            "to_compound": driver_data.iloc[i].get('Compound', 'Unknown')
-                        })
+            pit_stops = [
+                {
+                    "lap": int(current["start_lap"]),
+                    "from_compound": previous["compound"],
+                    "to_compound": current["compound"]
+                }
+                for previous, current in zip(driver_stints, driver_stints[1:])
+            ]
             
             return {
                 "total_pit_stops": len(pit_stops),
@@ -180,101 +185,51 @@ class SingleDriverTireAnalysis:
         except:
             return {"error": "無法分析輪胎表現"}
     
-    def _analyze_stints(self, driver_data) -> List[Dict[str, Any]]:
+    def _analyze_stints(self, driver_stints: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """分析每個 stint (進站間的段落)"""
         try:
             stints = []
-            current_stint = []
-            
-            if 'TyreLife' in driver_data.columns:
-                for _, lap in driver_data.iterrows():
-                    tyre_life = lap.get('TyreLife', 0)
-                    
-                    if tyre_life == 1 and current_stint:
-                        # 新 stint 開始，結束上一個
-                        stints.append(self._analyze_stint(current_stint))
-                        current_stint = [lap]
-                    else:
-                        current_stint.append(lap)
-                
-                # 處理最後一個 stint
-                if current_stint:
-                    stints.append(self._analyze_stint(current_stint))
-            
+            for stint in driver_stints:
+                position_start = stint.get("position_start")
+                position_end = stint.get("position_end")
+                stints.append({
+                    "start_lap": stint["start_lap"],
+                    "end_lap": stint["end_lap"],
+                    "stint_length": stint["laps"],
+                    "compound": stint["compound"],
+                    "average_lap_time": stint.get("average_lap_time"),
+                    "positions_gained": int(position_start - position_end) if position_start and position_end else 0,
+                    "degradation_per_lap": stint.get("degradation_per_lap"),
+                    "fuel_corrected_degradation": stint.get("fuel_corrected_degradation")
+                })
             return stints
         except:
             return []
     
-    def _analyze_stint(self, stint_data: List) -> Dict[str, Any]:
-        """分析單個 stint"""
-        try:
-            if not stint_data:
-                return {}
-            
-            first_lap = stint_data[0]
-            last_lap = stint_data[-1]
-            
-            return {
-                "start_lap": int(first_lap.get('LapNumber', 0)),
-                "end_lap": int(last_lap.get('LapNumber', 0)),
-                "stint_length": len(stint_data),
-                "compound": first_lap.get('Compound', 'Unknown'),
-                "average_lap_time": self._calculate_average_stint_time(stint_data),
-                "positions_gained": int(first_lap.get('Position', 0)) - int(last_lap.get('Position', 0))
-            }
-        except:
-            return {"error": "無法分析 stint"}
-    
-    def _calculate_average_stint_time(self, stint_data: List) -> Optional[float]:
-        """計算 stint 平均圈速"""
-        try:
-            valid_times = []
-            for lap in stint_data:
-                lap_time = lap.get('LapTime')
-                if lap_time and hasattr(lap_time, 'total_seconds'):
-                    valid_times.append(lap_time.total_seconds())
-            
-            if valid_times:
-                return sum(valid_times) / len(valid_times)
-        except:
-            pass
-        return None
-    
-    def _analyze_tire_degradation(self, driver_data) -> Dict[str, Any]:
-        """分析輪胎衰退"""
+    def _analyze_tire_degradation(self, driver_stints: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """分析輪胎衰退 (各 stint 最小平方法擬合，依擬合圈數加權平均)"""
         try:
             degradation_data = {}
             
-            if 'Compound' in driver_data.columns and 'TyreLife' in driver_data.columns:
-                for compound in driver_data['Compound'].dropna().unique():
-                    compound_data = driver_data[driver_data['Compound'] == compound]
-                    
-                    if len(compound_data) > 5:  # 至少5圈數據
-                        degradation_data[compound] = self._calculate_degradation_rate(compound_data)
+            for compound in dict.fromkeys(stint["compound"] for stint in driver_stints):
+                fitted = [stint for stint in driver_stints
+                          if stint["compound"] == compound and stint.get("fuel_corrected_degradation") is not None]
+                fit_laps = sum(stint["fit_laps"] for stint in fitted)
+                if not fit_laps:
+                    degradation_data[compound] = {"insufficient_data": True}
+                    continue
+                
+                degradation_data[compound] = {
+                    "degradation_per_lap": round(sum(s["degradation_per_lap"] * s["fit_laps"] for s in fitted) / fit_laps, 4),
+                    "fuel_corrected_degradation": round(sum(s["fuel_corrected_degradation"] * s["fit_laps"] for s in fitted) / fit_laps, 4),
+                    "fit_laps": fit_laps,
+                    "stints": len(fitted)
+                }
             
             return degradation_data
         except:
             return {"error": "無法分析輪胎衰退"}
     
-    def _calculate_degradation_rate(self, compound_data) -> Dict[str, Any]:
-        """計算特定配方的衰退率"""
-        try:
-            # 簡化的衰退分析 - 比較前5圈和後5圈
-            if len(compound_data) >= 10:
-                first_5 = compound_data.head(5)['LapTime'].dropna().mean()
-                last_5 = compound_data.tail(5)['LapTime'].dropna().mean()
-                
-                if first_5 and last_5:
-                    degradation = (last_5 - first_5).total_seconds()
-                    return {
-                        "degradation_seconds": degradation,
-                        "degradation_percentage": (degradation / first_5.total_seconds()) * 100
-                    }
-            
-            return {"insufficient_data": True}
-        except:
-            return {"error": "計算失敗"}
-    
     def _calculate_average_pit_window(self, pit_stops: List) -> Optional[float]:
         """計算平均進站間隔"""
         try:
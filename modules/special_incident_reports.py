@@ -13,6 +13,11 @@ import re
 from datetime import datetime
 from prettytable import PrettyTable
 
+try:
+    from .race_control_classifier import get_classified_messages, derived_column, extract_driver_info as _extract_driver_info
+except ImportError:
+    from modules.race_control_classifier import get_classified_messages, derived_column, extract_driver_info as _extract_driver_info
+
 def generate_cache_key(session_info):
     """生成快取鍵值"""
     return f"special_incident_reports_{session_info.get('year', 2024)}_{session_info.get('event_name', 'Unknown')}_{session_info.get('session_type', 'R')}"
@@ -54,23 +59,7 @@ def format_time(time_obj):
 
 def extract_driver_info(message):
     """從訊息中提取車手資訊"""
-    import re
-    
-    # 提取車號和車手代碼
-    car_pattern = r'CAR[S]?\s+(\d+)\s*\(([A-Z]{3})\)'
-    cars = re.findall(car_pattern, message.upper())
-    
-    if cars:
-        return [{'car_number': car[0], 'driver_code': car[1]} for car in cars]
-    
-    # 僅提取車號
-    car_number_pattern = r'CAR[S]?\s+(\d+)'
-    car_numbers = re.findall(car_number_pattern, message.upper())
-    
-    if car_numbers:
-        return [{'car_number': num, 'driver_code': 'UNK'} for num in car_numbers]
-    
-    return []
+    return _extract_driver_info(message)
 
 def classify_special_incident(message):
     """分類特殊事件"""
@@ -318,213 +307,211 @@ def analyze_special_incidents(session):
                 # 估算總圈數，同時用於過濾正常結束的 CHEQUERED FLAG
                 total_laps = race_control['Lap'].max() if 'Lap' in race_control.columns else 50
                 
-                for _, message in race_control.iterrows():
-                    msg_text = str(message.get('Message', ''))
-                    msg_upper = msg_text.upper()
+                # 共用分類引擎 - 訊息分類與車手擷取每場賽事只計算一次
+                classified = get_classified_messages(race_control)
+                incident_types = derived_column(classified, 'special_incident_type', lambda f: [
+                    classify_special_incident(text) for text in f['message_text']
+                ])
+                selected = classified[incident_types.notna().to_numpy(dtype=bool) & ~classified['is_final_chequered']]
+                
+                for message in selected.to_dict('records'):
+                    msg_text = message['message_text']
+                    msg_upper = message['message_upper']
                     lap = message.get('Lap', 0)
                     time = message.get('Time', 'N/A')
+                    incident_type = message['special_incident_type']
+                    involved_drivers_info = message['involved_drivers']
                     
-                    # 過濾最後一圈的正常比賽結束 CHEQUERED FLAG
-                    if 'CHEQUERED FLAG' in msg_upper and lap == total_laps:
-                        continue  # 跳過正常的比賽結束標誌
+                    # 評估嚴重程度
+                    severity = assess_special_severity(msg_text, incident_type)
                     
-                    # 分類特殊事件
-                    incident_type = classify_special_incident(msg_text)
+                    # 計算影響評分
+                    impact_score = calculate_impact_score(incident_type, lap, total_laps)
                     
-                    if incident_type:
-                        # 提取車手資訊
-                        involved_drivers_info = extract_driver_info(msg_text)
-                        
-                        # 評估嚴重程度
-                        severity = assess_special_severity(msg_text, incident_type)
-                        
-                        # 計算影響評分
-                        impact_score = calculate_impact_score(incident_type, lap, total_laps)
-                        
-                        # 提取處罰詳細資訊
-                        penalty_details = extract_penalty_details(msg_text) if 'PENALTY' in incident_type else None
+                    # 提取處罰詳細資訊
+                    penalty_details = extract_penalty_details(msg_text) if 'PENALTY' in incident_type else None
+                    
+                    special_incident = {
+                        'special_sequence': special_sequence,
+                        'lap': lap,
+                        'time': format_time(time) if time != 'N/A' else str(time),
+                        'raw_time': str(time),
+                        'incident_type': incident_type,
+                        'severity': severity,
+                        'impact_score': impact_score,
+                        'message': msg_text,
+                        'involved_drivers': involved_drivers_info,
+                        'driver_codes': [d['driver_code'] for d in involved_drivers_info],
+                        'penalty_details': penalty_details,
+                        'flags_involved': extract_flags_detailed(msg_upper),
+                        'safety_implications': assess_safety_implications(msg_upper, incident_type),
+                        'race_impact': assess_race_impact(msg_upper, incident_type, lap, total_laps)
+                    }
+                    
+                    special_data['special_incidents'].append(special_incident)
+                    
+                    # 分類存儲
+                    if incident_type == 'RED_FLAG_INCIDENT':
+                        special_data['red_flag_incidents'].append(special_incident)
+                    elif 'SAFETY_CAR' in incident_type:
+                        special_data['safety_car_incidents'].append(special_incident)
+                        special_data['summary_statistics']['safety_car_deployments'] += 1
                         
-                        special_incident = {
-                            'special_sequence': special_sequence,
+                        # 安全車時間軸分析
+                        special_data['safety_car_timeline'].append({
+                            'sequence': special_sequence,
                             'lap': lap,
                             'time': format_time(time) if time != 'N/A' else str(time),
-                            'raw_time': str(time),
-                            'incident_type': incident_type,
-                            'severity': severity,
-                            'impact_score': impact_score,
-                            'message': msg_text,
-                            'involved_drivers': involved_drivers_info,
-                            'driver_codes': [d['driver_code'] for d in involved_drivers_info],
-                            'penalty_details': penalty_details,
-                            'flags_involved': extract_flags_detailed(msg_upper),
-                            'safety_implications': assess_safety_implications(msg_upper, incident_type),
-                            'race_impact': assess_race_impact(msg_upper, incident_type, lap, total_laps)
-                        }
+                            'action': incident_type,
+                            'impact_score': impact_score
+                        })
+                    elif 'VSC' in incident_type:
+                        special_data['vsc_incidents'].append(special_incident)
+                        special_data['summary_statistics']['vsc_deployments'] += 1
+                    elif incident_type == 'MAJOR_COLLISION':
+                        special_data['collision_incidents'].append(special_incident)
+                        special_data['major_accidents'].append(special_incident)  # 保持向後相容
+                        special_data['summary_statistics']['collision_count'] += 1
                         
-                        special_data['special_incidents'].append(special_incident)
+                        # 碰撞分析
+                        special_data['collision_analysis']['total_collisions'] += 1
+                        special_data['collision_analysis']['collision_severity_distribution'][severity] += 1
                         
-                        # 分類存儲
-                        if incident_type == 'RED_FLAG_INCIDENT':
-                            special_data['red_flag_incidents'].append(special_incident)
-                        elif 'SAFETY_CAR' in incident_type:
-                            special_data['safety_car_incidents'].append(special_incident)
-                            special_data['summary_statistics']['safety_car_deployments'] += 1
+                        # 提取碰撞位置（如果有）
+                        location_match = re.search(r'TURN\s+(\d+)', msg_text.upper())
+                        if location_match:
+                            turn = f"TURN_{location_match.group(1)}"
+                            special_data['collision_analysis']['collision_locations'][turn] = \
+                                special_data['collision_analysis']['collision_locations'].get(turn, 0) + 1
+                            
+                            # 詳細彎角事件記錄
+                            corner_name = f"彎角{location_match.group(1)}"
+                            if corner_name not in special_data['collision_analysis']['corner_incident_details']:
+                                special_data['collision_analysis']['corner_incident_details'][corner_name] = {
+                                    'total_incidents': 0,
+                                    'incidents': [],
+                                    'drivers_involved': [],
+                                    'penalty_outcomes': {'investigation': 0, 'penalty': 0, 'warning': 0, 'no_action': 0}
+                                }
                             
-                            # 安全車時間軸分析
-                            special_data['safety_car_timeline'].append({
-                                'sequence': special_sequence,
+                            special_data['collision_analysis']['corner_incident_details'][corner_name]['total_incidents'] += 1
+                            special_data['collision_analysis']['corner_incident_details'][corner_name]['incidents'].append({
                                 'lap': lap,
-                                'time': format_time(time) if time != 'N/A' else str(time),
-                                'action': incident_type,
-                                'impact_score': impact_score
+                                'drivers': [d['driver_code'] for d in involved_drivers_info],
+                                'severity': severity,
+                                'message': msg_text
                             })
-                        elif 'VSC' in incident_type:
-                            special_data['vsc_incidents'].append(special_incident)
-                            special_data['summary_statistics']['vsc_deployments'] += 1
-                        elif incident_type == 'MAJOR_COLLISION':
-                            special_data['collision_incidents'].append(special_incident)
-                            special_data['major_accidents'].append(special_incident)  # 保持向後相容
-                            special_data['summary_statistics']['collision_count'] += 1
-                            
-                            # 碰撞分析
-                            special_data['collision_analysis']['total_collisions'] += 1
-                            special_data['collision_analysis']['collision_severity_distribution'][severity] += 1
-                            
-                            # 提取碰撞位置（如果有）
-                            location_match = re.search(r'TURN\s+(\d+)', msg_text.upper())
-                            if location_match:
-                                turn = f"TURN_{location_match.group(1)}"
-                                special_data['collision_analysis']['collision_locations'][turn] = \
-                                    special_data['collision_analysis']['collision_locations'].get(turn, 0) + 1
-                                
-                                # 詳細彎角事件記錄
-                                corner_name = f"彎角{location_match.group(1)}"
-                                if corner_name not in special_data['collision_analysis']['corner_incident_details']:
-                                    special_data['collision_analysis']['corner_incident_details'][corner_name] = {
-                                        'total_incidents': 0,
-                                        'incidents': [],
-                                        'drivers_involved': [],
-                                        'penalty_outcomes': {'investigation': 0, 'penalty': 0, 'warning': 0, 'no_action': 0}
-                                    }
-                                
-                                special_data['collision_analysis']['corner_incident_details'][corner_name]['total_incidents'] += 1
-                                special_data['collision_analysis']['corner_incident_details'][corner_name]['incidents'].append({
-                                    'lap': lap,
-                                    'drivers': [d['driver_code'] for d in involved_drivers_info],
-                                    'severity': severity,
-                                    'message': msg_text
-                                })
-                                
-                                for driver in involved_drivers_info:
-                                    if driver['driver_code'] not in special_data['collision_analysis']['corner_incident_details'][corner_name]['drivers_involved']:
-                                        special_data['collision_analysis']['corner_incident_details'][corner_name]['drivers_involved'].append(driver['driver_code'])
                             
-                            elif 'PIT' in msg_text.upper():
-                                location = "PIT_AREA"
-                                special_data['collision_analysis']['collision_locations'][location] = \
-                                    special_data['collision_analysis']['collision_locations'].get(location, 0) + 1
-                            
-                        elif incident_type == 'CONTACT_INCIDENT':
-                            special_data['contact_incidents'].append(special_incident)
-                            special_data['summary_statistics']['contact_incidents_count'] += 1
-                        elif incident_type == 'PENALTY_DECISION':
-                            special_data['penalty_incidents'].append(special_incident)
-                            special_data['summary_statistics']['penalty_decisions'] += 1
-                            
-                            # 處罰決定詳細分析
-                            special_data['collision_analysis']['collision_penalty_status']['penalty_imposed'] += 1
+                            for driver in involved_drivers_info:
+                                if driver['driver_code'] not in special_data['collision_analysis']['corner_incident_details'][corner_name]['drivers_involved']:
+                                    special_data['collision_analysis']['corner_incident_details'][corner_name]['drivers_involved'].append(driver['driver_code'])
+                        
+                        elif 'PIT' in msg_text.upper():
+                            location = "PIT_AREA"
+                            special_data['collision_analysis']['collision_locations'][location] = \
+                                special_data['collision_analysis']['collision_locations'].get(location, 0) + 1
+                        
+                    elif incident_type == 'CONTACT_INCIDENT':
+                        special_data['contact_incidents'].append(special_incident)
+                        special_data['summary_statistics']['contact_incidents_count'] += 1
+                    elif incident_type == 'PENALTY_DECISION':
+                        special_data['penalty_incidents'].append(special_incident)
+                        special_data['summary_statistics']['penalty_decisions'] += 1
+                        
+                        # 處罰決定詳細分析
+                        special_data['collision_analysis']['collision_penalty_status']['penalty_imposed'] += 1
+                        
+                        # 分析處罰類型
+                        if 'TIME PENALTY' in msg_text.upper():
+                            special_data['collision_analysis']['penalty_breakdown']['time_penalties'].append({
+                                'driver': involved_drivers_info[0]['driver_code'] if involved_drivers_info else 'UNK',
+                                'lap': lap,
+                                'penalty': msg_text
+                            })
+                        elif 'POSITION' in msg_text.upper() and 'PENALTY' in msg_text.upper():
+                            special_data['collision_analysis']['penalty_breakdown']['position_penalties'].append({
+                                'driver': involved_drivers_info[0]['driver_code'] if involved_drivers_info else 'UNK',
+                                'lap': lap,
+                                'penalty': msg_text
+                            })
+                        elif 'WARNING' in msg_text.upper():
+                            special_data['collision_analysis']['penalty_breakdown']['warnings'].append({
+                                'driver': involved_drivers_info[0]['driver_code'] if involved_drivers_info else 'UNK',
+                                'lap': lap,
+                                'penalty': msg_text
+                            })
+                            special_data['collision_analysis']['collision_penalty_status']['warnings_issued'] += 1
                             
-                            # 分析處罰類型
-                            if 'TIME PENALTY' in msg_text.upper():
-                                special_data['collision_analysis']['penalty_breakdown']['time_penalties'].append({
-                                    'driver': involved_drivers_info[0]['driver_code'] if involved_drivers_info else 'UNK',
-                                    'lap': lap,
-                                    'penalty': msg_text
-                                })
-                            elif 'POSITION' in msg_text.upper() and 'PENALTY' in msg_text.upper():
-                                special_data['collision_analysis']['penalty_breakdown']['position_penalties'].append({
-                                    'driver': involved_drivers_info[0]['driver_code'] if involved_drivers_info else 'UNK',
-                                    'lap': lap,
-                                    'penalty': msg_text
-                                })
-                            elif 'WARNING' in msg_text.upper():
-                                special_data['collision_analysis']['penalty_breakdown']['warnings'].append({
-                                    'driver': involved_drivers_info[0]['driver_code'] if involved_drivers_info else 'UNK',
-                                    'lap': lap,
-                                    'penalty': msg_text
-                                })
-                                special_data['collision_analysis']['collision_penalty_status']['warnings_issued'] += 1
-                                
-                        elif 'PENALTY' in incident_type:
-                            special_data['penalty_incidents'].append(special_incident)
-                        elif incident_type == 'INVESTIGATION_INCIDENT':
-                            special_data['investigation_incidents'].append(special_incident)
-                            special_data['collision_analysis']['collision_penalty_status']['investigation_stage'] += 1
-                        elif incident_type == 'MEDICAL_INTERVENTION':
-                            special_data['medical_interventions'].append(special_incident)
-                        elif incident_type == 'DEBRIS_INCIDENT':
-                            special_data['debris_incidents'].append(special_incident)
-                        elif incident_type == 'WEATHER_INCIDENT':
-                            special_data['weather_incidents'].append(special_incident)
-                            special_data['summary_statistics']['weather_events'] += 1
+                    elif 'PENALTY' in incident_type:
+                        special_data['penalty_incidents'].append(special_incident)
+                    elif incident_type == 'INVESTIGATION_INCIDENT':
+                        special_data['investigation_incidents'].append(special_incident)
+                        special_data['collision_analysis']['collision_penalty_status']['investigation_stage'] += 1
+                    elif incident_type == 'MEDICAL_INTERVENTION':
+                        special_data['medical_interventions'].append(special_incident)
+                    elif incident_type == 'DEBRIS_INCIDENT':
+                        special_data['debris_incidents'].append(special_incident)
+                    elif incident_type == 'WEATHER_INCIDENT':
+                        special_data['weather_incidents'].append(special_incident)
+                        special_data['summary_statistics']['weather_events'] += 1
+                    
+                    # 統計分析
+                    special_data['summary_statistics']['total_special_incidents'] += 1
+                    
+                    if severity == 'CRITICAL':
+                        special_data['summary_statistics']['critical_incidents'] += 1
+                    elif severity == 'HIGH':
+                        special_data['summary_statistics']['high_severity_incidents'] += 1
+                    
+                    if 'PENALTY' in incident_type:
+                        special_data['summary_statistics']['penalty_decisions'] += 1
+                    
+                    if incident_type in ['RED_FLAG_INCIDENT', 'SAFETY_CAR_DEPLOYED', 'SAFETY_CAR_INCIDENT', 'VSC_DEPLOYED']:
+                        special_data['summary_statistics']['race_interruptions'] += 1
+                    
+                    # 時間軸分析
+                    special_data['chronological_timeline'].append({
+                        'sequence': special_sequence,
+                        'lap': lap,
+                        'incident_type': incident_type,
+                        'severity': severity,
+                        'impact_score': impact_score
+                    })
+                    
+                    # 車手處罰分析
+                    for driver in involved_drivers_info:
+                        driver_code = driver['driver_code']
+                        if driver_code not in involved_drivers:
+                            involved_drivers.append(driver_code)
                         
-                        # 統計分析
-                        special_data['summary_statistics']['total_special_incidents'] += 1
+                        if driver_code not in special_data['driver_penalty_analysis']:
+                            special_data['driver_penalty_analysis'][driver_code] = {
+                                'total_incidents': 0,
+                                'penalties_received': 0,
+                                'investigations': 0,
+                                'severity_breakdown': {'LOW': 0, 'MEDIUM': 0, 'HIGH': 0, 'CRITICAL': 0},
+                                'incident_details': []
+                            }
                         
-                        if severity == 'CRITICAL':
-                            special_data['summary_statistics']['critical_incidents'] += 1
-                        elif severity == 'HIGH':
-                            special_data['summary_statistics']['high_severity_incidents'] += 1
+                        special_data['driver_penalty_analysis'][driver_code]['total_incidents'] += 1
+                        special_data['driver_penalty_analysis'][driver_code]['severity_breakdown'][severity] += 1
                         
                         if 'PENALTY' in incident_type:
-                            special_data['summary_statistics']['penalty_decisions'] += 1
+                            special_data['driver_penalty_analysis'][driver_code]['penalties_received'] += 1
                         
-                        if incident_type in ['RED_FLAG_INCIDENT', 'SAFETY_CAR_DEPLOYED', 'SAFETY_CAR_INCIDENT', 'VSC_DEPLOYED']:
-                            special_data['summary_statistics']['race_interruptions'] += 1
+                        if incident_type == 'INVESTIGATION_INCIDENT':
+                            special_data['driver_penalty_analysis'][driver_code]['investigations'] += 1
                         
-                        # 時間軸分析
-                        special_data['chronological_timeline'].append({
+                        special_data['driver_penalty_analysis'][driver_code]['incident_details'].append({
                             'sequence': special_sequence,
                             'lap': lap,
-                            'incident_type': incident_type,
+                            'type': incident_type,
                             'severity': severity,
                             'impact_score': impact_score
                         })
-                        
-                        # 車手處罰分析
-                        for driver in involved_drivers_info:
-                            driver_code = driver['driver_code']
-                            if driver_code not in involved_drivers:
-                                involved_drivers.append(driver_code)
-                            
-                            if driver_code not in special_data['driver_penalty_analysis']:
-                                special_data['driver_penalty_analysis'][driver_code] = {
-                                    'total_incidents': 0,
-                                    'penalties_received': 0,
-                                    'investigations': 0,
-                                    'severity_breakdown': {'LOW': 0, 'MEDIUM': 0, 'HIGH': 0, 'CRITICAL': 0},
-                                    'incident_details': []
-                                }
-                            
-                            special_data['driver_penalty_analysis'][driver_code]['total_incidents'] += 1
-                            special_data['driver_penalty_analysis'][driver_code]['severity_breakdown'][severity] += 1
-                            
-                            if 'PENALTY' in incident_type:
-                                special_data['driver_penalty_analysis'][driver_code]['penalties_received'] += 1
-                            
-                            if incident_type == 'INVESTIGATION_INCIDENT':
-                                special_data['driver_penalty_analysis'][driver_code]['investigations'] += 1
-                            
-                            special_data['driver_penalty_analysis'][driver_code]['incident_details'].append({
-                                'sequence': special_sequence,
-                                'lap': lap,
-                                'type': incident_type,
-                                'severity': severity,
-                                'impact_score': impact_score
-                            })
-                        
-                        total_impact_score += impact_score
-                        special_sequence += 1
+                    
+                    total_impact_score += impact_score
+                    special_sequence += 1
                 
                 # 計算平均影響評分
                 if special_data['summary_statistics']['total_special_incidents'] > 0:
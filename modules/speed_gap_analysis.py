@@ -23,6 +23,7 @@ from matplotlib.lines import Line2D
 sys.path.append(str(Path(__file__).parent.parent))
 
 from modules.base import F1AnalysisBase
+from modules.chart_renderer import acquire_subplots, register_chart_renderer, release_figure, show_figure
 
 class SpeedGapAnalyzer(F1AnalysisBase):
     """速度差距分析器 - 專門分析兩車手之間的速度差距"""
@@ -670,80 +671,92 @@ class SpeedGapAnalyzer(F1AnalysisBase):
         driver1, driver2 = self.selected_drivers
         lap1_num, lap2_num = self.selected_laps
         
+        fig = None
         try:
-            # 設置圖表樣式
-            plt.style.use('default')
-            fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10))
-            fig.suptitle(f'速度差距分析: {driver1} (第{lap1_num}圈) vs {driver2} (第{lap2_num}圈)', 
-                        fontsize=16, fontweight='bold')
-            
-            # 上圖：速度對比
-            ax1.plot(distance_grid, speed1_grid, label=f'{driver1} (第{lap1_num}圈)', 
-                    linewidth=2, color='blue')
-            ax1.plot(distance_grid, speed2_grid, label=f'{driver2} (第{lap2_num}圈)', 
-                    linewidth=2, color='red')
-            
-            ax1.set_title('速度對比圖', fontweight='bold', fontsize=14)
-            ax1.set_ylabel('速度 (km/h)', fontsize=12)
-            ax1.grid(True, alpha=0.3)
-            ax1.legend(fontsize=11)
-            
-            # 下圖：速度差距
-            # 使用顏色填充表示優劣勢
-            ax2.axhline(y=0, color='black', linestyle='-', alpha=0.3, linewidth=1)
-            
-            # 填充正值（優勢）和負值（劣勢）區域
-            ax2.fill_between(distance_grid, 0, speed_gap, where=(speed_gap >= 0), 
-                           color='green', alpha=0.3, label=f'{driver1}較快')
-            ax2.fill_between(distance_grid, 0, speed_gap, where=(speed_gap < 0), 
-                           color='red', alpha=0.3, label=f'{driver1}較慢')
-            
-            # 繪製差距線
-            ax2.plot(distance_grid, speed_gap, color='black', linewidth=1.5, alpha=0.8)
-            
-            ax2.set_title('速度差距分析', fontweight='bold', fontsize=14)
-            ax2.set_xlabel('距離 (m)', fontsize=12)
-            ax2.set_ylabel('速度差距 (km/h)', fontsize=12)
-            ax2.grid(True, alpha=0.3)
-            ax2.legend(fontsize=11)
-            
-            # 標註關鍵點
-            max_adv_idx = np.argmax(speed_gap)
-            max_dis_idx = np.argmin(speed_gap)
-            
-            ax2.annotate(f'最大優勢\n{speed_gap[max_adv_idx]:+.1f} km/h', 
-                        xy=(distance_grid[max_adv_idx], speed_gap[max_adv_idx]),
-                        xytext=(10, 10), textcoords='offset points',
-                        bbox=dict(boxstyle='round,pad=0.3', fc='green', alpha=0.7),
-                        arrowprops=dict(arrowstyle='->', connectionstyle='arc3,rad=0'))
-            
-            ax2.annotate(f'最大劣勢\n{speed_gap[max_dis_idx]:+.1f} km/h', 
-                        xy=(distance_grid[max_dis_idx], speed_gap[max_dis_idx]),
-                        xytext=(10, -20), textcoords='offset points',
-                        bbox=dict(boxstyle='round,pad=0.3', fc='red', alpha=0.7),
-                        arrowprops=dict(arrowstyle='->', connectionstyle='arc3,rad=0'))
-            
-            plt.tight_layout()
+            # 設置圖表樣式 (池化圖表，主題設定已快取)
+            fig, axes = acquire_subplots(2, 1, figsize=(14, 10), dark_theme=False)
+            draw_speed_gap_chart(fig, axes, distance_grid, speed1_grid, speed2_grid, speed_gap,
+                                 driver1, driver2, lap1_num, lap2_num)
             
             # 儲存圖表
             cache_dir = self.get_cache_dir()
             filename = f"speed_gap_analysis_{driver1}_vs_{driver2}_{lap1_num}_{lap2_num}.png"
             filepath = cache_dir / filename
-            plt.savefig(filepath, dpi=300, bbox_inches='tight')
+            fig.savefig(filepath, dpi=300, bbox_inches='tight')
             print(f"[INFO] 速度差距分析圖已儲存: {filepath}")
             
             # 顯示圖表
             if self.f1_analysis_instance and hasattr(self.f1_analysis_instance, 'show_plots'):
                 if self.f1_analysis_instance.show_plots:
-                    plt.show()
+                    show_figure(fig)
             else:
-                plt.show()
+                show_figure(fig)
                 
         except Exception as e:
             print(f"[ERROR] 圖表生成失敗: {e}")
             traceback.print_exc()
         finally:
-            plt.close()
+            release_figure(fig)
+
+
+@register_chart_renderer("speed_gap")
+def draw_speed_gap_chart(fig, axes, distance_grid, speed1_grid, speed2_grid, speed_gap,
+                         driver1, driver2, lap1_num, lap2_num):
+    """速度差距圖 (上: 速度對比，下: 速度差距)；批次渲染工作使用 nrows=2, figsize=(14, 10)"""
+    ax1, ax2 = axes
+    distance_grid = np.asarray(distance_grid, dtype=float)
+    speed_gap = np.asarray(speed_gap, dtype=float)
+    fig.suptitle(f'速度差距分析: {driver1} (第{lap1_num}圈) vs {driver2} (第{lap2_num}圈)', 
+                fontsize=16, fontweight='bold')
+
+    # 上圖：速度對比
+    ax1.plot(distance_grid, speed1_grid, label=f'{driver1} (第{lap1_num}圈)', 
+            linewidth=2, color='blue')
+    ax1.plot(distance_grid, speed2_grid, label=f'{driver2} (第{lap2_num}圈)', 
+            linewidth=2, color='red')
+
+    ax1.set_title('速度對比圖', fontweight='bold', fontsize=14)
+    ax1.set_ylabel('速度 (km/h)', fontsize=12)
+    ax1.grid(True, alpha=0.3)
+    ax1.legend(fontsize=11)
+
+    # 下圖：速度差距
+    # 使用顏色填充表示優劣勢
+    ax2.axhline(y=0, color='black', linestyle='-', alpha=0.3, linewidth=1)
+
+    # 填充正值（優勢）和負值（劣勢）區域
+    ax2.fill_between(distance_grid, 0, speed_gap, where=(speed_gap >= 0), 
+                   color='green', alpha=0.3, label=f'{driver1}較快')
+    ax2.fill_between(distance_grid, 0, speed_gap, where=(speed_gap < 0), 
+                   color='red', alpha=0.3, label=f'{driver1}較慢')
+
+    # 繪製差距線
+    ax2.plot(distance_grid, speed_gap, color='black', linewidth=1.5, alpha=0.8)
+
+    ax2.set_title('速度差距分析', fontweight='bold', fontsize=14)
+    ax2.set_xlabel('距離 (m)', fontsize=12)
+    ax2.set_ylabel('速度差距 (km/h)', fontsize=12)
+    ax2.grid(True, alpha=0.3)
+    ax2.legend(fontsize=11)
+
+    # 標註關鍵點
+    max_adv_idx = np.argmax(speed_gap)
+    max_dis_idx = np.argmin(speed_gap)
+
+    ax2.annotate(f'最大優勢\n{speed_gap[max_adv_idx]:+.1f} km/h', 
+                xy=(distance_grid[max_adv_idx], speed_gap[max_adv_idx]),
+                xytext=(10, 10), textcoords='offset points',
+                bbox=dict(boxstyle='round,pad=0.3', fc='green', alpha=0.7),
+                arrowprops=dict(arrowstyle='->', connectionstyle='arc3,rad=0'))
+
+    ax2.annotate(f'最大劣勢\n{speed_gap[max_dis_idx]:+.1f} km/h', 
+                xy=(distance_grid[max_dis_idx], speed_gap[max_dis_idx]),
+                xytext=(10, -20), textcoords='offset points',
+                bbox=dict(boxstyle='round,pad=0.3', fc='red', alpha=0.7),
+                arrowprops=dict(arrowstyle='->', connectionstyle='arc3,rad=0'))
+
+    fig.tight_layout()
+
 
 def run_speed_gap_analysis(data_loader, open_analyzer=None, f1_analysis_instance=None):
     """執行速度差距分析 - 對外接口函數"""
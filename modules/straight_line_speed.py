@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+"""
+F1 全場直線速度表 - Whole-Field Straight-Line Speed Table
+每場賽事一次建立全場車手每一圈的直線速度、測速點速度、DRS 差異與加速曲線
+
+- 直線位置由參考圈 (全場最快有效圈) 自動取得: 沿用動態彎道檢測的彎道區間，
+  並以 X/Y 路徑曲率排除彎道以外的彎曲路段，長度不足的路段不列為直線
+- 每位車手只走訪一次 session.car_data (速度積分為行駛距離)，以各圈起訖距離正規化到
+  參考圈座標；各圈/各直線最高速以 np.fmax.at 一次分組求得，不逐圈呼叫 get_car_data()
+- 測速點速度與直線加速曲線以單次 np.interp 取得所有圈次
+- DRS 開啟 (DRS ≥ 10) 與未開啟圈的直線最高速差異以有效圈計算
+- 官方測速 (SpeedI1 / SpeedI2 / SpeedFL / SpeedST) 一併附在逐圈表
+
+查詢範例:
+    table = get_straight_speed_table(data_loader)
+    table.top_speeds()                       # 全場最高速排名
+    table.lap_table[table.lap_table['Driver'] == 'VER']
+    table.drs_deltas()                       # 各直線 DRS 速度增益
+    table.acceleration_profiles()            # 各車手各直線平均加速曲線
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+from prettytable import PrettyTable
+
+try:
+    from .minisector_table import (LAP_DISTANCE_TOLERANCE, distance_trace, driver_code_map,
+                                   resolve_session_sources)
+    from .session_tables import IdentityCache, json_value, to_seconds
+    from .telemetry_matrix import build_telemetry_matrix, select_laps
+except ImportError:
+    from minisector_table import LAP_DISTANCE_TOLERANCE, distance_trace, driver_code_map, resolve_session_sources
+    from session_tables import IdentityCache, json_value, to_seconds
+    from telemetry_matrix import build_telemetry_matrix, select_laps
+
+# 直線最短長度 (公尺)
+MIN_STRAIGHT_LENGTH = 250.0
+
+# 曲率低於此值 (rad/m，約半徑 400 m) 視為直線
+STRAIGHT_CURVATURE = 0.0025
+
+# 曲率平滑視窗 (公尺)
+CURVATURE_WINDOW = 50.0
+
+# FastF1 DRS 通道: 10 / 12 / 14 為開啟
+DRS_OPEN = 10
+
+# 每條直線的加速曲線取樣點數
+PROFILE_POINTS = 11
+
+# 參考圈距離網格間距 (公尺)
+REFERENCE_GRID_STEP = 5.0
+
+# laps 內的官方測速欄位
+OFFICIAL_TRAPS = ('SpeedI1', 'SpeedI2', 'SpeedFL', 'SpeedST')
+
+MAX_CACHED_TABLES = 4
+
+
+def _column(frame, name):
+    if name in frame.columns:
+        return frame[name]
+    return pd.Series(np.nan, index=frame.index)
+
+
+def _runs(mask):
+    """布林陣列的連續 True 區段 (起點索引, 終點索引)，以 run-length 編碼求得"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1
+
+
+def _curvature(distance, x, y):
+    """參考圈各點曲率 (rad/m)，以 CURVATURE_WINDOW 平滑"""
+    heading = np.unwrap(np.arctan2(np.gradient(y), np.gradient(x)))
+    curvature = np.abs(np.gradient(heading, distance))
+    width = max(1, int(round(CURVATURE_WINDOW / max(distance[1] - distance[0], 1e-6))))
+    return np.convolve(curvature, np.ones(width) / width, mode='same')
+
+
+def locate_straights(distance, speed, x=None, y=None, corners=None, min_length=MIN_STRAIGHT_LENGTH,
+                     lap_distance=None):
+    """由參考圈找出直線區間
+
+    Args:
+        distance: 參考圈距離網格 (公尺)
+        speed: 參考圈速度 (km/h)
+        x, y: 參考圈 X/Y 路徑 (可為 None)
+        corners: 動態彎道檢測輸出 (含 start_distance / end_distance)
+        min_length: 直線最短長度 (公尺)
+        lap_distance: 單圈距離 (公尺)，None 為距離網格終點加一格
+
+    Returns:
+        DataFrame: straight, start_m, end_m, length_m, trap_m (參考圈最高速位置)；
+                   跨越起終點線的直線列於最後，end_m 為終點距離加上單圈距離
+    """
+    mask = np.ones(len(distance), dtype=bool)
+    for corner in corners or []:
+        mask &= ~((distance >= corner['start_distance']) & (distance <= corner['end_distance']))
+    if x is not None and y is not None and np.isfinite(x).all() and np.isfinite(y).all():
+        mask &= _curvature(distance, x, y) < STRAIGHT_CURVATURE
+
+    if lap_distance is None:
+        lap_distance = distance[-1] + (distance[1] - distance[0] if len(distance) > 1 else 0.0)
+
+    starts, ends = _runs(mask)
+    runs = [(float(distance[first]), float(distance[last]), np.arange(first, last + 1))
+            for first, last in zip(starts, ends)]
+    # 起終點線位於直線上: 最後一段與第一段合併為同一條直線
+    if len(runs) > 1 and mask[0] and mask[-1]:
+        (_, first_end, first_index), (last_start, _, last_index) = runs[0], runs[-1]
+        runs = runs[1:-1] + [(last_start, first_end + float(lap_distance), np.concatenate((last_index, first_index)))]
+
+    rows = []
+    for start_m, end_m, index in runs:
+        if end_m - start_m < min_length:
+            continue
+        values = speed[index]
+        trap = index[int(np.nanargmax(values))] if np.isfinite(values).any() else index[-1]
+        rows.append({
+            'straight': len(rows) + 1,
+            'start_m': start_m,
+            'end_m': end_m,
+            'length_m': end_m - start_m,
+            'trap_m': float(distance[trap]),
+        })
+    return pd.DataFrame(rows, columns=['straight', 'start_m', 'end_m', 'length_m', 'trap_m'])
+
+
+def _reference_lap(source, laps, car_data, pos_data, results):
+    """全場最快有效圈的距離網格、速度與 X/Y 路徑"""
+    fastest = select_laps(laps)
+    if fastest.empty:
+        return None
+    driver = fastest['Driver'].iloc[0]
+    matrix = build_telemetry_matrix({'laps': laps, 'car_data': car_data, 'results': results},
+                                    drivers=[driver], channels=('Speed',), grid_step=REFERENCE_GRID_STEP)
+    if matrix.empty or len(matrix.distance) < 3:
+        return None
+
+    x = y = None
+    number = next((n for n, code in driver_code_map(laps, results).items() if code == driver), None)
+    pos = pos_data.get(number) if number is not None else None
+    if pos is not None and len(pos) > 1 and {'SessionTime', 'X', 'Y'}.issubset(pos.columns):
+        start = fastest['LapStartTime'].iloc[0].total_seconds()
+        pos_times = to_seconds(pos['SessionTime'])
+        order = np.argsort(pos_times, kind='stable')
+        times = start + matrix.elapsed[0].astype(float)
+        x = np.interp(times, pos_times[order], pos['X'].to_numpy(dtype=float)[order])
+        y = np.interp(times, pos_times[order], pos['Y'].to_numpy(dtype=float)[order])
+    return {
+        'driver': driver,
+        'lap': int(matrix.lap_numbers[0]),
+        'distance': matrix.distance,
+        'speed': matrix.channel('Speed')[0].astype(float),
+        'lap_distance': matrix.lap_distance,
+        'x': x,
+        'y': y,
+    }
+
+
+def _detect_corners(source, reference):
+    """以動態彎道檢測找出參考圈彎道區間"""
+    try:
+        from .dynamic_corner_detection import DynamicCornerDetectionAnalysis
+    except ImportError:
+        from dynamic_corner_detection import DynamicCornerDetectionAnalysis
+
+    telemetry = pd.DataFrame({'Distance': reference['distance'], 'Speed': reference['speed']})
+    if reference['x'] is not None:
+        telemetry['X'] = reference['x']
+        telemetry['Y'] = reference['y']
+    detector = DynamicCornerDetectionAnalysis(data_loader=source)
+    params = detector.detection_params
+    corners = detector.detect_corners_by_speed_and_direction(
+        telemetry,
+        speed_threshold=params['speed_threshold'],
+        direction_threshold=params['direction_threshold'],
+        min_corner_distance=params['min_corner_distance'],
+    )
+    return [corner for corner in corners if corner['confidence_score'] >= params['confidence_threshold']]
+
+
+_reference_cache = IdentityCache("reference_lap", MAX_CACHED_TABLES)
+
+
+def get_reference_lap(source):
+    """取得參考圈 (全場最快有效圈) 的距離網格、速度、X/Y 路徑與彎道區間 (每份圈速數據只檢測一次)
+
+    Returns:
+        dict: driver, lap, distance, speed, lap_distance, x, y, corners；無可用數據時為 None
+    """
+    laps, car_data, pos_data, results = resolve_session_sources(source)
+    required = {'Driver', 'LapNumber', 'LapStartTime', 'Time', 'LapTime'}
+    if laps is None or len(laps) == 0 or not required.issubset(laps.columns) or not car_data:
+        return None
+
+    def build():
+        reference = _reference_lap(source, laps, car_data, pos_data, results)
+        if reference is not None:
+            reference['corners'] = _detect_corners(source, reference)
+        return reference
+
+    return _reference_cache.get_or_build(laps, build, span_name="table.reference_lap")
+
+
+class StraightSpeedTable:
+    """全場直線速度表
+
+    Attributes:
+        reference: 參考圈資訊 (driver, lap, lap_distance)
+        straights: 直線區間 (straight, start_m, end_m, length_m, trap_m)
+        trap_points: 測速點位置 (公尺，參考圈座標)
+        lap_table: 逐圈表 (Driver, LapNumber, clean, max_speed, max_speed_at_m, trap_<m>m, 官方測速)
+        straight_table: 逐圈逐直線表 (Driver, LapNumber, straight, max_speed, entry_speed, drs_open, mean_accel)
+        profiles: float32 (lap_table 列, 直線, PROFILE_POINTS) 直線加速曲線速度 (km/h)
+    """
+
+    def __init__(self, source, laps, car_data, pos_data=None, results=None, trap_points=None):
+        self.reference = None
+        self.straights = pd.DataFrame(columns=['straight', 'start_m', 'end_m', 'length_m', 'trap_m'])
+        self.trap_points = np.zeros(0)
+        self.lap_table = pd.DataFrame()
+        self.straight_table = pd.DataFrame()
+        self.profiles = np.zeros((0, 0, PROFILE_POINTS), dtype=np.float32)
+
+        required = {'Driver', 'LapNumber', 'LapStartTime', 'Time', 'LapTime'}
+        if laps is None or len(laps) == 0 or not required.issubset(laps.columns) or not car_data:
+            return
+        reference = get_reference_lap(source)
+        if reference is None:
+            return
+        corners = reference['corners']
+        self.reference = {
+            'driver': reference['driver'],
+            'lap': reference['lap'],
+            'lap_distance': reference['lap_distance'],
+            'corners': len(corners),
+        }
+        self.straights = locate_straights(reference['distance'], reference['speed'],
+                                          reference['x'], reference['y'], corners,
+                                          lap_distance=reference['lap_distance'])
+        traps = self.straights['trap_m'].to_numpy(dtype=float)
+        if trap_points is not None:
+            traps = np.asarray(list(trap_points), dtype=float)
+        self.trap_points = np.sort(traps[(traps >= 0) & (traps <= reference['lap_distance'])])
+        self._build(laps, car_data, pos_data or {}, results, reference['lap_distance'])
+
+    @property
+    def empty(self):
+        return self.lap_table.empty
+
+    def _build(self, laps, car_data, pos_data, results, lap_distance):
+        numbers = driver_code_map(laps, results)
+        lap_numbers = pd.to_numeric(laps['LapNumber'], errors='coerce')
+        starts = to_seconds(laps['LapStartTime'])
+        ends = to_seconds(laps['Time'])
+        excluded = (_column(laps, 'PitInTime').notna() | _column(laps, 'PitOutTime').notna()
+                    | (lap_numbers <= 1)).to_numpy(copy=True)
+        if 'Deleted' in laps.columns:
+            excluded |= laps['Deleted'].fillna(False).astype(bool).to_numpy()
+        driver_codes = laps['Driver'].astype(str).to_numpy()
+
+        n_straights = len(self.straights)
+        straight_start = self.straights['start_m'].to_numpy(dtype=float)
+        straight_end = self.straights['end_m'].to_numpy(dtype=float)
+        profile_at = (straight_start[:, None]
+                      + (straight_end - straight_start)[:, None] * np.linspace(0.0, 1.0, PROFILE_POINTS))
+        # 跨越起終點線的直線 (最後一條): 圈起點附近的樣本以 +lap_distance 的座標歸屬
+        wrap_end = straight_end[-1] - lap_distance if n_straights and straight_end[-1] > lap_distance else -np.inf
+
+        lap_blocks, straight_blocks, profile_blocks = [], [], []
+        for number, car in car_data.items():
+            code = numbers.get(str(number), str(number))
+            rows = np.flatnonzero((driver_codes == code) & np.isfinite(starts) & np.isfinite(ends)
+                                  & (ends > starts) & lap_numbers.notna().to_numpy())
+            if rows.size == 0 or 'Speed' not in car.columns:
+                continue
+            times, distance = distance_trace(car, pos_data.get(number))
+            if times is None:
+                continue
+            rows = rows[(starts[rows] >= times[0]) & (ends[rows] <= times[-1])]
+            rows = rows[np.argsort(starts[rows], kind='stable')]
+            if rows.size == 0:
+                continue
+
+            order = np.argsort(to_seconds(car['SessionTime']), kind='stable')
+            speed = car['Speed'].to_numpy(dtype=float)[order]
+            drs = (car['DRS'].to_numpy(dtype=float)[order] >= DRS_OPEN) if 'DRS' in car.columns \
+                else np.zeros(len(order), dtype=bool)
+
+            # 各圈起訖距離一次內插，樣本依時間歸屬到圈並換算為參考圈座標
+            lap_start = np.interp(starts[rows], times, distance)
+            lap_end = np.interp(ends[rows], times, distance)
+            span_m = lap_end - lap_start
+            lap_index = np.searchsorted(starts[rows], times, side='right') - 1
+            clipped = np.clip(lap_index, 0, None)
+            in_lap = (lap_index >= 0) & (times <= ends[rows][clipped]) & (span_m[clipped] > 0)
+            lap_index = lap_index[in_lap]
+            sample_speed = speed[in_lap]
+            position = ((distance[in_lap] - lap_start[lap_index]) / span_m[lap_index]) * lap_distance
+
+            n_laps = rows.size
+            lap_max = np.full(n_laps, np.nan)
+            np.fmax.at(lap_max, lap_index, sample_speed)
+            # 依 (圈, 速度) 排序，每圈最後一筆為最高速樣本
+            ranked = np.lexsort((np.nan_to_num(sample_speed, nan=-np.inf), lap_index))
+            last = np.flatnonzero(np.diff(np.concatenate((lap_index[ranked], [n_laps]))))
+            max_at = np.full(n_laps, np.nan)
+            max_at[lap_index[ranked][last]] = position[ranked][last]
+
+            # 測速點與加速曲線: 所有圈次單次內插
+            scale = span_m[:, None] / lap_distance
+            trap_speed = np.interp((lap_start[:, None] + self.trap_points[None, :] * scale).ravel(),
+                                   distance, np.nan_to_num(speed)).reshape(n_laps, len(self.trap_points))
+            profile = np.interp((lap_start[:, None, None] + profile_at[None] * scale[:, :, None]).ravel(),
+                                distance, np.nan_to_num(speed)).reshape(n_laps, n_straights, PROFILE_POINTS)
+
+            # 各圈各直線最高速與 DRS 開啟
+            on_lap = np.where(position <= wrap_end, position + lap_distance, position)
+            segment = np.searchsorted(straight_start, on_lap, side='right') - 1
+            on_straight = segment >= 0
+            on_straight[on_straight] = on_lap[on_straight] <= straight_end[segment[on_straight]]
+            key = lap_index[on_straight] * n_straights + segment[on_straight]
+            straight_max = np.full(n_laps * n_straights, np.nan)
+            np.fmax.at(straight_max, key, sample_speed[on_straight])
+            straight_drs = np.zeros(n_laps * n_straights, dtype=bool)
+            np.logical_or.at(straight_drs, key, drs[in_lap][on_straight])
+
+            within = np.abs(span_m - lap_distance) <= lap_distance * LAP_DISTANCE_TOLERANCE
+            lap_frame = pd.DataFrame({
+                'Driver': code,
+                'LapNumber': lap_numbers.to_numpy()[rows].astype(int),
+                'clean': within & ~excluded[rows],
+                'max_speed': lap_max,
+                'max_speed_at_m': max_at,
+            })
+            for i, trap in enumerate(self.trap_points):
+                lap_frame[f"trap_{trap:.0f}m"] = np.where(within, trap_speed[:, i], np.nan)
+            for column in OFFICIAL_TRAPS:
+                lap_frame[column] = pd.to_numeric(_column(laps, column), errors='coerce').to_numpy()[rows]
+            lap_blocks.append(lap_frame)
+
+            profile[~within] = np.nan
+            profile_blocks.append(profile)
+            straight_blocks.append(pd.DataFrame({
+                'Driver': code,
+                'LapNumber': np.repeat(lap_frame['LapNumber'].to_numpy(), n_straights),
+                'clean': np.repeat(lap_frame['clean'].to_numpy(), n_straights),
+                'straight': np.tile(self.straights['straight'].to_numpy(), n_laps),
+                'max_speed': np.where(np.repeat(within, n_straights), straight_max, np.nan),
+                'drs_open': straight_drs,
+            }))
+
+        if not lap_blocks:
+            return
+        self.lap_table = pd.concat(lap_blocks, ignore_index=True)
+        self.profiles = np.concatenate(profile_blocks).astype(np.float32)
+        self.straight_table = pd.concat(straight_blocks, ignore_index=True)
+        self.straight_table['entry_speed'] = self.profiles[:, :, 0].ravel()
+        self.straight_table['mean_accel'] = self._mean_acceleration(profile_at).ravel()
+
+    def _mean_acceleration(self, profile_at):
+        """直線入口到曲線最高速點的平均加速度 (m/s²)，以 v dv/ds 的距離形式計算"""
+        speed = self.profiles.astype(float) / 3.6
+        filled = np.where(np.isnan(speed), -np.inf, speed)
+        peak = np.argmax(filled, axis=2)
+        v_peak = np.take_along_axis(speed, peak[:, :, None], axis=2)[:, :, 0]
+        covered = np.take_along_axis(np.broadcast_to(profile_at, speed.shape), peak[:, :, None], axis=2)[:, :, 0] \
+            - profile_at[None, :, 0]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(covered > 0, (v_peak ** 2 - speed[:, :, 0] ** 2) / (2 * covered), np.nan)
+
+    def top_speeds(self):
+        """每位車手的最高速 (全部圈次)、有效圈平均最高速、測速點與官方測速最佳值"""
+        if self.empty:
+            return pd.DataFrame()
+        laps = self.lap_table
+        grouped = laps.groupby('Driver', sort=False)
+        measured = laps[laps['max_speed'].notna()]
+        best = measured.loc[measured.groupby('Driver', sort=False)['max_speed'].idxmax()]
+        summary = pd.DataFrame({
+            'driver': best['Driver'].to_numpy(),
+            'max_speed': best['max_speed'].to_numpy(),
+            'max_speed_lap': best['LapNumber'].to_numpy(),
+            'max_speed_at_m': best['max_speed_at_m'].to_numpy(),
+        })
+        clean = laps[laps['clean']].groupby('Driver')['max_speed'].mean()
+        summary['clean_mean_max_speed'] = summary['driver'].map(clean)
+        trap_columns = [column for column in laps.columns if column.startswith('trap_')]
+        for column in trap_columns + [column for column in OFFICIAL_TRAPS if laps[column].notna().any()]:
+            summary[column] = summary['driver'].map(grouped[column].max())
+        return summary.sort_values('max_speed', ascending=False, kind='mergesort').reset_index(drop=True)
+
+    def drs_deltas(self):
+        """各直線有效圈的 DRS 開啟/未開啟平均最高速與差異"""
+        columns = ['straight', 'drs_laps', 'no_drs_laps', 'drs_speed', 'no_drs_speed', 'drs_delta']
+        if self.empty or self.straight_table.empty:
+            return pd.DataFrame(columns=columns)
+        frame = self.straight_table[self.straight_table['clean'] & self.straight_table['max_speed'].notna()]
+        stats = frame.groupby(['straight', 'drs_open'])['max_speed'].agg(['size', 'mean']).unstack('drs_open')
+        result = pd.DataFrame({'straight': self.straights['straight'].to_numpy()}).set_index('straight')
+        for flag, suffix in ((True, 'drs'), (False, 'no_drs')):
+            result[f'{suffix}_laps'] = stats[('size', flag)] if ('size', flag) in stats.columns else 0
+            result[f'{suffix}_speed'] = stats[('mean', flag)] if ('mean', flag) in stats.columns else np.nan
+        result[['drs_laps', 'no_drs_laps']] = result[['drs_laps', 'no_drs_laps']].fillna(0).astype(int)
+        result['drs_delta'] = result['drs_speed'] - result['no_drs_speed']
+        return result.reset_index()[columns]
+
+    def acceleration_profiles(self):
+        """各車手各直線的有效圈平均加速曲線 (速度 km/h) 與平均加速度"""
+        if self.empty or self.straight_table.empty:
+            return pd.DataFrame()
+        n_straights = len(self.straights)
+        clean = self.lap_table['clean'].to_numpy()
+        rows = []
+        for driver in self.lap_table['Driver'].unique():
+            selected = clean & (self.lap_table['Driver'] == driver).to_numpy()
+            if not selected.any():
+                continue
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                profile = np.nanmean(self.profiles[selected], axis=0)
+            accel = self.straight_table[self.straight_table['clean'] & (self.straight_table['Driver'] == driver)] \
+                .groupby('straight')['mean_accel'].mean()
+            for s in range(n_straights):
+                straight = int(self.straights['straight'].iloc[s])
+                rows.append({'driver': driver, 'straight': straight,
+                             'mean_accel': accel.get(straight, np.nan), 'profile': profile[s]})
+        return pd.DataFrame(rows)
+
+
+_table_cache = IdentityCache("straight_speed", MAX_CACHED_TABLES)
+
+
+def get_straight_speed_table(source, trap_points=None):
+    """取得全場直線速度表 (每份圈速數據與測速點設定只建立一次)
+
+    Args:
+        source: get_loaded_data() 字典、數據載入器或 FastF1 session
+        trap_points: 自訂測速點位置 (公尺)，None 為各直線參考圈最高速位置
+    """
+    laps, car_data, pos_data, results = resolve_session_sources(source)
+    traps = tuple(float(value) for value in trap_points) if trap_points is not None else None
+    return _table_cache.get_or_build(
+        laps, lambda: StraightSpeedTable(source, laps, car_data, pos_data, results, traps),
+        key=traps, span_name="table.straight_speed")
+
+
+def clear_cache():
+    """清除直線速度表與參考圈快取"""
+    _table_cache.clear()
+    _reference_cache.clear()
+
+
+def speed_records(frame, digits=1):
+    """速度表轉為字典列表"""
+    return [{key: json_value(value, digits) for key, value in row.items()} for row in frame.to_dict('records')]
+
+
+def _speed(value):
+    return f"{value:.1f}" if value is not None and value == value else "N/A"
+
+
+def display_top_speeds(summary):
+    table = PrettyTable()
+    table.field_names = ["排名", "車手", "最高速", "圈數", "位置", "有效圈平均最高速", "官方測速 ST"]
+    table.align = "c"
+    for rank, row in enumerate(summary.to_dict('records'), 1):
+        at = row['max_speed_at_m']
+        table.add_row([
+            rank, row['driver'], _speed(row['max_speed']), int(row['max_speed_lap']),
+            f"{at:.0f} m" if at == at else "N/A",
+            _speed(row['clean_mean_max_speed']), _speed(row.get('SpeedST', np.nan)),
+        ])
+    print("\n🚀 全場最高速排名 (km/h)")
+    print(table)
+
+
+def display_straights(straights, deltas):
+    table = PrettyTable()
+    table.field_names = ["直線", "距離 (m)", "長度", "測速點", "DRS 圈數", "DRS 最高速", "無 DRS 最高速", "DRS 增益"]
+    table.align = "c"
+    merged = straights.merge(deltas, on='straight', how='left')
+    for row in merged.to_dict('records'):
+        delta = row['drs_delta']
+        table.add_row([
+            row['straight'], f"{row['start_m']:.0f}-{row['end_m']:.0f}", f"{row['length_m']:.0f} m",
+            f"{row['trap_m']:.0f} m", row['drs_laps'], _speed(row['drs_speed']), _speed(row['no_drs_speed']),
+            f"{delta:+.1f}" if delta == delta else "N/A",
+        ])
+    print("\n📏 直線區間與 DRS 速度增益 (km/h)")
+    print(table)
+
+
+def run_all_drivers_straight_line_speed(data_loader, trap_points=None, show_detailed_output=True):
+    """全部車手直線速度分析 (功能48)"""
+    table = get_straight_speed_table(data_loader, trap_points)
+    if table.empty:
+        return {"success": False, "message": "沒有可用的遙測與圈速數據，無法計算直線速度", "function_id": "48"}
+
+    summary = table.top_speeds()
+    deltas = table.drs_deltas()
+    profiles = table.acceleration_profiles()
+    if show_detailed_output:
+        print(f"\n[INFO] 參考圈: {table.reference['driver']} 第 {table.reference['lap']} 圈，"
+              f"檢測到 {table.reference['corners']} 個彎道、{len(table.straights)} 條直線")
+        display_top_speeds(summary)
+        if not table.straights.empty:
+            display_straights(table.straights, deltas)
+
+    return {
+        "success": True,
+        "message": f"全部車手直線速度分析完成 ({len(summary)} 位車手，{len(table.straights)} 條直線)",
+        "data": {
+            "reference": {key: json_value(value, 1) for key, value in table.reference.items()},
+            "straights": speed_records(table.straights),
+            "trap_points_m": [json_value(value, 1) for value in table.trap_points],
+            "top_speeds": speed_records(summary),
+            "drs_deltas": speed_records(deltas),
+            "acceleration_profiles": [
+                {"driver": row['driver'], "straight": int(row['straight']),
+                 "mean_accel": json_value(row['mean_accel'], 2),
+                 "speed_kmh": [json_value(value, 1) for value in row['profile']]}
+                for row in profiles.to_dict('records')
+            ],
+            "lap_top_speeds": speed_records(table.lap_table),
+        },
+        "function_id": "48",
+    }
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+F1 Analysis Streaming Results - 漸進式結果輸出工具
+長時間分析 (全部車手彎道分析、全賽季超車統計) 的部分結果串流
+
+模組透過 partial_callback 回呼逐步回報部分結果 (每位車手 / 每個彎道 / 每場賽事)，
+CLI 串流模式將部分結果以 "[PARTIAL] {json}" 單行格式輸出到 stdout (parse_partial_line 解析)，
+程序內呼叫端 (如 GUI 串流分析工作執行緒) 可使用 F1AnalysisFunctionMapper.execute_function_streaming() 逐筆取得，
+partial_rows / partial_chart_points 將部分結果轉為表格資料列與圖表數據點。
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import json
+import queue
+import sys
+import threading
+from datetime import datetime
+
+# stdout 部分結果行前綴 - GUI/API 依此辨識串流資料
+PARTIAL_RESULT_PREFIX = "[PARTIAL]"
+
+# 生成器結束標記
+_STREAM_DONE = object()
+
+
+def emit_partial(partial_callback, stage, payload, progress=None, **meta):
+    """安全地回報一筆部分結果
+
+    Args:
+        partial_callback: 回呼函數 (可為 None，表示未啟用串流模式)
+        stage: 階段名稱 (如 'driver', 'corner', 'race', 'section')
+        payload: 部分結果內容 (需可 JSON 序列化)
+        progress: 進度百分比 0-100 (可選)
+        **meta: 額外欄位 (如 driver='VER', index=3, total=20)
+
+    Returns:
+        bool: 是否成功回報
+    """
+    if partial_callback is None:
+        return False
+
+    partial = {
+        "type": "partial",
+        "stage": stage,
+        "progress": progress,
+        "timestamp": datetime.now().isoformat(),
+        "data": payload,
+    }
+    partial.update(meta)
+
+    try:
+        partial_callback(partial)
+        return True
+    except Exception as e:
+        # 串流失敗不可中斷主分析流程
+        print(f"[WARNING] 部分結果回報失敗: {e}")
+        return False
+
+
+def calculate_progress(index, total):
+    """計算迴圈進度百分比 (index 由 0 起算)"""
+    if not total:
+        return None
+    return int(min(100, max(0, (index + 1) * 100 / total)))
+
+
+def make_stdout_emitter(stream=None):
+    """建立輸出到 stdout 的回呼 - CLI --stream 模式使用
+
+    每筆部分結果輸出為單行 "[PARTIAL] {json}" 並立即 flush，
+    讓讀取子程序輸出的呼叫端能在分析完成前收到資料。
+    """
+    output = stream or sys.stdout
+
+    def _emit(partial):
+        line = json.dumps(partial, ensure_ascii=False, default=str)
+        output.write(f"{PARTIAL_RESULT_PREFIX} {line}\n")
+        output.flush()
+
+    return _emit
+
+
+def parse_partial_line(line):
+    """解析 stdout 的部分結果行
+
+    Returns:
+        dict 或 None: 非部分結果行或格式錯誤時回傳 None
+    """
+    if not line:
+        return None
+    line = line.strip()
+    if not line.startswith(PARTIAL_RESULT_PREFIX):
+        return None
+    try:
+        return json.loads(line[len(PARTIAL_RESULT_PREFIX):].strip())
+    except (ValueError, TypeError):
+        return None
+
+
+def iter_streaming_results(target, *args, **kwargs):
+    """以生成器方式執行分析函數，逐筆產出部分結果
+
+    target 必須接受 partial_callback 關鍵字參數。
+    分析在背景執行緒中執行，部分結果依序 yield，
+    最後一筆為 {"type": "final", "data": <回傳值>}；
+    發生例外時最後一筆為 {"type": "error", "error": <訊息>}。
+    """
+    results = queue.Queue()
+
+    def _callback(partial):
+        results.put(partial)
+
+    def _runner():
+        try:
+            final = target(*args, partial_callback=_callback, **kwargs)
+            results.put({"type": "final", "data": final})
+        except Exception as e:
+            results.put({"type": "error", "error": str(e)})
+        finally:
+            results.put(_STREAM_DONE)
+
+    worker = threading.Thread(target=_runner, daemon=True)
+    worker.start()
+
+    while True:
+        item = results.get()
+        if item is _STREAM_DONE:
+            break
+        yield item
+
+    worker.join()
+
+
+def partial_rows(partial):
+    """將一筆部分結果轉換為表格資料列
+
+    data 為 dict 時視為單一資料列，為 list 時視為多筆資料列，
+    其他型別以 value 欄位顯示；部分結果帶有 driver / corner 時補入資料列。
+    """
+    data = partial.get("data")
+    if isinstance(data, list):
+        rows = [dict(row) if isinstance(row, dict) else {"value": row} for row in data]
+    elif isinstance(data, dict):
+        rows = [dict(data)]
+    else:
+        rows = [{"value": data}]
+
+    for key in ("corner", "driver"):
+        if partial.get(key) is not None:
+            for row in rows:
+                if key not in row and "abbreviation" not in row:
+                    row[key] = partial[key]
+    return rows
+
+
+def _as_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def partial_chart_points(partial):
+    """將一筆部分結果轉換為圖表數據點
+
+    - 車手彎道平均速度 (功能 20，stage=driver): 每位車手一個系列，x 為彎道編號
+    - 彎道統計 (功能 20，stage=corner): 車手平均速度系列，x 為彎道編號
+    - 年度超車統計 (功能 16.1，stage=driver): 淨超車系列，x 為完成順序
+
+    Returns:
+        list: [(系列名稱, x 值列表, y 值列表), ...]；無法繪製時為空列表
+    """
+    data = partial.get("data")
+    if not isinstance(data, dict):
+        return []
+
+    stage = partial.get("stage")
+    driver = partial.get("driver") or ""
+
+    if stage == "driver" and isinstance(data.get("corner_avg_speeds"), dict):
+        points = [(_as_number(corner), _as_number(speed))
+                  for corner, speed in data["corner_avg_speeds"].items()]
+        points = sorted((x, y) for x, y in points if x is not None and y is not None)
+        if not points:
+            return []
+        return [(driver, [x for x, _ in points], [y for _, y in points])]
+
+    if stage == "corner":
+        x = _as_number(partial.get("corner"))
+        y = _as_number(data.get("avg_speed"))
+        if x is None or y is None:
+            return []
+        return [(f"{driver} 平均速度".strip(), [x], [y])]
+
+    if stage == "driver" and "net_overtaking" in data:
+        x = _as_number(partial.get("index"))
+        y = _as_number(data.get("net_overtaking"))
+        if x is None or y is None:
+            return []
+        return [("淨超車", [x], [y])]
+
+    return []
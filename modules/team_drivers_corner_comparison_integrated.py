@@ -22,6 +22,9 @@ from prettytable import PrettyTable
 sys.path.append(str(Path(__file__).parent.parent))
 from modules.race_pitstop_statistics_enhanced import RacePitstopStatisticsEnhanced
 from modules.accident_analysis_complete import F1AccidentAnalyzer
+from modules.race_control_classifier import classify_text, CORNER_INCIDENT_RULES
+from modules.incident_timeline import get_incident_timeline
+from modules.pitstop_table import get_driver_pitstops
 
 class TeamDriversCornerComparisonIntegrated:
     """團隊車手彎道對比分析 - 集成進站與事件版本"""
@@ -106,19 +109,16 @@ class TeamDriversCornerComparisonIntegrated:
                         })
                 return pitstops
             else:
-                # 使用FastF1數據
-                if hasattr(self.data_loader, 'laps') and self.data_loader.laps is not None:
-                    driver_laps = self.data_loader.laps[self.data_loader.laps['Driver'] == driver]
-                    pitstops = []
-                    
-                    for _, lap in driver_laps.iterrows():
-                        if pd.notna(lap.get('PitOutTime')) or pd.notna(lap.get('PitInTime')):
-                            pitstops.append({
-                                'lap_number': lap['LapNumber'],
-                                'duration': 25.0,  # 估算時間
-                                'source': 'FastF1'
-                            })
-                    return pitstops
+                # 使用FastF1數據 - 共用進站表 (進站圈/出站圈已配對)
+                driver_stops = get_driver_pitstops(self.data_loader, driver)
+                return [
+                    {
+                        'lap_number': int(stop['lap']),
+                        'duration': round(float(stop['pit_lane_time']), 3),
+                        'source': 'FastF1'
+                    }
+                    for stop in driver_stops.to_dict('records')
+                ]
                     
         except Exception as e:
             print(f"[WARNING] 獲取車手 {driver} 進站資訊時發生錯誤: {e}")
@@ -127,20 +127,22 @@ class TeamDriversCornerComparisonIntegrated:
     
     def get_incident_info_for_lap_range(self, start_lap, end_lap):
         """獲取指定圈數範圍內的特殊事件"""
-        if not self.accident_analyzer or not hasattr(self.accident_analyzer, 'accidents'):
+        if not self.accident_analyzer:
             return []
             
         try:
+            # 賽事事件時間軸 - 依圈數排序的事件以二分搜尋取區間
+            timeline = get_incident_timeline(self.data_loader)
+            events = timeline.events_between_laps(start_lap, end_lap, 'is_accident_message')
+            
             incidents = []
-            for accident in self.accident_analyzer.accidents:
-                lap_num = accident.get('lap', 0)
-                if lap_num and start_lap <= lap_num <= end_lap:
-                    incidents.append({
-                        'lap': lap_num,
-                        'type': self._classify_incident_type(accident.get('message', '')),
-                        'message': accident.get('message', ''),
-                        'time': accident.get('time', 'N/A')
-                    })
+            for event in events.to_dict('records'):
+                incidents.append({
+                    'lap': int(event['timeline_lap']),
+                    'type': self._classify_incident_type(event.get('Message', '')),
+                    'message': event.get('Message', ''),
+                    'time': event.get('Time', 'N/A')
+                })
             return incidents
             
         except Exception as e:
@@ -149,22 +151,7 @@ class TeamDriversCornerComparisonIntegrated:
     
     def _classify_incident_type(self, message):
         """分類事件類型"""
-        msg = str(message).upper()
-        
-        if 'RED' in msg and 'FLAG' in msg:
-            return '🔴 紅旗'
-        elif 'SAFETY CAR' in msg:
-            return '🚗 安全車'
-        elif 'VIRTUAL SAFETY CAR' in msg or 'VSC' in msg:
-            return '🟡 虛擬安全車'
-        elif 'YELLOW' in msg and 'FLAG' in msg:
-            return '🟡 黃旗'
-        elif 'INVESTIGATION' in msg:
-            return '[DEBUG] 調查'
-        elif 'PENALTY' in msg:
-            return '[WARNING] 處罰'
-        else:
-            return '[LIST] 其他事件'
+        return classify_text(str(message).upper(), CORNER_INCIDENT_RULES, '[LIST] 其他事件')
     
     def analyze_team_drivers_corner_comparison(self, driver1="VER", driver2="NOR", corner_number=1, auto_mode=True):
         """
@@ -28,6 +28,11 @@ except ImportError:
         print("[WARNING] 無法導入 OpenF1 數據分析器")
         F1OpenDataAnalyzer = None
 
+try:
+    from .pitstop_table import get_pitstop_table
+except ImportError:
+    from pitstop_table import get_pitstop_table
+
 
 def check_cache(cache_key):
     """檢查緩存是否存在"""
@@ -186,7 +191,44 @@ def get_session_info(data_loader):
 
 
 def analyze_team_pitstop_performance(data_loader, session_info):
-    """分析車隊進站時間數據"""
+    """分析車隊進站時間數據 - 優先 OpenF1，無法取得時改用 FastF1 共用進站表"""
+    result = _analyze_team_pitstop_performance_openf1(data_loader, session_info)
+    if result:
+        return result
+    
+    print("[INFO] 改用 FastF1 圈速數據的進站表分析車隊進站時間")
+    result = _analyze_team_pitstop_performance_fastf1(data_loader)
+    return result or None
+
+
+def _analyze_team_pitstop_performance_fastf1(data_loader):
+    """以 FastF1 共用進站表 (進站通道時間) 分析車隊進站時間"""
+    table = get_pitstop_table(data_loader)
+    if table.empty:
+        print("[ERROR] FastF1 圈速數據中沒有可配對的進站記錄")
+        return None
+    
+    valid = table[table['is_valid']]
+    team_rankings = []
+    for team, times in valid.groupby('Team', sort=False)['pit_lane_time']:
+        times = times.astype(float).tolist()
+        std_deviation = statistics.stdev(times) if len(times) > 1 else 0.0
+        team_rankings.append({
+            'team': team,
+            'fastest_time': min(times),
+            'average_time': statistics.mean(times),
+            'median_time': statistics.median(times),
+            'pitstop_count': len(times),
+            'std_deviation': std_deviation,
+            'consistency_score': max(0, 100 - std_deviation * 20)
+        })
+    
+    team_rankings.sort(key=lambda x: x['fastest_time'])
+    return team_rankings
+
+
+def _analyze_team_pitstop_performance_openf1(data_loader, session_info):
+    """分析車隊進站時間數據 (OpenF1 API)"""
     if F1OpenDataAnalyzer is None:
         print("[ERROR] OpenF1 數據分析器未可用")
         return None
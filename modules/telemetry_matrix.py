@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+F1 全場遙測比較矩陣 - All-Drivers Telemetry Matrix
+將 N 位車手的最快圈 (或指定圈) 遙測重取樣到同一距離網格，一次比較全場
+
+- 各車手只從 session.car_data 切出該圈樣本，以速度積分得到圈內距離並依單圈距離正規化
+- 所有車手與通道重取樣為單一 (車手, 通道, 距離) float32 陣列
+- 與參考圈的時間差 (delta time) 以一次陣列相減取得全場結果
+- 輸出: 摘要表 + 緊湊的陣列附檔 (json_export 的 .arrays.npz，供圖表直接讀取)
+- overlay_series() / render_overlay() 一次呼叫取得全場速度/油門疊圖
+
+查詢範例:
+    matrix = build_telemetry_matrix(data_loader)                  # 全場最快圈
+    matrix = build_telemetry_matrix(data_loader, laps={'VER': 12}, drivers=['VER', 'NOR', 'LEC'])
+    matrix.channel('Speed')          # (車手, 距離) 速度矩陣
+    matrix.delta                     # (車手, 距離) 與參考圈時間差
+    render_overlay(matrix, "charts/overlay.png", channels=('Speed', 'Throttle'))
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from prettytable import PrettyTable
+
+try:
+    from .json_export import DEFAULT_ARRAY_THRESHOLD, write_json
+    from .minisector_table import driver_code_map, resolve_session_sources, team_colors
+    from .session_tables import json_value, to_seconds
+    from .tracing import span
+except ImportError:
+    from json_export import DEFAULT_ARRAY_THRESHOLD, write_json
+    from minisector_table import driver_code_map, resolve_session_sources, team_colors
+    from session_tables import json_value, to_seconds
+    from tracing import span
+
+# 比較通道 (session.car_data 欄位)；缺少的通道以 NaN 填充
+CHANNELS = ('Speed', 'Throttle', 'Brake', 'nGear', 'RPM', 'DRS')
+
+# 距離網格間距 (公尺)
+DEFAULT_GRID_STEP = 5.0
+
+# 全油門門檻 (%)
+FULL_THROTTLE = 98.0
+
+
+def select_laps(laps, drivers=None, chosen=None):
+    """每位車手的比較圈: 指定圈或最快的有效圈 (排除進/出站圈與刪除圈)
+
+    Returns:
+        DataFrame: 每位車手一列 (Driver, LapNumber, LapTime, LapStartTime, Time)
+    """
+    chosen = {str(k): int(v) for k, v in (chosen or {}).items()}
+    frame = laps[laps['LapTime'].notna() & laps['LapStartTime'].notna() & laps['Time'].notna()]
+    if drivers:
+        frame = frame[frame['Driver'].isin(list(drivers))]
+
+    clean = frame
+    for column in ('PitInTime', 'PitOutTime'):
+        if column in clean.columns:
+            clean = clean[clean[column].isna()]
+    if 'Deleted' in clean.columns:
+        clean = clean[~clean['Deleted'].fillna(False).astype(bool)]
+    fastest = clean.loc[clean.groupby('Driver', sort=False)['LapTime'].idxmin()] if not clean.empty else clean
+
+    if chosen:
+        picked = frame[[chosen.get(driver) == lap for driver, lap in zip(frame['Driver'], frame['LapNumber'])]]
+        fastest = pd.concat([fastest[~fastest['Driver'].isin(picked['Driver'])], picked])
+    return fastest.sort_values('LapTime', kind='mergesort')
+
+
+class TelemetryMatrix:
+    """全場遙測比較矩陣
+
+    Attributes:
+        drivers: 車手代碼 (第 0 軸，依圈速排序)
+        lap_numbers: 各車手比較圈
+        lap_times: 各車手圈速 (秒)
+        channels: 通道名稱 (第 1 軸)
+        distance: 距離網格 (公尺)
+        values: float32 (車手, 通道, 距離)
+        elapsed: float32 (車手, 距離) 圈內經過時間 (秒)
+        reference: 參考車手 (delta 基準)
+        lap_distance: 比較圈距離中位數 (公尺)
+    """
+
+    def __init__(self, drivers, lap_numbers, lap_times, channels, distance, values, elapsed,
+                 reference=None, colors=None, lap_distance=np.nan):
+        self.drivers = list(drivers)
+        self.lap_numbers = np.asarray(lap_numbers, dtype=int)
+        self.lap_times = np.asarray(lap_times, dtype=float)
+        self.channels = list(channels)
+        self.distance = distance
+        self.values = values
+        self.elapsed = elapsed
+        self.colors = colors or {}
+        self.lap_distance = lap_distance
+        self.set_reference(reference)
+
+    @property
+    def empty(self):
+        return not self.drivers
+
+    def set_reference(self, driver=None):
+        """設定 delta 基準車手 (預設為最快圈)，一次計算全場時間差"""
+        if self.empty:
+            self.reference = None
+            self.delta = np.zeros((0, len(self.distance)), dtype=np.float32)
+            return
+        self.reference = driver if driver in self.drivers else self.drivers[0]
+        self.delta = self.elapsed - self.elapsed[self.drivers.index(self.reference)]
+
+    def channel(self, name):
+        """(車手, 距離) 單一通道矩陣"""
+        return self.values[:, self.channels.index(name), :]
+
+    def summary(self):
+        """每位車手的圈速、差距與通道統計"""
+        speed = self.channel('Speed')
+        throttle = self.channel('Throttle')
+        brake = self.channel('Brake')
+        with np.errstate(invalid='ignore'):
+            # 時間差在 50 m 內的變化，找出失去最多時間的位置
+            window = max(1, int(round(50.0 / max(self.distance[1] - self.distance[0], 1e-6)))) \
+                if len(self.distance) > 1 else 1
+            loss_rate = np.full_like(self.delta, np.nan)
+            if self.delta.shape[1] > window:
+                loss_rate[:, window:] = self.delta[:, window:] - self.delta[:, :-window]
+        filled = np.where(np.isnan(loss_rate), -np.inf, loss_rate)
+        worst = np.argmax(filled, axis=1)
+        # 完全沒有失時 (如參考車手本身 delta 全為 0) 時不標示位置
+        worst_rate = filled[np.arange(len(worst)), worst]
+        return pd.DataFrame({
+            'driver': self.drivers,
+            'lap': self.lap_numbers,
+            'lap_time': self.lap_times,
+            'gap_to_reference': self.lap_times - self.lap_times[self.drivers.index(self.reference)],
+            'top_speed': np.nanmax(speed, axis=1),
+            'min_speed': np.nanmin(speed, axis=1),
+            'mean_speed': np.nanmean(speed, axis=1),
+            'full_throttle_percent': np.mean(throttle >= FULL_THROTTLE, axis=1) * 100,
+            'braking_percent': np.mean(brake > 0, axis=1) * 100,
+            'largest_loss_at_m': np.where(np.isfinite(worst_rate) & (worst_rate > 0), self.distance[worst], np.nan),
+        })
+
+    def payload(self):
+        """圖表用的緊湊陣列資料 (float32，交由 write_json 移至 .arrays.npz)"""
+        return {
+            "drivers": self.drivers,
+            "laps": self.lap_numbers.tolist(),
+            "lap_times": [round(float(value), 3) for value in self.lap_times],
+            "channels": self.channels,
+            "reference": self.reference,
+            "colors": {driver: self.colors.get(driver) for driver in self.drivers},
+            "distance": self.distance.astype(np.float32),
+            "values": self.values,
+            "delta": self.delta.astype(np.float32),
+        }
+
+    def overlay_series(self, channel='Speed'):
+        """全場疊圖資料 (chart_renderer 'line' 格式)"""
+        values = self.channel(channel) if channel != 'Delta' else self.delta
+        return [
+            {"x": self.distance, "y": values[index], "label": driver, "color": self.colors.get(driver),
+             "linewidth": 1.0}
+            for index, driver in enumerate(self.drivers)
+        ]
+
+
+def _lap_samples(car, start, end):
+    """切出單圈 car_data 樣本 (含前後各一筆，確保涵蓋起訖時間)"""
+    times = to_seconds(car['SessionTime'])
+    order = np.argsort(times, kind='stable')
+    times = times[order]
+    first = max(np.searchsorted(times, start, side='right') - 1, 0)
+    last = min(np.searchsorted(times, end, side='left') + 1, len(times))
+    rows = order[first:last]
+    return times[first:last], rows
+
+
+def build_telemetry_matrix(source, drivers=None, laps=None, channels=CHANNELS,
+                           grid_step=DEFAULT_GRID_STEP, reference=None):
+    """建立全場遙測比較矩陣
+
+    Args:
+        source: get_loaded_data() 字典、數據載入器或 FastF1 session
+        drivers: 只比較指定車手 (None 為全場)
+        laps: 指定比較圈 {'VER': 12}，未指定的車手使用最快有效圈
+        channels: 比較通道
+        grid_step: 距離網格間距 (公尺)
+        reference: delta 基準車手 (預設為最快圈)
+    """
+    lap_frame, car_data, _, results = resolve_session_sources(source)
+    colors = team_colors(results)
+    if lap_frame is None or lap_frame.empty or not car_data:
+        return TelemetryMatrix([], [], [], channels, np.zeros(0), np.zeros((0, len(channels), 0), np.float32),
+                               np.zeros((0, 0), np.float32), colors=colors)
+
+    with span("table.telemetry_matrix"):
+        numbers = {code: number for number, code in driver_code_map(lap_frame, results).items()}
+        selected = select_laps(lap_frame, drivers, laps)
+
+        samples = []
+        for row in selected.itertuples(index=False):
+            car = car_data.get(numbers.get(row.Driver)) if numbers.get(row.Driver) is not None else None
+            if car is None or len(car) < 2 or 'SessionTime' not in car.columns or 'Speed' not in car.columns:
+                continue
+            start = row.LapStartTime.total_seconds()
+            end = row.Time.total_seconds()
+            times, rows = _lap_samples(car, start, end)
+            if len(times) < 2:
+                continue
+            speed = np.nan_to_num(car['Speed'].to_numpy(dtype=float)[rows]) / 3.6
+            distance = np.concatenate(([0.0], np.cumsum(np.diff(times) * (speed[1:] + speed[:-1]) / 2)))
+            # 以起訖時間的距離裁切，並正規化為 0-1 的圈內比例
+            lap_start, lap_end = np.interp([start, end], times, distance)
+            if lap_end <= lap_start:
+                continue
+            channel_values = np.vstack([
+                car[name].to_numpy(dtype=float)[rows] if name in car.columns else np.full(len(rows), np.nan)
+                for name in channels
+            ])
+            samples.append((row.Driver, int(row.LapNumber), row.LapTime.total_seconds(),
+                            (distance - lap_start) / (lap_end - lap_start), times - start, channel_values,
+                            lap_end - lap_start))
+
+        if not samples:
+            return TelemetryMatrix([], [], [], channels, np.zeros(0), np.zeros((0, len(channels), 0), np.float32),
+                                   np.zeros((0, 0), np.float32), colors=colors)
+
+        lap_distance = float(np.median([sample[6] for sample in samples]))
+        distance = np.arange(0.0, lap_distance, grid_step)
+        fractions = distance / lap_distance
+        values = np.empty((len(samples), len(channels), len(distance)), dtype=np.float32)
+        elapsed = np.empty((len(samples), len(distance)), dtype=np.float32)
+        for index, (_, _, _, fraction, lap_elapsed, channel_values, _) in enumerate(samples):
+            elapsed[index] = np.interp(fractions, fraction, lap_elapsed)
+            for c in range(len(channels)):
+                values[index, c] = np.interp(fractions, fraction, channel_values[c])
+
+    return TelemetryMatrix([s[0] for s in samples], [s[1] for s in samples], [s[2] for s in samples],
+                           channels, distance, values, elapsed, reference=reference, colors=colors,
+                           lap_distance=lap_distance)
+
+
+def _render_overlay(fig, axes, matrix=None, channels=('Speed', 'Throttle'), title=""):
+    """全場疊圖: 每個通道一列子圖，最後一列為時間差"""
+    axes = np.atleast_1d(axes)
+    for ax, name in zip(axes, list(channels) + ['Delta']):
+        for series in matrix.overlay_series(name):
+            ax.plot(series['x'], series['y'], label=series['label'], color=series['color'],
+                    linewidth=series['linewidth'])
+        ax.set_ylabel(name if name != 'Delta' else f"Δt vs {matrix.reference} (s)")
+        ax.grid(True, alpha=0.3)
+    axes[0].set_title(title, fontweight="bold")
+    axes[0].legend(ncol=min(len(matrix.drivers), 10), fontsize=7, loc='lower left')
+    axes[-1].set_xlabel("距離 (m)")
+
+
+def render_overlay(matrix, output, channels=('Speed', 'Throttle'), title="全場遙測疊圖"):
+    """一次輸出全場速度/油門 (及時間差) 疊圖 PNG"""
+    try:
+        from .chart_renderer import render_chart_jobs
+    except ImportError:
+        from chart_renderer import render_chart_jobs
+    return render_chart_jobs([{
+        "renderer": _render_overlay,
+        "output": output,
+        "nrows": len(channels) + 1,
+        "figsize": (14, 3 * (len(channels) + 1)),
+        "params": {"matrix": matrix, "channels": channels, "title": title},
+    }])
+
+
+def _format_lap(seconds):
+    if seconds is None or seconds != seconds:
+        return "N/A"
+    return f"{int(seconds // 60)}:{seconds % 60:06.3f}"
+
+
+def display_summary(summary, reference):
+    table = PrettyTable()
+    table.field_names = ["車手", "圈數", "圈速", f"與 {reference} 差距", "最高速", "最低速", "平均速度",
+                         "全油門", "煞車", "最大失時位置"]
+    table.align = "c"
+    for row in summary.to_dict('records'):
+        table.add_row([
+            row['driver'], row['lap'], _format_lap(row['lap_time']),
+            f"{row['gap_to_reference']:+.3f}s",
+            f"{row['top_speed']:.1f}", f"{row['min_speed']:.1f}", f"{row['mean_speed']:.1f}",
+            f"{row['full_throttle_percent']:.1f}%", f"{row['braking_percent']:.1f}%",
+            f"{row['largest_loss_at_m']:.0f} m" if row['largest_loss_at_m'] == row['largest_loss_at_m'] else "N/A",
+        ])
+    print(f"\n📡 全場遙測比較 (參考圈: {reference})")
+    print(table)
+
+
+def run_all_drivers_telemetry_comparison(data_loader, drivers=None, laps=None, reference=None,
+                                         grid_step=DEFAULT_GRID_STEP, show_detailed_output=True):
+    """全部車手遙測比較 (功能41)"""
+    matrix = build_telemetry_matrix(data_loader, drivers=drivers, laps=laps, grid_step=grid_step,
+                                    reference=reference)
+    if matrix.empty:
+        return {"success": False, "message": "沒有可用的遙測數據，無法建立全場比較", "function_id": "41"}
+
+    summary = matrix.summary()
+    if show_detailed_output:
+        display_summary(summary, matrix.reference)
+
+    # 陣列寫入 .arrays.npz 附檔，回應只帶摘要與檔案路徑
+    year = getattr(data_loader, 'year', None) or 'unknown'
+    race = str(getattr(data_loader, 'race_name', None) or 'unknown').replace(" ", "_")
+    session_type = getattr(data_loader, 'session_type', None) or 'R'
+    payload_path = None
+    try:
+        payload_path = write_json(
+            os.path.join("json", f"all_drivers_telemetry_{year}_{race}_{session_type}.json"),
+            matrix.payload(), array_threshold=DEFAULT_ARRAY_THRESHOLD)
+        if show_detailed_output:
+            print(f"[INFO] 遙測矩陣已保存: {payload_path}")
+    except Exception as e:
+        print(f"[WARNING] 遙測矩陣保存失敗: {e}")
+
+    return {
+        "success": True,
+        "message": f"全部車手遙測比較完成 ({len(matrix.drivers)} 位車手)",
+        "data": {
+            "reference": matrix.reference,
+            "channels": matrix.channels,
+            "grid_step": grid_step,
+            "lap_distance": json_value(matrix.lap_distance, 1),
+            "summary": [{key: json_value(value) for key, value in row.items()} for row in summary.to_dict('records')],
+            "payload_file": payload_path,
+        },
+        "function_id": "41",
+    }
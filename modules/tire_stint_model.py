@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+F1 輪胎 Stint 與衰退模型 - Session Tire Stint Model
+每場賽事一次建立全場車手的 stint 表與輪胎衰退擬合，供輪胎相關分析共用
+
+- stint 表: 車手、stint、配方、起訖圈、輪胎圈齡、平均/最快圈速
+- 衰退擬合: 以分組加總 (Σx, Σy, Σxy, Σx²) 一次完成所有 stint 的最小平方法直線擬合
+- 燃油修正: 扣除每圈燃油減輕帶來的圈速提升，衰退率只反映輪胎
+- 排除進/出站圈、第 1 圈、非綠旗圈與超過 stint 中位數 107% 的慢圈
+
+查詢範例:
+    model = get_tire_model(data_loader)
+    model.driver_stints('VER')          # 車手各 stint 與衰退率
+    model.compound_summary()            # 全場各配方平均衰退
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+from itertools import product
+
+import numpy as np
+import pandas as pd
+from prettytable import PrettyTable
+
+try:
+    from .pitstop_table import get_pitstop_table, resolve_laps
+    from .session_tables import IdentityCache, json_value, to_seconds
+except ImportError:
+    from pitstop_table import get_pitstop_table, resolve_laps
+    from session_tables import IdentityCache, json_value, to_seconds
+
+# 每少一圈燃油帶來的圈速提升 (秒/圈) - 約 1.7 kg/圈 × 0.035 秒/kg
+FUEL_SECONDS_PER_LAP = 0.06
+
+# 超過 stint 中位數此比例的圈速不納入擬合 (黃旗、失誤、交通)
+SLOW_LAP_RATIO = 1.07
+
+# stint 至少需要的擬合圈數
+MIN_FIT_LAPS = 4
+
+DRY_COMPOUNDS = ('SOFT', 'MEDIUM', 'HARD')
+
+# 無進站數據時的預設進站損失 (秒)
+DEFAULT_PIT_LOSS = 22.0
+
+# 策略模擬的最短 stint 圈數
+MIN_STINT_LAPS = 5
+
+MAX_CACHED_MODELS = 4
+
+
+def _column(frame, name, default=np.nan):
+    if name in frame.columns:
+        return frame[name]
+    return pd.Series(default, index=frame.index)
+
+
+def annotate_stint_laps(laps):
+    """為每圈加上 stint 編號、輪胎圈齡、燃油修正圈速與擬合標記"""
+    columns = [c for c in ('Driver', 'Team', 'LapNumber', 'LapTime', 'Compound', 'TyreLife', 'Stint',
+                           'PitInTime', 'PitOutTime', 'TrackStatus', 'Position') if c in laps.columns]
+    frame = laps[columns].sort_values(['Driver', 'LapNumber'], kind='mergesort').reset_index(drop=True)
+    for name in ('Team', 'Position'):
+        if name not in frame.columns:
+            frame[name] = np.nan
+    drivers = frame['Driver']
+
+    compound = _column(frame, 'Compound').astype(object)
+    compound = compound.where(compound.notna(), 'UNKNOWN')
+    tyre_life = pd.to_numeric(_column(frame, 'TyreLife'), errors='coerce')
+
+    stint = pd.to_numeric(_column(frame, 'Stint'), errors='coerce').groupby(drivers, sort=False).ffill()
+    if stint.isna().any():
+        # 沒有 Stint 欄位時，配方改變或輪胎圈齡歸零即視為新 stint
+        previous_compound = compound.groupby(drivers, sort=False).shift(1)
+        previous_life = tyre_life.groupby(drivers, sort=False).shift(1)
+        new_stint = previous_compound.isna() | (compound != previous_compound) | (tyre_life <= previous_life)
+        derived = new_stint.astype(int).groupby(drivers, sort=False).cumsum()
+        stint = stint.where(stint.notna(), derived)
+
+    frame['stint'] = stint.astype(int)
+    frame['compound'] = compound
+    stint_keys = [drivers, frame['stint']]
+    frame['stint_lap'] = frame.groupby(stint_keys, sort=False).cumcount() + 1
+    frame['tyre_age'] = tyre_life.where(tyre_life.notna(), frame['stint_lap'])
+
+    frame['lap_seconds'] = to_seconds(_column(frame, 'LapTime'))
+    lap_seconds = frame['lap_seconds']
+    total_laps = frame['LapNumber'].max()
+    frame['fuel_corrected'] = lap_seconds - FUEL_SECONDS_PER_LAP * (total_laps - frame['LapNumber'])
+
+    candidate = (lap_seconds.notna()
+                 & _column(frame, 'PitInTime').isna()
+                 & _column(frame, 'PitOutTime').isna()
+                 & (frame['LapNumber'] > 1))
+    if 'TrackStatus' in frame.columns:
+        candidate &= frame['TrackStatus'].astype(str) == '1'
+    stint_median = lap_seconds.where(candidate).groupby(stint_keys, sort=False).transform('median')
+    frame['is_fit_lap'] = candidate & (lap_seconds <= stint_median * SLOW_LAP_RATIO)
+    return frame
+
+
+def fit_stint_degradation(frame):
+    """所有 stint 一次完成最小平方法擬合
+
+    Returns:
+        DataFrame: 以 (Driver, stint) 為索引，含 fit_laps、degradation_per_lap (原始)、
+                   fuel_corrected_degradation (燃油修正) 與 base_lap_time (圈齡 0 的修正圈速)
+    """
+    fit = frame[frame['is_fit_lap']]
+    x = fit['tyre_age'].astype(float)
+    y = fit['fuel_corrected']
+    raw = fit['lap_seconds']
+    sums = pd.DataFrame({
+        'n': 1.0, 'sx': x, 'sxx': x * x,
+        'sy': y, 'sxy': x * y,
+        'sr': raw, 'sxr': x * raw,
+    }).groupby([fit['Driver'], fit['stint']], sort=False).sum()
+
+    n, sx, sxx = sums['n'], sums['sx'], sums['sxx']
+    denominator = n * sxx - sx * sx
+    usable = (n >= MIN_FIT_LAPS) & (denominator > 0)
+    denominator = denominator.where(usable)
+
+    slope = (n * sums['sxy'] - sx * sums['sy']) / denominator
+    raw_slope = (n * sums['sxr'] - sx * sums['sr']) / denominator
+    return pd.DataFrame({
+        'fit_laps': n.astype(int),
+        'degradation_per_lap': raw_slope,
+        'fuel_corrected_degradation': slope,
+        'base_lap_time': (sums['sy'] - slope * sx) / n,
+    })
+
+
+def build_stint_table(frame):
+    """由逐圈標記建立 stint 表 (含衰退擬合)"""
+    if frame.empty:
+        return pd.DataFrame()
+    grouped = frame.groupby(['Driver', 'stint'], sort=False)
+    stints = grouped.agg(
+        team=('Team', 'first'),
+        compound=('compound', 'first'),
+        start_lap=('LapNumber', 'min'),
+        end_lap=('LapNumber', 'max'),
+        laps=('LapNumber', 'size'),
+        tyre_life_start=('tyre_age', 'first'),
+        tyre_life_end=('tyre_age', 'last'),
+        average_lap_time=('lap_seconds', 'mean'),
+        best_lap_time=('lap_seconds', 'min'),
+        position_start=('Position', 'first'),
+        position_end=('Position', 'last'),
+    )
+    stints = stints.join(fit_stint_degradation(frame))
+    stints['fit_laps'] = stints['fit_laps'].fillna(0).astype(int)
+    stints[['start_lap', 'end_lap']] = stints[['start_lap', 'end_lap']].astype(int)
+    return stints.reset_index()
+
+
+class TireStintModel:
+    """全場輪胎 stint 與衰退模型"""
+
+    def __init__(self, laps):
+        required = {'Driver', 'LapNumber'}
+        if laps is None or len(laps) == 0 or not required.issubset(laps.columns):
+            self.laps = pd.DataFrame()
+            self.stints = pd.DataFrame()
+            self.total_laps = 0
+        else:
+            self.laps = annotate_stint_laps(laps)
+            self.stints = build_stint_table(self.laps)
+            self.total_laps = int(self.laps['LapNumber'].max())
+        self._compound_summary = None
+
+    @property
+    def empty(self):
+        return self.stints.empty
+
+    def driver_laps(self, driver):
+        """車手逐圈數據 (含 stint 標記)"""
+        if self.laps.empty:
+            return self.laps
+        return self.laps[self.laps['Driver'] == driver]
+
+    def driver_stints(self, driver):
+        """車手各 stint"""
+        if self.stints.empty:
+            return self.stints
+        return self.stints[self.stints['Driver'] == driver]
+
+    def compound_summary(self):
+        """全場各配方衰退摘要 - 以擬合圈數加權的燃油修正衰退率"""
+        if self._compound_summary is not None:
+            return self._compound_summary
+        fitted = self.stints[self.stints['fuel_corrected_degradation'].notna()] if not self.stints.empty else self.stints
+        if fitted.empty:
+            self._compound_summary = pd.DataFrame(columns=[
+                'compound', 'stints', 'drivers', 'fit_laps', 'fuel_corrected_degradation',
+                'degradation_per_lap', 'base_lap_time', 'longest_stint'])
+            return self._compound_summary
+
+        weights = fitted['fit_laps'].astype(float)
+        weighted = fitted.assign(
+            w_corrected=fitted['fuel_corrected_degradation'] * weights,
+            w_raw=fitted['degradation_per_lap'] * weights,
+            weight=weights,
+        ).groupby('compound', sort=False)
+        summary = weighted.agg(
+            stints=('Driver', 'size'),
+            drivers=('Driver', 'nunique'),
+            fit_laps=('fit_laps', 'sum'),
+            w_corrected=('w_corrected', 'sum'),
+            w_raw=('w_raw', 'sum'),
+            weight=('weight', 'sum'),
+            base_lap_time=('base_lap_time', 'median'),
+            longest_stint=('laps', 'max'),
+        )
+        summary['fuel_corrected_degradation'] = summary['w_corrected'] / summary['weight']
+        summary['degradation_per_lap'] = summary['w_raw'] / summary['weight']
+        summary = summary.drop(columns=['w_corrected', 'w_raw', 'weight']).reset_index()
+        self._compound_summary = summary.sort_values('fuel_corrected_degradation').reset_index(drop=True)
+        return self._compound_summary
+
+    def grid_degradation(self, compound=None):
+        """全場 stint 依燃油修正衰退率排序 (可指定配方)"""
+        fitted = self.stints[self.stints['fuel_corrected_degradation'].notna()] if not self.stints.empty else self.stints
+        if compound is not None and not fitted.empty:
+            fitted = fitted[fitted['compound'] == compound]
+        return fitted.sort_values('fuel_corrected_degradation') if not fitted.empty else fitted
+
+
+_model_cache = IdentityCache("tire_model", MAX_CACHED_MODELS)
+
+
+def get_tire_model(source):
+    """取得輪胎 stint 模型 (每份圈速數據只建立一次)
+
+    Args:
+        source: laps DataFrame、get_loaded_data() 字典、數據載入器或 FastF1 session
+    """
+    laps = resolve_laps(source)
+    return _model_cache.get_or_build(laps, lambda: TireStintModel(laps), span_name="table.tire_model")
+
+
+def clear_cache():
+    """清除輪胎模型快取"""
+    _model_cache.clear()
+
+
+def stint_records(stints):
+    """stint 表轉為字典列表"""
+    return [{key: json_value(value) for key, value in row.items()} for row in stints.to_dict('records')]
+
+
+def _format_rate(value):
+    return f"{value:+.3f}s/圈" if value is not None and value == value else "N/A"
+
+
+def _format_lap(seconds):
+    if seconds is None or seconds != seconds:
+        return "N/A"
+    return f"{int(seconds // 60)}:{seconds % 60:06.3f}"
+
+
+def display_stint_table(stints, title):
+    """顯示 stint 表"""
+    table = PrettyTable()
+    table.field_names = ["車手", "Stint", "配方", "圈數範圍", "圈數", "平均圈速", "衰退率", "燃油修正衰退", "擬合圈數"]
+    table.align = "c"
+    for row in stints.to_dict('records'):
+        table.add_row([
+            row['Driver'], int(row['stint']), row['compound'],
+            f"{row['start_lap']}-{row['end_lap']}", row['laps'],
+            _format_lap(row['average_lap_time']),
+            _format_rate(row['degradation_per_lap']),
+            _format_rate(row['fuel_corrected_degradation']),
+            row['fit_laps'],
+        ])
+    print(f"\n🛞 {title}")
+    print(table)
+
+
+def display_compound_summary(summary):
+    """顯示全場配方衰退摘要"""
+    table = PrettyTable()
+    table.field_names = ["配方", "Stint 數", "車手數", "擬合圈數", "修正基準圈速", "衰退率", "燃油修正衰退", "最長 stint"]
+    table.align = "c"
+    for row in summary.to_dict('records'):
+        table.add_row([
+            row['compound'], row['stints'], row['drivers'], row['fit_laps'],
+            _format_lap(row['base_lap_time']),
+            _format_rate(row['degradation_per_lap']),
+            _format_rate(row['fuel_corrected_degradation']),
+            f"{row['longest_stint']} 圈",
+        ])
+    print("\n📊 全場輪胎配方衰退比較 (燃油修正)")
+    print(table)
+
+
+def run_driver_stint_analysis(data_loader, driver, show_detailed_output=True):
+    """車手 stint 與輪胎衰退分析 (功能6.2)"""
+    model = get_tire_model(data_loader)
+    stints = model.driver_stints(driver)
+    if stints.empty:
+        return {"success": False, "message": f"找不到車手 {driver} 的 stint 數據", "function_id": "6.2"}
+
+    if show_detailed_output:
+        display_stint_table(stints, f"車手 {driver} 輪胎策略 (共 {len(stints)} 個 stint)")
+
+    return {
+        "success": True,
+        "message": f"車手 {driver} 輪胎策略遙測分析完成",
+        "data": {"driver": driver, "stints": stint_records(stints)},
+        "function_id": "6.2",
+    }
+
+
+def run_driver_tire_performance(data_loader, driver, show_detailed_output=True):
+    """車手各配方衰退與全場比較 (功能6.3)"""
+    model = get_tire_model(data_loader)
+    stints = model.driver_stints(driver)
+    if stints.empty:
+        return {"success": False, "message": f"找不到車手 {driver} 的 stint 數據", "function_id": "6.3"}
+
+    grid = model.compound_summary().set_index('compound')
+    comparison = []
+    for row in stints.to_dict('records'):
+        field = grid['fuel_corrected_degradation'].get(row['compound'], np.nan)
+        delta = row['fuel_corrected_degradation'] - field
+        comparison.append({
+            "stint": int(row['stint']),
+            "compound": row['compound'],
+            "laps": int(row['laps']),
+            "fuel_corrected_degradation": json_value(row['fuel_corrected_degradation']),
+            "grid_degradation": json_value(field),
+            "delta_to_grid": json_value(delta),
+        })
+
+    if show_detailed_output:
+        table = PrettyTable()
+        table.field_names = ["Stint", "配方", "圈數", "車手衰退", "全場平均", "差距"]
+        table.align = "c"
+        for item in comparison:
+            table.add_row([item['stint'], item['compound'], item['laps'],
+                           _format_rate(item['fuel_corrected_degradation']),
+                           _format_rate(item['grid_degradation']),
+                           _format_rate(item['delta_to_grid'])])
+        print(f"\n🛞 車手 {driver} 輪胎性能 vs 全場 (燃油修正衰退率)")
+        print(table)
+
+    return {
+        "success": True,
+        "message": f"車手 {driver} 輪胎性能遙測分析完成",
+        "data": {"driver": driver, "comparison": comparison},
+        "function_id": "6.3",
+    }
+
+
+def _stint_times(lengths, base, degradation):
+    """stint 總時間: 每圈基準圈速 + 圈齡 1..n 的線性衰退"""
+    return lengths * base + degradation * lengths * (lengths + 1) / 2
+
+
+def simulate_strategies(compound_params, total_laps, pit_loss, max_stops=2, min_stint=MIN_STINT_LAPS):
+    """列舉一停/二停策略並以 numpy 網格求各配方組合的最佳 stint 長度
+
+    Args:
+        compound_params: {配方: (基準圈速, 燃油修正衰退率)}
+        total_laps: 比賽圈數
+        pit_loss: 每次進站損失 (秒)
+
+    Returns:
+        list: 依總時間排序的策略
+    """
+    compounds = [c for c in DRY_COMPOUNDS if c in compound_params] or list(compound_params)
+    strategies = []
+    for stops in range(1, max_stops + 1):
+        stint_count = stops + 1
+        if total_laps < stint_count * min_stint:
+            break
+        # 前 n-1 個 stint 長度的網格，最後一個 stint 補足剩餘圈數
+        axes = np.meshgrid(*[np.arange(min_stint, total_laps + 1)] * stops, indexing='ij')
+        lengths = [axis.ravel() for axis in axes]
+        last = total_laps - np.sum(lengths, axis=0)
+        valid = last >= min_stint
+        lengths = [length[valid] for length in lengths] + [last[valid]]
+        if not len(lengths[-1]):
+            continue
+
+        for combo in product(compounds, repeat=stint_count):
+            # 乾地規則: 至少使用兩種配方
+            if len(set(combo)) < 2 and len(compounds) > 1:
+                continue
+            total = stops * pit_loss
+            for length, compound in zip(lengths, combo):
+                base, degradation = compound_params[compound]
+                total = total + _stint_times(length, base, max(degradation, 0.0))
+            best = int(np.argmin(total))
+            stint_lengths = [int(length[best]) for length in lengths]
+            strategies.append({
+                "stops": stops,
+                "compounds": list(combo),
+                "stint_lengths": stint_lengths,
+                "pit_laps": [int(v) for v in np.cumsum(stint_lengths)[:-1]],
+                "total_time": float(total[best]),
+            })
+
+    strategies.sort(key=lambda s: s['total_time'])
+    if strategies:
+        fastest = strategies[0]['total_time']
+        for strategy in strategies:
+            strategy['gap_to_best'] = round(strategy['total_time'] - fastest, 3)
+            strategy['total_time'] = round(strategy['total_time'], 3)
+    return strategies
+
+
+def run_tire_strategy_optimization(data_loader, show_detailed_output=True, top_n=8):
+    """輪胎策略優化 (功能30)
+
+    以全場燃油修正衰退模型為各配方參數，列舉一停/二停策略並求最佳 stint 長度
+    """
+    print("🛞 開始輪胎策略優化分析...")
+    model = get_tire_model(data_loader)
+    summary = model.compound_summary()
+    if summary.empty:
+        return {"success": False, "message": "輪胎策略優化失敗：沒有足夠的 stint 擬合數據", "function_id": "30"}
+
+    compound_params = {
+        row['compound']: (row['base_lap_time'], row['fuel_corrected_degradation'])
+        for row in summary.to_dict('records')
+        if row['base_lap_time'] == row['base_lap_time']
+    }
+
+    pitstops = get_pitstop_table(data_loader)
+    valid_stops = pitstops.loc[pitstops['is_valid'], 'pit_lane_time'] if not pitstops.empty else pitstops
+    pit_loss = float(valid_stops.median()) if len(valid_stops) else DEFAULT_PIT_LOSS
+
+    strategies = simulate_strategies(compound_params, model.total_laps, pit_loss)
+
+    if show_detailed_output:
+        display_compound_summary(summary)
+        table = PrettyTable()
+        table.field_names = ["排名", "進站", "配方順序", "Stint 圈數", "進站圈", "與最佳差距"]
+        table.align = "c"
+        for rank, strategy in enumerate(strategies[:top_n], 1):
+            table.add_row([rank, f"{strategy['stops']} 停",
+                           " → ".join(strategy['compounds']),
+                           " / ".join(str(v) for v in strategy['stint_lengths']),
+                           ", ".join(str(v) for v in strategy['pit_laps']),
+                           f"+{strategy['gap_to_best']:.1f}s"])
+        print(f"\n🎯 最佳策略 (比賽 {model.total_laps} 圈，進站損失 {pit_loss:.1f}s)")
+        print(table)
+
+    print("\n✅ 輪胎策略優化分析完成！")
+    return {
+        "success": True,
+        "message": "輪胎策略優化完成",
+        "data": {
+            "total_laps": model.total_laps,
+            "pit_loss": round(pit_loss, 3),
+            "compound_summary": stint_records(summary),
+            "strategies": strategies[:top_n],
+        },
+        "function_id": "30",
+    }
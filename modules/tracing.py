@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+F1 分析追蹤 - Lightweight Tracing Spans
+記錄 數據載入 → 分析 → 圖表/JSON 輸出 各階段的巢狀耗時與記憶體配置
+
+- start_trace() 只對單一請求啟用追蹤 (contextvars，不影響其他請求/執行緒)
+- 目前 span 同樣存於 contextvars；以 contextvars.copy_context().run 提交到執行緒池的工作
+  沿用提交時的追蹤，並行的子 span 各自掛在提交時的父 span 下
+- span() / traced() 在未啟用時直接返回共用的空物件，幾乎沒有額外開銷
+- memory=True 時以 tracemalloc 記錄每個 span 的淨配置量 (會拖慢執行，僅供除錯)；
+  多請求的服務程序以 F1_TRACE_MEMORY 在啟動時開啟一次 tracemalloc，不逐請求切換
+- 完成的追蹤樹可附加在 API 回應中，並以 JSON 單行寫入輪替日誌 logs/trace.log 供彙整
+
+使用範例:
+    with start_trace("analyze", function_id="5") as trace:
+        with span("load.pickle_read"):
+            ...
+    trace.to_dict()              # 巢狀 span 樹
+    print(format_span_tree(trace))
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import time
+import tracemalloc
+from logging.handlers import RotatingFileHandler
+
+# 環境變數: CLI 未指定 --trace 時也可啟用追蹤
+TRACE_ENV_VAR = "F1_TRACE"
+# 環境變數: 服務程序啟動時開啟 tracemalloc，追蹤才記錄記憶體配置
+TRACE_MEMORY_ENV_VAR = "F1_TRACE_MEMORY"
+
+TRACE_LOG_PATH = os.path.join("logs", "trace.log")
+TRACE_LOG_MAX_BYTES = 5 * 1024 * 1024
+TRACE_LOG_BACKUPS = 5
+
+_active_trace = contextvars.ContextVar("f1_active_trace", default=None)
+_current_span = contextvars.ContextVar("f1_current_span", default=None)
+_trace_logger = None
+
+
+class _NullSpan:
+    """追蹤未啟用時使用的空 span"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """單一追蹤區段"""
+
+    __slots__ = ("name", "attrs", "children", "wall_ms", "cpu_ms", "alloc_kb", "error",
+                 "_trace", "_parent", "_token", "_wall_start", "_cpu_start", "_mem_start")
+
+    def __init__(self, trace, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.children = []
+        self.wall_ms = None
+        self.cpu_ms = None
+        self.alloc_kb = None
+        self.error = None
+        self._trace = trace
+        self._parent = None
+        self._token = None
+
+    def set(self, **attrs):
+        """補充 span 屬性 (如資料筆數、輸出路徑)"""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        trace = self._trace
+        parent = _current_span.get()
+        self._parent = parent if parent is not None and parent._trace is trace else trace.root
+        self._parent.children.append(self)
+        self._token = _current_span.set(self)
+        self._mem_start = tracemalloc.get_traced_memory()[0] if trace.memory else None
+        self._cpu_start = time.process_time()
+        self._wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.wall_ms = (time.perf_counter() - self._wall_start) * 1000
+        self.cpu_ms = (time.process_time() - self._cpu_start) * 1000
+        if self._mem_start is not None:
+            self.alloc_kb = (tracemalloc.get_traced_memory()[0] - self._mem_start) / 1024
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        return False
+
+    def to_dict(self):
+        node = {"name": self.name, "wall_ms": _round(self.wall_ms), "cpu_ms": _round(self.cpu_ms)}
+        if self.alloc_kb is not None:
+            node["alloc_kb"] = _round(self.alloc_kb)
+        if self.attrs:
+            node["attrs"] = self.attrs
+        if self.error:
+            node["error"] = self.error
+        if self.children:
+            node["children"] = [child.to_dict() for child in self.children]
+        return node
+
+
+def _round(value):
+    return round(value, 3) if value is not None else None
+
+
+class Trace:
+    """一次請求的追蹤樹"""
+
+    def __init__(self, name, memory=False, **attrs):
+        self.memory = memory
+        self.root = Span(self, name, attrs)
+        self.peak_kb = None
+        self._started_tracemalloc = False
+        self._token = None
+        self._span_token = None
+
+    def __enter__(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._token = _active_trace.set(self)
+        # 根 span 沒有父節點，直接設定為目前節點
+        root = self.root
+        root._parent = None
+        self._span_token = _current_span.set(root)
+        root._mem_start = tracemalloc.get_traced_memory()[0] if self.memory else None
+        root._cpu_start = time.process_time()
+        root._wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        root = self.root
+        root.wall_ms = (time.perf_counter() - root._wall_start) * 1000
+        root.cpu_ms = (time.process_time() - root._cpu_start) * 1000
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            root.alloc_kb = (current - root._mem_start) / 1024
+            # 程序層級開啟的 tracemalloc 峰值涵蓋其他請求，只在本追蹤自行開啟時記錄
+            if self._started_tracemalloc:
+                self.peak_kb = peak / 1024
+                tracemalloc.stop()
+        if exc_type is not None:
+            root.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._span_token)
+        _active_trace.reset(self._token)
+        return False
+
+    def to_dict(self):
+        tree = self.root.to_dict()
+        if self.peak_kb is not None:
+            tree["peak_kb"] = _round(self.peak_kb)
+        return tree
+
+
+def start_trace(name, memory=False, **attrs):
+    """為目前的請求啟用追蹤 (作為 with 使用)"""
+    return Trace(name, memory=memory, **attrs)
+
+
+def current_trace():
+    """目前啟用中的追蹤 (未啟用時為 None)"""
+    return _active_trace.get()
+
+
+def trace_enabled_by_env():
+    return os.environ.get(TRACE_ENV_VAR, "") not in ("", "0")
+
+
+def memory_tracing_enabled_by_env():
+    return os.environ.get(TRACE_MEMORY_ENV_VAR, "") not in ("", "0")
+
+
+def enable_memory_tracing():
+    """為整個程序開啟 tracemalloc (只需在啟動時呼叫一次；已開啟時不重複啟動)"""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def span(name, **attrs):
+    """建立子 span；未啟用追蹤時返回空物件"""
+    trace = _active_trace.get()
+    if trace is None:
+        return _NULL_SPAN
+    return Span(trace, name, attrs)
+
+
+def traced(name=None):
+    """函數裝飾器版本的 span"""
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = _active_trace.get()
+            if trace is None:
+                return func(*args, **kwargs)
+            with Span(trace, span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def format_span_tree(trace_or_dict, indent="  "):
+    """將追蹤樹格式化為縮排文字"""
+    tree = trace_or_dict.to_dict() if isinstance(trace_or_dict, Trace) else trace_or_dict
+    lines = []
+
+    def walk(node, depth):
+        text = f"{indent * depth}{node['name']}: {node['wall_ms']:.1f} ms (CPU {node['cpu_ms']:.1f} ms)"
+        if node.get("alloc_kb") is not None:
+            text += f", 配置 {node['alloc_kb']:.0f} KB"
+        if node.get("error"):
+            text += f" [ERROR] {node['error']}"
+        lines.append(text)
+        for child in node.get("children", []):
+            walk(child, depth + 1)
+
+    walk(tree, 0)
+    return "\n".join(lines)
+
+
+def _get_trace_logger():
+    global _trace_logger
+    if _trace_logger is None:
+        os.makedirs(os.path.dirname(TRACE_LOG_PATH), exist_ok=True)
+        trace_logger = logging.getLogger("f1.trace")
+        trace_logger.setLevel(logging.INFO)
+        # 追蹤紀錄只寫入輪替日誌，不輸出到主控台
+        trace_logger.propagate = False
+        if not trace_logger.handlers:
+            handler = RotatingFileHandler(TRACE_LOG_PATH, maxBytes=TRACE_LOG_MAX_BYTES,
+                                          backupCount=TRACE_LOG_BACKUPS, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            trace_logger.addHandler(handler)
+        _trace_logger = trace_logger
+    return _trace_logger
+
+
+def write_trace_log(trace, **extra):
+    """將追蹤樹以 JSON 單行寫入輪替日誌"""
+    try:
+        record = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), **extra, "trace": trace.to_dict()}
+        _get_trace_logger().info(json.dumps(record, ensure_ascii=False, default=str))
+    except Exception as e:
+        print(f"[WARNING] 追蹤日誌寫入失敗: {e}")
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+F1 賽道演化分析 - Track Evolution Analysis
+以逐圈情境表對全場車手一次做分組回歸，估計賽道隨時間與溫度的變化
+
+- 只使用綠旗、非進/出站、非慢圈的擬合圈 (輪胎 stint 模型標記)，圈速只先扣除燃油減輕
+- 輪胎衰退不預先扣除: 同一 stint 內圈齡與 session 時間同步增加，各 stint 的衰退斜率含有
+  賽道演化；改為 圈齡 × 配方 與 session 時間、賽道溫度在同一次最小平方法中估計
+- 以車手為固定效應: 各車手去平均後求解 (Frisch–Waugh)，配方速度差異為共用的虛擬變數；
+  進站後圈齡歸零而時間持續增加，時間與圈齡效應才能分開
+- 每位車手的時間斜率以分組加總 (Σxy / Σx²) 一次求得
+- 演化曲線: 扣除溫度、輪胎與配方效應後，各圈全場殘差中位數
+
+查詢範例:
+    evolution = fit_track_evolution(get_lap_context(data_loader))
+    evolution['seconds_per_minute']        # 每分鐘 session 時間的圈速變化
+    evolution['tyre_degradation']          # 各配方每圈輪胎衰退 (與演化同時估計)
+    evolution['per_lap']                   # 各圈演化曲線
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import numpy as np
+import pandas as pd
+from prettytable import PrettyTable
+
+try:
+    from .lap_context import get_lap_context
+    from .session_tables import json_value
+    from .tracing import span
+except ImportError:
+    from lap_context import get_lap_context
+    from session_tables import json_value
+    from tracing import span
+
+# 回歸至少需要的圈數
+MIN_EVOLUTION_LAPS = 20
+
+# 車手斜率至少需要的圈數
+MIN_DRIVER_LAPS = 8
+
+FIXED_EFFECTS = ['Driver']
+
+
+def _demean(frame, columns):
+    """各固定效應組去平均"""
+    means = frame.groupby(FIXED_EFFECTS, sort=False)[columns].transform('mean')
+    return frame[columns] - means
+
+
+def _design(frame, regressors):
+    """回歸矩陣: session 時間 / 賽道溫度、各配方圈齡與配方虛擬變數 (第一個配方為基準)"""
+    design = frame[regressors].astype(float)
+    compounds = sorted(frame['compound'].unique())
+    age = frame['tyre_age'].astype(float)
+    for compound in compounds:
+        design[f'tyre_age:{compound}'] = age.where(frame['compound'] == compound, 0.0)
+    for compound in compounds[1:]:
+        design[f'compound:{compound}'] = (frame['compound'] == compound).astype(float)
+    return design, compounds
+
+
+def fit_track_evolution(context):
+    """全場車手固定效應回歸: fuel_corrected ~ session_minutes + track_temp + tyre_age × compound + compound
+
+    Returns:
+        dict: laps_used, regressors, seconds_per_minute, seconds_per_degree, tyre_degradation (配方 → 秒/圈),
+              total_evolution, r_squared, per_lap (LapNumber, evolution), per_driver (Driver, laps,
+              seconds_per_minute)；數據不足時為 None
+    """
+    if context.empty:
+        return None
+    laps = context.laps
+    frame = laps[laps['is_fit_lap'] & laps['green'] & laps['fuel_corrected'].notna()
+                 & laps['session_minutes'].notna() & laps['tyre_age'].notna()]
+    if len(frame) < MIN_EVOLUTION_LAPS:
+        return None
+
+    regressors = ['session_minutes']
+    temps = frame['weather_track_temp']
+    if temps.notna().sum() >= MIN_EVOLUTION_LAPS and temps.nunique() > 1:
+        frame = frame[temps.notna()]
+        regressors.append('weather_track_temp')
+
+    design, compounds = _design(frame, regressors)
+    columns = list(design.columns)
+    centered = _demean(design.assign(Driver=frame['Driver'], fuel_corrected=frame['fuel_corrected']),
+                       columns + ['fuel_corrected'])
+    x = centered[columns].to_numpy(dtype=float)
+    y = centered['fuel_corrected'].to_numpy(dtype=float)
+    coefficients, *_ = np.linalg.lstsq(x, y, rcond=None)
+    residual = y - x @ coefficients
+    total = float(np.sum(y * y))
+    r_squared = 1 - float(np.sum(residual * residual)) / total if total > 0 else np.nan
+
+    per_minute = float(coefficients[0])
+    per_degree = float(coefficients[1]) if 'weather_track_temp' in regressors else np.nan
+    # 扣除時間以外所有效應後的各圈演化曲線 (以第一個有效圈為 0)
+    adjusted = y - x[:, 1:] @ coefficients[1:]
+    curve = pd.Series(adjusted, index=frame.index).groupby(frame['LapNumber']).median()
+    curve = curve - curve.iloc[0]
+
+    # 各車手時間斜率: 組內 Σxy / Σx²
+    sums = pd.DataFrame({
+        'n': 1, 'sxx': centered['session_minutes'] ** 2,
+        'sxy': centered['session_minutes'] * adjusted,
+    }).groupby(frame['Driver']).sum()
+    driver_slopes = (sums['sxy'] / sums['sxx'].where(sums['sxx'] > 0)).where(sums['n'] >= MIN_DRIVER_LAPS)
+
+    minutes = frame['session_minutes']
+    return {
+        'laps_used': int(len(frame)),
+        'regressors': columns,
+        'seconds_per_minute': per_minute,
+        'seconds_per_degree': per_degree,
+        'tyre_degradation': {compound: float(coefficients[columns.index(f'tyre_age:{compound}')])
+                             for compound in compounds},
+        'total_evolution': per_minute * float(minutes.max() - minutes.min()),
+        'r_squared': r_squared,
+        'per_lap': curve.rename('evolution').reset_index(),
+        'per_driver': pd.DataFrame({
+            'Driver': sums.index,
+            'laps': sums['n'].to_numpy(dtype=int),
+            'seconds_per_minute': driver_slopes.to_numpy(),
+        }).sort_values('seconds_per_minute', kind='mergesort').reset_index(drop=True),
+    }
+
+
+def evolution_records(frame):
+    """演化表轉為字典列表"""
+    return [{key: json_value(value, 4) for key, value in row.items()} for row in frame.to_dict('records')]
+
+
+def _format_seconds(value, unit):
+    return f"{value:+.4f}s/{unit}" if value is not None and value == value else "N/A"
+
+
+def display_track_evolution(evolution):
+    table = PrettyTable()
+    table.field_names = ["項目", "數值"]
+    table.align = "l"
+    table.add_row(["使用圈數", evolution['laps_used']])
+    table.add_row(["時間效應", _format_seconds(evolution['seconds_per_minute'], "分鐘")])
+    table.add_row(["溫度效應", _format_seconds(evolution['seconds_per_degree'], "°C")])
+    for compound, rate in evolution['tyre_degradation'].items():
+        table.add_row([f"{compound} 輪胎衰退", _format_seconds(rate, "圈")])
+    table.add_row(["全場演化", f"{evolution['total_evolution']:+.3f}s"])
+    table.add_row(["R²", f"{evolution['r_squared']:.3f}" if evolution['r_squared'] == evolution['r_squared']
+                   else "N/A"])
+    print("\n🛣️ 賽道演化 (燃油修正，輪胎圈齡 × 配方同時估計，車手固定效應)")
+    print(table)
+
+    drivers = PrettyTable()
+    drivers.field_names = ["車手", "擬合圈", "時間斜率"]
+    drivers.align = "c"
+    for row in evolution['per_driver'].to_dict('records'):
+        drivers.add_row([row['Driver'], row['laps'], _format_seconds(row['seconds_per_minute'], "分鐘")])
+    print(drivers)
+
+
+def run_track_evolution_analysis(data_loader, show_detailed_output=True):
+    """賽道演化分析 (功能38)"""
+    context = get_lap_context(data_loader)
+    with span("analysis.track_evolution"):
+        evolution = fit_track_evolution(context)
+    if evolution is None:
+        return {"success": False, "message": f"有效綠旗圈不足 {MIN_EVOLUTION_LAPS} 圈，無法估計賽道演化",
+                "function_id": "38"}
+
+    if show_detailed_output:
+        display_track_evolution(evolution)
+
+    return {
+        "success": True,
+        "message": f"賽道演化分析完成 (全場演化 {evolution['total_evolution']:+.3f}s)",
+        "data": {
+            "laps_used": evolution['laps_used'],
+            "regressors": evolution['regressors'],
+            "seconds_per_minute": json_value(evolution['seconds_per_minute'], 4),
+            "seconds_per_degree": json_value(evolution['seconds_per_degree'], 4),
+            "tyre_degradation": {compound: json_value(rate, 4)
+                                 for compound, rate in evolution['tyre_degradation'].items()},
+            "total_evolution": json_value(evolution['total_evolution'], 3),
+            "r_squared": json_value(evolution['r_squared'], 3),
+            "per_lap": evolution_records(evolution['per_lap']),
+            "per_driver": evolution_records(evolution['per_driver']),
+        },
+        "function_id": "38",
+    }
@@ -4,7 +4,6 @@ F1 Analysis API - 賽道位置分析模組 (功能2)
 符合 copilot-instructions 開發核心要求
 """
 
-import json
 import pandas as pd
 import numpy as np
 import os
@@ -12,6 +11,13 @@ import pickle
 from datetime import datetime, timedelta
 from prettytable import PrettyTable
 
+try:
+    from .json_export import write_json
+    from .minisector_table import get_minisector_table
+except ImportError:
+    from json_export import write_json
+    from minisector_table import get_minisector_table
+
 
 def run_track_position_analysis(data_loader, show_detailed_output=True):
     """主要功能：賽道位置分析 - 僅包含距離、位置X、位置Y (純FastF1/OpenF1數據)
@@ -79,6 +85,9 @@ def run_track_position_analysis(data_loader, show_detailed_output=True):
             print("❌ 賽道位置分析失敗：無可用數據")
             return None
         
+        # 迷你分段著色 (各分段最快車手) - 共用全場迷你分段表
+        position_data["minisector_segments"] = _minisector_segments(data_loader)
+        
         # 保存緩存
         save_cache(position_data, cache_key)
         print("💾 分析結果已緩存")
@@ -106,6 +115,15 @@ def run_track_position_analysis(data_loader, show_detailed_output=True):
     }
 
 
+def _minisector_segments(data_loader):
+    """賽道地圖的迷你分段著色路徑"""
+    try:
+        return get_minisector_table(data_loader).track_map_segments()
+    except Exception as e:
+        print(f"[WARNING] 迷你分段著色計算失敗: {e}")
+        return []
+
+
 def check_cache(cache_key):
     """檢查緩存是否存在"""
     cache_dir = "cache"
@@ -513,36 +531,20 @@ def display_position_statistics(position_data):
 def save_position_raw_data(session_info, position_data):
     """保存位置分析Raw Data"""
     
-    # 清理不能序列化的數據類型
-    def clean_for_json(obj):
-        if isinstance(obj, (list, tuple)):
-            return [clean_for_json(item) for item in obj]
-        elif isinstance(obj, dict):
-            return {key: clean_for_json(value) for key, value in obj.items()}
-        elif isinstance(obj, bool):
-            return bool(obj)
-        elif obj is None or isinstance(obj, (str, int, float)):
-            return obj
-        elif isinstance(obj, np.integer):
-            return int(obj)
-        elif isinstance(obj, np.floating):
-            return float(obj)
-        else:
-            return str(obj)
-    
     raw_data = {
         "analysis_type": "track_position_analysis",
         "function": "2",
         "timestamp": datetime.now().strftime("%Y%m%d"),
-        "session_info": clean_for_json(session_info),
+        "session_info": session_info,
         "position_analysis": {
             "has_position_data": bool(position_data["has_position_data"]),
-            "fastest_lap_info": clean_for_json(position_data["fastest_lap_info"]),
-            "track_bounds": clean_for_json(position_data["track_bounds"]),
+            "fastest_lap_info": position_data["fastest_lap_info"],
+            "track_bounds": position_data["track_bounds"],
             "distance_covered_m": float(position_data["distance_covered"]),
             "total_position_records": len(position_data["position_records"])
         },
-        "detailed_position_records": clean_for_json(position_data["position_records"])
+        "detailed_position_records": position_data["position_records"],
+        "minisector_segments": position_data.get("minisector_segments", [])
     }
     
     # 確保json資料夾存在
@@ -553,8 +555,7 @@ def save_position_raw_data(session_info, position_data):
     raw_data_file = os.path.join(json_dir, f"raw_data_track_position_{session_info['year']}_{session_info['race']}_{datetime.now().strftime('%Y%m%d')}.json")
     
     try:
-        with open(raw_data_file, "w", encoding="utf-8") as f:
-            json.dump(raw_data, f, ensure_ascii=False, indent=2)
+        write_json(raw_data_file, raw_data)
         print(f"\n💾 Raw Data 已保存: {raw_data_file}")
     except Exception as e:
         print(f"\n[ERROR] Raw Data 保存失敗: {e}")
@@ -25,7 +25,6 @@
 """
 
 import os
-import json
 import pickle
 import numpy as np
 import pandas as pd
@@ -33,6 +32,8 @@ import matplotlib.pyplot as plt
 from datetime import datetime
 from prettytable import PrettyTable
 from .base import initialize_data_loader
+from .chart_renderer import acquire_subplots, register_chart_renderer, release_figure
+from .json_export import write_json, DEFAULT_ARRAY_THRESHOLD
 
 # 設置中文字體
 plt.rcParams['font.sans-serif'] = ['Microsoft JhengHei', 'SimHei']
@@ -535,98 +536,16 @@ class TwoDriverTelemetryComparison:
             rows, cols = 3, 3
             figsize = (18, 12)
         
-        fig, axes = plt.subplots(rows, cols, figsize=figsize)
-        axes = axes.flatten() if rows * cols > 1 else [axes]
-        
-        # 顏色設定
-        driver1_color = '#FF6B6B'
-        driver2_color = '#4ECDC4'
-        diff_color = '#96CEB4'
-        
-        plot_idx = 0
-        
-        # 繪製遙測參數比較
-        for param, data_info in telemetry_data.items():
-            if plot_idx >= len(axes):
-                break
-                
-            ax = axes[plot_idx]
-            
-            ax.plot(data_info['distance'], data_info['driver1_data'], 
-                   color=driver1_color, linewidth=2, alpha=0.8, label=driver1)
-            ax.plot(data_info['distance'], data_info['driver2_data'], 
-                   color=driver2_color, linewidth=2, alpha=0.8, label=driver2)
-            
-            ax.set_xlabel('距離 (m)')
-            ax.set_ylabel(data_info['name'])
-            ax.set_title(f'第{lap_number}圈 {data_info["name"]} 比較')
-            ax.grid(True, alpha=0.3)
-            ax.legend()
-            
-            # 設置y軸範圍
-            if param == 'nGear':
-                ax.set_ylim(0, 8)
-            elif param in ['Brake', 'Throttle']:
-                ax.set_ylim(0, 100)
-            
-            plot_idx += 1
-        
-        # 繪製速度差圖表
-        if has_speed_diff and plot_idx < len(axes):
-            ax = axes[plot_idx]
-            ax.plot(speed_diff['distance'], speed_diff['speed_difference'], 
-                   color=diff_color, linewidth=2, alpha=0.8)
-            ax.set_xlabel('距離 (m)')
-            ax.set_ylabel('速度差 (km/h)')
-            ax.set_title(f'第{lap_number}圈 速度差 ({speed_diff["reference"]})')
-            ax.grid(True, alpha=0.3)
-            ax.axhline(y=0, color='black', linestyle='--', alpha=0.5)
-            plot_idx += 1
-        
-        # 繪製賽道累積距離差圖表
-        if has_distance_diff and plot_idx < len(axes):
-            ax = axes[plot_idx]
-            
-            # 檢查新的數據結構
-            if 'cumulative_distance_difference' in distance_diff:
-                # 使用新的累積距離差數據
-                ax.plot(distance_diff['reference_distance'], distance_diff['cumulative_distance_difference'], 
-                       color='#DDA0DD', linewidth=2, alpha=0.8, label='累積距離差')
-                       
-                # 可選：添加位置距離差
-                if 'position_difference' in distance_diff:
-                    ax2 = ax.twinx()
-                    ax2.plot(distance_diff['reference_distance'], distance_diff['position_difference'], 
-                           color='#FF6B6B', linewidth=1.5, alpha=0.6, label='位置距離差')
-                    ax2.set_ylabel('位置距離差 (m)', color='#FF6B6B')
-                    ax2.tick_params(axis='y', labelcolor='#FF6B6B')
-                
-            elif 'distance_difference' in distance_diff:
-                # 向下兼容舊的數據結構
-                ax.plot(distance_diff['reference_distance'], distance_diff['distance_difference'], 
-                       color='#DDA0DD', linewidth=2, alpha=0.8)
-            
-            ax.set_xlabel('參考距離 (m)')
-            ax.set_ylabel('累積距離差 (m)')
-            ax.set_title(f'第{lap_number}圈 賽道累積距離差 ({distance_diff["reference"]})')
-            ax.grid(True, alpha=0.3)
-            ax.axhline(y=0, color='black', linestyle='--', alpha=0.5)
-            ax.legend()
-            plot_idx += 1
-        
-        # 隱藏多餘的子圖
-        for j in range(plot_idx, len(axes)):
-            axes[j].set_visible(False)
-        
-        plt.tight_layout()
+        fig, axes = acquire_subplots(rows, cols, figsize=figsize)
+        draw_comparison_chart(fig, axes, telemetry_data, speed_diff, distance_diff, driver1, driver2, lap_number)
         
         # 保存圖表
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         chart_filename = f"comparison_telemetry_{driver1}_{driver2}_{self.year}_{self.race}_lap{lap_number}_{timestamp}.png"
         chart_path = os.path.join(chart_dir, chart_filename)
         
-        plt.savefig(chart_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.savefig(chart_path, dpi=300, bbox_inches='tight')
+        release_figure(fig)
         
         analysis_result['charts_generated'].append(chart_path)
         print(f"📊 比較圖表已保存: {chart_path}")
@@ -736,8 +655,8 @@ class TwoDriverTelemetryComparison:
             filename = f"comparison_telemetry_{driver1}_{driver2}_{self.year}_{self.race}_lap{lap_number}_{timestamp}.json"
             filepath = os.path.join(json_dir, filename)
             
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(json_data, f, ensure_ascii=False, indent=2, default=str)
+            # 插值後的遙測陣列寫入 .arrays.npz 附檔，JSON 只保留統計與參照
+            filepath = write_json(filepath, json_data, array_threshold=DEFAULT_ARRAY_THRESHOLD)
             
             print(f"💾 JSON 結果已保存: {filepath}")
             
@@ -990,6 +909,98 @@ class TwoDriverTelemetryComparison:
         return True
 
 
+@register_chart_renderer("two_driver_comparison")
+def draw_comparison_chart(fig, axes, telemetry_data, speed_diff, distance_diff, driver1, driver2, lap_number):
+    """雙車手遙測比較圖 (各遙測參數、速度差、累積距離差各一格)；
+    批次渲染工作參數同分析結果的 telemetry_comparison / speed_difference / distance_difference"""
+    axes = np.ravel(axes)
+    telemetry_data = telemetry_data or {}
+    has_speed_diff = bool(speed_diff)
+    has_distance_diff = bool(distance_diff)
+
+    # 顏色設定
+    driver1_color = '#FF6B6B'
+    driver2_color = '#4ECDC4'
+    diff_color = '#96CEB4'
+
+    plot_idx = 0
+
+    # 繪製遙測參數比較
+    for param, data_info in telemetry_data.items():
+        if plot_idx >= len(axes):
+            break
+
+        ax = axes[plot_idx]
+
+        ax.plot(data_info['distance'], data_info['driver1_data'], 
+               color=driver1_color, linewidth=2, alpha=0.8, label=driver1)
+        ax.plot(data_info['distance'], data_info['driver2_data'], 
+               color=driver2_color, linewidth=2, alpha=0.8, label=driver2)
+
+        ax.set_xlabel('距離 (m)')
+        ax.set_ylabel(data_info['name'])
+        ax.set_title(f'第{lap_number}圈 {data_info["name"]} 比較')
+        ax.grid(True, alpha=0.3)
+        ax.legend()
+
+        # 設置y軸範圍
+        if param == 'nGear':
+            ax.set_ylim(0, 8)
+        elif param in ['Brake', 'Throttle']:
+            ax.set_ylim(0, 100)
+
+        plot_idx += 1
+
+    # 繪製速度差圖表
+    if has_speed_diff and plot_idx < len(axes):
+        ax = axes[plot_idx]
+        ax.plot(speed_diff['distance'], speed_diff['speed_difference'], 
+               color=diff_color, linewidth=2, alpha=0.8)
+        ax.set_xlabel('距離 (m)')
+        ax.set_ylabel('速度差 (km/h)')
+        ax.set_title(f'第{lap_number}圈 速度差 ({speed_diff["reference"]})')
+        ax.grid(True, alpha=0.3)
+        ax.axhline(y=0, color='black', linestyle='--', alpha=0.5)
+        plot_idx += 1
+
+    # 繪製賽道累積距離差圖表
+    if has_distance_diff and plot_idx < len(axes):
+        ax = axes[plot_idx]
+
+        # 檢查新的數據結構
+        if 'cumulative_distance_difference' in distance_diff:
+            # 使用新的累積距離差數據
+            ax.plot(distance_diff['reference_distance'], distance_diff['cumulative_distance_difference'], 
+                   color='#DDA0DD', linewidth=2, alpha=0.8, label='累積距離差')
+
+            # 可選：添加位置距離差
+            if 'position_difference' in distance_diff:
+                ax2 = ax.twinx()
+                ax2.plot(distance_diff['reference_distance'], distance_diff['position_difference'], 
+                       color='#FF6B6B', linewidth=1.5, alpha=0.6, label='位置距離差')
+                ax2.set_ylabel('位置距離差 (m)', color='#FF6B6B')
+                ax2.tick_params(axis='y', labelcolor='#FF6B6B')
+
+        elif 'distance_difference' in distance_diff:
+            # 向下兼容舊的數據結構
+            ax.plot(distance_diff['reference_distance'], distance_diff['distance_difference'], 
+                   color='#DDA0DD', linewidth=2, alpha=0.8)
+
+        ax.set_xlabel('參考距離 (m)')
+        ax.set_ylabel('累積距離差 (m)')
+        ax.set_title(f'第{lap_number}圈 賽道累積距離差 ({distance_diff["reference"]})')
+        ax.grid(True, alpha=0.3)
+        ax.axhline(y=0, color='black', linestyle='--', alpha=0.5)
+        ax.legend()
+        plot_idx += 1
+
+    # 隱藏多餘的子圖
+    for j in range(plot_idx, len(axes)):
+        axes[j].set_visible(False)
+
+    fig.tight_layout()
+
+
 def run_two_driver_telemetry_comparison_analysis(data_loader, year, race, session, driver, driver2, lap_number=1, **kwargs):
     """運行雙車手遙測比較分析的入口函數"""
     analyzer = TwoDriverTelemetryComparison(
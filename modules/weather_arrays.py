@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+F1 天氣數據陣列 - Weather Arrays
+將 FastF1 weather_data 一次轉為 NumPy 陣列，供降雨分析、圖表與逐圈天氣共用
+
+- 降雨時段以 run-length encoding 一次找出 (不再逐筆迴圈)
+- 以 searchsorted 將每圈對齊到天氣樣本，圈速表每列附帶氣溫、賽道溫度、濕度、風與降雨
+- 每場賽事 (同一份 weather_data / laps) 只建立一次
+
+查詢範例:
+    weather = get_weather_arrays(data_loader)
+    weather.rain_periods()                  # [(開始秒, 結束秒), ...]
+    lap_weather = get_lap_weather(data_loader)
+    lap_weather[['LapNumber', 'weather_track_temp', 'weather_rainfall']]
+
+版本: 1.0
+作者: F1 Analysis Team
+"""
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .session_tables import IdentityCache, to_seconds
+except ImportError:
+    from session_tables import IdentityCache, to_seconds
+
+# weather_data 欄位 → 陣列屬性 / 逐圈欄位名稱
+WEATHER_FIELDS = {
+    'AirTemp': 'air_temp',
+    'TrackTemp': 'track_temp',
+    'Humidity': 'humidity',
+    'Pressure': 'pressure',
+    'WindSpeed': 'wind_speed',
+    'WindDirection': 'wind_direction',
+}
+
+LAP_WEATHER_COLUMNS = ['weather_' + name for name in WEATHER_FIELDS.values()] + ['weather_rainfall']
+
+# 賽道溫度分級 (°C)
+HOT_TRACK_TEMP = 40
+COOL_TRACK_TEMP = 25
+
+MAX_CACHED_ITEMS = 4
+
+
+def rain_mask(values):
+    """降雨欄位轉為布林陣列 (NaN / 0 / False 視為無雨)"""
+    numeric = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float)
+    return np.nan_to_num(numeric, nan=0.0) > 0
+
+
+def run_length_periods(mask):
+    """布林陣列的連續 True 區段
+
+    Returns:
+        (starts, ends): 區段起點索引與結束索引 (不含)
+    """
+    mask = np.asarray(mask, dtype=bool)
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def rain_period_bounds(time_data, rainfall_data):
+    """依時間序列找出降雨時段
+
+    與圖表原本的定義一致: 時段由第一筆降雨樣本開始，到下一筆無雨樣本的時間結束；
+    持續到最後則以最後一筆時間結束
+
+    Returns:
+        (periods, rain_times): [(開始, 結束), ...] 與所有降雨樣本的時間
+    """
+    times = np.asarray(time_data, dtype=float)
+    mask = rain_mask(rainfall_data)[:len(times)]
+    times = times[:len(mask)]
+    if not len(times):
+        return [], []
+    starts, ends = run_length_periods(mask)
+    end_times = times[np.minimum(ends, len(times) - 1)]
+    periods = list(zip(times[starts].tolist(), end_times.tolist()))
+    return periods, times[mask].tolist()
+
+
+class WeatherArrays:
+    """天氣數據陣列 (依 session 時間排序)"""
+
+    def __init__(self, weather_data):
+        if weather_data is None or len(weather_data) == 0:
+            frame = pd.DataFrame({'Time': pd.Series(dtype=float)})
+        else:
+            frame = weather_data.sort_values('Time', kind='mergesort') if 'Time' in weather_data.columns else weather_data
+
+        self.size = len(frame)
+        if 'Time' in frame.columns:
+            self.time_s = to_seconds(frame['Time'])
+        else:
+            self.time_s = np.arange(self.size, dtype=float) * 60.0
+        self.time_values = frame['Time'].to_numpy() if 'Time' in frame.columns else self.time_s
+        for column, name in WEATHER_FIELDS.items():
+            values = frame[column] if column in frame.columns else pd.Series(np.nan, index=frame.index)
+            setattr(self, name, pd.to_numeric(values, errors='coerce').to_numpy(dtype=float))
+        self.has_rainfall = 'Rainfall' in frame.columns
+        self.rainfall = rain_mask(frame['Rainfall']) if self.has_rainfall else np.zeros(self.size, dtype=bool)
+        # 降雨樣本累計數，區間內降雨樣本數 = cum[i1] - cum[i0]
+        self._rain_cumsum = np.concatenate(([0], np.cumsum(self.rainfall)))
+
+    @property
+    def empty(self):
+        return self.size == 0
+
+    def rain_period_indices(self):
+        """降雨時段的樣本索引區間 [(start, end), ...] (end 不含)"""
+        starts, ends = run_length_periods(self.rainfall)
+        return list(zip(starts.tolist(), ends.tolist()))
+
+    def rain_periods(self):
+        """降雨時段 [(開始秒, 結束秒), ...]"""
+        return rain_period_bounds(self.time_s, self.rainfall)[0]
+
+    def sample_index_at(self, seconds):
+        """每個時間點對應的天氣樣本 (該時間點之前最近的一筆)"""
+        index = np.searchsorted(self.time_s, np.asarray(seconds, dtype=float), side='right') - 1
+        return np.clip(index, 0, max(self.size - 1, 0))
+
+    def rain_samples_between(self, start_s, end_s):
+        """各時間區間內的降雨樣本數"""
+        i0 = np.searchsorted(self.time_s, np.asarray(start_s, dtype=float), side='left')
+        i1 = np.searchsorted(self.time_s, np.asarray(end_s, dtype=float), side='right')
+        return self._rain_cumsum[i1] - self._rain_cumsum[i0]
+
+    def align_laps(self, laps):
+        """為每圈附加天氣欄位 (保留原索引)
+
+        以圈起點對應天氣樣本，圈內任一樣本降雨即標記為降雨圈
+        """
+        aligned = laps.copy()
+        if self.empty or laps.empty:
+            for column in LAP_WEATHER_COLUMNS:
+                aligned[column] = np.nan
+            return aligned
+
+        lap_time = to_seconds(laps['LapTime']) if 'LapTime' in laps.columns else np.full(len(laps), np.nan)
+        end = to_seconds(laps['Time']) if 'Time' in laps.columns else np.full(len(laps), np.nan)
+        start = to_seconds(laps['LapStartTime']) if 'LapStartTime' in laps.columns else end - lap_time
+        start = np.where(np.isnan(start), end - lap_time, start)
+        end = np.where(np.isnan(end), start + lap_time, end)
+
+        valid = ~np.isnan(start)
+        index = self.sample_index_at(np.where(valid, start, 0.0))
+        for name in WEATHER_FIELDS.values():
+            aligned['weather_' + name] = np.where(valid, getattr(self, name)[index], np.nan)
+
+        has_end = valid & ~np.isnan(end)
+        rain_samples = self.rain_samples_between(np.where(valid, start, 0.0), np.where(has_end, end, 0.0))
+        raining = self.rainfall[index] | (has_end & (rain_samples > 0))
+        aligned['weather_rainfall'] = np.where(valid, raining, False)
+        return aligned
+
+
+def weather_label(track_temp, rainfall):
+    """逐圈天氣標籤"""
+    if rainfall == rainfall and rainfall:
+        return "🌧️雨"
+    if track_temp is None or track_temp != track_temp:
+        return "☀️乾"
+    if track_temp > HOT_TRACK_TEMP:
+        return "🌡️熱"
+    if track_temp < COOL_TRACK_TEMP:
+        return "❄️涼"
+    return "🌤️適中"
+
+
+def _resolve_frames(source):
+    """由 get_loaded_data() 字典 / 數據載入器 / FastF1 session 取得 weather_data 與 laps"""
+    if isinstance(source, dict):
+        data = source
+    elif isinstance(getattr(source, 'loaded_data', None), dict):
+        data = source.loaded_data
+    else:
+        data = {'session': source}
+
+    session = data.get('session')
+
+    def pick(*keys):
+        for key in keys:
+            value = data.get(key)
+            if value is None and session is not None:
+                try:
+                    value = getattr(session, key, None)
+                except Exception:
+                    value = None
+            if isinstance(value, pd.DataFrame):
+                return value
+        return None
+
+    return pick('weather_data', 'weather'), pick('laps')
+
+
+_weather_cache = IdentityCache("weather", MAX_CACHED_ITEMS)
+_lap_weather_cache = IdentityCache("lap_weather", MAX_CACHED_ITEMS)
+
+
+def get_weather_arrays(source):
+    """取得天氣數據陣列 (每場賽事只建立一次)
+
+    Args:
+        source: weather_data DataFrame、get_loaded_data() 字典、數據載入器或 FastF1 session
+    """
+    weather = source if isinstance(source, pd.DataFrame) else _resolve_frames(source)[0]
+    return _weather_cache.get_or_build(weather, lambda: WeatherArrays(weather), span_name="table.weather")
+
+
+def get_lap_weather(source):
+    """取得附加天氣欄位的全場圈速表 (每場賽事只建立一次)"""
+    weather, laps = _resolve_frames(source)
+    if laps is None:
+        return None
+    return _lap_weather_cache.get_or_build((weather, laps), lambda: get_weather_arrays(weather).align_laps(laps),
+                                           span_name="table.lap_weather")
+
+
+def weather_for_laps(laps, source):
+    """取得指定圈次的天氣欄位 - 屬於全場圈速表的子集時直接取用快取結果"""
+    lap_weather = get_lap_weather(source)
+    if lap_weather is not None and laps.index.isin(lap_weather.index).all() and lap_weather.index.is_unique:
+        return lap_weather.loc[laps.index]
+    return get_weather_arrays(_resolve_frames(source)[0]).align_laps(laps)
+
+
+def clear_cache():
+    """清除天氣陣列快取"""
+    _weather_cache.clear()
+    _lap_weather_cache.clear()
@@ -0,0 +1,111 @@
+"""
+F1 批次分析執行器測試
+以合成的工作清單檢查清單展開、賽段分組與每個賽段只載入一次數據
+"""
+
+import sys
+import os
+import json
+
+import pytest
+
+# 確保模組路徑正確
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import batch_runner
+from modules.batch_runner import group_jobs_by_session, load_job_manifest, run_batch
+from modules.function_mapper import F1AnalysisFunctionMapper
+
+MANIFEST = {
+    "defaults": {"year": 2025, "session": "R"},
+    "jobs": [
+        {"race": "Japan", "function": [5, 6.2], "driver": ["VER", "NOR"]},
+        {"race": "Monaco", "function": 7.1, "driver": "VER", "driver2": "LEC", "session": "Q"},
+        {"race": "Japan", "function": 30},
+        {"race": "Japan", "driver": "VER"},
+        {"race": "Japan", "function": 1, "colour": "red"},
+    ],
+}
+
+
+def _write_manifest(tmp_path, name="jobs.json"):
+    path = tmp_path / name
+    if name.endswith(".jsonl"):
+        defaults = MANIFEST["defaults"]
+        path.write_text("# 每行一個工作\n" + "\n".join(json.dumps(dict(defaults, **job)) for job in MANIFEST["jobs"]),
+                        encoding="utf-8")
+    elif name.endswith((".yaml", ".yml")):
+        yaml = pytest.importorskip("yaml")
+        path.write_text(yaml.safe_dump(MANIFEST, allow_unicode=True), encoding="utf-8")
+    else:
+        path.write_text(json.dumps(MANIFEST), encoding="utf-8")
+    return str(path)
+
+
+class TestBatchRunner:
+    """
+    批次分析執行器測試類別
+
+    測試範圍:
+    - function / driver 清單展開為單一功能 × 車手的工作，套用 defaults
+    - 缺少必要欄位的工作略過
+    - 依 (年份, 賽事, 賽段) 分組並保留清單順序
+    - 每個賽段只載入一次數據；載入失敗的賽段工作標記為略過
+    """
+
+    @pytest.mark.parametrize("name", ["jobs.json", "jobs.jsonl", "jobs.yaml"])
+    def test_manifest_expansion(self, tmp_path, name):
+        """2 功能 × 2 車手展開為 4 項工作；缺少 function 的工作略過，未知欄位忽略"""
+        jobs = load_job_manifest(_write_manifest(tmp_path, name))
+
+        assert [job["job_id"] for job in jobs] == list(range(1, 8))
+        assert [(job["race"], job["function"], job["driver"]) for job in jobs] == [
+            ("Japan", "5", "VER"), ("Japan", "5", "NOR"), ("Japan", "6.2", "VER"), ("Japan", "6.2", "NOR"),
+            ("Monaco", "7.1", "VER"), ("Japan", "30", None), ("Japan", "1", None),
+        ]
+        monaco = jobs[4]
+        assert monaco["session"] == "Q" and monaco["driver2"] == "LEC" and monaco["year"] == 2025
+        assert all(set(job) == set(batch_runner.JOB_FIELDS) | {"job_id"} for job in jobs)
+
+    def test_group_jobs_by_session(self, tmp_path):
+        """同一賽段的工作歸在一組，組別依首次出現的順序"""
+        groups = group_jobs_by_session(load_job_manifest(_write_manifest(tmp_path)))
+
+        assert list(groups) == [(2025, "Japan", "R"), (2025, "Monaco", "Q")]
+        assert [job["job_id"] for job in groups[(2025, "Japan", "R")]] == [1, 2, 3, 4, 6, 7]
+
+    def test_run_batch_loads_each_session_once(self, tmp_path, monkeypatch):
+        """每個賽段只載入一次；載入失敗的賽段其工作全部略過，摘要寫入指定路徑"""
+        loads, calls = [], []
+
+        def load_session_data(year, race, session):
+            loads.append((year, race, session))
+            if race == "Monaco":
+                return None, None
+            return object(), None
+
+        def execute(self, function_id, **kwargs):
+            calls.append((function_id, kwargs.get("driver")))
+            return {"success": function_id != "30", "message": "完成", "function_id": function_id}
+
+        monkeypatch.setattr(batch_runner, "load_session_data", load_session_data)
+        monkeypatch.setattr(F1AnalysisFunctionMapper, "execute_function_by_number", execute)
+
+        summary_path = str(tmp_path / "summary.json")
+        summary = run_batch(_write_manifest(tmp_path), summary_path=summary_path)
+
+        assert loads == [(2025, "Japan", "R"), (2025, "Monaco", "Q")]
+        assert calls == [("5", "VER"), ("5", "NOR"), ("6.2", "VER"), ("6.2", "NOR"), ("30", None), ("1", None)]
+        assert summary["totals"] == {"sessions": 2, "jobs": 7, "success": 5, "failed": 1, "error": 0, "skipped": 1}
+        assert summary["success"] is False
+        with open(summary_path, encoding="utf-8") as f:
+            saved = json.load(f)
+        statuses = {record["job_id"]: record["status"] for session in saved["sessions"] for record in session["jobs"]}
+        assert statuses[5] == "skipped" and statuses[6] == "failed"
+
+    def test_empty_manifest(self, tmp_path):
+        """沒有可執行工作時不載入任何賽段"""
+        path = tmp_path / "empty.jsonl"
+        path.write_text("\n", encoding="utf-8")
+
+        assert run_batch(str(path))["success"] is False
@@ -0,0 +1,142 @@
+"""
+F1 煞車與引擎通道分析測試
+以合成的 car_data 檢查依車手增量建立的指標表與一次建立全場的結果相同
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+
+# 確保模組路徑正確
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import brake_engine_analytics
+from modules.brake_engine_analytics import ChannelAnalytics
+
+LAP_TIME = 80.0
+LAPS = 4
+DRIVERS = {"1": ("VER", 0.0), "16": ("LEC", 0.7), "4": ("NOR", 1.3)}
+# 每圈煞車區 (圈相位起訖)
+BRAKE_ZONES = ((0.30, 0.34), (0.70, 0.75))
+
+
+def _car(phase_shift, zones=BRAKE_ZONES):
+    """單一車手 10 Hz car_data: 每圈兩個煞車區，升/降檔與 RPM 隨速度變化"""
+    t = np.arange(0.0, LAP_TIME * LAPS + 0.1, 0.1)
+    phase = ((t + phase_shift) % LAP_TIME) / LAP_TIME
+    braking = np.zeros(len(t), dtype=bool)
+    for start, end in zones:
+        braking |= (phase > start) & (phase < end)
+    speed = 180.0 + 120.0 * np.sin(np.pi * phase) - 60.0 * braking
+    gear = np.clip(np.floor(speed / 40.0), 1, 8)
+    return pd.DataFrame({
+        "SessionTime": pd.to_timedelta(t, unit="s"),
+        "Speed": speed,
+        "RPM": 8000.0 + 3000.0 * (speed / 40.0 - gear),
+        "nGear": gear,
+        "Throttle": np.where(braking, 0.0, 100.0),
+        "Brake": braking,
+    })
+
+
+def _session(zones=BRAKE_ZONES):
+    starts = np.arange(LAPS) * LAP_TIME
+    laps = pd.concat([pd.DataFrame({
+        "Driver": code, "DriverNumber": number, "LapNumber": np.arange(1, LAPS + 1),
+        "LapStartTime": pd.to_timedelta(starts, unit="s"),
+        "Time": pd.to_timedelta(starts + LAP_TIME, unit="s"),
+        "LapTime": pd.to_timedelta(np.full(LAPS, LAP_TIME), unit="s"),
+        "PitInTime": pd.NaT, "PitOutTime": pd.NaT,
+    }) for number, (code, _) in DRIVERS.items()], ignore_index=True)
+    car_data = {number: _car(shift, zones) for number, (_, shift) in DRIVERS.items()}
+    return {"laps": laps, "car_data": car_data}
+
+
+def _reference(source):
+    """固定參考圈: 兩個彎道頂點"""
+    return {"lap_distance": 5000.0, "corners": [{"distance": 1800.0}, {"distance": 3900.0}]}
+
+
+def _sorted(frame, keys):
+    return frame.sort_values(keys, kind="stable").reset_index(drop=True)
+
+
+class TestBrakeEngineAnalytics:
+    """
+    煞車與引擎通道分析測試類別
+
+    測試範圍:
+    - 分次增量建立車手與一次建立全場的逐圈、逐彎道、換檔表與 RPM 直方圖相同
+    - get_channel_analytics 沿用同一份快取並只補算新車手
+    - 起終點線後的彎道取上一圈末段的煞車區段作為煞車點
+    """
+
+    def _analytics(self, data):
+        return ChannelAnalytics(data, data["laps"], data["car_data"])
+
+    def test_incremental_build_matches_full_build(self, monkeypatch):
+        """先 VER、再 LEC+NOR 的結果與一次計算全場相同"""
+        monkeypatch.setattr(brake_engine_analytics, "get_reference_lap", _reference)
+        data = _session()
+
+        full = self._analytics(data)
+        assert full.ensure() is True
+
+        incremental = self._analytics(data)
+        assert incremental.ensure(["VER"]) is True
+        assert incremental.ensure(["VER"]) is False
+        assert incremental.ensure(["LEC", "NOR"]) is True
+        assert incremental.computed == full.computed == {"VER", "LEC", "NOR"}
+
+        assert not full.lap_table().empty and not full.corner_table().empty
+        pdt.assert_frame_equal(_sorted(incremental.lap_table(), ["Driver", "LapNumber"]),
+                               _sorted(full.lap_table(), ["Driver", "LapNumber"]))
+        pdt.assert_frame_equal(_sorted(incremental.corner_table(), ["Driver", "LapNumber", "corner"]),
+                               _sorted(full.corner_table(), ["Driver", "LapNumber", "corner"]))
+        pdt.assert_frame_equal(_sorted(incremental.shift_table(), ["Driver", "LapNumber", "position_m"]),
+                               _sorted(full.shift_table(), ["Driver", "LapNumber", "position_m"]))
+        pdt.assert_frame_equal(incremental.driver_summary(), full.driver_summary())
+
+        full_histogram = full.rpm_histogram()
+        incremental_histogram = incremental.rpm_histogram()
+        assert sorted(incremental_histogram) == sorted(full_histogram)
+        for driver, values in full_histogram.items():
+            np.testing.assert_allclose(incremental_histogram[driver], values)
+
+    def test_cached_analytics_only_builds_new_drivers(self, monkeypatch):
+        """同一份 laps 取回同一物件，新車手併入既有表"""
+        monkeypatch.setattr(brake_engine_analytics, "get_reference_lap", _reference)
+        brake_engine_analytics.clear_cache()
+        data = _session()
+
+        first = brake_engine_analytics.get_channel_analytics(data, drivers=["VER"])
+        assert set(first.lap_table()["Driver"]) == {"VER"}
+
+        second = brake_engine_analytics.get_channel_analytics(data, drivers=["NOR"])
+        assert second is first
+        assert set(second.lap_table()["Driver"]) == {"VER", "NOR"}
+        brake_engine_analytics.clear_cache()
+
+    def test_corner_after_start_line_uses_previous_lap_braking(self, monkeypatch):
+        """T1 頂點在起終點線後 50 m: 上一圈末段的煞車區段歸屬下一圈的 T1"""
+        monkeypatch.setattr(brake_engine_analytics, "get_reference_lap", lambda source: {
+            "lap_distance": 5000.0, "corners": [{"distance": 50.0}, {"distance": 1800.0}, {"distance": 3900.0}]})
+        data = _session(BRAKE_ZONES + ((0.95, 0.99),))
+        analytics = self._analytics(data)
+        analytics.ensure()
+
+        corners = analytics.corner_table()
+        first = corners[corners["corner"] == 1]
+        # 第 1 圈之前沒有上一圈；最後一圈末段的煞車不歸屬到下一位車手的第 1 圈
+        for driver in ("VER", "LEC", "NOR"):
+            assert first.loc[first["Driver"] == driver, "LapNumber"].tolist() == list(range(2, LAPS + 1))
+        assert (first["braking_point_m"] < 0).all()
+        np.testing.assert_allclose(first["apex_m"] - first["braking_point_m"], first["braking_distance_m"])
+        assert (first["braking_distance_m"] <= brake_engine_analytics.BRAKE_WINDOW).all()
+        # 其他彎道仍以圈內的煞車區段計算
+        assert (corners["corner"] == 3).sum() == LAPS * len(DRIVERS)
+        assert (corners.loc[corners["corner"] == 3, "braking_point_m"] > 0).all()
+        assert not corners.duplicated(["Driver", "LapNumber", "corner"]).any()
@@ -0,0 +1,59 @@
+"""
+F1 冠軍模擬測試
+以合成的賽季成績檢查剩餘分站的積分分配
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# 確保模組路徑正確
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.championship_simulator import RACE_POINTS, ChampionshipSimulation
+
+
+def _results():
+    """兩站成績: 第二站 HAM 未參賽 (不在剩餘分站陣容)，ALO 第一站退賽"""
+    rows = [
+        ("Bahrain", 1, "VER", "Red Bull", 1, 25, True),
+        ("Bahrain", 1, "LEC", "Ferrari", 2, 18, True),
+        ("Bahrain", 1, "HAM", "Ferrari", 3, 15, True),
+        ("Bahrain", 1, "ALO", "Aston Martin", np.nan, 0, False),
+        ("Jeddah", 2, "LEC", "Ferrari", 1, 25, True),
+        ("Jeddah", 2, "VER", "Red Bull", 2, 18, True),
+        ("Jeddah", 2, "ALO", "Aston Martin", 3, 15, True),
+    ]
+    return pd.DataFrame(rows, columns=["race", "round", "driver", "team", "position", "points", "finished"])
+
+
+class TestChampionshipSimulator:
+    """
+    冠軍模擬測試類別
+
+    測試範圍:
+    - 完賽車手少於得分名額時，退賽/不在陣容的車手不得分
+    - 冠軍機率加總與未參賽車手的積分
+    """
+
+    def test_non_finishers_never_score(self):
+        """每站只有完賽車手依名次得分，未參賽車手 (inf) 永遠 0 分"""
+        simulation = ChampionshipSimulation(_results(), ["Melbourne", "Suzuka"], n_seasons=2000, seed=3)
+        hamilton = simulation.driver_index["HAM"]
+
+        assert not simulation.race_points[:, :, hamilton].any()
+        # 每站最多 3 位完賽車手得分，且得分依序為前幾名的積分
+        for race_points in simulation.race_points.reshape(-1, len(simulation.drivers)):
+            awarded = np.sort(race_points[race_points > 0])[::-1]
+            assert np.array_equal(awarded, RACE_POINTS[:len(awarded)])
+        assert simulation.simulated_wins[:, hamilton].sum() == 0
+
+    def test_position_probabilities_sum_to_one(self):
+        """冠軍機率加總為 1；未參賽車手維持目前積分"""
+        simulation = ChampionshipSimulation(_results(), ["Melbourne"], n_seasons=500, seed=11)
+        standings = simulation.standings()
+
+        assert abs(standings["title_probability"].sum() - 1.0) < 1e-9
+        assert standings.loc[standings["driver"] == "HAM", "expected_points"].iloc[0] == 15
@@ -0,0 +1,82 @@
+"""
+F1 數據完整性檢查測試
+以合成的圈速、成績與 car_data 檢查 OpenF1 車手對照在有無 OpenF1 資料時的結果
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# 確保模組路徑正確
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.data_integrity import check_driver_mapping, check_session_integrity, display_integrity_report
+
+NUMBERS = {"VER": "1", "LEC": "16"}
+LAP_TIME = 90.0
+TOTAL_LAPS = 3
+
+
+def _source(openf1_drivers=None):
+    """兩位車手各 3 圈的完整數據 (遙測連續、圈號與名次正常)"""
+    laps = pd.DataFrame([
+        {"Driver": driver, "DriverNumber": number, "LapNumber": lap, "Position": float(position),
+         "LapTime": pd.Timedelta(seconds=LAP_TIME), "PitInTime": pd.NaT, "PitOutTime": pd.NaT}
+        for position, (driver, number) in enumerate(NUMBERS.items(), 1)
+        for lap in range(1, TOTAL_LAPS + 1)
+    ])
+    results = pd.DataFrame({"DriverNumber": list(NUMBERS.values()), "Abbreviation": list(NUMBERS),
+                            "Laps": [TOTAL_LAPS] * len(NUMBERS)})
+    t = np.arange(0.0, LAP_TIME * TOTAL_LAPS, 0.25)
+    car_data = {number: pd.DataFrame({"SessionTime": pd.to_timedelta(t, unit="s"), "Speed": np.full(len(t), 200.0)})
+                for number in NUMBERS.values()}
+    source = {"laps": laps, "results": results, "car_data": car_data}
+    if openf1_drivers is not None:
+        source["openf1_drivers"] = openf1_drivers
+    return source
+
+
+class TestDataIntegrity:
+    """
+    數據完整性檢查測試類別
+
+    測試範圍:
+    - 未載入 OpenF1 資料時車手對照為 skipped，不計入問題數
+    - OpenF1 缺少車手時列出缺少的車手並計入問題數
+    """
+
+    def test_mapping_skipped_without_openf1(self, capsys):
+        """沒有 OpenF1 車手資料: skipped、計數 0，報告仍可顯示"""
+        report = check_session_integrity(_source())
+        mapping = report["checks"]["driver_mapping"]
+
+        assert mapping["status"] == "skipped"
+        assert mapping["count"] == 0
+        assert mapping["items"] == []
+        others = sum(1 for name, check in report["checks"].items()
+                     if name != "driver_mapping" and check["status"] == "warning")
+        assert report["issues"] == others
+
+        display_integrity_report(report)
+        assert "沒有 OpenF1 車手資料" in capsys.readouterr().out
+
+    def test_mapping_lists_drivers_missing_from_openf1(self):
+        """OpenF1 只有 VER: LEC 列為缺少並計入問題數"""
+        baseline = check_session_integrity(_source())
+        report = check_session_integrity(_source({1: {"name_acronym": "VER"}}))
+        mapping = report["checks"]["driver_mapping"]
+
+        assert mapping["status"] == "warning"
+        assert mapping["items"] == ["LEC"]
+        assert mapping["openf1_drivers"] == 1
+        assert report["issues"] == baseline["issues"] + 1
+
+    def test_mapping_ok_when_all_drivers_present(self):
+        """全部車手都有 OpenF1 資料時為 ok"""
+        openf1 = {int(number): {"name_acronym": driver} for driver, number in NUMBERS.items()}
+        mapping = check_driver_mapping(set(NUMBERS), openf1, None)
+
+        assert mapping["status"] == "ok"
+        assert mapping["count"] == 0
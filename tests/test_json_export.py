@@ -0,0 +1,75 @@
+"""
+F1 JSON 輸出層測試
+orjson 與標準 json 退回路徑的輸出需一致且為合法 JSON (NaN / inf → null、numpy 鍵值)
+"""
+
+import json
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 確保模組路徑正確
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import json_export
+
+
+SAMPLE = {
+    "lap_time": float("nan"),
+    "gap": np.float64(np.inf),
+    "positions": {np.int64(1): "VER", np.int64(2): "LEC"},
+    "speeds": np.array([301.5, np.nan]),
+    "laps": pd.DataFrame({"LapNumber": [1, 2], "LapTime": [90.1, np.nan]}),
+    "nested": [{"delta": -np.inf}, (1, 2)],
+}
+
+EXPECTED = {
+    "lap_time": None,
+    "gap": None,
+    "positions": {"1": "VER", "2": "LEC"},
+    "speeds": [301.5, None],
+    "laps": [{"LapNumber": 1, "LapTime": 90.1}, {"LapNumber": 2, "LapTime": None}],
+    "nested": [{"delta": None}, [1, 2]],
+}
+
+
+class TestJsonExport:
+    """
+    JSON 輸出層測試類別
+
+    測試範圍:
+    - 標準 json 退回路徑的 NaN / inf 與 numpy 鍵值
+    - orjson 路徑與退回路徑輸出一致
+    """
+
+    @pytest.mark.parametrize("pretty", [False, True])
+    def test_stdlib_fallback_writes_valid_json(self, monkeypatch, pretty):
+        """沒有 orjson 時仍輸出合法 JSON (嚴格解析不接受 NaN / Infinity)"""
+        monkeypatch.setattr(json_export, "orjson", None)
+
+        data = json_export.dumps(SAMPLE, pretty=pretty)
+
+        def reject(token):
+            raise ValueError(f"invalid JSON token {token}")
+
+        assert json.loads(data, parse_constant=reject) == EXPECTED
+
+    def test_orjson_and_fallback_agree(self, monkeypatch):
+        """orjson 遇到 numpy 鍵值退回標準 json，結果與純標準 json 相同"""
+        if json_export.orjson is None:
+            pytest.skip("未安裝 orjson")
+        with_orjson = json_export.dumps(SAMPLE)
+        monkeypatch.setattr(json_export, "orjson", None)
+        without_orjson = json_export.dumps(SAMPLE)
+
+        assert json.loads(with_orjson) == json.loads(without_orjson) == EXPECTED
+
+    def test_orjson_path_nan_is_null(self):
+        """orjson 路徑的 NaN 同樣輸出為 null"""
+        if json_export.orjson is None:
+            pytest.skip("未安裝 orjson")
+        assert json.loads(json_export.dumps({"value": float("nan"), "values": np.array([np.nan])})) == \
+            {"value": None, "values": [None]}
@@ -0,0 +1,82 @@
+"""
+F1 全場迷你分段表測試
+以合成的圈速與遙測數據檢查分段時間與共用的每場賽事快取
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 確保模組路徑正確
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.minisector_table import MinisectorTable, get_minisector_table
+
+LAP_DISTANCE = 5000.0
+
+
+def _session(lap_times=None):
+    """兩位車手、各 4 圈的合成賽段 (速度沿賽道變化，車速 4 Hz 取樣)"""
+    lap_times = lap_times or {"VER": [95.0, 90.0, 91.0, 92.0], "NOR": [96.0, 90.5, 90.2, 93.0]}
+    numbers = {"VER": "1", "NOR": "4"}
+    laps, car_data = [], {}
+    for driver, times in lap_times.items():
+        starts = np.concatenate(([0.0], np.cumsum(times)[:-1]))
+        for lap, (start, duration) in enumerate(zip(starts, times), 1):
+            laps.append({"Driver": driver, "DriverNumber": numbers[driver], "LapNumber": lap,
+                         "LapStartTime": pd.Timedelta(seconds=start), "Time": pd.Timedelta(seconds=start + duration),
+                         "LapTime": pd.Timedelta(seconds=duration), "PitInTime": pd.NaT, "PitOutTime": pd.NaT})
+        # 每圈前半段較快、後半段較慢，平均車速使單圈距離為 LAP_DISTANCE
+        t = np.arange(0.0, sum(times) + 0.25, 0.25)
+        lap_index = np.minimum(np.searchsorted(np.cumsum(times), t, side='right'), len(times) - 1)
+        phase = (t - starts[lap_index]) / np.asarray(times)[lap_index]
+        speed = LAP_DISTANCE / np.asarray(times)[lap_index] * (1.0 + 0.3 * np.cos(2 * np.pi * phase)) * 3.6
+        car_data[numbers[driver]] = pd.DataFrame({"SessionTime": pd.to_timedelta(t, unit="s"), "Speed": speed})
+    return {"laps": pd.DataFrame(laps), "car_data": car_data, "pos_data": {}, "results": None}
+
+
+class TestMinisectorTable:
+    """
+    迷你分段表測試類別
+
+    測試範圍:
+    - 分段時間總和等於圈速
+    - 有效圈遮罩與最快分段歸屬
+    - 每份圈速數據與分段數只建立一次
+    """
+
+    def test_sector_sums_equal_lap_time(self):
+        """每一圈的迷你分段時間總和等於 Time - LapStartTime"""
+        session = _session()
+        table = MinisectorTable(session["laps"], session["car_data"], n_minisectors=10)
+
+        assert table.drivers == ["NOR", "VER"]
+        assert table.lap_distance == pytest.approx(LAP_DISTANCE, rel=0.01)
+        for driver in table.drivers:
+            laps = session["laps"][session["laps"]["Driver"] == driver]
+            expected = (laps["Time"] - laps["LapStartTime"]).dt.total_seconds().to_numpy()
+            np.testing.assert_allclose(table.driver_minisectors(driver).sum(axis=1), expected, atol=1e-3)
+
+    def test_valid_laps_and_theoretical_best(self):
+        """第 1 圈不列入有效圈；理論最快圈不慢於任何有效圈"""
+        session = _session()
+        table = MinisectorTable(session["laps"], session["car_data"], n_minisectors=10)
+
+        assert not table.valid[:, 0].any()
+        assert table.valid[:, 1:].all()
+        fastest_valid = np.where(table.valid, table.times.sum(axis=2), np.inf).min()
+        assert table.best_minisectors().min(axis=0).sum() <= fastest_valid + 1e-3
+
+    def test_cache_reuses_table_per_laps_object(self):
+        """相同圈速物件與分段數命中快取；換成新的圈速物件或分段數時重新建立"""
+        session = _session()
+        table = get_minisector_table(session, n_minisectors=10)
+
+        assert get_minisector_table(session, n_minisectors=10) is table
+        assert get_minisector_table(session, n_minisectors=5) is not table
+        rebuilt = get_minisector_table(dict(session, laps=session["laps"].copy()), n_minisectors=10)
+        assert rebuilt is not table
+        np.testing.assert_allclose(rebuilt.times, table.times)
@@ -0,0 +1,87 @@
+"""
+F1 分析功能效能基準測試
+以本地賽段快取執行 benchmarks/benchmark_config.json 指定的功能，並與基準線比較
+沒有本地賽段快取 (f1_analysis_cache/*.pkl)、快取無法讀取或未安裝 fastf1 時略過
+基準線 (benchmarks/benchmark_baseline.json) 以真實賽段執行 --update-baseline 產生
+"""
+
+import pytest
+import sys
+import os
+
+# 確保模組路徑正確
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.performance_benchmark import (
+    DEFAULT_BASELINE_PATH,
+    _current_rss_mb,
+    _measure,
+    available_fixtures,
+    compare_with_baseline,
+    load_benchmark_config,
+    run_performance_benchmark,
+)
+
+
+class TestPerformanceBenchmark:
+    """
+    效能基準測試類別
+
+    測試範圍:
+    - 基準線比較門檻
+    - 每次執行的 RSS 增加以執行前後的目前 RSS 計算
+    - 本地賽段的效能退化檢查
+    """
+
+    def test_compare_with_baseline_thresholds(self):
+        """超過比例與最小容許秒數才列為退化"""
+        baseline = {"results": {"2025_Japan_R": {"3": {
+            "cold": {"status": "success", "wall_s": 2.0, "cpu_s": 1.0, "rss_growth_mb": 10.0},
+            "warm": {"status": "success", "wall_s": 0.02, "cpu_s": 0.02, "rss_growth_mb": 0.0},
+        }}}}
+        results = {"2025_Japan_R": {"3": {
+            "cold": {"status": "success", "wall_s": 2.6, "cpu_s": 1.2, "rss_growth_mb": 15.0},
+            "warm": {"status": "failed", "wall_s": 0.06, "cpu_s": 0.03, "rss_growth_mb": 0.0},
+        }}}
+
+        regressions = compare_with_baseline(results, baseline)
+        flagged = {(item["phase"], item["metric"]) for item in regressions}
+
+        assert ("cold", "wall_s") in flagged
+        assert ("cold", "cpu_s") not in flagged
+        # 暖啟動時間極短，差距在最小容許秒數內不算退化，但狀態失敗仍需標記
+        assert ("warm", "wall_s") not in flagged
+        assert ("warm", "status") in flagged
+
+    @pytest.mark.skipif(_current_rss_mb() is None, reason="無法取得目前 RSS")
+    def test_rss_growth_uses_current_rss(self):
+        """執行中配置並保留的記憶體計入 RSS 增加；高峰之後的執行不受先前高峰遮蔽"""
+        kept = []
+        transient = bytearray(80 * 1024 * 1024)
+        del transient
+
+        measurement = _measure(lambda: kept.append(bytearray(40 * 1024 * 1024)) or True)
+
+        assert measurement["status"] == "success"
+        assert measurement["rss_growth_mb"] >= 30
+        assert measurement["peak_rss_mb"] is not None
+
+    @pytest.mark.skipif(not available_fixtures(load_benchmark_config()),
+                        reason="沒有本地賽段快取 (f1_analysis_cache/*.pkl)")
+    def test_no_performance_regression(self):
+        """本地賽段的各功能不得慢於基準線門檻，且每次執行皆成功"""
+        pytest.importorskip("fastf1")
+        if not os.path.exists(DEFAULT_BASELINE_PATH):
+            pytest.skip(f"缺少基準線 {DEFAULT_BASELINE_PATH}，請以真實賽段執行 "
+                        "python -m modules.performance_benchmark --update-baseline 後提交")
+        result = run_performance_benchmark(quiet=True, show_detailed_output=False)
+
+        if not result["data"].get("results"):
+            pytest.skip(f"本地賽段快取無法讀取: {result['data'].get('skipped_fixtures')}")
+        failed = [(session, function_id, phase, run["status"])
+                  for session, functions in result["data"]["results"].items()
+                  for function_id, phases in functions.items()
+                  for phase, run in phases.items()
+                  if run["status"] != "success"]
+        assert not failed, failed
+        assert result["success"], result["data"]["regressions"]
@@ -0,0 +1,116 @@
+"""
+F1 進站表測試
+以合成的圈速數據檢查進/出站圈配對、進站通道時間、靜止時間估算與每份圈速數據的快取
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 確保模組路徑正確
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import pitstop_table
+from modules.pitstop_table import build_pitstop_table, get_driver_pitstops, get_pitstop_table
+
+TOTAL_LAPS = 10
+LAP_TIME = 90.0
+# 車手 → {進站圈: (進站通道時間, 出站後配方)}；LEC 第 8 圈為紅旗期間的車庫停留
+STOPS = {
+    "VER": {5: (22.0, "HARD")},
+    "LEC": {4: (24.5, "MEDIUM"), 8: (80.0, "HARD")},
+    "NOR": {},
+}
+
+
+def _laps():
+    """每位車手 10 圈，PitInTime 記在進站圈、PitOutTime 記在下一圈"""
+    rows = []
+    for driver, stops in STOPS.items():
+        compound, stint, life = "MEDIUM", 1, 0
+        pit_out = None
+        for lap in range(1, TOTAL_LAPS + 1):
+            start = (lap - 1) * LAP_TIME
+            life += 1
+            row = {"Driver": driver, "Team": f"{driver} Racing", "LapNumber": lap,
+                   "Compound": compound, "Stint": float(stint), "TyreLife": float(life),
+                   "PitInTime": pd.NaT, "PitOutTime": pit_out if pit_out is not None else pd.NaT}
+            pit_out = None
+            if lap in stops:
+                lane_time, compound = stops[lap]
+                pit_in = start + LAP_TIME - 10.0
+                row["PitInTime"] = pd.Timedelta(seconds=pit_in)
+                pit_out = pd.Timedelta(seconds=pit_in + lane_time)
+                stint, life = stint + 1, 0
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+class TestPitstopTable:
+    """
+    進站表測試類別
+
+    測試範圍:
+    - 進站圈與出站圈配對、進站次數與配方更換
+    - 有效進站範圍與靜止時間估算
+    - 沒有 Stint / 出站圈時的備援
+    - 同一份圈速數據只建立一次
+    """
+
+    def test_pairs_pit_in_with_next_lap_out(self):
+        """PitInTime 與下一圈的 PitOutTime 配對，得到通道時間、stint 與配方更換"""
+        table = build_pitstop_table(_laps()).set_index(["Driver", "lap"])
+
+        assert sorted(table.index) == [("LEC", 4), ("LEC", 8), ("VER", 5)]
+        np.testing.assert_allclose(table["pit_lane_time"].to_numpy(dtype=float), [24.5, 80.0, 22.0])
+        assert table["out_lap"].to_dict() == {("LEC", 4): 5, ("LEC", 8): 9, ("VER", 5): 6}
+        assert table["stop_number"].to_dict() == {("LEC", 4): 1, ("LEC", 8): 2, ("VER", 5): 1}
+        assert table.loc[("VER", 5), "compound_before"] == "MEDIUM"
+        assert table.loc[("VER", 5), "compound_after"] == "HARD"
+        assert table["compound_changed"].to_dict() == {("LEC", 4): False, ("LEC", 8): True, ("VER", 5): True}
+        assert table.loc[("VER", 5), ["stint_before", "stint_after"]].tolist() == [1.0, 2.0]
+        assert table.loc[("VER", 5), "tyre_life"] == 5.0
+        assert table.loc[("VER", 5), "Team"] == "VER Racing"
+
+    def test_valid_range_and_stationary_estimate(self):
+        """通道時間超出有效範圍不列入；最快有效進站的靜止時間為 MIN_STATIONARY_SECONDS"""
+        table = build_pitstop_table(_laps()).set_index(["Driver", "lap"])
+
+        assert table["is_valid"].to_dict() == {("LEC", 4): True, ("LEC", 8): False, ("VER", 5): True}
+        assert table.loc[("VER", 5), "stationary_estimate"] == pytest.approx(pitstop_table.MIN_STATIONARY_SECONDS)
+        assert table.loc[("LEC", 4), "stationary_estimate"] == pytest.approx(
+            pitstop_table.MIN_STATIONARY_SECONDS + 2.5)
+        assert np.isnan(table.loc[("LEC", 8), "stationary_estimate"])
+
+    def test_fallbacks_without_stint_or_out_lap(self):
+        """沒有 Stint 欄位時以進站次數推算；出站時間記在同一圈時仍可配對"""
+        laps = _laps().drop(columns=["Stint", "Team"])
+        table = build_pitstop_table(laps).set_index(["Driver", "lap"])
+        assert table.loc[("LEC", 8), ["stint_before", "stint_after"]].tolist() == [2, 3]
+        assert table.loc[("LEC", 8), "Team"] == pitstop_table.UNKNOWN_TEAM
+
+        same_row = _laps()
+        same_row = same_row[same_row["Driver"] == "VER"].set_index("LapNumber")
+        same_row.loc[5, "PitOutTime"] = same_row.loc[6, "PitOutTime"]
+        same_row.loc[6, "PitOutTime"] = pd.NaT
+        table = build_pitstop_table(same_row.reset_index())
+        assert table["lap"].tolist() == table["out_lap"].tolist() == [5]
+        assert table["pit_lane_time"].iloc[0] == pytest.approx(22.0)
+
+        assert build_pitstop_table(_laps().drop(columns=["PitOutTime"])).empty
+        assert list(build_pitstop_table(None).columns) == pitstop_table.PITSTOP_TABLE_COLUMNS
+
+    def test_table_is_cached_per_laps(self):
+        """同一份圈速數據取回同一張表；不同的數據另外建立"""
+        pitstop_table.clear_cache()
+        laps = _laps()
+
+        first = get_pitstop_table({"laps": laps})
+        assert get_pitstop_table(laps) is first
+        assert get_pitstop_table(_laps()) is not first
+        assert get_driver_pitstops(laps, "VER")["lap"].tolist() == [5]
+        assert get_driver_pitstops(laps, "NOR").empty
+        pitstop_table.clear_cache()
@@ -0,0 +1,135 @@
+"""
+F1 排位賽分析測試
+以合成的排位賽圈速與 car_data 檢查 Q1 / Q2 / Q3 分段、淘汰標記與並行遙測的追蹤
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# 確保模組路徑正確
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.qualifying_analyzer import QualifyingAnalysis, display_segment, split_qualifying
+from modules.tracing import start_trace
+
+LAP_DISTANCE = 4000.0
+NUMBERS = {"VER": "1", "LEC": "16", "NOR": "4", "PIA": "81", "HAM": "44", "RUS": "63"}
+# 各階段開始時間 (秒) 與參賽車手 (依速度排序)
+SEGMENT_PLAN = [
+    (0.0, ["VER", "LEC", "NOR", "PIA", "HAM", "RUS"]),
+    (1000.0, ["VER", "LEC", "NOR", "PIA"]),
+    (2000.0, ["VER", "LEC"]),
+]
+
+
+def _session():
+    """每位車手每階段兩圈 (第二圈較快)，各階段之間休息 800 秒以上"""
+    laps = []
+    for segment, (start, drivers) in enumerate(SEGMENT_PLAN):
+        for rank, driver in enumerate(drivers):
+            lap_start = start + 5.0 * rank
+            for lap in (1, 2):
+                duration = 80.0 + 0.2 * rank - 0.1 * segment - 0.3 * (lap - 1)
+                laps.append({
+                    "Driver": driver, "DriverNumber": NUMBERS[driver], "LapNumber": segment * 2 + lap,
+                    "LapStartTime": pd.Timedelta(seconds=lap_start),
+                    "Time": pd.Timedelta(seconds=lap_start + duration),
+                    "LapTime": pd.Timedelta(seconds=duration),
+                    "Sector1Time": pd.Timedelta(seconds=duration / 3),
+                    "Sector2Time": pd.Timedelta(seconds=duration / 3),
+                    "Sector3Time": pd.Timedelta(seconds=duration / 3),
+                    "PitInTime": pd.NaT, "PitOutTime": pd.NaT,
+                })
+                lap_start += duration
+    laps = pd.DataFrame(laps)
+
+    car_data = {}
+    for driver, number in NUMBERS.items():
+        own = laps[laps["Driver"] == driver]
+        starts = own["LapStartTime"].dt.total_seconds().to_numpy()
+        ends = own["Time"].dt.total_seconds().to_numpy()
+        t = np.arange(0.0, ends.max() + 0.2, 0.2)
+        index = np.clip(np.searchsorted(starts, t, side="right") - 1, 0, len(starts) - 1)
+        on_lap = t <= ends[index]
+        speed = np.where(on_lap, LAP_DISTANCE / (ends - starts)[index] * 3.6, 100.0)
+        car_data[number] = pd.DataFrame({
+            "SessionTime": pd.to_timedelta(t, unit="s"), "Speed": speed,
+            "Throttle": np.full(len(t), 100.0), "Brake": np.zeros(len(t)), "RPM": np.full(len(t), 11000.0),
+            "nGear": np.full(len(t), 7.0), "DRS": np.zeros(len(t)),
+        })
+    return laps, car_data
+
+
+class TestQualifyingAnalyzer:
+    """
+    排位賽分析測試類別
+
+    測試範圍:
+    - 以階段間休息切分 Q1 / Q2 / Q3
+    - 各階段最快圈排序與淘汰標記
+    - 並行建立的遙測 span 記入呼叫端的追蹤
+    - P1 的最大失時位置顯示為 N/A
+    """
+
+    def test_split_by_session_breaks(self):
+        """三段休息切出三個階段，各階段車手正確"""
+        laps, _ = _session()
+        segments = split_qualifying(laps)
+
+        assert list(segments) == ["Q1", "Q2", "Q3"]
+        for name, (_, drivers) in zip(segments, SEGMENT_PLAN):
+            assert sorted(segments[name]["Driver"].unique()) == sorted(drivers)
+
+    def test_best_laps_and_elimination(self):
+        """未進入下一階段的車手標記淘汰；Q3 沒有淘汰"""
+        laps, car_data = _session()
+        analysis = QualifyingAnalysis(laps, car_data)
+
+        q1 = analysis.best_laps("Q1")
+        assert q1["Driver"].tolist() == SEGMENT_PLAN[0][1]
+        assert q1.loc[q1["eliminated"], "Driver"].tolist() == ["HAM", "RUS"]
+        # 第二圈為各車手最快圈
+        assert set(q1["LapNumber"]) == {2}
+
+        q2 = analysis.best_laps("Q2")
+        assert q2.loc[q2["eliminated"], "Driver"].tolist() == ["NOR", "PIA"]
+
+        q3 = analysis.best_laps("Q3")
+        assert q3["Driver"].tolist() == ["VER", "LEC"]
+        assert not q3["eliminated"].any()
+        assert q3["gap_to_first"].iloc[1] > 0
+
+    def test_parallel_telemetry_is_traced(self):
+        """三個階段以執行緒並行建立，各自的 span 掛在呼叫端的根 span 下"""
+        laps, car_data = _session()
+        analysis = QualifyingAnalysis(laps, car_data)
+
+        with start_trace("test.qualifying") as trace:
+            matrices = analysis.telemetry(workers=3)
+
+        assert sorted(matrices) == ["Q1", "Q2", "Q3"]
+        children = trace.to_dict().get("children", [])
+        segments = [child["attrs"]["segment"] for child in children if child["name"] == "table.qualifying_telemetry"]
+        assert sorted(segments) == ["Q1", "Q2", "Q3"]
+        assert all(child["name"] == "table.qualifying_telemetry" for child in children)
+
+    def test_leader_loss_position_not_shown(self, capsys):
+        """P1 (遙測參考) 沒有失時位置，顯示 N/A；其他車手顯示距離"""
+        laps, car_data = _session()
+        analysis = QualifyingAnalysis(laps, car_data)
+        summary = analysis.telemetry(workers=1)["Q3"].summary().set_index("driver")
+
+        assert np.isnan(summary.loc["VER", "largest_loss_at_m"])
+        assert summary.loc["LEC", "largest_loss_at_m"] > 0
+
+        display_segment("Q3", analysis.best_laps("Q3"), summary.reset_index())
+        rows = {}
+        for line in capsys.readouterr().out.splitlines():
+            cells = [cell.strip() for cell in line.split("|")[1:-1]]
+            if len(cells) == 8 and cells[1] in ("VER", "LEC"):
+                rows[cells[1]] = cells[6]
+        assert rows["VER"] == "N/A"
+        assert rows["LEC"].endswith(" m")
@@ -0,0 +1,79 @@
+"""
+F1 全場比賽節奏表測試
+以合成圈速檢查空數據、沒有有效圈的車手與節奏統計
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 確保模組路徑正確
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.race_pace_table import RacePaceTable, get_race_pace, run_all_drivers_race_pace_analysis
+from modules.tire_stint_model import annotate_stint_laps
+
+
+def _laps(track_status=None, n_laps=12):
+    """三位車手單一 stint 的合成圈速；track_status 可逐車手指定賽道狀態"""
+    track_status = track_status or {}
+    base = {"VER": 90.0, "LEC": 90.4, "NOR": 90.8}
+    rows = []
+    for driver, pace in base.items():
+        for lap in range(1, n_laps + 1):
+            rows.append({
+                "Driver": driver, "Team": f"{driver} Racing", "LapNumber": lap, "Stint": 1, "Compound": "MEDIUM",
+                "TyreLife": lap, "LapTime": pd.Timedelta(seconds=pace + 0.05 * lap + (0.1 if lap % 2 else 0.0)),
+                "PitInTime": pd.NaT, "PitOutTime": pd.NaT, "TrackStatus": track_status.get(driver, "1"),
+            })
+    return pd.DataFrame(rows)
+
+
+class TestRacePaceTable:
+    """
+    比賽節奏表測試類別
+
+    測試範圍:
+    - 空圈速表
+    - 全場或個別車手沒有有效圈
+    - 節奏排序與與領先者差距
+    """
+
+    def test_empty_laps(self):
+        """空圈速表返回空節奏表，分析回報失敗而非拋出例外"""
+        assert RacePaceTable(pd.DataFrame()).empty
+        assert RacePaceTable(None).empty
+        result = run_all_drivers_race_pace_analysis({"laps": _laps().iloc[0:0]}, show_detailed_output=False)
+        assert result["success"] is False
+
+    def test_no_clean_laps_anywhere(self):
+        """全場皆為非綠旗圈時不拋出 KeyError，車手保留且統計為 NaN"""
+        table = RacePaceTable(annotate_stint_laps(_laps({"VER": "4", "LEC": "4", "NOR": "4"})))
+
+        assert sorted(table.driver_pace["Driver"]) == ["LEC", "NOR", "VER"]
+        assert (table.driver_pace["clean_laps"] == 0).all()
+        assert table.driver_pace[["median_pace", "iqr", "gap_to_leader"]].isna().all().all()
+        assert not table.driver_pace["ranked"].any()
+        assert table.stint_pace.empty
+
+    def test_driver_without_clean_laps_is_kept(self):
+        """沒有有效圈的車手列於表末 (未排名)，其他車手照常計算"""
+        table = RacePaceTable(annotate_stint_laps(_laps({"NOR": "6"})))
+        pace = table.driver_pace.set_index("Driver")
+
+        assert list(table.driver_pace["Driver"]) == ["VER", "LEC", "NOR"]
+        assert pace.loc["NOR", "clean_laps"] == 0
+        assert pace.loc["NOR", "total_laps"] == 12
+        assert np.isnan(pace.loc["NOR", "median_pace"]) and np.isnan(pace.loc["NOR", "iqr"])
+        assert pace.loc["VER", "gap_to_leader"] == 0
+        assert pace.loc["LEC", "gap_to_leader"] == pytest.approx(0.4, abs=1e-6)
+        assert pace.loc["VER", "iqr"] > 0
+        assert set(table.stint_pace["Driver"]) == {"VER", "LEC"}
+
+    def test_cached_per_laps_object(self):
+        """相同圈速數據只建立一次節奏表"""
+        laps = _laps()
+        assert get_race_pace(laps) is get_race_pace(laps)
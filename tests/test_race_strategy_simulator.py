@@ -0,0 +1,78 @@
+"""
+F1 賽事策略模擬測試
+以合成的模擬參數檢查 Monte Carlo 比賽時間與中性化提前進站
+"""
+
+import sys
+import os
+
+import pytest
+
+# 確保模組路徑正確
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.race_strategy_simulator import normalise_strategy, run_monte_carlo
+
+
+def _inputs(hazard_per_lap=0.0, pit_loss_std=0.0):
+    """20 圈、兩種配方、無雜訊的合成模擬參數"""
+    return {
+        "total_laps": 20,
+        "compounds": {
+            "SOFT": {"base": 90.0, "degradation": 0.10, "degradation_std": 0.0, "lap_noise": 0.0},
+            "HARD": {"base": 91.0, "degradation": 0.02, "degradation_std": 0.0, "lap_noise": 0.0},
+        },
+        "pit_loss": 20.0,
+        "pit_loss_std": pit_loss_std,
+        "neutralisation": {"hazard_per_lap": hazard_per_lap, "vsc_share": 0.0, "mean_laps": {"SC": 3.0, "VSC": 2.0}},
+    }
+
+
+def _stint_time(params, laps):
+    return laps * params["base"] + params["degradation"] * laps * (laps + 1) / 2
+
+
+class TestRaceStrategySimulator:
+    """
+    賽事策略模擬測試類別
+
+    測試範圍:
+    - 無隨機成分時等於封閉解
+    - 每圈都中性化時進站損失依安全車比例打折
+    """
+
+    def test_deterministic_inputs_match_closed_form(self):
+        """沒有雜訊與中性化時每次模擬都等於 stint 時間加進站損失"""
+        inputs = _inputs()
+        one_stop = normalise_strategy({"compounds": ["SOFT", "HARD"], "pit_laps": [8]}, inputs)
+        two_stop = normalise_strategy({"compounds": ["SOFT", "HARD", "SOFT"], "pit_laps": [6, 14]}, inputs)
+
+        results, seed = run_monte_carlo(inputs, [one_stop, two_stop], n_sims=50, seed=7)
+        by_stops = {result["stops"]: result for result in results}
+        soft, hard = inputs["compounds"]["SOFT"], inputs["compounds"]["HARD"]
+
+        assert seed == 7
+        assert by_stops[1]["mean_time"] == pytest.approx(_stint_time(soft, 8) + _stint_time(hard, 12) + 20.0, abs=1e-3)
+        assert by_stops[2]["mean_time"] == pytest.approx(
+            _stint_time(soft, 6) + _stint_time(hard, 8) + _stint_time(soft, 6) + 40.0, abs=1e-3)
+        assert all(result["std_time"] == 0 and result["neutralised_stop_probability"] == 0 for result in results)
+        assert sum(result["win_probability"] for result in results) == pytest.approx(1.0)
+
+    def test_neutralised_stop_is_discounted(self):
+        """每圈都中性化時必定於中性化期間進站，損失為安全車比例"""
+        inputs = _inputs(hazard_per_lap=1.0)
+        strategy = normalise_strategy({"compounds": ["SOFT", "HARD"], "pit_laps": [8]}, inputs)
+
+        results, _ = run_monte_carlo(inputs, [strategy], n_sims=20, seed=1)
+
+        assert results[0]["neutralised_stop_probability"] == 1.0
+        # 窗口內第一個中性化圈為第 5 圈
+        soft, hard = inputs["compounds"]["SOFT"], inputs["compounds"]["HARD"]
+        assert results[0]["mean_time"] == pytest.approx(_stint_time(soft, 5) + _stint_time(hard, 15) + 20.0 * 0.45, abs=1e-3)
+
+    def test_invalid_strategy_rejected(self):
+        """配方數與進站次數不符或進站圈超出比賽時不接受"""
+        inputs = _inputs()
+        assert normalise_strategy({"compounds": ["SOFT"], "pit_laps": [8]}, inputs) is None
+        assert normalise_strategy({"compounds": ["SOFT", "HARD"], "pit_laps": [20]}, inputs) is None
+        assert normalise_strategy({"compounds": ["SOFT", "INTER"], "pit_laps": [8]}, inputs) is None
@@ -0,0 +1,101 @@
+"""
+F1 安全車影響分析測試
+以合成的逐圈數據與事件時間軸檢查中立化時段的進站歸屬與逐圈情境表的進站標記
+"""
+
+import sys
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# 確保模組路徑正確
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.lap_context import LapContext
+from modules.pitstop_table import build_pitstop_table
+from modules.safety_car_impact import analyze_safety_car_impact
+from modules.tire_stint_model import TireStintModel
+
+TOTAL_LAPS = 20
+# 領先車手每圈 90 秒，落後車手每圈 95 秒
+LAP_TIMES = {"VER": 90.0, "HAM": 95.0}
+# 進站圈 → 進站時間 (session 秒)
+PIT_LAPS = {"VER": {5: 440.0, 12: 1070.0}, "HAM": {10: 940.0}}
+# 安全車: 905 秒至 1100 秒 (領先車手第 11 至 13 圈)
+SC_START_MS, SC_END_MS = 905000.0, 1100000.0
+
+
+class _Timeline:
+    """事件時間軸替身: 只提供賽道狀態區間"""
+
+    status_codes = np.array(['GREEN', 'SC', 'GREEN'], dtype=object)
+    status_start_ms = np.array([0.0, SC_START_MS, SC_END_MS])
+    status_end_ms = np.array([SC_START_MS, SC_END_MS, np.inf])
+
+    def status_periods(self):
+        return [{'status': 'SC', 'label': '安全車', 'start_ms': SC_START_MS, 'end_ms': SC_END_MS,
+                 'start_lap': 11, 'end_lap': 13}]
+
+
+def _laps():
+    frames = []
+    for position, (driver, lap_time) in enumerate(LAP_TIMES.items(), 1):
+        numbers = np.arange(1, TOTAL_LAPS + 1)
+        starts = (numbers - 1) * lap_time
+        pit_in = pd.Series(pd.NaT, index=numbers - 1, dtype='timedelta64[ns]')
+        pit_out = pd.Series(pd.NaT, index=numbers - 1, dtype='timedelta64[ns]')
+        for lap, time in PIT_LAPS[driver].items():
+            pit_in[lap - 1] = pd.Timedelta(seconds=time)
+            pit_out[lap] = pd.Timedelta(seconds=lap * lap_time + 20.0)
+        frames.append(pd.DataFrame({
+            "Driver": driver, "LapNumber": numbers, "Position": float(position),
+            "LapStartTime": pd.to_timedelta(starts, unit="s"),
+            "Time": pd.to_timedelta(starts + lap_time, unit="s"),
+            "LapTime": pd.to_timedelta(np.full(TOTAL_LAPS, lap_time), unit="s"),
+            "Compound": "MEDIUM", "PitInTime": pit_in.to_numpy(), "PitOutTime": pit_out.to_numpy(),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _context():
+    laps = _laps()
+    return LapContext(laps, TireStintModel(laps), timeline=_Timeline(), pitstops=build_pitstop_table(laps))
+
+
+class TestSafetyCarImpact:
+    """
+    安全車影響分析測試類別
+
+    測試範圍:
+    - 逐圈情境表的進站/出站圈標記 (不產生 pandas FutureWarning)
+    - 時段的中立化進站數與逐站 neutralised 旗標使用同一時間重疊判斷
+    """
+
+    def test_lap_context_marks_pit_laps_without_warnings(self):
+        """進站圈與出站圈依進站表標記，且建立過程沒有 FutureWarning"""
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', FutureWarning)
+            context = _context()
+
+        laps = context.laps.set_index(['Driver', 'LapNumber'])
+        assert laps['pit_out'].dtype == bool
+        assert sorted(laps.index[laps['pit_in']]) == [('HAM', 10), ('VER', 5), ('VER', 12)]
+        assert sorted(laps.index[laps['pit_out']]) == [('HAM', 11), ('VER', 6), ('VER', 13)]
+        # 落後車手第 10 圈 (855-950 秒) 與安全車時段重疊
+        assert laps.loc[('HAM', 10), 'neutralised']
+        assert not laps.loc[('VER', 10), 'neutralised']
+
+    def test_period_pit_stops_follow_neutralised_flag(self):
+        """落後車手在時段開始圈之前的圈數進站，仍計入該時段"""
+        impact = analyze_safety_car_impact(_context(), _Timeline())
+
+        stops = impact['stops'].set_index(['Driver', 'LapNumber'])
+        assert stops['neutralised'].to_dict() == {('HAM', 10): True, ('VER', 5): False, ('VER', 12): True}
+
+        period, = impact['periods']
+        assert period['pit_stops'] == int(stops['neutralised'].sum()) == 2
+
+        drivers = impact['drivers'].set_index('Driver')
+        assert drivers['neutralised_stops'].to_dict() == {'VER': 1, 'HAM': 1}
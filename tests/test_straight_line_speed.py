@@ -0,0 +1,93 @@
+"""
+F1 直線速度表測試
+以合成的參考圈檢查直線區間 (含跨越起終點線的直線)
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 確保模組路徑正確
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import straight_line_speed
+from modules.straight_line_speed import StraightSpeedTable, locate_straights
+
+LAP_DISTANCE = 5000.0
+
+
+def _reference(peak_at):
+    """5 公尺網格的參考圈，最高速位於 peak_at"""
+    distance = np.arange(0.0, LAP_DISTANCE, 5.0)
+    gap = np.abs(distance - peak_at)
+    speed = 320.0 - 0.05 * np.minimum(gap, LAP_DISTANCE - gap)
+    return distance, speed
+
+
+class TestStraightLineSpeed:
+    """
+    直線速度表測試類別
+
+    測試範圍:
+    - 彎道之間的直線區間
+    - 起終點線位於直線上時首尾合併
+    - 圈起點附近的最高速歸屬到跨越起終點線的直線
+    """
+
+    CORNERS = [{'start_distance': 1000.0, 'end_distance': 1500.0},
+               {'start_distance': 3000.0, 'end_distance': 3500.0}]
+
+    def test_straight_across_finish_line_is_merged(self):
+        """最後一段與第一段合併為一條直線，終點距離加上單圈距離"""
+        distance, speed = _reference(peak_at=200.0)
+        straights = locate_straights(distance, speed, corners=self.CORNERS, lap_distance=LAP_DISTANCE)
+
+        assert straights['straight'].tolist() == [1, 2]
+        assert straights[['start_m', 'end_m']].values.tolist() == [[1505.0, 2995.0], [3505.0, 5995.0]]
+        assert straights['length_m'].iloc[1] == pytest.approx(2490.0)
+        # 測速點位於合併直線的起終點線之後，以參考圈座標表示
+        assert straights['trap_m'].iloc[1] == pytest.approx(200.0)
+
+    def test_straights_without_wrap(self):
+        """起點位於彎道內時不合併；過短的直線不列出"""
+        distance, speed = _reference(peak_at=2500.0)
+        corners = [{'start_distance': 0.0, 'end_distance': 300.0}] + self.CORNERS + \
+                  [{'start_distance': 3600.0, 'end_distance': 4999.0}]
+        straights = locate_straights(distance, speed, corners=corners)
+
+        assert straights[['start_m', 'end_m']].values.tolist() == [[305.0, 995.0], [1505.0, 2995.0]]
+        assert straights['trap_m'].tolist() == [995.0, 2500.0]
+
+    def test_lap_start_samples_count_for_wrapped_straight(self, monkeypatch):
+        """最高速出現在起終點線後時，計入跨越起終點線的直線"""
+        lap_times = [80.0, 80.0, 80.0, 80.0]
+        t = np.arange(0.0, sum(lap_times) + 0.1, 0.1)
+        phase = (t % 80.0) / 80.0
+        # 每圈第 4% 時間為最高速 (起終點線後約 200 m)
+        speed = 180.0 + 140.0 * np.exp(-((np.minimum(np.abs(phase - 0.04), 1 - np.abs(phase - 0.04))) / 0.08) ** 2)
+        car = pd.DataFrame({"SessionTime": pd.to_timedelta(t, unit="s"), "Speed": speed, "DRS": np.zeros(len(t))})
+        starts = np.arange(4) * 80.0
+        laps = pd.DataFrame({
+            "Driver": "VER", "DriverNumber": "1", "LapNumber": [1, 2, 3, 4],
+            "LapStartTime": pd.to_timedelta(starts, unit="s"), "Time": pd.to_timedelta(starts + 80.0, unit="s"),
+            "LapTime": pd.to_timedelta(lap_times, unit="s"), "PitInTime": pd.NaT, "PitOutTime": pd.NaT,
+        })
+        first_lap = t <= 80.0
+        lap_distance = float(np.sum(np.diff(t[first_lap]) * (speed[first_lap][1:] + speed[first_lap][:-1]) / 2 / 3.6))
+        distance = np.arange(0.0, lap_distance, 5.0)
+        reference = {"driver": "VER", "lap": 2, "distance": distance, "lap_distance": lap_distance,
+                     "speed": np.full(len(distance), 200.0), "x": None, "y": None,
+                     "corners": [{"start_distance": 0.3 * lap_distance, "end_distance": 0.4 * lap_distance},
+                                 {"start_distance": 0.6 * lap_distance, "end_distance": 0.7 * lap_distance}]}
+        monkeypatch.setattr(straight_line_speed, "get_reference_lap", lambda source: reference)
+
+        table = StraightSpeedTable({}, laps, {"1": car})
+
+        assert table.straights["end_m"].iloc[-1] > lap_distance
+        wrapped = table.straight_table[table.straight_table["straight"] == table.straights["straight"].iloc[-1]]
+        lap_max = table.lap_table.set_index("LapNumber")["max_speed"]
+        np.testing.assert_allclose(wrapped.set_index("LapNumber")["max_speed"], lap_max, atol=0.5)
+        assert lap_max.min() > 310
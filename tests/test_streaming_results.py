@@ -0,0 +1,92 @@
+"""
+F1 串流結果測試
+以功能映射器的 execute_function_streaming() 執行會回報部分結果的功能，檢查收到的部分結果與最終結果
+"""
+
+import io
+import sys
+import os
+
+# 確保模組路徑正確
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.function_mapper import F1AnalysisFunctionMapper
+from modules.streaming_results import (emit_partial, make_stdout_emitter, parse_partial_line,
+                                       partial_chart_points, partial_rows)
+
+
+class TestStreamingResults:
+    """
+    串流結果測試類別
+
+    測試範圍:
+    - 映射器串流執行的部分結果與最終結果
+    - CLI --stream 輸出行格式
+    - GUI 漸進顯示用的表格資料列與圖表數據點
+    """
+
+    @staticmethod
+    def _streaming_mapper():
+        """功能 20 (系統功能，不需載入數據) 換成逐車手回報部分結果的分析"""
+        mapper = F1AnalysisFunctionMapper()
+
+        def analysis(**kwargs):
+            drivers = ["VER", "LEC", "NOR"]
+            for index, driver in enumerate(drivers):
+                emit_partial(mapper.partial_callback, "driver", {"laps": 10 + index},
+                             progress=(index + 1) * 100 // len(drivers), driver=driver)
+            return {"success": True, "message": "完成", "data": {"drivers": drivers}, "function_id": "20"}
+
+        mapper.function_mapping[20] = analysis
+        return mapper
+
+    def test_execute_function_streaming_yields_partials(self):
+        """部分結果依序產出並轉交回呼，最後一筆為標準化的最終結果"""
+        mapper = self._streaming_mapper()
+        received = []
+
+        items = list(mapper.execute_function_streaming(20, partial_callback=received.append))
+
+        partials = [item for item in items if item["type"] == "partial"]
+        assert [item["driver"] for item in partials] == ["VER", "LEC", "NOR"]
+        assert [item["data"]["laps"] for item in partials] == [10, 11, 12]
+        assert partials[-1]["progress"] == 100
+        assert all(item["function_id"] == "20" and item["stage"] == "driver" for item in partials)
+        assert received == partials
+
+        final = items[-1]
+        assert final["type"] == "final"
+        assert final["data"]["success"] is True
+        assert final["data"]["data"]["drivers"] == ["VER", "LEC", "NOR"]
+        # 串流結束後還原映射器原本的回呼
+        assert mapper.partial_callback is None
+
+    def test_stdout_emitter_round_trip(self):
+        """CLI 串流行可由 parse_partial_line 還原；一般輸出行回傳 None"""
+        output = io.StringIO()
+        emit_partial(make_stdout_emitter(output), "corner", {"corner": 3, "min_speed": 92.5}, progress=40)
+
+        line = output.getvalue()
+        partial = parse_partial_line(line)
+
+        assert partial["stage"] == "corner"
+        assert partial["data"] == {"corner": 3, "min_speed": 92.5}
+        assert parse_partial_line("[INFO] 一般輸出") is None
+
+    def test_partial_rows_and_chart_points(self):
+        """彎道統計與車手彎道平均速度轉為表格資料列與依彎道排序的圖表數據點"""
+        corner = {"type": "partial", "stage": "corner", "driver": "VER", "corner": "3",
+                  "data": {"avg_speed": 142.5, "lap_count": 40}}
+        driver = {"type": "partial", "stage": "driver", "driver": "LEC",
+                  "data": {"corner_avg_speeds": {"10": 95.0, "2": 180.0, "1": 120.0}}}
+        overtaking = {"type": "partial", "stage": "driver", "driver": "NOR", "index": 4,
+                      "data": {"abbreviation": "NOR", "net_overtaking": -2}}
+
+        assert partial_rows(corner) == [{"avg_speed": 142.5, "lap_count": 40, "corner": "3", "driver": "VER"}]
+        assert partial_rows(overtaking) == [{"abbreviation": "NOR", "net_overtaking": -2}]
+        assert partial_rows({"data": [1, {"a": 2}]}) == [{"value": 1}, {"a": 2}]
+
+        assert partial_chart_points(corner) == [("VER 平均速度", [3.0], [142.5])]
+        assert partial_chart_points(driver) == [("LEC", [1.0, 2.0, 10.0], [120.0, 180.0, 95.0])]
+        assert partial_chart_points(overtaking) == [("淨超車", [4.0], [-2.0])]
+        assert partial_chart_points({"stage": "section", "data": "文字"}) == []
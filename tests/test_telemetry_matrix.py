@@ -0,0 +1,75 @@
+"""
+F1 全場遙測比較矩陣測試
+以合成的圈速與 car_data 檢查比較圈選擇與時間差
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 確保模組路徑正確
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.telemetry_matrix import build_telemetry_matrix, select_laps
+
+LAP_DISTANCE = 4000.0
+
+
+def _session():
+    """兩位車手各 3 圈，VER 第 3 圈最快但為進站圈"""
+    lap_times = {"VER": [92.0, 90.0, 89.0], "LEC": [91.0, 90.5, 91.5]}
+    numbers = {"VER": "1", "LEC": "16"}
+    laps, car_data = [], {}
+    for driver, times in lap_times.items():
+        starts = np.concatenate(([0.0], np.cumsum(times)[:-1]))
+        for lap, (start, duration) in enumerate(zip(starts, times), 1):
+            laps.append({"Driver": driver, "DriverNumber": numbers[driver], "LapNumber": lap,
+                         "LapStartTime": pd.Timedelta(seconds=start), "Time": pd.Timedelta(seconds=start + duration),
+                         "LapTime": pd.Timedelta(seconds=duration),
+                         "PitInTime": pd.Timedelta(seconds=start + duration) if (driver, lap) == ("VER", 3) else pd.NaT,
+                         "PitOutTime": pd.NaT})
+        t = np.arange(0.0, sum(times) + 0.2, 0.2)
+        lap_index = np.minimum(np.searchsorted(np.cumsum(times), t, side='right'), len(times) - 1)
+        speed = LAP_DISTANCE / np.asarray(times)[lap_index] * 3.6
+        car_data[numbers[driver]] = pd.DataFrame({
+            "SessionTime": pd.to_timedelta(t, unit="s"), "Speed": speed,
+            "Throttle": np.full(len(t), 100.0), "Brake": np.zeros(len(t)), "RPM": np.full(len(t), 11000.0),
+            "nGear": np.full(len(t), 7.0), "DRS": np.zeros(len(t)),
+        })
+    return {"laps": pd.DataFrame(laps), "car_data": car_data, "pos_data": {}, "results": None}
+
+
+class TestTelemetryMatrix:
+    """
+    全場遙測矩陣測試類別
+
+    測試範圍:
+    - 最快有效圈選擇 (排除進站圈) 與指定圈
+    - 以最快圈為基準的時間差
+    """
+
+    def test_select_laps_skips_pit_laps(self):
+        """進站圈不作為最快圈；指定圈優先"""
+        laps = _session()["laps"]
+        selected = select_laps(laps)
+        assert dict(zip(selected["Driver"], selected["LapNumber"])) == {"VER": 2, "LEC": 2}
+
+        chosen = select_laps(laps, chosen={"LEC": 1})
+        assert dict(zip(chosen["Driver"], chosen["LapNumber"])) == {"VER": 2, "LEC": 1}
+
+    def test_delta_to_reference(self):
+        """時間差以最快圈車手為基準，圈末接近兩圈圈速差"""
+        matrix = build_telemetry_matrix(_session(), grid_step=10.0)
+
+        assert matrix.drivers == ["VER", "LEC"]
+        assert matrix.reference == "VER"
+        assert matrix.lap_distance == pytest.approx(LAP_DISTANCE, rel=0.01)
+        assert matrix.values.shape == (2, len(matrix.channels), len(matrix.distance))
+        assert np.allclose(matrix.delta[0], 0.0)
+        assert matrix.delta[1, -1] == pytest.approx(0.5, abs=0.05)
+        summary = matrix.summary().set_index("driver")
+        assert summary.loc["LEC", "gap_to_reference"] == pytest.approx(0.5)
+        assert summary.loc["VER", "full_throttle_percent"] == 100
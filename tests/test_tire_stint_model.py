@@ -0,0 +1,154 @@
+"""
+F1 輪胎 Stint 模型測試
+以已知衰退率合成的圈速檢查分組最小平方法擬合，並以逐一列舉驗證策略模擬的最佳 stint 長度
+"""
+
+import sys
+import os
+from itertools import product
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# 確保模組路徑正確
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.tire_stint_model import FUEL_SECONDS_PER_LAP, MIN_FIT_LAPS, TireStintModel, simulate_strategies
+
+TOTAL_LAPS = 30
+# 車手 → (基準圈速, [(配方, stint 圈數, 衰退率 秒/圈齡), ...])
+PLAN = {
+    "VER": (90.0, [("MEDIUM", 12, 0.08), ("HARD", 18, 0.03)]),
+    "LEC": (90.4, [("SOFT", 8, 0.15), ("MEDIUM", 10, 0.07), ("HARD", 12, 0.04)]),
+}
+# LEC 第 15 圈受黃旗影響慢 8 秒
+SLOW_LAP = ("LEC", 15, 8.0)
+
+
+def _laps(with_stint=True):
+    rows = []
+    for driver, (base, stints) in PLAN.items():
+        lap = 0
+        for stint, (compound, length, degradation) in enumerate(stints, 1):
+            for age in range(1, length + 1):
+                lap += 1
+                seconds = base + FUEL_SECONDS_PER_LAP * (TOTAL_LAPS - lap) + degradation * age
+                if (driver, lap) == SLOW_LAP[:2]:
+                    seconds += SLOW_LAP[2]
+                rows.append({
+                    "Driver": driver, "LapNumber": lap, "Compound": compound, "TyreLife": float(age),
+                    "Stint": float(stint), "LapTime": pd.Timedelta(seconds=seconds),
+                    "PitInTime": pd.Timedelta(seconds=1.0) if age == length and stint < len(stints) else pd.NaT,
+                    "PitOutTime": pd.Timedelta(seconds=1.0) if age == 1 and stint > 1 else pd.NaT,
+                })
+    laps = pd.DataFrame(rows)
+    return laps if with_stint else laps.drop(columns=["Stint"])
+
+
+def _brute_force(compound_params, total_laps, pit_loss, max_stops, min_stint):
+    """逐一列舉每種配方組合與 stint 長度的總時間"""
+    best = {}
+    for stops in range(1, max_stops + 1):
+        for lengths in product(range(min_stint, total_laps + 1), repeat=stops):
+            last = total_laps - sum(lengths)
+            if last < min_stint:
+                continue
+            for combo in product(compound_params, repeat=stops + 1):
+                if len(set(combo)) < 2:
+                    continue
+                total = stops * pit_loss
+                for length, compound in zip(list(lengths) + [last], combo):
+                    base, degradation = compound_params[compound]
+                    total += sum(base + degradation * age for age in range(1, length + 1))
+                key = (stops, combo)
+                if key not in best or total < best[key][0] - 1e-9:
+                    best[key] = (total, list(lengths) + [last])
+    return best
+
+
+class TestTireStintModel:
+    """
+    輪胎 Stint 模型測試類別
+
+    測試範圍:
+    - 分組加總的最小平方法擬合還原各 stint 的燃油修正衰退率
+    - 進/出站圈、第 1 圈與慢圈不納入擬合
+    - 沒有 Stint 欄位時以配方與圈齡推算 stint
+    - 策略模擬的最佳 stint 長度與逐一列舉相同
+    """
+
+    def test_fit_recovers_stint_degradation(self):
+        """各 stint 的燃油修正衰退率等於合成值，原始斜率再扣除燃油效應"""
+        model = TireStintModel(_laps())
+        stints = model.stints.set_index(["Driver", "stint"])
+
+        assert model.total_laps == TOTAL_LAPS
+        for driver, (base, plan) in PLAN.items():
+            for stint, (compound, length, degradation) in enumerate(plan, 1):
+                row = stints.loc[(driver, stint)]
+                assert row["compound"] == compound
+                assert row["laps"] == length
+                assert row["fuel_corrected_degradation"] == pytest.approx(degradation, abs=1e-6)
+                assert row["degradation_per_lap"] == pytest.approx(degradation - FUEL_SECONDS_PER_LAP, abs=1e-6)
+                assert row["base_lap_time"] == pytest.approx(base, abs=1e-6)
+
+    def test_fit_excludes_pit_first_and_slow_laps(self):
+        """進站圈、出站圈、第 1 圈與超過中位數 107% 的慢圈不計入擬合圈數"""
+        model = TireStintModel(_laps())
+        stints = model.stints.set_index(["Driver", "stint"])["fit_laps"]
+
+        # VER: 第 1 圈與第 12 圈 (進站) / 第 13 圈 (出站) 排除
+        assert stints[("VER", 1)] == 12 - 2
+        assert stints[("VER", 2)] == 18 - 1
+        # LEC 第二 stint 的第 15 圈為慢圈
+        assert stints[("LEC", 2)] == 10 - 2 - 1
+        fit = model.driver_laps("LEC").set_index("LapNumber")["is_fit_lap"]
+        assert not fit[15] and fit[14]
+
+        summary = model.compound_summary().set_index("compound")
+        assert summary.loc["HARD", "stints"] == 2
+        assert summary.loc["HARD", "fuel_corrected_degradation"] == pytest.approx(
+            (0.03 * 17 + 0.04 * 11) / (17 + 11), abs=1e-6)
+
+    def test_stints_derived_without_stint_column(self):
+        """沒有 Stint 欄位時，配方改變或圈齡歸零即為新 stint"""
+        derived = TireStintModel(_laps(with_stint=False)).stints
+        expected = TireStintModel(_laps()).stints
+
+        assert derived[["Driver", "stint", "compound", "start_lap", "end_lap"]].equals(
+            expected[["Driver", "stint", "compound", "start_lap", "end_lap"]])
+
+    def test_too_few_fit_laps_not_fitted(self):
+        """擬合圈數少於 MIN_FIT_LAPS 的 stint 沒有衰退率"""
+        laps = _laps()
+        laps = laps[laps["LapNumber"] <= MIN_FIT_LAPS]
+        stints = TireStintModel(laps).stints
+
+        assert stints["fuel_corrected_degradation"].isna().all()
+        assert (stints["fit_laps"] < MIN_FIT_LAPS).all()
+
+    def test_simulate_strategies_matches_brute_force(self):
+        """網格求解的每個配方組合最佳 stint 長度與總時間等於逐一列舉"""
+        params = {"SOFT": (90.0, 0.15), "MEDIUM": (90.3, 0.07), "HARD": (90.6, 0.03)}
+        total_laps, pit_loss, min_stint = 24, 20.0, 5
+        strategies = simulate_strategies(params, total_laps, pit_loss, max_stops=2, min_stint=min_stint)
+        expected = _brute_force(params, total_laps, pit_loss, 2, min_stint)
+
+        assert len(strategies) == len(expected)
+        for strategy in strategies:
+            total, lengths = expected[(strategy["stops"], tuple(strategy["compounds"]))]
+            assert strategy["total_time"] == pytest.approx(total, abs=1e-3)
+            assert sum(strategy["stint_lengths"]) == total_laps
+            assert min(strategy["stint_lengths"]) >= min_stint
+            assert strategy["pit_laps"] == list(np.cumsum(strategy["stint_lengths"])[:-1])
+            assert len(set(strategy["compounds"])) >= 2
+
+        totals = [strategy["total_time"] for strategy in strategies]
+        assert totals == sorted(totals)
+        assert strategies[0]["gap_to_best"] == 0
+        assert strategies[0]["total_time"] == pytest.approx(min(total for total, _ in expected.values()), abs=1e-3)
+
+    def test_simulate_strategies_race_too_short(self):
+        """比賽圈數不足兩個最短 stint 時沒有策略"""
+        assert simulate_strategies({"SOFT": (90.0, 0.1), "HARD": (90.5, 0.03)}, 8, 20.0) == []
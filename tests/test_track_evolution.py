@@ -0,0 +1,92 @@
+"""
+F1 賽道演化分析測試
+以已知賽道演化、輪胎衰退與燃油效應合成的全場圈速，檢查固定效應回歸能還原演化斜率
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# 確保模組路徑正確
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.lap_context import LapContext
+from modules.pitstop_table import build_pitstop_table
+from modules.tire_stint_model import FUEL_SECONDS_PER_LAP, TireStintModel
+from modules.track_evolution import fit_track_evolution
+
+TOTAL_LAPS = 50
+EVOLUTION = -0.02                              # 秒 / session 分鐘
+DEGRADATION = {"MEDIUM": 0.08, "HARD": 0.03}   # 秒 / 圈齡
+HARD_OFFSET = 0.4
+# 車手 → (基準圈速, 進站圈)
+DRIVERS = {"VER": (90.0, 14), "LEC": (90.3, 20), "NOR": (90.5, 26), "HAM": (90.8, 32)}
+
+
+def _laps(seed=0):
+    """每位車手一次 MEDIUM → HARD 進站；圈速 = 基準 + 燃油 + 演化 + 輪胎衰退 + 配方差 + 雜訊"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for driver, (base, stop) in DRIVERS.items():
+        start = 0.0
+        for lap in range(1, TOTAL_LAPS + 1):
+            compound = "MEDIUM" if lap <= stop else "HARD"
+            age = lap if lap <= stop else lap - stop
+            seconds = (base + FUEL_SECONDS_PER_LAP * (TOTAL_LAPS - lap) + EVOLUTION * start / 60.0
+                       + DEGRADATION[compound] * age + (HARD_OFFSET if compound == "HARD" else 0.0)
+                       + rng.normal(0.0, 0.02))
+            rows.append({
+                "Driver": driver, "LapNumber": lap, "Compound": compound, "TyreLife": float(age),
+                "Stint": 1 if lap <= stop else 2,
+                "LapStartTime": pd.Timedelta(seconds=start), "Time": pd.Timedelta(seconds=start + seconds),
+                "LapTime": pd.Timedelta(seconds=seconds),
+                "PitInTime": pd.Timedelta(seconds=start + seconds - 5.0) if lap == stop else pd.NaT,
+                "PitOutTime": pd.Timedelta(seconds=start + 20.0) if lap == stop + 1 else pd.NaT,
+            })
+            start += seconds
+    return pd.DataFrame(rows)
+
+
+def _context(laps):
+    return LapContext(laps, TireStintModel(laps), pitstops=build_pitstop_table(laps))
+
+
+class TestTrackEvolution:
+    """
+    賽道演化分析測試類別
+
+    測試範圍:
+    - 輪胎圈齡 × 配方與 session 時間同時估計，還原已知的演化斜率與各配方衰退
+    - 逐圈情境表不再預先扣除 stint 衰退擬合
+    - 有效圈數不足時返回 None
+    """
+
+    def test_recovers_known_evolution_slope(self):
+        """4 位車手 50 圈、各一次 MEDIUM → HARD 進站，演化 -0.02 s/min"""
+        evolution = fit_track_evolution(_context(_laps()))
+
+        assert evolution is not None
+        assert abs(evolution['seconds_per_minute'] - EVOLUTION) < 0.002
+        for compound, rate in DEGRADATION.items():
+            assert abs(evolution['tyre_degradation'][compound] - rate) < 0.005
+        assert 'session_minutes' in evolution['regressors']
+        assert evolution['total_evolution'] < 0
+        assert evolution['r_squared'] > 0.9
+        # 各車手時間斜率在扣除輪胎與配方效應後也接近真值
+        slopes = evolution['per_driver'].set_index('Driver')['seconds_per_minute']
+        assert sorted(slopes.index) == sorted(DRIVERS)
+        assert np.allclose(slopes.to_numpy(), EVOLUTION, atol=0.005)
+
+    def test_lap_context_keeps_tyre_effect_in_lap_times(self):
+        """情境表只有燃油修正圈速，沒有預先扣除的 stint 衰退"""
+        context = _context(_laps())
+
+        assert 'corrected_lap' not in context.laps.columns
+        assert 'fuel_corrected' in context.laps.columns
+
+    def test_too_few_laps(self):
+        """有效圈數少於下限時不做回歸"""
+        laps = _laps()
+        assert fit_track_evolution(_context(laps[laps['LapNumber'] <= 3])) is None
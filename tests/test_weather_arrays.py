@@ -0,0 +1,131 @@
+"""
+F1 天氣數據陣列測試
+以合成的天氣樣本檢查 run-length 降雨時段、逐圈天氣對齊與每場賽事的快取
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# 確保模組路徑正確
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import weather_arrays
+from modules.weather_arrays import (WeatherArrays, get_lap_weather, rain_mask, rain_period_bounds,
+                                    run_length_periods, weather_for_laps)
+
+SAMPLE_SECONDS = 60.0
+# 每分鐘一筆；第 3-5 筆與第 9 筆起 (持續到最後) 降雨
+RAINFALL = [False, False, False, True, True, True, False, False, False, True, True]
+LAP_TIME = 150.0
+
+
+def _weather(shuffle=False):
+    n = len(RAINFALL)
+    frame = pd.DataFrame({
+        "Time": pd.to_timedelta(np.arange(n) * SAMPLE_SECONDS, unit="s"),
+        "AirTemp": 20.0 + np.arange(n),
+        "TrackTemp": 30.0 + np.arange(n),
+        "Humidity": np.full(n, 70.0),
+        "Rainfall": RAINFALL,
+    })
+    return frame.sample(frac=1.0, random_state=1) if shuffle else frame
+
+
+def _laps():
+    """單一車手 4 圈，每圈 150 秒"""
+    starts = np.arange(4) * LAP_TIME
+    return pd.DataFrame({
+        "Driver": "VER", "LapNumber": np.arange(1, 5),
+        "LapStartTime": pd.to_timedelta(starts, unit="s"),
+        "Time": pd.to_timedelta(starts + LAP_TIME, unit="s"),
+        "LapTime": pd.to_timedelta(np.full(4, LAP_TIME), unit="s"),
+    })
+
+
+def _loop_periods(mask):
+    """逐筆迴圈的參考實作"""
+    periods, start = [], None
+    for i, value in enumerate(mask):
+        if value and start is None:
+            start = i
+        elif not value and start is not None:
+            periods.append((start, i))
+            start = None
+    if start is not None:
+        periods.append((start, len(mask)))
+    return periods
+
+
+class TestWeatherArrays:
+    """
+    天氣數據陣列測試類別
+
+    測試範圍:
+    - run-length 降雨區段與逐筆迴圈結果相同
+    - 降雨時段的開始/結束時間 (結束於下一筆無雨樣本，持續到最後則為最後一筆)
+    - 降雨欄位的 NaN / 數值 / 布林轉換
+    - 逐圈天氣對齊: 圈起點樣本與圈內降雨
+    - 同一份數據只建立一次，子集取用快取結果
+    """
+
+    def test_run_length_matches_loop(self):
+        """隨機遮罩 (含首尾降雨與空陣列) 的區段與逐筆迴圈相同"""
+        rng = np.random.default_rng(0)
+        masks = [rng.random(50) > 0.6 for _ in range(20)] + [np.ones(5, bool), np.zeros(5, bool), np.zeros(0, bool)]
+        for mask in masks:
+            starts, ends = run_length_periods(mask)
+            assert list(zip(starts.tolist(), ends.tolist())) == _loop_periods(mask)
+
+    def test_rain_period_bounds(self):
+        """時段起於第一筆降雨樣本，止於下一筆無雨樣本；持續到最後以最後一筆結束"""
+        times = np.arange(len(RAINFALL)) * SAMPLE_SECONDS
+        periods, rain_times = rain_period_bounds(times, RAINFALL)
+
+        assert periods == [(180.0, 360.0), (540.0, 600.0)]
+        assert rain_times == [180.0, 240.0, 300.0, 540.0, 600.0]
+        assert rain_period_bounds([], []) == ([], [])
+
+    def test_rain_mask_conversion(self):
+        """NaN、0 與 False 視為無雨"""
+        assert rain_mask([True, False, np.nan, 0, 1, 0.2]).tolist() == [True, False, False, False, True, True]
+
+    def test_arrays_sorted_and_periods(self):
+        """未排序的天氣數據依時間排序後計算降雨時段與區間降雨樣本數"""
+        arrays = WeatherArrays(_weather(shuffle=True))
+
+        assert arrays.size == len(RAINFALL)
+        assert np.all(np.diff(arrays.time_s) > 0)
+        assert arrays.rain_period_indices() == [(3, 6), (9, 11)]
+        assert arrays.rain_periods() == [(180.0, 360.0), (540.0, 600.0)]
+        assert arrays.rain_samples_between([0.0, 200.0], [120.0, 550.0]).tolist() == [0, 3]
+
+        empty = WeatherArrays(None)
+        assert empty.empty and empty.rain_periods() == []
+
+    def test_align_laps(self):
+        """天氣欄位取圈起點之前最近的樣本；圈內有任一降雨樣本即為降雨圈"""
+        aligned = WeatherArrays(_weather()).align_laps(_laps())
+
+        # 圈起點 0 / 150 / 300 / 450 秒 → 樣本 0 / 2 / 5 / 7
+        assert aligned["weather_air_temp"].tolist() == [20.0, 22.0, 25.0, 27.0]
+        assert aligned["weather_track_temp"].tolist() == [30.0, 32.0, 35.0, 37.0]
+        assert np.isnan(aligned["weather_wind_speed"]).all()
+        # 第 2 圈 (150-300 秒) 於 180 秒開始下雨；第 4 圈 (450-600 秒) 於 540 秒再次下雨
+        assert aligned["weather_rainfall"].tolist() == [False, True, True, True]
+        assert set(weather_arrays.LAP_WEATHER_COLUMNS).issubset(aligned.columns)
+
+    def test_lap_weather_cached_per_session(self):
+        """同一份 weather_data / laps 只建立一次；子集直接取用快取結果"""
+        weather_arrays.clear_cache()
+        source = {"weather_data": _weather(), "laps": _laps()}
+
+        lap_weather = get_lap_weather(source)
+        assert get_lap_weather(source) is lap_weather
+        subset = weather_for_laps(source["laps"].iloc[[1, 3]], source)
+        assert subset["weather_rainfall"].tolist() == [True, True]
+        assert subset.index.tolist() == [1, 3]
+        assert get_lap_weather({"laps": None}) is None
+        weather_arrays.clear_cache()